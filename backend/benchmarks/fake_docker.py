@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Stand-in for the `docker` CLI, covering exactly the commands MCDock runs.
+
+Containers are files in $FAKE_DOCKER_STATE named after their instance (the
+compose template names the container after the instance, and the compose
+project directory is MC_ROOT/servers/<instance>). Streams are synthetic:
+
+    FAKE_DOCKER_LOG_LINES / FAKE_DOCKER_LOG_RATE      `compose logs -f`
+    FAKE_DOCKER_STATS_LINES / FAKE_DOCKER_STATS_RATE  `stats <id>`
+
+A rate of 0 means "as fast as possible"; streams end after their line count.
+"""
+import json
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+STATE = Path(os.environ.get("FAKE_DOCKER_STATE", "/tmp/fake-docker"))
+
+RCON = {
+    "list": "There are 0 of a max of 20 players online: ",
+    "save-all": "Saving the game (this may take a moment!)Saved the game",
+    "save-off": "Automatic saving is now disabled",
+    "save-on": "Automatic saving is now enabled",
+}
+
+
+def _running() -> list[str]:
+    return sorted(p.name for p in STATE.iterdir()) if STATE.exists() else []
+
+
+def _stats_line(name: str) -> str:
+    return json.dumps({
+        "Name": name,
+        "CPUPerc": f"{random.uniform(0, 400):.2f}%",
+        "MemUsage": f"{random.uniform(500, 4000):.1f}MiB / 15.5GiB",
+        "MemPerc": "10.00%",
+        "NetIO": "1.2MB / 3.4MB",
+        "BlockIO": "0B / 0B",
+        "PIDs": "42",
+    })
+
+
+def _stream(lines: int, rate: float, make) -> None:
+    delay = 1 / rate if rate > 0 else 0
+    out = sys.stdout
+    for i in range(lines):
+        out.write(make(i) + "\n")
+        if delay:
+            out.flush()
+            time.sleep(delay)
+    out.flush()
+
+
+def _env(name: str, default: float) -> float:
+    return float(os.environ.get(name, default))
+
+
+def compose(args: list[str]) -> int:
+    project = Path.cwd().name
+    sub = args[0] if args else ""
+    if sub == "ps":
+        if (STATE / project).exists():
+            print(project)                               # the container "id"
+    elif sub == "up":
+        STATE.mkdir(parents=True, exist_ok=True)
+        (STATE / project).touch()
+        print(f" Container {project}  Started", file=sys.stderr)
+    elif sub == "down":
+        (STATE / project).unlink(missing_ok=True)
+        print(f" Container {project}  Removed", file=sys.stderr)
+    elif sub == "logs":
+        _stream(
+            int(_env("FAKE_DOCKER_LOG_LINES", 1000)),
+            _env("FAKE_DOCKER_LOG_RATE", 0),
+            # sequence number and send time let the load generator spot drops and latency
+            lambda i: f"{project}  | [12:00:00] [Server thread/INFO]: line {i} t={time.time():.6f}",
+        )
+    return 0
+
+
+def main(argv: list[str]) -> int:
+    if not argv:
+        return 0
+    cmd, args = argv[0], argv[1:]
+    if cmd == "compose":
+        return compose(args)
+    if cmd == "ps":
+        print("\n".join(_running()))
+    elif cmd == "exec":                                   # exec <name> rcon-cli <command>
+        name, command = args[0], " ".join(args[2:])
+        if not (STATE / name).exists():
+            print(f"Error response from daemon: container {name} is not running", file=sys.stderr)
+            return 1
+        print(RCON.get(command.split(" ", 1)[0], ""))
+    elif cmd == "stats":
+        if "--no-stream" in args:
+            print("\n".join(_stats_line(n) for n in _running()))
+        else:
+            _stream(
+                int(_env("FAKE_DOCKER_STATS_LINES", 100)),
+                _env("FAKE_DOCKER_STATS_RATE", 0),
+                lambda i: _stats_line(args[0]),
+            )
+    return 0                                              # logs --since, inspect, ...: nothing
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
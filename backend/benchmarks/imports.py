@@ -0,0 +1,144 @@
+"""
+Cold-start report: what importing the app costs, and how long a worker
+takes from importing it to answering its first request.
+
+    python -m benchmarks.imports                              # report + JSON on stdout
+    python -m benchmarks.imports --top 30 --out boot.json
+    python -m benchmarks.imports --out new.json --compare boot.json
+
+Every measurement is a fresh interpreter (that is what a gunicorn worker
+is), against the same throw-away MC_ROOT and fake docker as benchmarks.run:
+
+* `import`  – wall time of `python -c "import mcdock.main"`;
+* `boot`    – import, lifespan startup and a first GET /api/health;
+* `-X importtime` of the import, summed per top-level package, printed as
+  a table on stderr.
+
+Modules in LAZY are loaded on first use by design; finding one of them
+after `import mcdock.main` exits 1, like a regression beyond --threshold
+does with --compare.
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from .sandbox import TMP as _TMP, meta                          # before mcdock: sets MC_ROOT
+
+from . import synthetic                                         # noqa: E402
+from .run import compare, _stats                                # noqa: E402
+
+BACKEND = Path(__file__).resolve().parent.parent
+LAZY = ("apscheduler", "sqlalchemy", "jinja2", "jose.jwt", "uvicorn")
+
+_LOADED = "import sys, mcdock.main; print(' '.join(sorted(sys.modules)))"
+_BOOT = """
+import time
+from fastapi.testclient import TestClient
+started = time.perf_counter()
+from mcdock.main import app
+with TestClient(app) as client:
+    assert client.get("/api/health").status_code == 200
+    print(time.perf_counter() - started)
+"""
+
+
+def _python(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args], cwd=BACKEND, capture_output=True, text=True, check=True,
+    )
+
+
+# ───────────────────────────── measurements ────────────────────────
+def importtime() -> dict[str, tuple[int, int]]:
+    """-X importtime of mcdock.main: top-level package -> (self µs, modules)."""
+    packages: dict[str, list[int]] = defaultdict(lambda: [0, 0])
+    for line in _python("-X", "importtime", "-c", "import mcdock.main").stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line.removeprefix("import time:").split("|")
+        package = packages[name.strip().split(".")[0]]
+        package[0] += int(self_us)
+        package[1] += 1
+    return {name: (us, n) for name, (us, n) in packages.items()}
+
+
+def lazy_loaded() -> list[str]:
+    """Members of LAZY that `import mcdock.main` loaded anyway."""
+    loaded = set(_python("-c", _LOADED).stdout.split())
+    return [m for m in LAZY if m in loaded]
+
+
+def bench_import(repeat: int) -> list[dict]:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        _python("-c", "import mcdock.main")
+        samples.append(time.perf_counter() - started)
+    stats = _stats(samples)
+    return [{"bench": "import", "params": {}, "unit": "s", "value": stats["median"],
+             "higher_is_better": False, "stats": stats}]
+
+
+def bench_boot(repeat: int) -> list[dict]:
+    samples = [float(_python("-c", _BOOT).stdout.split()[-1]) for _ in range(repeat)]
+    stats = _stats(samples)
+    return [{"bench": "boot", "params": {}, "unit": "s", "value": stats["median"],
+             "higher_is_better": False, "stats": stats}]
+
+
+# ───────────────────────────── reporting ───────────────────────────
+def print_table(packages: dict[str, tuple[int, int]], top: int) -> None:
+    total = sum(us for us, _ in packages.values())
+    print(f"{'package':30} {'ms':>9} {'share':>7} {'modules':>8}", file=sys.stderr)
+    for name, (us, n) in sorted(packages.items(), key=lambda kv: -kv[1][0])[:top]:
+        print(f"{name:30} {us / 1000:9.1f} {us / total:7.1%} {n:8}", file=sys.stderr)
+    print(f"{'total':30} {total / 1000:9.1f}", file=sys.stderr)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=15, help="packages to list in the importtime table")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--out", type=Path, help="write results here instead of stdout")
+    parser.add_argument("--compare", type=Path, help="previous results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="regression threshold (0.10 = 10%%)")
+    args = parser.parse_args(argv)
+
+    synthetic.install_fake_docker(_TMP / "bin", _TMP / "containers")
+    try:
+        packages = importtime()
+        eager = lazy_loaded()
+        results = bench_import(args.repeat) + bench_boot(args.repeat)
+    finally:
+        shutil.rmtree(_TMP, ignore_errors=True)
+
+    print_table(packages, args.top)
+    results.append({
+        "bench": "importtime", "params": {}, "unit": "s",
+        "value": sum(us for us, _ in packages.values()) / 1e6, "higher_is_better": False,
+        "stats": {"packages": {name: us for name, (us, _) in packages.items()}},
+    })
+    report = json.dumps({"meta": meta(), "results": results}, indent=2)
+    if args.out:
+        args.out.write_text(report + "\n")
+    else:
+        print(report)
+
+    status = 0
+    if eager:
+        print(f"loaded at import but meant to be lazy: {', '.join(eager)}", file=sys.stderr)
+        status = 1
+    if args.compare and compare(results, json.loads(args.compare.read_text())["results"], args.threshold):
+        status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
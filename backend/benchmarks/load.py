@@ -0,0 +1,286 @@
+"""
+End-to-end load generator: one real panel, many simulated servers and viewers.
+
+    python -m benchmarks.load --instances 20 --log-viewers 100 --stats-viewers 50 \\
+        --pollers 10 --duration 60 --out load.json
+
+Starts the panel under gunicorn (GUNICORN workers, fake docker on its PATH,
+synthetic MC_ROOT), logs in, then for --duration seconds:
+
+* every log viewer opens /api/instances/{name}/logs; each viewer's `docker
+  compose logs -f` emits --log-rate lines/s carrying a sequence number and
+  send time, so delivery latency and dropped lines are exact;
+* every stats viewer opens /api/instances/{name}/stats, fed --stats-rate
+  samples/s; missing frames are counted as dropped;
+* every REST poller GETs /api/instances/ every --poll-interval seconds;
+
+while the CPU and RSS of each panel worker are sampled from /proc. The JSON
+report goes to --out (or stdout).
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import secrets
+import shutil
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from .sandbox import TMP as _TMP, meta                          # before mcdock: sets MC_ROOT
+
+import bcrypt                                                  # noqa: E402
+import websockets                                              # noqa: E402
+
+from . import synthetic                                        # noqa: E402
+
+BACKEND = Path(__file__).resolve().parent.parent
+_STAMP = re.compile(r"line (\d+) t=([\d.]+)")
+
+
+def _percentiles(values: list[float]) -> dict:
+    if not values:
+        return {"n": 0}
+    ordered = sorted(values)
+    p50, p95, p99 = (ordered[min(len(ordered) - 1, int(q * len(ordered)))] for q in (0.5, 0.95, 0.99))
+    return {"n": len(ordered), "p50": p50, "p95": p95, "p99": p99, "max": ordered[-1]}
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+# ───────────────────────────── panel ───────────────────────────────
+class Panel:
+    """The panel under test, in its own gunicorn process tree."""
+
+    def __init__(self, workers: int, env: dict[str, str]):
+        self.port = _free_port()
+        self.log = open(_TMP / "panel.log", "wb")
+        self.proc = subprocess.Popen(
+            [
+                sys.executable, "-m", "gunicorn", "mcdock.main:app",
+                "-c", "gunicorn_conf.py",
+                "--bind", f"127.0.0.1:{self.port}",
+                "--workers", str(workers),
+            ],
+            cwd=BACKEND, env=env, stdout=self.log, stderr=subprocess.STDOUT,
+        )
+
+    @property
+    def base(self) -> str:
+        return f"127.0.0.1:{self.port}"
+
+    def workers(self) -> list[int]:
+        pids = []
+        for stat in Path("/proc").glob("[0-9]*/stat"):
+            try:
+                fields = stat.read_text().rsplit(")", 1)[1].split()
+            except OSError:
+                continue
+            if int(fields[1]) == self.proc.pid:                # ppid
+                pids.append(int(stat.parent.name))
+        return sorted(pids)
+
+    async def wait_ready(self, timeout: float = 30) -> None:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.proc.poll() is not None:
+                raise RuntimeError("panel exited during startup")
+            try:
+                status, _ = await http(self.base, "GET", "/api/health")
+                if status == 200:
+                    return
+            except OSError:
+                pass
+            await asyncio.sleep(0.2)
+        raise TimeoutError("panel did not become ready")
+
+    def stop(self) -> None:
+        self.proc.terminate()
+        try:
+            self.proc.wait(15)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+        self.log.close()
+
+
+async def http(base: str, method: str, path: str, *, token: str | None = None, body: dict | None = None):
+    """Minimal HTTP/1.1 request (no client dependency beyond the stdlib)."""
+    host, port = base.split(":")
+    reader, writer = await asyncio.open_connection(host, int(port))
+    payload = json.dumps(body).encode() if body is not None else b""
+    headers = [f"{method} {path} HTTP/1.1", f"Host: {base}", "Connection: close",
+               f"Content-Length: {len(payload)}"]
+    if body is not None:
+        headers.append("Content-Type: application/json")
+    if token:
+        headers.append(f"Authorization: Bearer {token}")
+    writer.write(("\r\n".join(headers) + "\r\n\r\n").encode() + payload)
+    await writer.drain()
+    raw = await reader.read()
+    writer.close()
+    head, _, content = raw.partition(b"\r\n\r\n")
+    return int(head.split(b" ", 2)[1]), content
+
+
+# ───────────────────────────── clients ─────────────────────────────
+async def log_viewer(base: str, token: str, instance: str, expected: int, report: dict) -> None:
+    seen: set[int] = set()
+    try:
+        async with websockets.connect(
+            f"ws://{base}/api/instances/{instance}/logs?token={token}", max_size=None
+        ) as ws:
+            async for frame in ws:
+                now = time.time()
+                if m := _STAMP.search(frame):
+                    seen.add(int(m.group(1)))
+                    report["latency"].append(now - float(m.group(2)))
+    except (OSError, websockets.WebSocketException) as e:
+        report["errors"].append(f"{type(e).__name__}: {e}")
+    report["frames"] += len(seen)
+    report["dropped"] += expected - len(seen)
+
+
+async def stats_viewer(base: str, token: str, instance: str, expected: int, report: dict) -> None:
+    frames = 0
+    try:
+        async with websockets.connect(
+            f"ws://{base}/api/instances/{instance}/stats?token={token}", max_size=None
+        ) as ws:
+            async for _ in ws:
+                frames += 1
+    except (OSError, websockets.WebSocketException) as e:
+        report["errors"].append(f"{type(e).__name__}: {e}")
+    report["frames"] += frames
+    report["dropped"] += max(0, expected - frames)
+
+
+async def poller(base: str, token: str, interval: float, until: float, report: dict) -> None:
+    while time.monotonic() < until:
+        started = time.perf_counter()
+        try:
+            status, _ = await http(base, "GET", "/api/instances/", token=token)
+        except OSError as e:
+            status = type(e).__name__
+        report["latency"].append(time.perf_counter() - started)
+        report["status"][str(status)] = report["status"].get(str(status), 0) + 1
+        await asyncio.sleep(max(0.0, interval - (time.perf_counter() - started)))
+
+
+async def sample_workers(panel: Panel, until: float, report: dict) -> None:
+    """CPU% (of one core) and RSS of every worker, once a second."""
+    tick = os.sysconf("SC_CLK_TCK")
+    last: dict[int, tuple[float, int]] = {}
+    while time.monotonic() < until:
+        now = time.monotonic()
+        for pid in panel.workers():
+            try:
+                fields = Path(f"/proc/{pid}/stat").read_text().rsplit(")", 1)[1].split()
+                status = Path(f"/proc/{pid}/status").read_text()
+            except OSError:
+                continue
+            cpu = int(fields[11]) + int(fields[12])           # utime + stime
+            rss = int(re.search(r"VmRSS:\s+(\d+)", status).group(1)) * 1024
+            w = report.setdefault(str(pid), {"cpu": [], "rss": []})
+            if pid in last:
+                t0, c0 = last[pid]
+                w["cpu"].append(100 * (cpu - c0) / tick / (now - t0))
+            w["rss"].append(rss)
+            last[pid] = (now, cpu)
+        await asyncio.sleep(1)
+
+
+# ───────────────────────────── driver ──────────────────────────────
+async def drive(args, panel: Panel, names: list[str], password: str) -> dict:
+    await panel.wait_ready()
+    status, body = await http(panel.base, "POST", "/api/auth/login",
+                              body={"username": os.environ["PANEL_USER"], "password": password})
+    if status != 200:
+        raise RuntimeError(f"login failed: {status} {body[:200]!r}")
+    token = json.loads(body)["token"]
+
+    until = time.monotonic() + args.duration
+    logs = {"frames": 0, "dropped": 0, "latency": [], "errors": []}
+    stats = {"frames": 0, "dropped": 0, "errors": []}
+    rest = {"latency": [], "status": {}}
+    workers: dict = {}
+
+    tasks = [asyncio.create_task(sample_workers(panel, until + 2, workers))]
+    for i in range(args.log_viewers):
+        tasks.append(asyncio.create_task(log_viewer(
+            panel.base, token, names[i % len(names)], int(args.log_rate * args.duration), logs)))
+    for i in range(args.stats_viewers):
+        tasks.append(asyncio.create_task(stats_viewer(
+            panel.base, token, names[i % len(names)], int(args.stats_rate * args.duration), stats)))
+    for _ in range(args.pollers):
+        tasks.append(asyncio.create_task(poller(panel.base, token, args.poll_interval, until, rest)))
+    await asyncio.gather(*tasks)
+
+    return {
+        "logs": {**logs, "latency": _percentiles(logs["latency"]), "errors": logs["errors"][:20]},
+        "stats": {**stats, "errors": stats["errors"][:20]},
+        "rest": {"latency": _percentiles(rest["latency"]), "status": rest["status"]},
+        "workers": {
+            pid: {
+                "cpu_avg_percent": sum(w["cpu"]) / len(w["cpu"]) if w["cpu"] else None,
+                "cpu_max_percent": max(w["cpu"], default=None),
+                "rss_max_mib": max(w["rss"]) / 2**20,
+            }
+            for pid, w in workers.items()
+        },
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--instances", type=int, default=10, help="simulated running servers")
+    parser.add_argument("--log-viewers", type=int, default=20)
+    parser.add_argument("--log-rate", type=float, default=20, help="console lines/s per log stream")
+    parser.add_argument("--stats-viewers", type=int, default=10)
+    parser.add_argument("--stats-rate", type=float, default=1, help="samples/s per stats stream")
+    parser.add_argument("--pollers", type=int, default=5, help="REST clients polling /api/instances")
+    parser.add_argument("--poll-interval", type=float, default=5)
+    parser.add_argument("--duration", type=float, default=30, help="seconds")
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn workers")
+    parser.add_argument("--out", type=Path)
+    args = parser.parse_args(argv)
+
+    password = secrets.token_urlsafe(12)
+    synthetic.install_fake_docker(_TMP / "bin", _TMP / "containers")
+    names = synthetic.build_tree(Path(os.environ["MC_ROOT"]), args.instances, running=args.instances)
+    env = {
+        **os.environ,
+        "PANEL_PASSWORD_HASH": bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode(),
+        "FAKE_DOCKER_LOG_LINES": str(int(args.log_rate * args.duration)),
+        "FAKE_DOCKER_LOG_RATE": str(args.log_rate),
+        "FAKE_DOCKER_STATS_LINES": str(int(args.stats_rate * args.duration)),
+        "FAKE_DOCKER_STATS_RATE": str(args.stats_rate),
+    }
+
+    panel = Panel(args.workers, env)
+    try:
+        result = asyncio.run(drive(args, panel, names, password))
+    except BaseException:
+        panel.stop()
+        sys.stderr.write((_TMP / "panel.log").read_text(errors="replace")[-4000:])
+        raise
+    finally:
+        panel.stop()
+        shutil.rmtree(_TMP, ignore_errors=True)
+
+    report = json.dumps({"meta": meta(), "config": vars(args) | {"out": None}, **result}, indent=2)
+    if args.out:
+        args.out.write_text(report + "\n")
+    else:
+        print(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,227 @@
+"""
+MCDock benchmark suite.
+
+    python -m benchmarks.run                                  # everything, default sizes
+    python -m benchmarks.run --only list,ports --instances 10,100,1000
+    python -m benchmarks.run --out bench.json --compare previous.json
+
+Runs from backend/ against a throw-away MC_ROOT and the fake docker CLI in
+this directory, never against the real daemon. The JSON written to --out
+(or stdout) has one record per benchmark and parameter set:
+
+    {"bench": "list_instances", "params": {"instances": 100}, "unit": "s",
+     "value": <median>, "higher_is_better": false, "stats": {...}}
+
+so two runs can be diffed with --compare (or any JSON tool).
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from .sandbox import TMP as _TMP, meta                          # before mcdock: sets MC_ROOT
+
+os.environ.setdefault("FAKE_DOCKER_LOG_LINES", "5000")
+
+from fastapi import FastAPI                                    # noqa: E402
+from fastapi.testclient import TestClient                      # noqa: E402
+
+from mcdock.core.models import PortBinding                     # noqa: E402
+from mcdock.routers import instances                           # noqa: E402
+from mcdock.routers.security import require_user               # noqa: E402
+from mcdock.services.backup_service import BackupService       # noqa: E402
+from mcdock.services.docker_service import DockerService       # noqa: E402
+
+from . import fake_docker, synthetic                           # noqa: E402
+
+
+# ───────────────────────────── helpers ─────────────────────────────
+def _stats(samples: list[float]) -> dict:
+    ordered = sorted(samples)
+    return {
+        "n": len(ordered),
+        "min": ordered[0],
+        "median": statistics.median(ordered),
+        "p95": ordered[min(len(ordered) - 1, round(0.95 * (len(ordered) - 1)))],
+        "mean": statistics.fmean(ordered),
+    }
+
+
+def _time(fn, repeat: int) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def _latency(bench: str, params: dict, samples: list[float]) -> dict:
+    stats = _stats(samples)
+    return {"bench": bench, "params": params, "unit": "s",
+            "value": stats["median"], "higher_is_better": False, "stats": stats}
+
+
+def _throughput(bench: str, params: dict, unit: str, work: float, samples: list[float]) -> dict:
+    stats = _stats(samples)
+    return {"bench": bench, "params": params, "unit": unit,
+            "value": work / stats["median"], "higher_is_better": True, "stats": stats}
+
+
+def _root(label: str) -> Path:
+    root = _TMP / label
+    shutil.rmtree(root, ignore_errors=True)
+    return root
+
+
+# ───────────────────────────── benchmarks ──────────────────────────
+def bench_list(sizes: list[int], repeat: int) -> list[dict]:
+    """GET /instances (registry + sleep table + cached pings) vs instance count."""
+    app = FastAPI()
+    app.include_router(instances.router)
+    app.dependency_overrides[require_user] = lambda: None
+    out = []
+    with TestClient(app) as client:
+        for n in sizes:
+            synthetic.build_tree(_root(f"list-{n}"), n, running=n // 4)
+            client.get("/instances/").raise_for_status()       # warm the ping cache
+            samples = _time(lambda: client.get("/instances/").raise_for_status(), repeat)
+            out.append(_latency("list_instances", {"instances": n}, samples))
+    return out
+
+
+def bench_ports(sizes: list[int], repeat: int) -> list[dict]:
+    """DockerService._check_ports for a new instance vs instance count."""
+    out = []
+    for n in sizes:
+        synthetic.build_tree(_root(f"ports-{n}"), n)
+        new = [PortBinding(host_port=20000, container_port=25565)]
+        samples = _time(lambda: DockerService._check_ports(new), repeat)
+        out.append(_latency("check_ports", {"instances": n}, samples))
+    return out
+
+
+def bench_backup(sizes: list[float], repeat: int) -> list[dict]:
+    """trigger_backup (stopped instance) and archive extraction vs world size."""
+    out = []
+    for mib in sizes:
+        [name] = synthetic.build_tree(_root(f"backup-{mib}"), 1, world_mib=mib)
+        samples = _time(lambda: asyncio.run(BackupService.trigger_backup(name)), repeat)
+        out.append(_throughput("backup", {"world_mib": mib}, "MiB/s", mib, samples))
+
+        archive = next((BackupService.backups_root / name).rglob("*.tar.gz"))
+        inst_dir = DockerService.root / name
+        samples = _time(lambda: BackupService._extract_archive(archive, inst_dir), repeat)
+        out.append(_throughput("restore_extract", {"world_mib": mib}, "MiB/s", mib, samples))
+    return out
+
+
+def bench_logs(sizes: list[int], repeat: int) -> list[dict]:
+    """Console lines/s delivered to N concurrent log viewers (one stream each)."""
+    lines = int(os.environ["FAKE_DOCKER_LOG_LINES"])
+    [name] = synthetic.build_tree(_root("logs"), 1, running=1)
+
+    async def _viewer() -> int:
+        proc = await DockerService.stream_logs(name)
+        count = 0
+        while raw := await proc.stdout.readline():
+            raw.decode(errors="ignore")                        # what the websocket does
+            count += 1
+        await proc.wait()
+        return count
+
+    async def _fan_out(viewers: int) -> None:
+        counts = await asyncio.gather(*(_viewer() for _ in range(viewers)))
+        assert all(c == lines for c in counts), counts
+
+    out = []
+    for viewers in sizes:
+        samples = _time(lambda: asyncio.run(_fan_out(viewers)), repeat)
+        out.append(_throughput("log_fanout", {"viewers": viewers}, "lines/s", viewers * lines, samples))
+    return out
+
+
+def bench_stats(lines: int, repeat: int) -> list[dict]:
+    """DockerService.parse_stats over `docker stats` JSON lines."""
+    data = [fake_docker._stats_line(f"bench-{i % 50:04d}") for i in range(lines)]
+    samples = _time(lambda: [DockerService.parse_stats(l) for l in data], repeat)
+    return [_throughput("stats_parse", {"lines": lines}, "lines/s", lines, samples)]
+
+
+# ───────────────────────────── reporting ───────────────────────────
+def _key(record: dict) -> str:
+    return record["bench"] + json.dumps(record["params"], sort_keys=True)
+
+
+def compare(current: list[dict], previous: list[dict], threshold: float) -> int:
+    """Print the change of every benchmark present in both runs; count regressions."""
+    before = {_key(r): r for r in previous}
+    regressions = 0
+    for r in current:
+        old = before.get(_key(r))
+        if old is None or not old["value"]:
+            continue
+        change = r["value"] / old["value"] - 1
+        worse = -change if r["higher_is_better"] else change
+        flag = "REGRESSION" if worse > threshold else ""
+        regressions += bool(flag)
+        print(f"{_key(r):50} {old['value']:>12.4g} -> {r['value']:>12.4g} {r['unit']:8}"
+              f" {change:+7.1%} {flag}", file=sys.stderr)
+    return regressions
+
+
+def _sizes(text: str, kind=int) -> list:
+    return [kind(x) for x in text.split(",") if x]
+
+
+BENCHES = ("list", "ports", "backup", "logs", "stats")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", default=",".join(BENCHES), help=f"subset of {','.join(BENCHES)}")
+    parser.add_argument("--instances", default="10,100,500", help="instance counts for list/ports")
+    parser.add_argument("--world-mib", default="16,64", help="world sizes for backup/restore")
+    parser.add_argument("--viewers", default="1,10,50", help="concurrent log viewers")
+    parser.add_argument("--stats-lines", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--out", type=Path, help="write results here instead of stdout")
+    parser.add_argument("--compare", type=Path, help="previous results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="regression threshold (0.10 = 10%%)")
+    args = parser.parse_args(argv)
+
+    synthetic.install_fake_docker(_TMP / "bin", _TMP / "containers")
+    only = set(args.only.split(","))
+    results: list[dict] = []
+    try:
+        if "list" in only:
+            results += bench_list(_sizes(args.instances), args.repeat)
+        if "ports" in only:
+            results += bench_ports(_sizes(args.instances), args.repeat)
+        if "backup" in only:
+            results += bench_backup(_sizes(args.world_mib, float), args.repeat)
+        if "logs" in only:
+            results += bench_logs(_sizes(args.viewers), args.repeat)
+        if "stats" in only:
+            results += bench_stats(args.stats_lines, args.repeat)
+    finally:
+        shutil.rmtree(_TMP, ignore_errors=True)
+
+    report = json.dumps({"meta": meta(), "results": results}, indent=2)
+    if args.out:
+        args.out.write_text(report + "\n")
+    else:
+        print(report)
+
+    if args.compare:
+        return 1 if compare(results, json.loads(args.compare.read_text())["results"], args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,38 @@
+"""
+Throw-away MC_ROOT for benchmark processes.
+
+Settings are read when mcdock is imported, so entry points import this
+module first; it points MC_ROOT (and the required credentials, unless
+already set) at a fresh temporary directory.
+"""
+import os
+import platform
+import subprocess
+import tempfile
+from datetime import datetime, UTC
+from pathlib import Path
+
+TMP = Path(tempfile.mkdtemp(prefix="mcdock-bench-"))
+
+os.environ["MC_ROOT"] = str(TMP / "root")
+os.environ.setdefault("PANEL_USER", "bench")
+os.environ.setdefault("PANEL_PASSWORD_HASH", "")
+os.environ.setdefault("JWT_SECRET", "bench")
+(TMP / "root").mkdir()
+
+
+def meta() -> dict:
+    """Where and on what a run happened, for comparing results over time."""
+    try:
+        rev = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        rev = None
+    return {
+        "at": datetime.now(UTC).isoformat(),
+        "git": rev,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
@@ -0,0 +1,89 @@
+"""
+Synthetic MC_ROOT trees and a PATH with the fake `docker` on it.
+
+`point_at` re-targets the services at a fresh root the same way the test
+fixtures do, so one benchmark process can measure several tree sizes.
+"""
+import os
+import stat
+import sys
+from pathlib import Path
+
+from mcdock.core import db
+from mcdock.core.config import settings
+from mcdock.core.models import PortBinding
+from mcdock.services.backup_service import BackupService
+from mcdock.services.docker_service import DockerService
+from mcdock.services.locks import InstanceLocks
+from mcdock.services.models import Instance
+from mcdock.services.registry import InstanceRegistry
+from mcdock.templates.compose import compose_template
+
+FAKE_DOCKER = Path(__file__).with_name("fake_docker.py")
+
+PROPERTIES = "\n".join(
+    ["#Minecraft server properties", "motd=A Minecraft Server", "max-players=20"]
+    + [f"setting-{i}=value-{i}" for i in range(60)]
+) + "\n"
+
+
+def install_fake_docker(bin_dir: Path, state_dir: Path) -> None:
+    """Put a `docker` shim first on PATH, keeping its containers in *state_dir*."""
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    shim = bin_dir / "docker"
+    shim.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{FAKE_DOCKER}" "$@"\n')
+    shim.chmod(shim.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    os.environ["PATH"] = f"{bin_dir}{os.pathsep}{os.environ['PATH']}"
+    os.environ["FAKE_DOCKER_STATE"] = str(state_dir)
+
+
+def point_at(root: Path) -> None:
+    """Make every service use *root* as MC_ROOT."""
+    root.mkdir(parents=True, exist_ok=True)
+    settings.MC_ROOT = root
+    DockerService.mc_root = root
+    DockerService.root = root / "servers"
+    BackupService.root = root
+    BackupService.backups_root = root / "backups"
+    InstanceLocks.lock_root = root / "locks"
+    db.STATE_DB = root / "mcdock.sqlite"
+
+
+def write_world(data_dir: Path, size_mib: float, files: int = 32) -> None:
+    """Region-file-like content: incompressible, split over *files* files."""
+    region = data_dir / "world" / "region"
+    region.mkdir(parents=True, exist_ok=True)
+    per_file = int(size_mib * 2**20 / files)
+    for i in range(files):
+        (region / f"r.{i}.0.mca").write_bytes(os.urandom(per_file))
+
+
+def build_tree(root: Path, instances: int, *, running: int = 0, world_mib: float = 0) -> list[str]:
+    """
+    Create *instances* instances under *root* (the first *running* of them
+    marked running in the fake docker) and index them. Returns their names.
+    """
+    point_at(root)
+    names = [f"bench-{i:04d}" for i in range(instances)]
+    state = Path(os.environ["FAKE_DOCKER_STATE"])
+    state.mkdir(parents=True, exist_ok=True)
+    for p in state.iterdir():
+        p.unlink()
+
+    for i, name in enumerate(names):
+        inst_dir = DockerService.root / name
+        (inst_dir / "data").mkdir(parents=True)
+        instance = Instance(
+            name=name, image="itzg/minecraft-server", eula=True, memory="2G",
+            env=[], tags=["bench"] if i % 2 else [],
+            ports=[PortBinding(host_port=30000 + i, container_port=25565)],
+        )
+        (inst_dir / "docker-compose.yml").write_text(compose_template().render(**instance.model_dump()))
+        (inst_dir / "data" / "server.properties").write_text(PROPERTIES)
+        if world_mib:
+            write_world(inst_dir / "data", world_mib)
+        if i < running:
+            (state / name).touch()
+
+    InstanceRegistry.reconcile(set(names[:running]))
+    return names
@@ -1,6 +1,13 @@
-import uvicorn
+def __getattr__(name: str):
+    # `mcdock.app` builds the whole application; only do that when asked, so
+    # importing any submodule (or gunicorn loading mcdock.main) stays cheap
+    if name == "app":
+        from .main import app
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-from .main import app
 
 def dev():
-    uvicorn.run("mcdock.main:app", host="127.0.0.1", port=8000, reload=True)
\ No newline at end of file
+    import uvicorn
+
+    uvicorn.run("mcdock.main:app", host="127.0.0.1", port=8000, reload=True)
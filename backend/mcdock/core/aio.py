@@ -0,0 +1,20 @@
+"""
+Small asyncio helpers shared by the services.
+"""
+import asyncio
+import weakref
+
+# asyncio primitives bind to the loop that first uses them; keep one per loop
+# (gunicorn worker, or each test's `asyncio.run`).
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, asyncio.Semaphore]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def loop_semaphore(name: str, size: int) -> asyncio.Semaphore:
+    """Return the semaphore *name* of the running loop, creating it with *size* slots."""
+    per_loop = _semaphores.setdefault(asyncio.get_running_loop(), {})
+    sem = per_loop.get(name)
+    if sem is None:
+        sem = per_loop[name] = asyncio.Semaphore(size)
+    return sem
@@ -0,0 +1,105 @@
+"""
+Conditional GET for file-backed read endpoints.
+
+An endpoint whose answer is a pure function of a few files gets a validator
+from their stat data (inode, mtime, size) — `file_tag` — or, for a directory
+tree of archives, from the directories whose mtimes change when an entry is
+added or removed — `tree_tag`. Routers compare it with If-None-Match
+*before* reading anything (`not_modified`); services keep the parsed result
+in a `TagCache` under the same tag, so a changed file is simply a miss and
+their own writes `discard` the entry on top of that.
+
+Atomic replaces (tmp + rename) always change the inode, so MCDock's own
+writes produce a new tag even within one mtime tick.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Hashable
+
+from fastapi import Request, Response
+
+CACHE_CONTROL = "private, no-cache"          # browsers keep it, but always revalidate
+NOT_MODIFIED = {304: {"description": "Not modified"}}
+
+
+def _stat_parts(path: Path) -> str:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return "-"
+    return f"{st.st_ino:x}.{st.st_mtime_ns:x}.{st.st_size:x}"
+
+
+def _quote(parts: list[str]) -> str:
+    return '"' + hashlib.blake2b("|".join(parts).encode(), digest_size=10).hexdigest() + '"'
+
+
+def file_tag(*paths: Path) -> str:
+    """ETag of the content of *paths* (missing files included, as such)."""
+    return _quote([_stat_parts(p) for p in paths])
+
+
+def tree_tag(root: Path) -> str:
+    """ETag of the file names under *root* and its direct subdirectories."""
+    parts = [_stat_parts(root)]
+    try:
+        with os.scandir(root) as it:
+            for entry in sorted(it, key=lambda e: e.name):
+                if entry.is_dir(follow_symlinks=False):
+                    parts.append(f"{entry.name}:{_stat_parts(Path(entry.path))}")
+    except OSError:
+        pass
+    return _quote(parts)
+
+
+def not_modified(request: Request, response: Response, etag: str) -> Response | None:
+    """
+    Set the validator headers on *response*; return a ready 304 when the
+    client's If-None-Match already names *etag*.
+    """
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (
+        if_none_match.strip() == "*"
+        or etag in (t.strip().removeprefix("W/") for t in if_none_match.split(","))
+    ):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+
+class TagCache:
+    """Bounded LRU of parsed results, each valid only under the tag it was stored with."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self._lock = threading.Lock()                # filled from worker threads
+        self._entries: OrderedDict[Hashable, tuple[str, Any]] = OrderedDict()
+
+    def get(self, key: Hashable, tag: str) -> Any | None:
+        with self._lock:
+            hit = self._entries.get(key)
+            if hit is None or hit[0] != tag:
+                return None
+            self._entries.move_to_end(key)
+            return hit[1]
+
+    def put(self, key: Hashable, tag: str, value: Any) -> None:
+        if self.size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (tag, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def discard(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
@@ -27,10 +27,119 @@ class Settings(BaseSettings):
     JWT_SECRET: str = Field(validation_alias="JWT_SECRET")
     HASH_ALGO: str = "HS256"
     JWT_TTL: timedelta = timedelta(hours=8)
+    AUTH_CACHE_SIZE: int = 1024             # verified tokens remembered per worker
+    AUTH_REVOCATION_REFRESH: float = 1.0    # seconds before other workers see a logout
 
     # Backup configuration
     BACKUP_RETENTION: int = 10
 
+    # Docker CLI: concurrent subprocesses per worker and timeouts (seconds)
+    DOCKER_MAX_PROCS: int = 8
+    DOCKER_TIMEOUT: float = 30           # ps / exec / rcon-cli
+    DOCKER_UP_TIMEOUT: float = 300       # compose up (may pull an image)
+    DOCKER_DOWN_TIMEOUT: float = 180     # compose down (graceful world save)
+
+    # Background operations (start/stop/restart/delete)
+    OPERATION_WORKERS: int = 4           # concurrent operations per worker
+    OPERATION_TTL: timedelta = timedelta(hours=1)   # keep finished results this long
+    BULK_PARALLELISM: int = 4            # default concurrency of /instances/bulk
+
+    # Boot queue: JVMs starting at once across all workers (0 = no limit), and
+    # how long a boot may hold its slot before the server must log "Done"
+    BOOT_CONCURRENCY: int = 2
+    BOOT_READY_TIMEOUT: float = 600
+
+    # Memory admission: refuse starts that would overcommit host RAM. Each
+    # instance costs its MEMORY heap plus JVM overhead (ratio of the heap,
+    # at least the minimum); RESERVE is kept free for the host itself.
+    MEMORY_ADMISSION: bool = True
+    HOST_MEMORY_RESERVE: str = "1G"
+    JVM_OVERHEAD_RATIO: float = 0.25
+    JVM_OVERHEAD_MIN: str = "256M"
+
+    # Idle auto-stop: stop instances without players for this long (0 = off);
+    # while stopped, a listener on their port wakes them on the next login
+    # (the panel must run with host networking for players to reach it)
+    IDLE_STOP_AFTER: timedelta = timedelta(0)
+    IDLE_POLL_INTERVAL: float = 60       # seconds between player-count polls
+    IDLE_EXEMPT_TAG: str = "always-on"   # instances with this tag never sleep
+    SLEEP_MOTD: str = "Sleeping - join to wake the server up"
+    SLEEP_WAKE_MESSAGE: str = "Server is starting, reconnect in a minute."
+
+    # Server List Ping of running instances (player counts, MOTD, latency)
+    # where published game ports are reachable: the docker host, via the
+    # `host.docker.internal:host-gateway` entry of the compose file; falls back
+    # to 127.0.0.1 where that name does not resolve (panel run outside docker)
+    PING_HOST: str = "host.docker.internal"
+    PING_TIMEOUT: float = 1.0
+    PING_CACHE_TTL: float = 5.0
+
+    # Tick-health sampling into per-instance time series, and alert thresholds
+    HEALTH_INTERVAL: float = 30          # seconds between samples (0 = off)
+    HEALTH_RETENTION: timedelta = timedelta(days=1)
+    HEALTH_TPS_MIN: float = 18.0
+    HEALTH_MSPT_MAX: float = 50.0        # one tick is 50 ms at 20 TPS
+    HEALTH_BEHIND_MAX: int = 100         # ticks skipped per interval (vanilla console)
+
+    # Disk usage of instance data/ and backup buckets: running instances are
+    # re-measured every INTERVAL seconds (0 = off), stopped ones on change
+    # events or every FULL_RESCAN; hourly totals are kept for growth trends
+    USAGE_INTERVAL: float = 300
+    USAGE_FULL_RESCAN: timedelta = timedelta(hours=6)
+    USAGE_RETENTION: timedelta = timedelta(days=30)
+    USAGE_TREND_WINDOW: timedelta = timedelta(days=7)
+
+    # World pre-generation jobs, driven through a Chunky-compatible plugin over
+    # RCON: progress is read from the console every INTERVAL seconds (0 = off);
+    # a job pauses while players are online or TPS is below TPS_MIN, and goes
+    # on once it is back at TPS_RESUME
+    PREGEN_COMMAND: str = "chunky"
+    PREGEN_INTERVAL: float = 15
+    PREGEN_TPS_MIN: float = 15.0
+    PREGEN_TPS_RESUME: float = 18.0
+    PREGEN_PAUSE_ON_PLAYERS: bool = True
+    PREGEN_STALL_AFTER: float = 120      # seconds without progress before `continue` is re-sent
+
+    # Rate limiting: token buckets per (route, caller) shared by all workers.
+    # Limits are "N/second|minute|hour|day" (or "N/5 minutes"); ROUTES keys are
+    # "METHOD /api/path/{param}"; routes not listed each get DEFAULT.
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_DEFAULT: str = "120/minute"
+    RATE_LIMIT_ROUTES: dict[str, str] = {
+        "POST /api/auth/login": "10/minute",
+        "POST /api/instances/bulk": "10/minute",
+    }
+    RATE_LIMIT_EXEMPT: list[str] = ["GET /api/health"]
+    RATE_LIMIT_SLOTS: int = 4096         # buckets tracked at once
+
+    # Prometheus scrape of /api/metrics: a static bearer token for the scraper
+    # (empty = only logged-in users), and how often workers publish snapshots
+    METRICS_TOKEN: str = ""
+    METRICS_FLUSH_INTERVAL: float = 5
+
+    # Latency breakdowns: finished requests/jobs kept per worker for /api/debug/timings
+    TIMING_RECENT: int = 500
+
+    # Watch MC_ROOT/servers and MC_ROOT/backups (inotify) to drop stale caches;
+    # without inotify the trees are rescanned every RESCAN_INTERVAL seconds
+    WATCH_ENABLED: bool = True
+    WATCH_DEBOUNCE: float = 0.2          # let a burst of changes settle first
+    WATCH_RESCAN_INTERVAL: float = 30
+
+    # Parsed compose / server.properties / backup listings kept per worker,
+    # each valid while the underlying files are unchanged (stat-based ETag)
+    READ_CACHE_SIZE: int = 512
+
+    # World imports: resumable uploads wait in MC_ROOT/imports until TTL after
+    # their last write; archives are extracted with WORKERS threads
+    IMPORT_MAX_BYTES: int = 64 * 1024 ** 3
+    IMPORT_UPLOAD_TTL: timedelta = timedelta(days=1)
+    IMPORT_WORKERS: int = 4
+
+    # SPA bundle: files up to MAX_FILE bytes are kept in memory, BYTES in total per worker
+    STATIC_CACHE_MAX_FILE: int = 64 * 1024
+    STATIC_CACHE_BYTES: int = 8 * 1024 * 1024
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_prefix=""
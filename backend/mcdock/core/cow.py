@@ -0,0 +1,145 @@
+"""
+Copy-on-write copies of instance data trees.
+
+`clone_tree` fills a new tree from an existing one as cheaply as the
+filesystem allows (`choose_mode`):
+
+* reflink – `ioctl(FICLONE)` (btrfs, XFS with reflink, bcachefs, ...): the
+  copy shares extents with the original and the filesystem copies blocks
+  as either side writes them. Nothing else to do, ever.
+* hardlink – both trees point at the same inodes. The Minecraft server
+  writes region files in place, so a shared inode must be copied before
+  either side writes it. The clone's directory gets a SHARED marker and
+  the clone pays: `unshare` gives a marked instance private copies of
+  whatever it still shares, and leaves the source's inodes alone. The
+  services run it in the background right after cloning; until it has
+  run, a source about to start finds its clones with `clones_of` and
+  waits for them.
+* copy – plain copies, when neither is possible or allowed.
+
+Nothing here knows about instances or settings; the services call in.
+"""
+import errno
+import fcntl
+import os
+import shutil
+import stat
+from pathlib import Path
+
+FICLONE = 0x40049409                    # _IOW(0x94, 9, int), <linux/fs.h>
+SHARED = ".shared"                      # marker in an instance dir whose data/ shares inodes
+
+REFLINK, HARDLINK, COPY = "reflink", "hardlink", "copy"
+
+# errors meaning "this filesystem (pair) can't", as opposed to real I/O failures
+_UNSUPPORTED = {errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV, errno.EINVAL, errno.ENOSYS, errno.EPERM}
+
+
+def reflink(src: Path, dst: Path) -> None:
+    """Make *dst* a reflinked copy of *src*; OSError where unsupported."""
+    with open(src, "rb") as s, open(dst, "xb") as d:
+        try:
+            fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+        except OSError:
+            d.close()
+            os.unlink(dst)
+            raise
+    shutil.copystat(src, dst)
+
+
+def _supports_reflink(src: Path, dst: Path) -> bool:
+    """Try one reflink from *src* into *dst*'s directory."""
+    probe_src = next((p for p in src.rglob("*") if p.is_file() and not p.is_symlink()), None)
+    if probe_src is None:
+        return False
+    probe = dst / f".reflink-probe-{os.getpid()}"
+    try:
+        reflink(probe_src, probe)
+    except OSError as e:
+        if e.errno in _UNSUPPORTED:
+            return False
+        raise
+    probe.unlink()
+    return True
+
+
+def choose_mode(src: Path, dst: Path, *, allow_hardlinks: bool = True) -> str:
+    """The cheapest way to copy the tree *src* into the directory *dst*."""
+    dst.mkdir(parents=True, exist_ok=True)
+    if _supports_reflink(src, dst):
+        return REFLINK
+    if allow_hardlinks and os.stat(src).st_dev == os.stat(dst).st_dev:
+        return HARDLINK
+    return COPY
+
+
+def clone_tree(src: Path, dst: Path, mode: str) -> None:
+    """Populate the (empty) directory *dst* with the contents of *src*, by *mode*."""
+    dst.mkdir(parents=True, exist_ok=True)
+    for root, dirs, files in os.walk(src):
+        rel = Path(root).relative_to(src)
+        target_root = dst / rel
+        for name in dirs:
+            source = Path(root, name)
+            target = target_root / name
+            if source.is_symlink():
+                os.symlink(os.readlink(source), target)
+            else:
+                target.mkdir(exist_ok=True)
+                shutil.copymode(source, target)
+        for name in files:
+            source = Path(root, name)
+            target = target_root / name
+            if source.is_symlink():
+                os.symlink(os.readlink(source), target)
+            elif mode == REFLINK:
+                reflink(source, target)
+            elif mode == HARDLINK:
+                os.link(source, target)
+            else:
+                shutil.copy2(source, target)
+    for root, dirs, _ in os.walk(src):                 # mtimes last: creating entries bumps them
+        for name in dirs:
+            if not Path(root, name).is_symlink():
+                shutil.copystat(Path(root, name), dst / Path(root, name).relative_to(src))
+
+
+def _linked(data: Path):
+    """(path, stat) of every regular file under *data* with more than one link."""
+    for root, _, files in os.walk(data):
+        for name in files:
+            path = Path(root, name)
+            st = path.lstat()
+            if st.st_nlink > 1 and stat.S_ISREG(st.st_mode):
+                yield path, st
+
+
+def unshare(inst_dir: Path) -> int:
+    """
+    Give *inst_dir*/data private copies of every file it still shares
+    (hardlink clones); a no-op without the SHARED marker. The other side
+    keeps its inodes. Returns the number of bytes copied.
+    """
+    marker = inst_dir / SHARED
+    if not marker.exists():
+        return 0
+    copied = 0
+    for path, st in list(_linked(inst_dir / "data")):
+        tmp = path.with_name(f".{path.name}.unshare")
+        shutil.copy2(path, tmp)
+        os.replace(tmp, path)
+        copied += st.st_size
+    marker.unlink(missing_ok=True)
+    return copied
+
+
+def clones_of(inst_dir: Path) -> list[Path]:
+    """Sibling directories still marked SHARED that share an inode with *inst_dir*/data."""
+    marked = [p for p in inst_dir.parent.iterdir() if p != inst_dir and (p / SHARED).exists()]
+    if not marked:
+        return []
+    inodes = {(st.st_dev, st.st_ino) for _, st in _linked(inst_dir / "data")}
+    return [
+        p for p in marked
+        if any((st.st_dev, st.st_ino) in inodes for _, st in _linked(p / "data"))
+    ]
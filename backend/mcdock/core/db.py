@@ -0,0 +1,52 @@
+"""
+Shared SQLite state file for panel-side bookkeeping (instance registry, …).
+
+Every gunicorn worker opens its own short-lived connections; WAL mode lets
+readers proceed while another worker writes.
+"""
+import os
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+from .config import settings
+
+STATE_DB = Path(settings.MC_ROOT) / "mcdock.sqlite"
+
+# (db path, schema) pairs already applied in this process
+_initialised: set[tuple[Path, str]] = set()
+
+
+@contextmanager
+def connect(schema: str = "") -> Iterator[sqlite3.Connection]:
+    """
+    Open a connection to the state DB and run the body in one transaction.
+
+    *schema* is an idempotent `CREATE … IF NOT EXISTS` script; it is executed
+    once per process and database file.
+    """
+    path = Path(STATE_DB)
+    conn = sqlite3.connect(path, timeout=10)
+    conn.row_factory = sqlite3.Row
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        if schema and (path, schema) not in _initialised:
+            conn.executescript(schema)
+            _initialised.add((path, schema))
+        with conn:                      # commit on success, rollback on error
+            yield conn
+    finally:
+        conn.close()
+
+
+def pid_alive(pid: int) -> bool:
+    """Whether the worker that owns a row (by `owner_pid`) still exists."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
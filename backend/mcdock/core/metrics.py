@@ -0,0 +1,269 @@
+"""
+In-process Prometheus-style metrics (counters, gauges, histograms).
+
+Every gunicorn worker records into its own registry and regularly writes a
+snapshot to MC_ROOT/metrics/<pid>.json; a scrape merges the snapshots of all
+live workers, so whichever worker answers reports the whole panel. When a
+worker exits (recycled or crashed) its counters and histograms are folded
+into MC_ROOT/metrics/departed.json, so totals never go down and Prometheus
+sees no false counter reset; only its gauges disappear. Nothing here ever
+blocks on I/O except `flush` and `collect`, which callers run off the loop.
+"""
+import asyncio
+import fcntl
+import json
+import logging
+import math
+import os
+from pathlib import Path
+from typing import Iterable
+
+from . import db
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+METRICS_DIR = Path(settings.MC_ROOT) / "metrics"
+DEPARTED = "departed"                   # snapshot name of everything exited workers counted
+
+# seconds; covers an `rcon-cli` round-trip up to a slow `compose up`
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+LabelValues = tuple[str, ...]
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labels)
+        self.values: dict[LabelValues, float | list[float]] = {}
+        REGISTRY[name] = self
+
+    def _key(self, labels: dict[str, str]) -> LabelValues:
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """Per-worker gauge; worker values are summed on scrape."""
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        self.values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """Values are [count per bucket..., count above the last bucket, sum]."""
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = (), buckets: Iterable[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        slots = self.values.get(key)
+        if slots is None:
+            slots = self.values[key] = [0.0] * (len(self.buckets) + 2)
+        i = next((i for i, b in enumerate(self.buckets) if value <= b), len(self.buckets))
+        slots[i] += 1
+        slots[-1] += value
+
+
+REGISTRY: dict[str, _Metric] = {}
+
+
+# ───────────────────────────── snapshots ─────────────────────────────
+def snapshot() -> dict:
+    """This worker's metrics as plain JSON-able data."""
+    return {
+        m.name: {
+            "kind": m.kind,
+            "help": m.help,
+            "labels": list(m.labelnames),
+            "buckets": list(getattr(m, "buckets", ())),
+            "values": [[list(k), v] for k, v in m.values.items()],
+        }
+        for m in REGISTRY.values()
+    }
+
+
+def flush() -> None:
+    """Write this worker's snapshot where scrapes of other workers find it."""
+    METRICS_DIR.mkdir(parents=True, exist_ok=True)
+    path = METRICS_DIR / f"{os.getpid()}.json"
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(snapshot()))
+    tmp.replace(path)
+
+
+async def run() -> None:
+    """Background loop for the app lifespan: keep this worker's snapshot fresh."""
+    try:
+        while True:
+            await asyncio.sleep(settings.METRICS_FLUSH_INTERVAL)
+            try:
+                await asyncio.to_thread(flush)
+            except OSError as e:
+                logger.debug("Metrics snapshot not written: %s", e)
+    finally:
+        try:
+            flush()
+            retire(METRICS_DIR / f"{os.getpid()}.json")
+        except OSError as e:
+            logger.debug("Metrics snapshot not retired: %s", e)
+
+
+def _merge(into: dict, other: dict) -> None:
+    """Add the families of snapshot *other* to snapshot *into*."""
+    for name, family in other.items():
+        mine = into.setdefault(name, {**family, "values": []})
+        values = {tuple(k): v for k, v in mine["values"]}
+        for key, value in family["values"]:
+            key = tuple(key)
+            if key not in values:
+                values[key] = value
+            elif isinstance(value, list):
+                values[key] = [a + b for a, b in zip(values[key], value)]
+            else:
+                values[key] += value
+        mine["values"] = [[list(k), v] for k, v in values.items()]
+
+
+def _read(path: Path) -> dict | None:
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def retire(path: Path) -> None:
+    """
+    Fold the snapshot at *path* of a worker that exited into the departed
+    snapshot (counters and histograms; gauges die with it) and remove it.
+    Serialised across workers, so two scrapes never count a worker twice.
+    """
+    METRICS_DIR.mkdir(parents=True, exist_ok=True)
+    with open(METRICS_DIR / f"{DEPARTED}.lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)            # released when the file closes
+        if not path.exists():
+            return                                  # another worker got here first
+        snap = _read(path) or {}
+        departed_path = METRICS_DIR / f"{DEPARTED}.json"
+        departed = _read(departed_path) or {}
+        _merge(departed, {n: f for n, f in snap.items() if f["kind"] != Gauge.kind})
+        tmp = departed_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(departed))
+        tmp.replace(departed_path)
+        path.unlink()
+
+
+def collect() -> dict:
+    """Merge the snapshots of every live worker (this one taken fresh) and departed ones."""
+    merged = snapshot()
+    if not METRICS_DIR.exists():
+        return merged
+    me = os.getpid()
+    live = []
+    for path in METRICS_DIR.glob("*.json"):
+        try:
+            pid = int(path.stem)
+        except ValueError:
+            continue
+        if pid == me:
+            continue
+        if db.pid_alive(pid):
+            live.append(path)
+        else:
+            retire(path)
+    for path in [*live, METRICS_DIR / f"{DEPARTED}.json"]:
+        if (other := _read(path)) is not None:
+            _merge(merged, other)
+    return merged
+
+
+# ───────────────────────────── exposition ────────────────────────────
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def render_family(name: str, kind: str, help: str, labelnames: Iterable[str], values, buckets=()) -> str:
+    """One metric family in text exposition format 0.0.4."""
+    labelnames = list(labelnames)
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+    for key, value in values:
+        if kind == "histogram":
+            cumulative = 0.0
+            for bound, count in zip([*buckets, math.inf], value[:-1]):
+                cumulative += count
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{name}_bucket{_labels(labelnames, key, le)} {_number(cumulative)}")
+            lines.append(f"{name}_sum{_labels(labelnames, key)} {_number(value[-1])}")
+            lines.append(f"{name}_count{_labels(labelnames, key)} {_number(cumulative)}")
+        else:
+            lines.append(f"{name}{_labels(labelnames, key)} {_number(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def render(merged: dict) -> str:
+    return "".join(
+        render_family(name, f["kind"], f["help"], f["labels"], f["values"], f["buckets"])
+        for name, f in sorted(merged.items())
+    )
+
+
+# ───────────────────────────── MCDock metrics ────────────────────────
+# sizes in bytes, 1 MiB … 64 GiB
+SIZE_BUCKETS = tuple(2 ** e for e in range(20, 37, 2))
+
+HTTP_DURATION = Histogram(
+    "mcdock_http_request_duration_seconds", "HTTP request latency by route template.",
+    ("method", "route", "status"),
+)
+DOCKER_DURATION = Histogram(
+    "mcdock_docker_call_duration_seconds", "Docker CLI call latency by subcommand.",
+    ("command", "outcome"),
+)
+RCON_DURATION = Histogram(
+    "mcdock_rcon_duration_seconds", "RCON command round-trip latency.", ("instance",),
+)
+BACKUP_DURATION = Histogram(
+    "mcdock_backup_duration_seconds", "Backup wall time, including save-off/save-all.",
+    ("instance",),
+)
+BACKUP_SIZE = Histogram(
+    "mcdock_backup_size_bytes", "Size of written backup archives.", ("instance",),
+    buckets=SIZE_BUCKETS,
+)
+BACKUPS = Counter("mcdock_backups_total", "Backups attempted, by outcome.", ("instance", "outcome"))
+WS_SUBSCRIBERS = Gauge("mcdock_websocket_subscribers", "Open WebSocket streams.", ("stream",))
@@ -84,6 +84,60 @@ class InstanceStatus(str, Enum):
     STOPPED = "stopped"
     ERROR = "error"
 
+class OperationKind(str, Enum):
+    START = "start"
+    STOP = "stop"
+    RESTART = "restart"
+    DELETE = "delete"
+    BACKUP = "backup"
+    RESTORE = "restore"
+    IMPORT = "import"
+    CLONE = "clone"
+    UNSHARE = "unshare"
+
+class OperationState(str, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+class BootState(str, Enum):
+    WAITING = "waiting"
+    BOOTING = "booting"
+
+class BulkAction(str, Enum):
+    START = "start"
+    STOP = "stop"
+    RESTART = "restart"
+    BACKUP = "backup"
+    COMMAND = "command"
+
+class FsChange(str, Enum):
+    INSTANCE_ADDED = "instance_added"
+    INSTANCE_REMOVED = "instance_removed"
+    COMPOSE_CHANGED = "compose_changed"
+    PROPERTIES_CHANGED = "properties_changed"
+    BACKUP_ADDED = "backup_added"
+    BACKUP_REMOVED = "backup_removed"
+
+class PregenShape(str, Enum):
+    SQUARE = "square"
+    CIRCLE = "circle"
+    DIAMOND = "diamond"
+    PENTAGON = "pentagon"
+    HEXAGON = "hexagon"
+    STAR = "star"
+    TRIANGLE = "triangle"
+
+class PregenState(str, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    THROTTLED = "throttled"
+    PAUSED = "paused"
+    COMPLETED = "completed"
+    CANCELLED = "cancelled"
+    FAILED = "failed"
+
 class EnvVar(BaseModel):
     key:  str = Field(pattern=r"^[A-Z0-9_]+$")
     value: str
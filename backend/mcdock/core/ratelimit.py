@@ -0,0 +1,110 @@
+"""
+Token-bucket rate limiting shared by all gunicorn workers.
+
+Buckets live in a small memory-mapped table (MC_ROOT/locks/ratelimit.shm, a
+fixed array of slots addressed by a hash of the bucket key) guarded by
+`flock`, so every worker draws from the same buckets and a check is one
+lock/unlock pair plus a few struct reads — microseconds, no SQL.
+
+A bucket is one (route, principal) pair: the route is the matched route
+template ("POST /api/auth/login"), the principal the caller's session when
+its token is already verified, else the client address. Limits come from
+RATE_LIMIT_ROUTES (per route) with RATE_LIMIT_DEFAULT for the rest.
+"""
+import fcntl
+import hashlib
+import mmap
+import os
+import re
+import struct
+import time
+from pathlib import Path
+
+from .config import settings
+
+# key hash, tokens left, last refill; CLOCK_MONOTONIC is system-wide, so workers agree on it
+_SLOT = struct.Struct("<Qdd")
+_PROBE = 16                                    # slots tried before evicting the stalest one
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+_SPEC = re.compile(r"^\s*(\d+)\s*/\s*(\d*)\s*(second|minute|hour|day)s?\s*$")
+
+
+def parse_limit(spec: str) -> tuple[float, float]:
+    """"10/minute" or "100/5 minutes" -> (burst capacity, tokens per second)."""
+    m = _SPEC.match(spec)
+    if not m:
+        raise ValueError(f"Invalid rate limit: {spec!r} (expected e.g. '30/minute')")
+    count, every, unit = int(m.group(1)), int(m.group(2) or 1), m.group(3)
+    return float(count), count / (every * _PERIODS[unit])
+
+
+class SharedBuckets:
+    """Fixed-size table of token buckets in a file-backed shared mapping."""
+
+    def __init__(self, path: Path, slots: int):
+        self.path = path
+        self.slots = slots
+        self._pid: int | None = None
+        self._fd = -1
+        self._map: mmap.mmap | None = None
+
+    def _open(self) -> None:
+        # per process: a mapping inherited across fork would still work, but
+        # the flock must be on a descriptor of our own
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        size = self.slots * _SLOT.size
+        if os.fstat(self._fd).st_size != size:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                if os.fstat(self._fd).st_size != size:
+                    os.ftruncate(self._fd, 0)              # resized: start empty
+                    os.ftruncate(self._fd, size)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._map = mmap.mmap(self._fd, size)
+        self._pid = os.getpid()
+
+    def take(self, key: str, capacity: float, rate: float) -> float:
+        """
+        Take one token from *key*'s bucket. Returns 0 when allowed, else the
+        seconds until a token will be available.
+        """
+        if self._pid != os.getpid():
+            self._open()
+        h = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little") or 1
+        now = time.monotonic()
+        first = h % self.slots
+        m = self._map
+
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            chosen, stalest = None, None
+            for i in range(_PROBE):
+                offset = ((first + i) % self.slots) * _SLOT.size
+                slot_key, tokens, stamp = _SLOT.unpack_from(m, offset)
+                if slot_key == h:
+                    chosen = offset
+                    break
+                if slot_key == 0:
+                    chosen, tokens, stamp = offset, capacity, now
+                    break
+                if stalest is None or stamp < stalest[1]:
+                    stalest = (offset, stamp)
+            else:
+                chosen, tokens, stamp = stalest[0], capacity, now   # evict: starts full
+
+            tokens = min(capacity, tokens + (now - stamp) * rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / rate
+            _SLOT.pack_into(m, chosen, h, tokens, now)
+            return wait
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+
+BUCKETS = SharedBuckets(Path(settings.MC_ROOT) / "locks" / "ratelimit.shm", settings.RATE_LIMIT_SLOTS)
@@ -0,0 +1,198 @@
+"""
+Serving of the built React bundle (mcdock/static).
+
+* Precompression: `precompress()` writes `<file>.br` and `<file>.gz` next
+  to every compressible asset. It runs in the Docker build (`python -m mcdock.core.static
+  mcdock/static`) and again at startup, where up-to-date siblings are
+  skipped, so a bundle copied in by hand is covered too.
+* `SPAStaticFiles` picks the best sibling the client accepts
+  (Accept-Encoding), answers If-None-Match with 304, marks Vite's hashed
+  `assets/*-<hash>.*` files immutable and everything else `no-cache`, keeps
+  small files in memory, and serves index.html for client-side routes.
+
+Nothing here reads the settings, so the module works in the image build.
+"""
+import gzip
+import mimetypes
+import os
+import re
+import stat
+import sys
+from pathlib import Path
+
+import brotli
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+COMPRESSIBLE = {".js", ".mjs", ".css", ".html", ".svg", ".json", ".map", ".txt", ".xml", ".wasm", ".ico"}
+MIN_SIZE = 1024                                         # smaller files gain nothing
+
+# encodings in order of preference -> sibling suffix
+_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+_HASHED = re.compile(r"(^|/)assets/.+[-.][A-Za-z0-9_-]{8,}\.\w+$")
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+
+# ───────────────────────────── precompression ──────────────────────
+def _write_atomic(path: Path, data: bytes, mtime_ns: int) -> None:
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.utime(tmp, ns=(mtime_ns, mtime_ns))             # sibling is fresh iff mtimes match
+    tmp.replace(path)
+
+
+def precompress(root: Path) -> int:
+    """Write missing or stale .br/.gz siblings under *root*; returns how many were written."""
+    written = 0
+    for path in root.rglob("*"):
+        if path.suffix not in COMPRESSIBLE or not path.is_file():
+            continue
+        st = path.stat()
+        if st.st_size < MIN_SIZE:
+            continue
+        data = None
+        for encoding, suffix in _ENCODINGS:
+            sibling = path.with_name(path.name + suffix)
+            try:
+                if sibling.stat().st_mtime_ns == st.st_mtime_ns:
+                    continue
+            except FileNotFoundError:
+                pass
+            data = data if data is not None else path.read_bytes()
+            packed = brotli.compress(data, quality=11) if encoding == "br" else gzip.compress(data, 9, mtime=0)
+            if len(packed) < len(data):
+                _write_atomic(sibling, packed, st.st_mtime_ns)
+                written += 1
+    return written
+
+
+# ───────────────────────────── serving ─────────────────────────────
+def _accepted(header: str) -> set[str]:
+    """Codings in an Accept-Encoding header, minus those refused with q=0."""
+    accepted = set()
+    for part in header.split(","):
+        coding, *params = (p.strip() for p in part.split(";"))
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding and q > 0:
+            accepted.add(coding.lower())
+    if "*" in accepted:
+        accepted.update(encoding for encoding, _ in _ENCODINGS)
+    return accepted
+
+
+class SPAStaticFiles(StaticFiles):
+    """`StaticFiles` for a single-page app: precompressed, cacheable, with an index fallback."""
+
+    def __init__(self, *, directory: Path, cache_max_file: int = 64 * 1024,
+                 cache_bytes: int = 8 * 1024 * 1024, reserved: tuple[str, ...] = ("api",)):
+        super().__init__(directory=directory, html=True)
+        self.cache_max_file = cache_max_file
+        self.cache_bytes = cache_bytes
+        self.reserved = reserved
+        self._cache: dict[str, tuple[int, int, bytes]] = {}        # full path -> (mtime_ns, size, body)
+        self._cached_bytes = 0
+
+    def _stat(self, path: str) -> tuple[str, os.stat_result | None]:
+        # a stat of a local file is microseconds; not worth a thread hop
+        try:
+            return self.lookup_path(path)
+        except (OSError, ValueError):
+            return "", None
+
+    def _variant(self, full_path: str, st: os.stat_result, headers: Headers) -> tuple[str, os.stat_result, str | None]:
+        """The best precompressed sibling of *full_path* the client accepts, if fresh."""
+        accepted = _accepted(headers.get("accept-encoding", ""))
+        for encoding, suffix in _ENCODINGS:
+            if encoding in accepted:
+                try:
+                    sibling = os.stat(full_path + suffix)
+                except OSError:
+                    continue
+                if sibling.st_mtime_ns == st.st_mtime_ns:
+                    return full_path + suffix, sibling, encoding
+        return full_path, st, None
+
+    def _body(self, path: str, st: os.stat_result) -> bytes | None:
+        """Small files come from memory; the cache entry dies with a new mtime or size."""
+        if st.st_size > self.cache_max_file:
+            return None
+        hit = self._cache.get(path)
+        if hit and hit[0] == st.st_mtime_ns and hit[1] == st.st_size:
+            return hit[2]
+        try:
+            with open(path, "rb") as f:
+                body = f.read()
+        except OSError:
+            return None
+        if hit:
+            self._cached_bytes -= len(hit[2])
+        if self._cached_bytes + len(body) <= self.cache_bytes:
+            self._cache[path] = (st.st_mtime_ns, st.st_size, body)
+            self._cached_bytes += len(body)
+        else:
+            self._cache.pop(path, None)
+        return body
+
+    def _serve(self, rel: str, full_path: str, st: os.stat_result, scope: Scope) -> Response:
+        headers = Headers(scope=scope)
+        served, served_st, encoding = self._variant(full_path, st, headers)
+        etag = f'"{st.st_mtime_ns:x}-{st.st_size:x}{"-" + encoding if encoding else ""}"'
+        response_headers = {
+            "ETag": etag,
+            "Cache-Control": IMMUTABLE if _HASHED.search(rel.replace(os.sep, "/")) else REVALIDATE,
+            "Vary": "Accept-Encoding",
+        }
+        if_none_match = headers.get("if-none-match")
+        if if_none_match and (
+            if_none_match.strip() == "*"
+            or etag in (t.strip().removeprefix("W/") for t in if_none_match.split(","))
+        ):
+            return Response(status_code=304, headers=response_headers)
+
+        media_type = mimetypes.guess_type(full_path)[0] or "text/plain"   # of the original, not .br
+        if encoding:
+            response_headers["Content-Encoding"] = encoding
+        body = self._body(served, served_st)
+        if body is None:
+            return FileResponse(served, stat_result=served_st, headers=response_headers, media_type=media_type)
+        if scope["method"] == "HEAD":
+            response_headers["Content-Length"] = str(len(body))
+            return Response(None, headers=response_headers, media_type=media_type)
+        return Response(body, headers=response_headers, media_type=media_type)
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        if scope["method"] not in ("GET", "HEAD"):
+            raise HTTPException(status_code=405, headers={"Allow": "GET, HEAD"})
+        if path.split(os.sep, 1)[0] in self.reserved:
+            raise HTTPException(status_code=404)        # unknown API route: JSON 404, not the SPA
+
+        full_path, st = self._stat(path)
+        if st is not None and stat.S_ISDIR(st.st_mode):
+            path = os.path.join(path, "index.html")
+            full_path, st = self._stat(path)
+        if st is not None and stat.S_ISREG(st.st_mode):
+            return self._serve(path, full_path, st, scope)
+
+        # client-side route (/instances/foo): the app shell, but a missing
+        # asset stays a 404 rather than HTML the browser would try to run
+        if not os.path.splitext(path)[1]:
+            full_path, st = self._stat("index.html")
+            if st is not None and stat.S_ISREG(st.st_mode):
+                return self._serve("index.html", full_path, st, scope)
+        raise HTTPException(status_code=404)
+
+
+if __name__ == "__main__":
+    for directory in sys.argv[1:] or ["mcdock/static"]:
+        print(f"{directory}: {precompress(Path(directory))} precompressed files written")
@@ -0,0 +1,119 @@
+"""
+Latency breakdowns of hot paths.
+
+`span` times a block and attaches it to the enclosing span of the same task
+(context variables follow `asyncio.to_thread` and child tasks), so an HTTP
+request ends up as a tree: route → DockerService/BackupService call →
+YAML/filesystem helper → docker subprocess with argv and exit code. `timed`
+wraps a function in a span named after it. Every span feeds the
+`mcdock_operation_duration_seconds` histogram; finished root spans are kept
+in a small ring so `/api/debug/timings` can show the slowest recent calls.
+"""
+import functools
+import inspect
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, UTC
+
+from . import metrics
+from .config import settings
+
+OPERATION_DURATION = metrics.Histogram(
+    "mcdock_operation_duration_seconds",
+    "Latency of timed service calls and helpers.", ("operation",),
+)
+
+MAX_CHILDREN = 50                      # per span; long jobs keep only the first ones
+
+
+class Span:
+    __slots__ = ("name", "attrs", "children", "dropped", "started_at", "duration")
+
+    def __init__(self, name: str, attrs: dict):
+        self.name = name
+        self.attrs = attrs
+        self.children: list[Span] = []
+        self.dropped = 0
+        self.started_at = datetime.now(UTC)
+        self.duration = 0.0
+
+    def as_dict(self) -> dict:
+        out = {"name": self.name, "duration_ms": round(self.duration * 1000, 3)}
+        if self.attrs:
+            out["attrs"] = self.attrs
+        if self.children:
+            out["children"] = [c.as_dict() for c in self.children]
+        if self.dropped:
+            out["dropped_children"] = self.dropped
+        return out
+
+
+_current: ContextVar[Span | None] = ContextVar("mcdock_span", default=None)
+_recent: deque[Span] = deque(maxlen=settings.TIMING_RECENT)
+
+
+@contextmanager
+def span(name: str, *, record: bool = True, **attrs):
+    """
+    Time the block as *name*. With *record* off the span only appears in
+    breakdowns (for callers that feed a more specific histogram themselves).
+    """
+    parent = _current.get()
+    s = Span(name, attrs)
+    token = _current.set(s)
+    started = time.perf_counter()
+    try:
+        yield s
+    except BaseException as e:
+        s.attrs.setdefault("error", type(e).__name__)
+        raise
+    finally:
+        s.duration = time.perf_counter() - started
+        _current.reset(token)
+        if record:
+            OPERATION_DURATION.observe(s.duration, operation=s.name)
+        if parent is None:
+            _recent.append(s)
+        elif len(parent.children) < MAX_CHILDREN:
+            parent.children.append(s)
+        else:
+            parent.dropped += 1
+
+
+def timed(name: str | None = None):
+    """Decorator: run every call of the (sync or async) function in a `span`."""
+    def decorate(fn):
+        label = name or fn.__qualname__
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                with span(label):
+                    return await fn(*args, **kwargs)
+        else:
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with span(label):
+                    return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def slowest(limit: int) -> list[dict]:
+    """The *limit* slowest recent root spans of this worker, with breakdowns."""
+    top = sorted(_recent, key=lambda s: s.duration, reverse=True)[:limit]
+    return [{**s.as_dict(), "started_at": s.started_at.isoformat()} for s in top]
+
+
+def quantile(q: float, buckets: list[float], values: list[float]) -> float:
+    """Estimate the *q* quantile of a histogram, interpolating inside a bucket."""
+    counts = values[:-1]
+    rank = q * sum(counts)
+    seen, lower = 0.0, 0.0
+    for bound, count in zip(buckets, counts):
+        if count and seen + count >= rank:
+            return lower + (bound - lower) * (rank - seen) / count
+        seen, lower = seen + count, bound
+    return buckets[-1] if buckets else 0.0           # beyond the last bucket
@@ -1,51 +1,123 @@
+import asyncio
+import importlib
 import logging
+import subprocess
+import time
 from contextlib import asynccontextmanager
 from pathlib import Path
 
-from fastapi import FastAPI, APIRouter, Request
-from fastapi.responses import JSONResponse, FileResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi import FastAPI, APIRouter, Depends, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.errors import RateLimitExceeded
-from slowapi.middleware import SlowAPIMiddleware
-from slowapi.util import get_remote_address
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
-from .core import logging_config  # noqa: F401 – side-effect import
+from .core import logging_config, metrics, static, timing
 from .core.config import settings, Environment
 from .routers.backups   import router as backup_router
+from .routers.debug     import router as debug_router
 from .routers.instances import router as instances_router, ws_router as instances_ws_router
+from .routers.host      import router as host_router
+from .routers.metrics   import router as metrics_router
+from .routers.operations import router as operations_router, ws_router as operations_ws_router
 from .routers.schedules import router as schedule_router
+from .routers.usage     import router as usage_router
 from .routers.auth      import router as auth_router
-from .services.scheduler import build_scheduler
+from .routers.security  import rate_limit
+from .services.boot import BootQueue
+from .services.docker_service import DockerService
+from .services.health import HealthService
+from .services.idle import IdleService
+from .services.operations import OperationService
+from .services.pregen import PregenService
+from .services.registry import InstanceRegistry
+from .services.scheduler import build_scheduler, queue_legacy_jobs
+from .services.usage import UsageService
+from .services.watcher import WatchService
 
 logger = logging.getLogger(__name__)
 
+# imported lazily by the code that needs them; pulled in right after startup
+# so that the first login or new instance does not pay for it either
+PRELOAD = ("jose.jwt", "jinja2")
+
 
 def create_app() -> FastAPI:
     """
     Build the FastAPI application with CORS, rate-limiting, routers,
     static SPA bundle, and an APScheduler that starts/stops with app life-cycle.
     """
+    logging_config.setup()
 
-    # ── Scheduler (created now, started in lifespan) ──────────
-    scheduler = build_scheduler()
+    async def reconcile_registry() -> None:
+        try:
+            running = await DockerService.running_instances()
+        except (OSError, TimeoutError, subprocess.CalledProcessError) as e:
+            logger.warning("Could not query docker for running instances: %s", e)
+            running = None
+        await asyncio.to_thread(InstanceRegistry.reconcile, running)
+
+    async def start_scheduler(app: FastAPI) -> None:
+        # the worker serves requests meanwhile; /schedules waits on scheduler_ready
+        try:
+            scheduler = await asyncio.to_thread(build_scheduler)
+            scheduler.start()
+            if migrated := await asyncio.to_thread(queue_legacy_jobs, scheduler):
+                logger.info("Moved %d cron job(s) onto the operation queue", migrated)
+            app.state.scheduler = scheduler
+            logger.info(
+                "APScheduler started with %d jobs",
+                len(scheduler.get_jobs(jobstore="default")),
+            )
+        except Exception:
+            logger.exception("APScheduler could not be started")
+        finally:
+            app.state.scheduler_ready.set()
+        for module in PRELOAD:
+            await asyncio.to_thread(importlib.import_module, module)
 
     @asynccontextmanager
     async def lifespan(app: FastAPI):
         # ── startup ───────────────────────────────────────────
-        scheduler.start()
-        logger.info(
-            "APScheduler started with %d jobs",
-            len(scheduler.get_jobs(jobstore="default")),
-        )
+        try:
+            await reconcile_registry()
+        except ValueError as e:
+            logger.error("Instance registry not reconciled: %s", e)
+        await asyncio.to_thread(OperationService.recover)
+        try:
+            written = await asyncio.to_thread(static.precompress, static_path)
+            if written:
+                logger.info("Precompressed %d static files", written)
+        except OSError as e:
+            logger.warning("Static bundle not precompressed: %s", e)
+        idle_loop = asyncio.create_task(IdleService.run(), name="idle-loop")
+        health_loop = asyncio.create_task(HealthService.run(), name="health-loop")
+        metrics_loop = asyncio.create_task(metrics.run(), name="metrics-loop")
+        watch_loop = asyncio.create_task(WatchService.run(), name="watch-loop")
+        usage_loop = asyncio.create_task(UsageService.run(), name="usage-loop")
+        pregen_loop = asyncio.create_task(PregenService.run(), name="pregen-loop")
+        app.state.scheduler = None
+        app.state.scheduler_ready = asyncio.Event()
+        scheduler_start = asyncio.create_task(start_scheduler(app), name="scheduler-start")
         try:
             yield
         finally:
             # ── shutdown ──────────────────────────────────────
-            scheduler.shutdown(wait=False)
-            logger.info("APScheduler shut down")
+            scheduler_start.cancel()
+            if app.state.scheduler is not None:
+                app.state.scheduler.shutdown(wait=False)
+                logger.info("APScheduler shut down")
+            idle_loop.cancel()
+            health_loop.cancel()
+            HealthService.shutdown()
+            metrics_loop.cancel()
+            watch_loop.cancel()
+            usage_loop.cancel()
+            UsageService.shutdown()
+            pregen_loop.cancel()
+            PregenService.shutdown()
+            await IdleService.shutdown()
+            await OperationService.shutdown()
+            await BootQueue.shutdown()
 
     app = FastAPI(
         title="MCDock Control Panel",
@@ -57,9 +129,6 @@ def create_app() -> FastAPI:
         openapi_url=None if settings.ENV == Environment.PROD else "/openapi.json"
     )
 
-    # Make scheduler accessible to routes / deps
-    app.state.scheduler = scheduler
-
     # ── 5xx logger -----------------------------------------------------------
     async def log_http_5xx(request: Request, exc: StarletteHTTPException):
         if exc.status_code >= 500:
@@ -72,21 +141,33 @@ def create_app() -> FastAPI:
                 status_code=exc.status_code,
                 content={"detail": "Internal server error"},
             )
-        
-        if exc.status_code == 404 and not request.url.path.startswith("/api/"):
-            return FileResponse(static_path / "index.html")
 
-        # pass-through 4xx
+        # pass-through 4xx (keeping WWW-Authenticate, Retry-After, ...)
         return JSONResponse(status_code=exc.status_code,
-                            content={"detail": exc.detail})
+                            content={"detail": exc.detail},
+                            headers=getattr(exc, "headers", None))
 
     app.add_exception_handler(StarletteHTTPException, log_http_5xx)
 
-    # ── Rate limiter ---------------------------------------------------------
-    limiter = Limiter(key_func=get_remote_address, default_limits=["30/minute"])
-    app.state.limiter = limiter
-    app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
-    app.add_middleware(SlowAPIMiddleware)
+    # ── Request timing -------------------------------------------------------
+    @app.middleware("http")
+    async def time_requests(request: Request, call_next):
+        started = time.perf_counter()
+        status = 500
+        with timing.span(request.method, record=False) as root:
+            try:
+                response = await call_next(request)
+                status = response.status_code
+                return response
+            finally:
+                # label by route template so /instances/{instance_name} is one series
+                route = getattr(request.scope.get("route"), "path", None) or "unmatched"
+                root.name = f"{request.method} {route}"
+                root.attrs["status"] = status
+                metrics.HTTP_DURATION.observe(
+                    time.perf_counter() - started,
+                    method=request.method, route=route, status=str(status),
+                )
 
     # ── CORS -----------------------------------------------------------------
     origins = [str(o).rstrip("/") for o in settings.CORS_ORIGINS]
@@ -96,10 +177,12 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Next-Cursor"],
     )
 
     # ── Routers --------------------------------------------------------------
-    api = APIRouter(prefix="/api")
+    # every API route is rate-limited (see RATE_LIMIT_*); the static mount is not
+    api = APIRouter(prefix="/api", dependencies=[Depends(rate_limit)])
 
     @api.get("/health")
     async def health():
@@ -107,15 +190,25 @@ def create_app() -> FastAPI:
 
     api.include_router(auth_router,            tags=["auth"])
     api.include_router(backup_router,          tags=["backups"])
+    api.include_router(debug_router,           tags=["debug"])
+    api.include_router(host_router,            tags=["host"])
     api.include_router(instances_router,       tags=["instances"])
     api.include_router(instances_ws_router,    tags=["ws_instances"])
+    api.include_router(metrics_router,         tags=["metrics"])
+    api.include_router(operations_router,      tags=["operations"])
+    api.include_router(operations_ws_router,   tags=["ws_operations"])
     api.include_router(schedule_router,        tags=["schedules"])
+    api.include_router(usage_router,           tags=["usage"])
     app.include_router(api)
 
     # ── Static React bundle --------------------------------------------------
     static_path = Path(__file__).parent / "static"
     static_path.mkdir(exist_ok=True)
-    app.mount("/", StaticFiles(directory=static_path, html=True), name="static")
+    app.mount("/", static.SPAStaticFiles(
+        directory=static_path,
+        cache_max_file=settings.STATIC_CACHE_MAX_FILE,
+        cache_bytes=settings.STATIC_CACHE_BYTES,
+    ), name="static")
 
     return app
 
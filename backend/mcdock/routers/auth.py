@@ -1,6 +1,12 @@
+import asyncio
+from typing import Annotated
+
 from fastapi import APIRouter, Security
+from fastapi.security import HTTPAuthorizationCredentials
+from jose import JWTError
 
-from .security import login_body, UNAUTHORIZED
+from ..services.tokens import TokenService
+from .security import bearer_scheme, login_body, UNAUTHORIZED
 from .models import ResponseMessage, TokenResponse
 
 
@@ -12,5 +18,13 @@ async def login(creds = Security(login_body)):
     return creds
 
 @router.post("/logout", response_model=ResponseMessage)
-async def logout():
-    return ResponseMessage(message="Bye!")
\ No newline at end of file
+async def logout(
+    credentials: Annotated[HTTPAuthorizationCredentials | None, Security(bearer_scheme)]
+):
+    """Revoke the presented token in every worker (no-op without a valid one)."""
+    if credentials and credentials.scheme.lower() == "bearer":
+        try:
+            await asyncio.to_thread(TokenService.revoke, credentials.credentials)
+        except JWTError:
+            pass                        # expired or foreign: nothing to revoke
+    return ResponseMessage(message="Bye!")
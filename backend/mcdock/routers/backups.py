@@ -1,14 +1,12 @@
 # routers/backups.py
-import uuid
-from datetime import datetime, UTC
-
-from fastapi import APIRouter, HTTPException, Request, Security
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from apscheduler.triggers.date import DateTrigger
+from fastapi import APIRouter, HTTPException, Request, Response, Security
 
+from ..core.conditional import NOT_MODIFIED, not_modified
+from ..core.models import OperationKind
 from ..services.backup_service import BackupService
 from ..services.docker_service import DockerService
-from .models import ResponseMessage
+from ..services.operations import OperationService
+from .models import OperationAccepted
 from .security import require_user, UNAUTHORIZED
 
 router = APIRouter(
@@ -27,44 +25,46 @@ def _validate_instance(name: str) -> None:
         raise HTTPException(404, f"No such instance: {name}")
 
 
-@router.get("/{instance}", response_model=list[str])
-async def list_backups(instance: str):
-    return BackupService.list_backups(instance)
+@router.get("/{instance}", response_model=list[str], responses=NOT_MODIFIED)
+async def list_backups(instance: str, request: Request, response: Response):
+    if cached := not_modified(request, response, BackupService.listing_tag(instance)):
+        return cached
+    return await BackupService.list_backups(instance)
 
 
-@router.put("/{instance}/trigger", status_code=202, response_model=ResponseMessage)
-async def trigger_backup(instance: str, request: Request):
+@router.put("/{instance}/trigger", status_code=202, response_model=OperationAccepted)
+async def trigger_backup(instance: str):
     _validate_instance(instance)
 
-    sched: AsyncIOScheduler = request.app.state.scheduler
-    sched.add_job(
-        BackupService.trigger_backup,
-        DateTrigger(run_date=datetime.now(UTC)),
-        args=[instance, BackupService.triggered_dirname],
-        id=f"trigger_{instance}_{uuid.uuid4().hex}",
-        max_instances=1,
+    bucket = BackupService.triggered_dirname
+    op = await OperationService.submit(
+        OperationKind.BACKUP, instance,
+        BackupService.trigger_backup, instance, bucket,
+        key=bucket,
+    )
+    return OperationAccepted(
+        message=f"Backup for '{instance}' is being created.",
+        operation_id=op.id,
     )
-    return ResponseMessage(message=f"Backup for '{instance}' is being created.")
 
 
 @router.post(
     "/{instance}/{bucket}/{filename}/restore",
     status_code=202,
-    response_model=ResponseMessage,
+    response_model=OperationAccepted,
 )
-async def restore_backup(instance: str, bucket: str, filename: str, request: Request):
+async def restore_backup(instance: str, bucket: str, filename: str):
     _validate_instance(instance)
 
-    sched: AsyncIOScheduler = request.app.state.scheduler
-    sched.add_job(
-        BackupService.restore_backup,
-        DateTrigger(run_date=datetime.now(UTC)),
-        args=[instance, f"{bucket}/{filename}"],
-        id=f"restore_{uuid.uuid4().hex}",
-        max_instances=1,
+    rel_path = f"{bucket}/{filename}"
+    op = await OperationService.submit(
+        OperationKind.RESTORE, instance,
+        BackupService.restore_backup, instance, rel_path,
+        key=rel_path,
     )
-    return ResponseMessage(
-        message=f"Restoring '{bucket}/{filename}' for '{instance}' in background."
+    return OperationAccepted(
+        message=f"Restoring '{rel_path}' for '{instance}' in background.",
+        operation_id=op.id,
     )
 
 
@@ -72,6 +72,6 @@ async def restore_backup(instance: str, bucket: str, filename: str, request: Req
 async def delete_backup(instance: str, bucket: str, filename: str):
     _validate_instance(instance)
     try:
-        BackupService.delete_backup(instance, f"{bucket}/{filename}")
+        await BackupService.delete_backup(instance, f"{bucket}/{filename}")
     except FileNotFoundError:
         raise HTTPException(404, "Backup not found.")
\ No newline at end of file
@@ -0,0 +1,119 @@
+# routers/debug.py
+import asyncio
+import os
+
+from typing import Literal
+
+from fastapi import APIRouter, HTTPException, Query, Security
+from fastapi.responses import PlainTextResponse
+
+from ..core import metrics, timing
+from ..services.models import MemoryReport
+from ..services.profiling import ProfilingService
+from .models import ResponseMessage, TimingReport, TimingStat
+from .security import require_user, UNAUTHORIZED
+
+router = APIRouter(
+    prefix="/debug",
+    dependencies=[Security(require_user)],
+    responses=UNAUTHORIZED,
+)
+
+
+def _stats(family: dict | None, name_of) -> list[TimingStat]:
+    """Percentiles per series of a merged histogram family, slowest p95 first."""
+    if family is None:
+        return []
+    series: dict[str, list[float]] = {}
+    for key, values in family["values"]:
+        name = name_of(*key)                    # fold labels we do not report on
+        if name in series:
+            series[name] = [a + b for a, b in zip(series[name], values)]
+        else:
+            series[name] = list(values)
+
+    out = []
+    for name, values in series.items():
+        count = int(sum(values[:-1]))
+        if not count:
+            continue
+        p50, p95, p99 = (
+            round(timing.quantile(q, family["buckets"], values) * 1000, 3)
+            for q in (0.5, 0.95, 0.99)
+        )
+        out.append(TimingStat(
+            name=name, count=count, mean_ms=round(values[-1] / count * 1000, 3),
+            p50_ms=p50, p95_ms=p95, p99_ms=p99,
+        ))
+    return sorted(out, key=lambda s: s.p95_ms, reverse=True)
+
+
+@router.get("/timings", response_model=TimingReport)
+async def timings(limit: int = Query(20, ge=1, le=200)):
+    """
+    p50/p95/p99 of HTTP routes, docker subprocesses and timed service calls
+    (all workers), plus the slowest recent calls of the answering worker
+    broken down into nested spans.
+    """
+    merged = await asyncio.to_thread(metrics.collect)
+    return TimingReport(
+        routes=_stats(
+            merged.get(metrics.HTTP_DURATION.name),
+            lambda method, route, status: f"{method} {route}",
+        ),
+        subprocesses=_stats(
+            merged.get(metrics.DOCKER_DURATION.name),
+            lambda command, outcome: command,
+        ),
+        operations=_stats(
+            merged.get(timing.OPERATION_DURATION.name),
+            lambda operation: operation,
+        ),
+        slowest=timing.slowest(limit),
+        worker=os.getpid(),
+    )
+
+
+# ───────────────────────────── profiling ─────────────────────────────
+@router.post("/profile/cpu", response_class=PlainTextResponse)
+async def profile_cpu(
+    seconds: float = Query(10, gt=0, le=120),
+    interval_ms: float = Query(5, ge=1, le=1000),
+):
+    """
+    Sample every thread of the answering worker for *seconds* and return
+    collapsed stacks (feed to flamegraph.pl, speedscope or inferno).
+    """
+    try:
+        stacks = await asyncio.to_thread(ProfilingService.sample_cpu, seconds, interval_ms / 1000)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
+    return PlainTextResponse(stacks, headers={"X-MCDock-Worker": str(os.getpid())})
+
+
+@router.post("/memory/start", response_model=ResponseMessage)
+async def memory_start(frames: int = Query(1, ge=1, le=50)):
+    """Start tracemalloc in the answering worker (slows allocations while on)."""
+    try:
+        ProfilingService.start_tracing(frames)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
+    return ResponseMessage(message=f"Memory tracing started in worker {os.getpid()}")
+
+
+@router.post("/memory/snapshot", response_model=MemoryReport)
+async def memory_snapshot(
+    limit: int = Query(25, ge=1, le=500),
+    group_by: Literal["lineno", "filename", "traceback"] = "lineno",
+):
+    """Top allocation sites, and growth since this worker's previous snapshot."""
+    try:
+        return await asyncio.to_thread(ProfilingService.snapshot, limit, group_by)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
+
+
+@router.post("/memory/stop", response_model=ResponseMessage)
+async def memory_stop():
+    ProfilingService.stop_tracing()
+    return ResponseMessage(message=f"Memory tracing stopped in worker {os.getpid()}")
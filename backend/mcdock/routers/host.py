@@ -0,0 +1,20 @@
+# routers/host.py
+import asyncio
+
+from fastapi import APIRouter, Security
+
+from ..services.capacity import CapacityService
+from ..services.models import HostCapacity
+from .security import require_user, UNAUTHORIZED
+
+router = APIRouter(
+    prefix="/host",
+    dependencies=[Security(require_user)],
+    responses=UNAUTHORIZED,
+)
+
+
+@router.get("/capacity", response_model=HostCapacity)
+async def host_capacity():
+    """Host RAM budget, what running/booting instances claim, and the headroom left."""
+    return await asyncio.to_thread(CapacityService.snapshot)
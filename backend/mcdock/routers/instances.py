@@ -4,28 +4,58 @@ This version aligns with the current DockerService & pydantic models and now
 **includes the server.properties GET/PUT endpoints**.
 """
 import asyncio
-import threading
-import re
 import json
 import logging
+import subprocess
+from datetime import datetime
 
 from fastapi import (
     APIRouter,
+    Header,
     HTTPException,
+    Query,
+    Request,
+    Response,
     WebSocket,
     WebSocketDisconnect,
     Security
 )
+from fastapi.responses import StreamingResponse
+from starlette.requests import ClientDisconnect
 
 from .models import (
     ResponseMessage,
     InstanceCreate,
     InstanceUpdate,
+    InstanceClone,
     InstanceInfo,
     CommandRequest,
+    OperationAccepted,
+    InstanceQueue,
+    QueuedOperation,
+    BulkRequest,
+    PregenCreate,
 )
+from ..core import metrics
+from ..core.conditional import NOT_MODIFIED, not_modified
+from ..core.models import InstanceStatus, OperationKind
+from ..services import process
+from ..services.boot import BootQueue
+from ..services.bulk import BulkService
+from ..services.capacity import CapacityService, InsufficientMemory
+from ..services.clone import CloneService
 from ..services.docker_service import DockerService
-from ..services.models import Instance
+from ..services.health import HealthService
+from ..services.imports import (
+    ImportService, OffsetMismatch, UploadBusy, ChecksumMismatch, InsufficientSpace,
+)
+from ..services.locks import InstanceLocks
+from ..services.models import Instance, BootEntry, HealthSample, ImportUpload, PregenJob
+from ..services.operations import OperationService
+from ..services.ping import PingService
+from ..services.pregen import PregenService
+from ..services.registry import InstanceRegistry
+from ..services.sleep import SleepService
 from .security import require_user, require_ws_user, UNAUTHORIZED
 
 
@@ -35,6 +65,13 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/instances", dependencies=[Security(require_user)], responses=UNAUTHORIZED)
 ws_router = APIRouter(prefix="/instances", responses=UNAUTHORIZED)
 
+
+def _validate_instance(name: str) -> None:
+    try:
+        DockerService.get_instance_dir(name)
+    except FileNotFoundError:
+        raise HTTPException(404, f"No such instance: {name}")
+
 # ---------------------------------------------------------------------------
 # Compose management
 # ---------------------------------------------------------------------------
@@ -44,24 +81,30 @@ ws_router = APIRouter(prefix="/instances", responses=UNAUTHORIZED)
 async def create_instance(body: InstanceCreate):
     """Create a new Minecraft instance on disk and write its compose file."""
     try:
-        DockerService.create_instance(
+        await DockerService.create_instance(
             instance_name=body.name,
             image=body.image,
             eula=body.eula,
             memory=body.memory,
             env=body.env,
             ports=body.ports,
+            tags=body.tags,
+            boot_priority=body.boot_priority,
         )
+    except InsufficientMemory as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
     except ValueError as e:
         raise HTTPException(status_code=500, detail=str(e)) from e
     return ResponseMessage(message=f"Instance '{body.name}' created successfully.")
 
 
-@router.get("/{instance_name}/compose", response_model=Instance)
-async def get_compose(instance_name: str):
+@router.get("/{instance_name}/compose", response_model=Instance, responses=NOT_MODIFIED)
+async def get_compose(instance_name: str, request: Request, response: Response):
     """Return the raw docker-compose.yml for *instance_name*."""
+    if cached := not_modified(request, response, DockerService.compose_tag(instance_name)):
+        return cached
     try:
-        return DockerService.get_compose(instance_name)
+        return await DockerService.get_compose(instance_name)
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e)) from e
     except ValueError as e:
@@ -72,13 +115,17 @@ async def get_compose(instance_name: str):
 async def update_compose(instance_name: str, body: InstanceUpdate):
     """Patch *docker-compose.yml* with any supplied fields."""
     try:
-        DockerService.update_compose(
+        await DockerService.update_compose(
             instance_name,
             eula=body.eula,
             memory=body.memory,
             env=body.env,
             ports=body.ports,
+            tags=body.tags,
+            boot_priority=body.boot_priority,
         )
+    except InsufficientMemory as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
     except ValueError as e:
         raise HTTPException(status_code=500, detail=str(e)) from e
     return ResponseMessage(message=f"docker-compose.yml for '{instance_name}' updated.")
@@ -87,11 +134,13 @@ async def update_compose(instance_name: str, body: InstanceUpdate):
 # server.properties management
 # ---------------------------------------------------------------------------
 
-@router.get("/{instance_name}/properties", response_model=dict[str, str])
-async def get_properties(instance_name: str):
+@router.get("/{instance_name}/properties", response_model=dict[str, str], responses=NOT_MODIFIED)
+async def get_properties(instance_name: str, request: Request, response: Response):
     """Return the key/value map from *server.properties*."""
+    if cached := not_modified(request, response, DockerService.properties_tag(instance_name)):
+        return cached
     try:
-        return DockerService.get_properties(instance_name)
+        return await DockerService.get_properties(instance_name)
     except ValueError as e:
         if "404" in str(e):
             raise HTTPException(status_code=404, detail=str(e)) from e
@@ -102,7 +151,7 @@ async def get_properties(instance_name: str):
 async def update_properties(instance_name: str, props: dict[str, str]):
     """Completely overwrite *server.properties* with *props*."""
     try:
-        DockerService.update_properties(instance_name, props)
+        await DockerService.update_properties(instance_name, props)
     except ValueError as e:
         if "404" in str(e):
             raise HTTPException(status_code=404, detail=str(e)) from e
@@ -114,52 +163,304 @@ async def update_properties(instance_name: str, props: dict[str, str]):
 # ---------------------------------------------------------------------------
 
 @router.get("/", response_model=list[InstanceInfo])
-async def list_instances():
-    """list all instances under *MC_ROOT* with their current status."""
+async def list_instances(
+    response: Response,
+    status: InstanceStatus | None = None,
+    tag: str | None = None,
+    q: str | None = Query(default=None, max_length=64),
+    limit: int | None = Query(default=None, ge=1, le=1000),
+    cursor: str | None = None,
+):
+    """
+    List instances from the registry with their last-known status, plus
+    players/version/MOTD/latency of running ones from a (cached) ping.
+
+    Filters combine with AND. When *limit* cuts the listing short, the
+    cursor for the next page is returned in the `X-Next-Cursor` header.
+    """
+    records, next_cursor = await asyncio.to_thread(
+        InstanceRegistry.query, status=status, tag=tag, q=q, limit=limit, cursor=cursor,
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    sleeping = await asyncio.to_thread(SleepService.sleeping)
+    live = await PingService.status_of([r for r in records if r.status == InstanceStatus.RUNNING])
+
+    items = []
+    for r in records:
+        status = live.get(r.name)
+        items.append(InstanceInfo(
+            **r.model_dump(),
+            **(status.model_dump() if status else {}),
+            sleeping=r.name in sleeping,
+        ))
+    return items
+
+
+async def _submit(kind: OperationKind, instance_name: str, func, verb: str) -> OperationAccepted:
+    """Queue a lifecycle operation; progress is at /operations/{id}."""
+    _validate_instance(instance_name)
+    if kind in (OperationKind.START, OperationKind.RESTART):
+        try:
+            await asyncio.to_thread(CapacityService.ensure_can_start, instance_name)
+        except InsufficientMemory as e:
+            raise HTTPException(409, str(e)) from e
+    op = await OperationService.submit(kind, instance_name, func, instance_name)
+    return OperationAccepted(message=f"{verb} '{instance_name}'", operation_id=op.id)
+
+
+@router.post("/{instance_name}/start", status_code=202, response_model=OperationAccepted)
+async def start_instance(instance_name: str):
+    return await _submit(OperationKind.START, instance_name, DockerService.start, "starting")
+
+
+@router.post("/{instance_name}/stop", status_code=202, response_model=OperationAccepted)
+async def stop_instance(instance_name: str):
+    return await _submit(OperationKind.STOP, instance_name, DockerService.stop, "stopping")
+
+
+@router.post("/{instance_name}/restart", status_code=202, response_model=OperationAccepted)
+async def restart_instance(instance_name: str):
+    return await _submit(OperationKind.RESTART, instance_name, DockerService.restart, "restarting")
+
+
+@router.delete("/{instance_name}", status_code=202, response_model=OperationAccepted)
+async def delete_instance(instance_name: str):
+    return await _submit(OperationKind.DELETE, instance_name, DockerService.delete, "deleting")
+
+
+@router.post("/{instance_name}/clone", status_code=202, response_model=OperationAccepted)
+async def clone_instance(instance_name: str, body: InstanceClone):
+    """
+    Create instance *body.name* as a copy of *instance_name* on the next
+    free host ports. data/ is reflinked where the filesystem supports it,
+    else hardlinked (stopped source) or copied (running source); the
+    source keeps running throughout.
+
+    A hardlink clone is near-instant and leaves the source's files alone;
+    an unshare operation then copies the clone's data/ in the background
+    (the clone pays, in disk space as well). A source started before that
+    copy has finished waits for it.
+    """
+    _validate_instance(instance_name)
+    if (DockerService.root / body.name).exists():
+        raise HTTPException(409, f"Instance already exists: {body.name}")
+    op = await OperationService.submit(
+        OperationKind.CLONE, instance_name, CloneService.clone,
+        instance_name, body.name, body.tags, key=body.name,
+    )
+    return OperationAccepted(message=f"cloning '{instance_name}' into '{body.name}'", operation_id=op.id)
+
+
+@router.post("/bulk")
+async def bulk_action(body: BulkRequest):
+    """
+    Apply one action to many instances, at most *parallelism* at a time.
+
+    Streams one JSON object per instance (NDJSON) as each finishes, so a
+    slow or failing instance never holds back the others' results.
+    """
+    targets = await asyncio.to_thread(BulkService.resolve, body.instances, body.tag)
+    if not targets:
+        raise HTTPException(404, "No instances matched.")
+
+    async def _lines():
+        async for item in BulkService.run(
+            body.action, targets, parallelism=body.parallelism, command=body.command,
+        ):
+            yield item.model_dump_json() + "\n"
+
+    return StreamingResponse(_lines(), media_type="application/x-ndjson")
+
+
+@router.get("/boot-queue", response_model=list[BootEntry])
+async def boot_queue():
+    """Instances booting (until they log "Done") and those waiting for a slot."""
+    return await asyncio.to_thread(BootQueue.snapshot)
+
+
+@router.get("/health", response_model=list[HealthSample])
+async def latest_health():
+    """Latest tick-health sample of every instance, with breached thresholds."""
+    return await asyncio.to_thread(HealthService.latest)
+
+
+@router.get("/{instance_name}/health", response_model=list[HealthSample])
+async def health_history(
+    instance_name: str,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    limit: int = Query(default=1000, ge=1, le=10000),
+):
+    """Tick-health time series of *instance_name*, oldest first."""
+    _validate_instance(instance_name)
+    return await asyncio.to_thread(
+        HealthService.history, instance_name, since=since, until=until, limit=limit
+    )
+
+
+@router.get("/{instance_name}/queue", response_model=InstanceQueue)
+async def instance_queue(instance_name: str):
+    """What is running on the instance and what waits behind it."""
+    _validate_instance(instance_name)
+    entries = [
+        QueuedOperation(kind=e.kind, key=e.key, operation_id=e.label, running=e.running)
+        for e in InstanceLocks.snapshot(instance_name)
+    ]
+    waiting = [e for e in entries if not e.running]
+    return InstanceQueue(
+        depth=len(waiting),
+        running=[e for e in entries if e.running],
+        waiting=waiting,
+    )
+
+# ---------------------------------------------------------------------------
+# World import
+# ---------------------------------------------------------------------------
+
+def _upload_error(e: ValueError) -> HTTPException:
+    if isinstance(e, OffsetMismatch):
+        return HTTPException(409, str(e), headers={"Upload-Offset": str(e.offset)})
+    if isinstance(e, UploadBusy):
+        return HTTPException(409, str(e))
+    if isinstance(e, ChecksumMismatch):
+        return HTTPException(422, str(e))
+    if isinstance(e, InsufficientSpace):
+        return HTTPException(507, str(e))
+    return HTTPException(400, str(e))
+
+
+@router.post(
+    "/{instance_name}/import",
+    response_model=ImportUpload,
+    responses={202: {"description": "Upload complete and verified; import queued"}},
+)
+async def import_world(
+    instance_name: str,
+    request: Request,
+    response: Response,
+    upload_length: int = Header(ge=1),
+    upload_checksum: str = Header(),
+    upload_id: str | None = Header(default=None),
+    upload_offset: int = Header(default=0, ge=0),
+):
+    """
+    Upload a zip or tar (.gz/.xz/.bz2) of a world or of a whole server
+    data/ directory, in one request or in many: each request's raw body is
+    written at Upload-Offset of the upload named by Upload-Id (none starts
+    a new one). After a broken request, continue from the `offset` of
+    GET .../import/{upload_id}.
+
+    Once all Upload-Length bytes are in and match Upload-Checksum
+    ("sha256=<hex>"), the import is queued as an operation (202): the
+    archive is extracted next to the instance and swapped in, with the
+    server stopped and a safety backup taken first.
+    """
+    _validate_instance(instance_name)
     try:
-        return [
-            InstanceInfo(name=inst_dir.name, status=DockerService.get_status(inst_dir.name))
-            for inst_dir in DockerService.get_instance_dirs()
-        ]
+        upload = await asyncio.to_thread(
+            ImportService.begin, instance_name, upload_id, upload_length, upload_checksum
+        )
+        upload = await ImportService.receive(upload, upload_offset, request.stream())
+        response.headers["Upload-Offset"] = str(upload.offset)
+        if upload.offset < upload.length:
+            return upload
+        upload = await ImportService.verify(upload)
+    except ClientDisconnect:
+        return Response(status_code=400)        # nobody listening; what arrived is kept
+    except FileNotFoundError as e:
+        raise HTTPException(404, str(e)) from e
     except ValueError as e:
-        raise HTTPException(status_code=500, detail=str(e)) from e
+        raise _upload_error(e) from e
 
+    op = await OperationService.submit(
+        OperationKind.IMPORT, instance_name, ImportService.import_world,
+        instance_name, upload.id, key=upload.id,
+    )
+    response.status_code = 202
+    return upload.model_copy(update={"operation_id": op.id})
 
-@router.post("/{instance_name}/start", response_model=ResponseMessage)
-async def start_instance(instance_name: str):
+
+@router.get("/{instance_name}/import/{upload_id}", response_model=ImportUpload)
+async def import_status(instance_name: str, upload_id: str, response: Response):
+    """How much of an upload has arrived (`offset`), to resume it from there."""
     try:
-        DockerService.start(instance_name)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) from e
-    return ResponseMessage(message="started")
+        upload = await asyncio.to_thread(ImportService.get, instance_name, upload_id)
+    except FileNotFoundError as e:
+        raise HTTPException(404, str(e)) from e
+    except ValueError as e:
+        raise _upload_error(e) from e
+    response.headers["Upload-Offset"] = str(upload.offset)
+    return upload
 
 
-@router.post("/{instance_name}/stop", response_model=ResponseMessage)
-async def stop_instance(instance_name: str):
+@router.delete("/{instance_name}/import/{upload_id}", status_code=204)
+async def abort_import(instance_name: str, upload_id: str):
+    """Discard an unfinished upload."""
     try:
-        DockerService.stop(instance_name)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) from e
-    return ResponseMessage(message="stopped")
+        await asyncio.to_thread(ImportService.abort, instance_name, upload_id)
+    except FileNotFoundError as e:
+        raise HTTPException(404, str(e)) from e
+    except ValueError as e:
+        raise _upload_error(e) from e
 
+# ---------------------------------------------------------------------------
+# World pre-generation
+# ---------------------------------------------------------------------------
 
-@router.post("/{instance_name}/restart", response_model=ResponseMessage)
-async def restart_instance(instance_name: str):
+@router.get("/{instance_name}/pregen", response_model=list[PregenJob])
+async def list_pregen_jobs(instance_name: str):
+    """Pre-generation jobs of the instance, newest first, with their progress."""
+    _validate_instance(instance_name)
+    return await asyncio.to_thread(PregenService.jobs, instance_name)
+
+
+@router.post("/{instance_name}/pregen", status_code=201, response_model=PregenJob)
+async def create_pregen_job(instance_name: str, body: PregenCreate):
+    """
+    Pre-generate the chunks of *world* within *radius* blocks of the centre,
+    through the Chunky plugin. The job starts once the server runs, pauses
+    while players are online or TPS is low, and carries on across restarts.
+    """
+    _validate_instance(instance_name)
     try:
-        DockerService.restart(instance_name)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) from e
-    return ResponseMessage(message="restarted")
+        return await asyncio.to_thread(
+            PregenService.create, instance_name, **body.model_dump()
+        )
+    except ValueError as e:
+        raise HTTPException(409, str(e)) from e
 
 
-@router.delete("/{instance_name}", status_code=204)
-async def delete_instance(instance_name: str):
+@router.get("/{instance_name}/pregen/{job_id}", response_model=PregenJob)
+async def get_pregen_job(instance_name: str, job_id: str):
     try:
-        DockerService.delete(instance_name)
-    except FileNotFoundError:
-        raise HTTPException(status_code=404, detail=f"No such instance: {instance_name}")
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) from e
+        return await asyncio.to_thread(PregenService.get, instance_name, job_id)
+    except FileNotFoundError as e:
+        raise HTTPException(404, str(e)) from e
+
+
+async def _pregen_action(action, instance_name: str, job_id: str) -> PregenJob:
+    try:
+        return await action(instance_name, job_id)
+    except FileNotFoundError as e:
+        raise HTTPException(404, str(e)) from e
+    except ValueError as e:
+        raise HTTPException(409, str(e)) from e
+
+
+@router.post("/{instance_name}/pregen/{job_id}/pause", response_model=PregenJob)
+async def pause_pregen_job(instance_name: str, job_id: str):
+    return await _pregen_action(PregenService.pause, instance_name, job_id)
+
+
+@router.post("/{instance_name}/pregen/{job_id}/resume", response_model=PregenJob)
+async def resume_pregen_job(instance_name: str, job_id: str):
+    return await _pregen_action(PregenService.resume, instance_name, job_id)
+
+
+@router.post("/{instance_name}/pregen/{job_id}/cancel", response_model=PregenJob)
+async def cancel_pregen_job(instance_name: str, job_id: str):
+    return await _pregen_action(PregenService.cancel, instance_name, job_id)
 
 # ---------------------------------------------------------------------------
 # RCON command
@@ -172,8 +473,9 @@ async def send_command(instance_name: str, body: CommandRequest):
         raise HTTPException(status_code=400, detail="Missing 'command' field")
 
     try:
-        output = DockerService.send_command(instance_name=instance_name, command=cmd)
-
+        output = await DockerService.send_command(instance_name=instance_name, command=cmd)
+    except TimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e)) from e
     except Exception as e:                            # timeouts, I/O, etc.
         raise HTTPException(status_code=500, detail=str(e)) from e
 
@@ -189,35 +491,17 @@ async def websocket_logs(
     _ = Security(require_ws_user),   # auth during handshake
 ):
     await websocket.accept()
-    proc = DockerService.stream_logs(instance_name) # Blocking
-
-    loop   = asyncio.get_running_loop()
-    queue  = asyncio.Queue[str]()
-
-    # ---------- thread: read docker logs ----------
-    def reader():
-        try:
-            for raw in proc.stdout:                       # blocking read
-                line = raw.decode(errors="ignore")
-                asyncio.run_coroutine_threadsafe(
-                    queue.put(line), loop
-                )
-        finally:
-            proc.stdout.close()
-
-    thread = threading.Thread(target=reader, daemon=True)
-    thread.start()
-    # ----------------------------------------------
+    proc = await DockerService.stream_logs(instance_name)
 
+    metrics.WS_SUBSCRIBERS.inc(stream="logs")
     try:
-        while True:
-            line = await queue.get()          # non-blocking for event-loop
-            await websocket.send_text(line)
+        while raw := await proc.stdout.readline():    # b"" on EOF
+            await websocket.send_text(raw.decode(errors="ignore"))
     except WebSocketDisconnect:
         pass
     finally:
-        proc.terminate()
-        thread.join(timeout=1)
+        metrics.WS_SUBSCRIBERS.dec(stream="logs")
+        await process.terminate(proc)
 
 @ws_router.websocket("/{instance_name}/stats")
 async def websocket_stats(
@@ -226,47 +510,25 @@ async def websocket_stats(
     _ = Security(require_ws_user),
 ):
     await websocket.accept()
-    proc = DockerService.stream_stats(instance_name)
-
-    loop   = asyncio.get_running_loop()
-    queue  = asyncio.Queue[str]()
-
-    # background thread: push each line into the asyncio queue
-    def reader():
-        try:
-            for raw in proc.stdout:
-                asyncio.run_coroutine_threadsafe(queue.put(raw), loop)
-        finally:
-            proc.stdout.close()
-
-    threading.Thread(target=reader, daemon=True).start()
-
-    # regex to pull the numeric part out of "742.6MiB"
-    mem_re = re.compile(r"([\d\.]+)([KMG]i?)B", re.I)
-    ansi_re = re.compile(r"\x1B\[[0-?]*[ -/]*[@-~]")
-    unit_factor = {"Ki": 1/1024, "Mi": 1, "Gi": 1024}
+    try:
+        proc = await DockerService.stream_stats(instance_name)
+    except (ValueError, TimeoutError, subprocess.CalledProcessError):
+        await websocket.close()
+        return
 
+    metrics.WS_SUBSCRIBERS.inc(stream="stats")
     try:
-        while True:
-            raw = await queue.get()
-
-            try:
-                clean = ansi_re.sub("", raw).strip()
-                item = json.loads(clean)
-                cpu = float(item["CPUPerc"].rstrip("%"))
-
-                # "742.6MiB / 3.7GiB"  -> 742.6 MiB
-                mem_used = item["MemUsage"].split("/")[0].strip()
-                val, unit = mem_re.match(mem_used).groups()  # e.g. ("742.6", "Mi")
-                mem_mib = float(val) * unit_factor[unit]
-
-                await websocket.send_text(
-                    json.dumps({"cpu": cpu, "mem": round(mem_mib, 1)})
-                )
-            except Exception:
-                # ignore malformed lines
-                continue
+        while raw := await proc.stdout.readline():
+            parsed = DockerService.parse_stats(raw.decode(errors="ignore"))
+            if parsed is None:
+                continue                                # ignore malformed lines
+            _, cpu, mem_mib = parsed
+
+            await websocket.send_text(
+                json.dumps({"cpu": cpu, "mem": round(mem_mib, 1)})
+            )
     except WebSocketDisconnect:
         pass
     finally:
-        proc.terminate()
+        metrics.WS_SUBSCRIBERS.dec(stream="stats")
+        await process.terminate(proc)
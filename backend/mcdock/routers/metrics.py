@@ -0,0 +1,73 @@
+# routers/metrics.py
+import asyncio
+
+from fastapi import APIRouter, Security
+from fastapi.responses import PlainTextResponse
+
+from ..core import metrics
+from ..core.models import InstanceStatus
+from ..services.health import HealthService
+from ..services.registry import InstanceRegistry
+from ..services.sleep import SleepService
+from .security import require_metrics, UNAUTHORIZED
+
+router = APIRouter(
+    dependencies=[Security(require_metrics)],
+    responses=UNAUTHORIZED,
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# (metric, help, HealthSample field, scale)
+_HEALTH_GAUGES = [
+    ("mcdock_instance_cpu_percent", "CPU usage in percent of one core.", "cpu", 1),
+    ("mcdock_instance_memory_bytes", "Container memory usage.", "mem_mib", 2 ** 20),
+    ("mcdock_instance_players", "Players online.", "players", 1),
+    ("mcdock_instance_players_max", "Player slots.", "players_max", 1),
+    ("mcdock_instance_tps", "Ticks per second (Paper, 1m average).", "tps", 1),
+    ("mcdock_instance_mspt", "Milliseconds per tick (Paper, 5s average).", "mspt", 1),
+]
+
+
+def _instance_families() -> str:
+    """Per-instance gauges from the registry and the latest health samples — no docker calls."""
+    records, _ = InstanceRegistry.query()
+    running = {r.name for r in records if r.status == InstanceStatus.RUNNING}
+    sleeping = SleepService.sleeping()
+    samples = [s for s in HealthService.latest() if s.instance in running]
+
+    out = [
+        metrics.render_family(
+            "mcdock_instance_status", "gauge", "1 for the instance's current status.",
+            ("instance", "status"),
+            [((r.name, st.value), int(r.status == st)) for r in records for st in InstanceStatus],
+        ),
+        metrics.render_family(
+            "mcdock_instance_sleeping", "gauge", "1 while stopped for idleness and waiting for a login.",
+            ("instance",), [((r.name,), int(r.name in sleeping)) for r in records],
+        ),
+        metrics.render_family(
+            "mcdock_instance_sample_timestamp_seconds", "gauge", "When the health sample below was taken.",
+            ("instance",), [((s.instance,), s.at.timestamp()) for s in samples],
+        ),
+    ]
+    for name, help, field, scale in _HEALTH_GAUGES:
+        values = [
+            ((s.instance,), getattr(s, field) * scale)
+            for s in samples if getattr(s, field) is not None
+        ]
+        out.append(metrics.render_family(name, "gauge", help, ("instance",), values))
+    return "".join(out)
+
+
+def _exposition() -> str:
+    return _instance_families() + metrics.render(metrics.collect())
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """
+    Prometheus text exposition of every worker's metrics plus per-instance
+    gauges. Built from cached state only, so scraping never runs docker.
+    """
+    return PlainTextResponse(await asyncio.to_thread(_exposition), media_type=CONTENT_TYPE)
@@ -1,6 +1,12 @@
-from pydantic import BaseModel, Field, field_validator
+from datetime import datetime
+from typing import Annotated
 
-from ..core.models import PortBinding, EnvVar, ConnectionType, InstanceStatus
+from pydantic import BaseModel, Field, field_validator, model_validator
+
+from ..core.config import settings
+from ..core.models import PortBinding, EnvVar, ConnectionType, InstanceStatus, OperationKind, BulkAction, PregenShape
+
+Tag = Annotated[str, Field(pattern=r"^[A-Za-z0-9_.-]+$", max_length=32)]
 
 class InstanceCreate(BaseModel):
     name:        str  = Field(pattern=r"^[A-Za-z0-9_-]+$")
@@ -9,6 +15,8 @@ class InstanceCreate(BaseModel):
     memory:      str = Field(default="4G", pattern=r"^[1-9]\d*[MG]$")
     env:         list[EnvVar] = []
     ports:       list[PortBinding] = Field(default_factory=lambda: [PortBinding(host_port=25565, container_port=25565, type=ConnectionType.TCP)])
+    tags:        list[Tag] = []
+    boot_priority: int = Field(default=0, ge=-100, le=100, description="Higher boots first")
 
     @classmethod
     @field_validator("image")
@@ -22,6 +30,19 @@ class InstanceUpdate(BaseModel):
     memory:     str = Field(pattern=r"^[1-9]\d*[MG]$")
     env:        list[EnvVar]
     ports:      list[PortBinding]
+    tags:       list[Tag] | None = None     # None keeps the current tags
+    boot_priority: int | None = Field(default=None, ge=-100, le=100)
+
+class InstanceClone(BaseModel):
+    name:       str = Field(pattern=r"^[A-Za-z0-9_-]+$")
+    tags:       list[Tag] | None = None     # None copies the source's tags
+
+class PregenCreate(BaseModel):
+    radius:     int = Field(ge=16, le=1_000_000, description="Blocks from the centre")
+    shape:      PregenShape = PregenShape.SQUARE
+    center_x:   int = Field(default=0, ge=-30_000_000, le=30_000_000)
+    center_z:   int = Field(default=0, ge=-30_000_000, le=30_000_000)
+    world:      str = Field(default="world", pattern=r"^[A-Za-z0-9_.:/-]+$", max_length=64)
 
 class InstanceInfo(BaseModel):
     """
@@ -29,16 +50,61 @@ class InstanceInfo(BaseModel):
     """
     name: str = Field(description="Name of the instance folder")
     status: InstanceStatus = Field(description="Current status: e.g., 'running' or 'stopped'")
+    image: str | None = None
+    memory: str | None = None
+    ports: list[PortBinding] = []
+    tags: list[str] = []
+    boot_priority: int = 0
+    created_at: datetime | None = None
+    sleeping: bool = Field(default=False, description="Stopped while idle; wakes on the next login")
+    # live Server List Ping fields, only for running instances that answered
+    players_online: int | None = None
+    players_max: int | None = None
+    version: str | None = None
+    motd: str | None = None
+    latency_ms: float | None = None
 
 class CommandRequest(BaseModel):
     command: str
 
+class BulkRequest(BaseModel):
+    """One action over an explicit list of instances or every instance with *tag*."""
+    action:      BulkAction
+    instances:   list[str] = []
+    tag:         Tag | None = None
+    command:     str | None = None          # required for action=command
+    parallelism: int = Field(default_factory=lambda: settings.BULK_PARALLELISM, ge=1, le=64)
+
+    @model_validator(mode="after")
+    def check_target(self) -> "BulkRequest":
+        if bool(self.instances) == (self.tag is not None):
+            raise ValueError("Give either 'instances' or 'tag'.")
+        if self.action == BulkAction.COMMAND and not self.command:
+            raise ValueError("'command' is required for action 'command'.")
+        return self
+
 class CronSchedule(BaseModel):
     cron: str  # e.g. "0 0 * * *" for midnight daily
 
 class ResponseMessage(BaseModel):
     message: str
 
+class OperationAccepted(ResponseMessage):
+    """Reply for lifecycle requests that continue in the background."""
+    operation_id: str
+
+class QueuedOperation(BaseModel):
+    kind: OperationKind
+    key: str | None = None
+    operation_id: str | None = None
+    running: bool
+
+class InstanceQueue(BaseModel):
+    """Operations holding or waiting for an instance (this worker's view)."""
+    depth: int = Field(description="Operations waiting behind the running ones")
+    running: list[QueuedOperation]
+    waiting: list[QueuedOperation]
+
 class ScheduledJob(BaseModel):
     id: str
     schedule: str         # the trigger spec (cron or date)
@@ -50,4 +116,21 @@ class LoginBody(BaseModel):
 
 class TokenResponse(BaseModel):
     token: str
-    user: str
\ No newline at end of file
+    user: str
+
+
+class TimingStat(BaseModel):
+    """Latency percentiles of one histogram series, across all workers."""
+    name: str
+    count: int
+    mean_ms: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+
+class TimingReport(BaseModel):
+    routes: list[TimingStat]        # "GET /instances/{instance_name}/compose"
+    subprocesses: list[TimingStat]  # "compose ps"
+    operations: list[TimingStat]    # "DockerService.get_compose", "bcrypt.checkpw"
+    slowest: list[dict]             # this worker's slowest recent calls, as span trees
+    worker: int
@@ -0,0 +1,82 @@
+import asyncio
+import json
+
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect, Security
+
+from ..core import metrics
+from ..services.models import Operation
+from ..services.operations import OperationService
+from .security import require_user, require_ws_user, UNAUTHORIZED
+
+router = APIRouter(
+    prefix="/operations",
+    dependencies=[Security(require_user)],
+    responses=UNAUTHORIZED,
+)
+ws_router = APIRouter(prefix="/operations", responses=UNAUTHORIZED)
+
+# how often a socket re-checks the shared DB for changes made by other workers
+_POLL_SECONDS = 1.0
+
+
+async def _until_closed(websocket: WebSocket) -> None:
+    """Swallow client messages; return once the client disconnects."""
+    try:
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+
+
+@router.get("/", response_model=list[Operation])
+async def list_operations(instance: str | None = None):
+    """Operations still within their retention window, newest first."""
+    return await asyncio.to_thread(OperationService.recent, instance)
+
+
+@router.get("/{operation_id}", response_model=Operation)
+async def get_operation(operation_id: str):
+    op = await asyncio.to_thread(OperationService.get, operation_id)
+    if op is None:
+        raise HTTPException(404, f"No such operation: {operation_id}")
+    return op
+
+
+@ws_router.websocket("/ws")
+async def websocket_operations(
+    websocket: WebSocket,
+    instance: str | None = None,
+    _ = Security(require_ws_user),
+):
+    """
+    Push every operation state change (optionally for one *instance*) as a
+    JSON object, starting from the moment the socket connects.
+    """
+    await websocket.accept()
+
+    wake = OperationService.subscribe()
+    closed = asyncio.create_task(_until_closed(websocket))
+    seq = await asyncio.to_thread(OperationService.last_seq)
+
+    metrics.WS_SUBSCRIBERS.inc(stream="operations")
+    try:
+        while not closed.done():
+            changed, seq = await asyncio.to_thread(OperationService.changes_since, seq)
+            for op in changed:
+                if instance is None or op.instance == instance:
+                    await websocket.send_text(json.dumps(op.model_dump(mode="json")))
+
+            woken = asyncio.create_task(wake.wait())
+            await asyncio.wait(
+                {closed, woken},
+                timeout=_POLL_SECONDS,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            woken.cancel()
+            wake.clear()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        metrics.WS_SUBSCRIBERS.dec(stream="operations")
+        OperationService.unsubscribe(wake)
+        closed.cancel()
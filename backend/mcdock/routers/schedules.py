@@ -2,17 +2,21 @@ import logging
 
 from hashlib import blake2s
 from datetime import UTC
+from typing import TYPE_CHECKING
 from fastapi import APIRouter, HTTPException, Request, Security
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from apscheduler.triggers.cron import CronTrigger
-from apscheduler.jobstores.base import JobLookupError
-from apscheduler.job import Job
 
 from .models import ResponseMessage, CronSchedule, ScheduledJob
+from ..core.models import OperationKind
 from ..services.backup_service import BackupService
 from ..services.docker_service import DockerService
+from ..services.operations import OperationService
 from .security import require_user, UNAUTHORIZED
 
+if TYPE_CHECKING:                       # APScheduler is imported with the scheduler, after boot
+    from apscheduler.schedulers.asyncio import AsyncIOScheduler
+    from apscheduler.triggers.cron import CronTrigger
+    from apscheduler.job import Job
+
 router = APIRouter(
     prefix="/schedules",
     dependencies=[Security(require_user)],
@@ -22,6 +26,24 @@ router = APIRouter(
 logger = logging.getLogger(__name__)
 
 
+async def _scheduler(request: Request) -> "AsyncIOScheduler":
+    """The app's scheduler; waits for it if the lifespan is still starting it."""
+    ready = getattr(request.app.state, "scheduler_ready", None)
+    if ready is not None:
+        await ready.wait()
+    sched = request.app.state.scheduler
+    if sched is None:
+        raise HTTPException(503, "Scheduler is not running")
+    return sched
+
+def _cron_trigger(cron: str) -> "CronTrigger":
+    from apscheduler.triggers.cron import CronTrigger
+
+    try:
+        return CronTrigger.from_crontab(cron)
+    except ValueError as e:
+        raise HTTPException(400, f"Invalid cron expression: {e}")
+
 def _validate_instance(name: str) -> None:
     try:
         DockerService.get_instance_dir(name)
@@ -61,7 +83,7 @@ def _cron_to_bucket(cron_spec: str) -> str:
 
     return _hash_tag(cron_spec)
 
-def _cron_from_trigger(trigger: CronTrigger) -> str:
+def _cron_from_trigger(trigger: "CronTrigger") -> str:
     try:
         options = [str(f) for f in trigger.fields if not f.is_default]
         return " ".join(reversed(options))
@@ -70,9 +92,9 @@ def _cron_from_trigger(trigger: CronTrigger) -> str:
 
 @router.get("/{instance}", response_model=list[ScheduledJob])
 async def list_instance_schedules(instance: str, request: Request):
-    sched: AsyncIOScheduler = request.app.state.scheduler
+    sched = await _scheduler(request)
 
-    all_jobs: list[Job] = sched.get_jobs()
+    all_jobs: list["Job"] = sched.get_jobs()
 
     jobs = [
         j for j in all_jobs
@@ -108,10 +130,7 @@ async def schedule_recurring_backup(
     _validate_instance(instance)
 
     # 1) validate & parse cron
-    try:
-        trigger = CronTrigger.from_crontab(body.cron)
-    except ValueError as e:
-        raise HTTPException(400, f"Invalid cron expression: {e}")
+    trigger = _cron_trigger(body.cron)
 
     bucket = _cron_to_bucket(body.cron)
     if bucket == BackupService.triggered_dirname:
@@ -119,13 +138,13 @@ async def schedule_recurring_backup(
         bucket = _hash_tag(body.cron)
 
     # 2) register (or replace) the APScheduler job
-    sched: AsyncIOScheduler = request.app.state.scheduler
+    sched = await _scheduler(request)
     job_id = f"cron_backup_{instance}_{bucket}"
 
     sched.add_job(
-        BackupService.trigger_backup,
+        OperationService.run_scheduled,
         trigger=trigger,
-        args=[instance, bucket],
+        args=[OperationKind.BACKUP, instance, bucket],
         id=job_id,
         replace_existing=True,
         max_instances=1
@@ -152,18 +171,15 @@ async def schedule_recurring_restart(
 ):
     _validate_instance(instance)
 
-    try:
-        trigger = CronTrigger.from_crontab(body.cron)
-    except ValueError as e:
-        raise HTTPException(400, f"Invalid cron expression: {e}")
+    trigger = _cron_trigger(body.cron)
 
-    sched: AsyncIOScheduler = request.app.state.scheduler
+    sched = await _scheduler(request)
     job_id = f"cron_restart_{instance}"
 
     sched.add_job(
-        DockerService.restart,
+        OperationService.run_scheduled,
         trigger=trigger,
-        args=[instance],
+        args=[OperationKind.RESTART, instance],
         id=job_id,
         replace_existing=True,
         max_instances=1
@@ -175,7 +191,9 @@ async def schedule_recurring_restart(
 
 @router.delete("/{job_id}", status_code=204)
 async def delete_schedule(job_id: str, request: Request):
-    sched: AsyncIOScheduler = request.app.state.scheduler
+    sched = await _scheduler(request)
+    from apscheduler.jobstores.base import JobLookupError
+
     try:
         sched.remove_job(job_id)
     except JobLookupError:
@@ -1,13 +1,24 @@
+import asyncio
 import bcrypt
+import functools
+import hmac
+import math
+import re
+import secrets
 from datetime import datetime, UTC
 from typing import Annotated
 
 from fastapi import HTTPException, status, Security
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi import WebSocket, WebSocketDisconnect
-from jose import jwt, JWTError
+from jose import JWTError
+from starlette.requests import HTTPConnection
+from starlette.routing import compile_path
 
+from ..core import ratelimit
 from ..core.config import settings
+from ..core.timing import timed
+from ..services.tokens import TokenService
 from .models import LoginBody, TokenResponse
 
 
@@ -19,19 +30,96 @@ _HASH_BYTES = settings.PASSWORD_HASH.encode()
 
 bearer_scheme = HTTPBearer(auto_error=False)
 
+@functools.cache
+def _dummy_hash() -> bytes:
+    """A hash as costly to check as the real one, for the failure path."""
+    try:
+        rounds = int(_HASH_BYTES.split(b"$")[2])
+    except (IndexError, ValueError):
+        rounds = 12
+    return bcrypt.hashpw(secrets.token_bytes(16), bcrypt.gensalt(rounds))
+
+@timed("bcrypt.checkpw")
 def _verify_password(raw: str) -> bool:
     if not _HASH_BYTES:
+        bcrypt.checkpw(raw.encode(), _dummy_hash())      # same cost, always fails
         return False
     return bcrypt.checkpw(raw.encode(), _HASH_BYTES)
 
+def _verify_login(username: str, password: str) -> bool:
+    """
+    Constant-time credential check: bcrypt runs whether or not the user name
+    matches, so response time does not reveal which part was wrong.
+    """
+    user_ok = hmac.compare_digest(username.encode(), settings.USER.encode())
+    if not user_ok:
+        bcrypt.checkpw(password.encode(), _dummy_hash())
+        return False
+    return _verify_password(password)
+
 def _create_token() -> str:
-    exp = datetime.now(UTC) + settings.JWT_TTL   # aware datetime
-    payload = {"sub": settings.USER, "exp": exp}
+    now = datetime.now(UTC)
+    payload = {
+        "sub": settings.USER,
+        "iat": now,
+        "exp": now + settings.JWT_TTL,
+        "jti": secrets.token_hex(8),        # tokens issued in the same second differ
+    }
+    from jose import jwt                    # pulls in the crypto backends; not needed to boot
+
     return jwt.encode(payload, settings.JWT_SECRET, algorithm=settings.HASH_ALGO)
 
+def _route_rules(specs: dict[str, str | None]) -> list[tuple[str, re.Pattern, str, tuple | None]]:
+    """{"POST /api/auth/login": "10/minute"} -> [(method, path regex, key, limit)]."""
+    rules = []
+    for route, spec in specs.items():
+        method, _, path = route.partition(" ")
+        rules.append((method.upper(), compile_path(path)[0], route,
+                      ratelimit.parse_limit(spec) if spec else None))
+    return rules
+
+_LIMITED = _route_rules(
+    {r: None for r in settings.RATE_LIMIT_EXEMPT} | settings.RATE_LIMIT_ROUTES
+)
+_DEFAULT_LIMIT = ratelimit.parse_limit(settings.RATE_LIMIT_DEFAULT)
+
+def _principal(conn: HTTPConnection) -> str:
+    """The session when its token is known-good in this worker, else the client address."""
+    header = conn.headers.get("authorization", "")
+    if header[:7].lower() == "bearer " and TokenService.is_verified(token := header[7:]):
+        return "t:" + token[-16:]                       # signature tail: unique per token
+    return "a:" + (conn.client.host if conn.client else "-")
+
 # ─────────────────────────── dependencies ────────────────────────
-def login_body(body: LoginBody) -> TokenResponse:
-    if body and body.username == settings.USER and _verify_password(body.password):
+async def rate_limit(conn: HTTPConnection) -> None:
+    """
+    Token bucket per (route, caller), shared by all workers. Runs before auth,
+    so an unauthenticated flood is throttled by address. Websocket upgrades are
+    not limited here (they are long-lived and authenticated on connect).
+    """
+    if not settings.RATE_LIMIT_ENABLED or conn.scope["type"] != "http":
+        return
+    method, path = conn.scope["method"], conn.url.path
+    for rule_method, regex, key, limit in _LIMITED:
+        if rule_method == method and regex.match(path):
+            if limit is None:
+                return
+            break
+    else:
+        key = f"{method} {conn.scope['route'].path}"
+        limit = _DEFAULT_LIMIT
+
+    wait = ratelimit.BUCKETS.take(f"{key}|{_principal(conn)}", *limit)
+    if wait:
+        raise HTTPException(
+            status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Rate limit exceeded",
+            headers={"Retry-After": str(math.ceil(wait))},
+        )
+
+async def login_body(body: LoginBody) -> TokenResponse:
+    # bcrypt takes ~0.2 s of CPU; keep it off the event loop
+    if body and await asyncio.to_thread(_verify_login, body.username, body.password):
         return TokenResponse(token=_create_token(), user=settings.USER)
     raise HTTPException(status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
@@ -42,16 +130,23 @@ def require_user(
         raise HTTPException(status.HTTP_401_UNAUTHORIZED, detail="Missing token")
 
     try:
-        payload = jwt.decode(
-            credentials.credentials,
-            settings.JWT_SECRET,
-            algorithms=[settings.HASH_ALGO],
-        )
-        if payload.get("sub") != settings.USER:
-            raise JWTError()
+        TokenService.verify(credentials.credentials)
     except JWTError:
         raise HTTPException(status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-    
+
+def require_metrics(
+    credentials: Annotated[HTTPAuthorizationCredentials | None, Security(bearer_scheme)]
+):
+    """Like `require_user`, but also accepts the static METRICS_TOKEN of a scraper."""
+    if (
+        settings.METRICS_TOKEN
+        and credentials
+        and credentials.scheme.lower() == "bearer"
+        and hmac.compare_digest(credentials.credentials.encode(), settings.METRICS_TOKEN.encode())
+    ):
+        return
+    require_user(credentials)
+
 async def require_ws_user(ws: WebSocket) -> None:
     """
     Validate JWT for a WebSocket connection.
@@ -75,13 +170,8 @@ async def require_ws_user(ws: WebSocket) -> None:
         raise WebSocketDisconnect
 
     try:
-        payload = jwt.decode(
-            token,
-            settings.JWT_SECRET,
-            algorithms=[settings.HASH_ALGO],  # e.g. "HS256"
-        )
-        if payload.get("sub") != settings.USER:
-            raise JWTError()
+        # a cache miss decodes the JWT and may re-read revocations from sqlite
+        await asyncio.to_thread(TokenService.verify, token)
     except JWTError:
         await ws.close(code=status.WS_1008_POLICY_VIOLATION)
-        raise WebSocketDisconnect
\ No newline at end of file
+        raise WebSocketDisconnect
@@ -0,0 +1,20 @@
+# routers/usage.py
+import asyncio
+
+from fastapi import APIRouter, Security
+
+from ..services.models import UsageReport
+from ..services.usage import UsageService
+from .security import require_user, UNAUTHORIZED
+
+router = APIRouter(
+    prefix="/usage",
+    dependencies=[Security(require_user)],
+    responses=UNAUTHORIZED,
+)
+
+
+@router.get("", response_model=UsageReport)
+async def disk_usage():
+    """Bytes per instance (by dimension, logs, plugins) and backup bucket, with growth trends."""
+    return await asyncio.to_thread(UsageService.report)
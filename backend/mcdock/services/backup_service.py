@@ -1,21 +1,45 @@
+import asyncio
+import logging
+import subprocess
 import tarfile
 import time
+from contextlib import asynccontextmanager
 from datetime import datetime, UTC
 from pathlib import Path, PurePosixPath
 
+from ..core import metrics
+from ..core.conditional import TagCache, tree_tag
 from ..core.config import settings
 from ..core.models import InstanceStatus
+from ..core.timing import timed
 from .docker_service import DockerService
 
+logger = logging.getLogger(__name__)
+
+
 class BackupService:
     """
     Service for managing backups entirely in Python—no external scripts.
+
+    Archive work (tar/gzip, unlink, directory walks) runs in worker threads
+    so the event loop stays responsive during multi-GB backups.
     """
 
     root = Path(settings.MC_ROOT)
     backups_root = root / "backups"
     triggered_dirname = "triggered"
     restored_dirname = "OLD_restored"
+    _listings = TagCache(settings.READ_CACHE_SIZE)     # instance -> list_backups result
+
+    @classmethod
+    def forget(cls, instance_name: str) -> None:
+        """Drop the cached listing of *instance_name* after adding or removing archives."""
+        cls._listings.discard(instance_name)
+
+    @classmethod
+    def listing_tag(cls, instance_name: str) -> str:
+        """ETag of `list_backups(instance_name)`: directory stats, no walk."""
+        return tree_tag(cls.backups_root / instance_name)
 
     @classmethod
     def _get_backup_dir(cls, instance_name: str, bucket: str) -> Path:
@@ -27,49 +51,102 @@ class BackupService:
         return inst_root
 
     @classmethod
-    def list_backups(cls, instance_name: str) -> list[str]:
+    @timed()
+    async def list_backups(cls, instance_name: str) -> list[str]:
+        return await asyncio.to_thread(cls._list_backups, instance_name)
+
+    @classmethod
+    @timed()
+    def _list_backups(cls, instance_name: str) -> list[str]:
+        tag = cls.listing_tag(instance_name)
+        if (cached := cls._listings.get(instance_name, tag)) is not None:
+            return list(cached)
+
         root = cls.backups_root / instance_name
         if not root.exists():
             return []
-        return sorted(
+        listing = sorted(
             p.relative_to(root).as_posix()
             for p in root.rglob("*.tar.gz")
         )[::-1]
+        cls._listings.put(instance_name, tag, tuple(listing))
+        return listing
 
     @classmethod
-    def trigger_backup(cls, instance_name: str, bucket: str = triggered_dirname) -> None:
+    @timed()
+    async def trigger_backup(cls, instance_name: str, bucket: str = triggered_dirname) -> None:
         """
         bucket = 'triggered' | '5m' | '1h' | ...
         """
+        started = time.perf_counter()
+        try:
+            size = await cls._trigger_backup(instance_name, bucket)
+        except Exception:
+            metrics.BACKUPS.inc(instance=instance_name, outcome="failed")
+            raise
+        metrics.BACKUPS.inc(instance=instance_name, outcome="ok")
+        metrics.BACKUP_DURATION.observe(time.perf_counter() - started, instance=instance_name)
+        metrics.BACKUP_SIZE.observe(size, instance=instance_name)
+
+    @classmethod
+    async def _trigger_backup(cls, instance_name: str, bucket: str) -> int:
+        """Write the archive; returns its size in bytes."""
         inst_dir   = DockerService.get_instance_dir(instance_name)
         data_dir   = inst_dir / "data"
         backup_dir = cls._get_backup_dir(instance_name, bucket)
-        status     = DockerService.get_status(instance_name)
-
-        if status == InstanceStatus.RUNNING:
-            # 1) Pause and flush saves
-            DockerService.send_command(instance_name, "save-off")
-            DockerService.send_command(instance_name, "save-all")
-            time.sleep(3)  # wait for disk I/O
 
-        # 2) Create the archive
+        # 1) Create the archive, saves paused and flushed
         ts   = datetime.now(UTC).strftime("%Y-%m-%d-%H-%M")
         name = f"{bucket}-{ts}.tar.gz" if bucket != cls.triggered_dirname and bucket != cls.restored_dirname else f"{ts}.tar.gz"
-        with tarfile.open(backup_dir / name, "w:gz") as tar:
-            tar.add(data_dir, arcname="data")
+        async with cls.saves_paused(instance_name):
+            await asyncio.to_thread(cls._write_archive, backup_dir / name, data_dir)
+            size = (backup_dir / name).stat().st_size
 
-        if status == InstanceStatus.RUNNING:
-            # 3) Resume saves
-            DockerService.send_command(instance_name, "save-on")
+        # 2) Prune old backups
+        await asyncio.to_thread(cls._prune, backup_dir)
+        cls.forget(instance_name)
+        return size
 
-        # 4) Prune old backups
+    @classmethod
+    @asynccontextmanager
+    async def saves_paused(cls, instance_name: str):
+        """
+        Hold the world still on disk: a running server flushes everything
+        and stops saving until the block ends. Yields whether it was running.
+        """
+        running = await DockerService.get_status(instance_name) == InstanceStatus.RUNNING
+        try:
+            if running:
+                await DockerService.send_command(instance_name, "save-off")
+                await DockerService.send_command(instance_name, "save-all")
+                await asyncio.sleep(3)  # wait for disk I/O
+            yield running
+        finally:
+            if running:
+                try:
+                    await DockerService.send_command(instance_name, "save-on")
+                except (subprocess.CalledProcessError, TimeoutError, OSError) as e:
+                    # stopped or restarted meanwhile (see locks._COMPATIBLE); a
+                    # fresh server process saves again anyway
+                    logger.info("save-on for %s not sent: %s", instance_name, e)
+
+    @staticmethod
+    @timed()
+    def _write_archive(archive: Path, data_dir: Path) -> None:
+        with tarfile.open(archive, "w:gz") as tar:
+            tar.add(data_dir, arcname="data")
+
+    @staticmethod
+    @timed()
+    def _prune(backup_dir: Path) -> None:
         max_keep = settings.BACKUP_RETENTION
         stale = sorted(backup_dir.glob("*.tar.gz"), reverse=True)[max_keep:]
         for old in stale:
             old.unlink(missing_ok=True)
 
     @classmethod
-    def restore_backup(cls, instance: str, rel_path: str) -> None:
+    @timed()
+    async def restore_backup(cls, instance: str, rel_path: str) -> None:
         """
         *rel_path* **must** be one of the strings returned by
         `list_backups`, e.g. '5m/2025-07-02-23-45.tar.gz'.
@@ -89,17 +166,30 @@ class BackupService:
         # ── stop server & make **automatic safety snapshot**
         inst_dir = DockerService.get_instance_dir(instance)
 
-        DockerService.stop(instance)
-        cls.trigger_backup(instance, bucket=cls.restored_dirname)
+        await DockerService.stop(instance)
+        await cls.trigger_backup(instance, bucket=cls.restored_dirname)
+
+        # ── unpack (tar overwrites files in place: no inodes shared with a clone)
+        await DockerService.unshare(instance)
+        await asyncio.to_thread(cls._extract_archive, archive, inst_dir)
+        DockerService.forget(instance)
 
-        # ── unpack
+        await DockerService.start(instance)
+
+    @staticmethod
+    @timed()
+    def _extract_archive(archive: Path, inst_dir: Path) -> None:
         with tarfile.open(archive, "r:gz") as tar:
             tar.extractall(path=inst_dir)         # recreates data/
 
-        DockerService.start(instance)
+    @classmethod
+    @timed()
+    async def delete_backup(cls, instance: str, path: str) -> None:
+        await asyncio.to_thread(cls._delete_backup, instance, path)
 
     @classmethod
-    def delete_backup(cls, instance: str, path: str) -> None:
+    @timed()
+    def _delete_backup(cls, instance: str, path: str) -> None:
         """
         path is the relative path returned by list_backups,
         e.g. 'triggered/2025-07-02-23-47.tar.gz'
@@ -107,4 +197,5 @@ class BackupService:
         file = cls.backups_root / instance / path
         if not file.exists() or not file.is_file():
             raise FileNotFoundError(path)
-        file.unlink()
\ No newline at end of file
+        file.unlink()
+        cls.forget(instance)
\ No newline at end of file
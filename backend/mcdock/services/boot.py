@@ -0,0 +1,217 @@
+import asyncio
+import logging
+import os
+import re
+import time
+from datetime import datetime, timedelta, UTC
+from typing import Awaitable, Callable
+
+from . import process
+from .models import BootEntry
+from ..core import db
+from ..core.config import settings
+from ..core.models import BootState
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS boot_queue (
+    instance    TEXT PRIMARY KEY,
+    priority    INTEGER NOT NULL,
+    state       TEXT NOT NULL,
+    enqueued_at TEXT NOT NULL,
+    started_at  TEXT,
+    owner_pid   INTEGER NOT NULL
+);
+"""
+
+# vanilla, Paper, Fabric and Forge all log this once the world is loaded
+_READY = re.compile(r"\]: Done \([\d.,]+s\)!")
+
+# how often a waiting boot re-checks the shared queue for a free slot
+_POLL_SECONDS = 0.5
+
+
+class BootQueue:
+    """
+    Staggers JVM boots so a mass start does not turn into a CPU storm.
+
+    At most BOOT_CONCURRENCY instances boot at once across all workers; the
+    queue lives in the shared state DB and is ordered by boot priority, then
+    arrival. A slot is held from `docker compose up` until the server logs
+    "Done (…)!" (or exits, or BOOT_READY_TIMEOUT passes), not merely until
+    compose returns.
+    """
+
+    _watchers: dict[str, asyncio.Task] = {}
+
+    # ───────────────────────────── records ─────────────────────────────
+    @staticmethod
+    def _to_entry(row) -> BootEntry:
+        return BootEntry(
+            instance    = row["instance"],
+            priority    = row["priority"],
+            state       = BootState(row["state"]),
+            enqueued_at = datetime.fromisoformat(row["enqueued_at"]),
+            started_at  = datetime.fromisoformat(row["started_at"]) if row["started_at"] else None,
+        )
+
+    @classmethod
+    def _enqueue(cls, instance: str, priority: int) -> None:
+        with db.connect(_SCHEMA) as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO boot_queue (instance, priority, state, enqueued_at, owner_pid)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (instance, priority, BootState.WAITING.value,
+                 datetime.now(UTC).isoformat(), os.getpid()),
+            )
+
+    @classmethod
+    def _try_admit(cls, instance: str) -> bool:
+        """Move *instance* to booting if a slot is free and it heads the queue."""
+        with db.connect(_SCHEMA) as conn:
+            conn.execute("BEGIN IMMEDIATE")         # no other worker admits in between
+
+            # slots held by dead workers or by boots that never reported ready
+            cutoff = datetime.now(UTC) - timedelta(seconds=settings.BOOT_READY_TIMEOUT)
+            for row in conn.execute("SELECT instance, owner_pid, started_at FROM boot_queue").fetchall():
+                stale = row["started_at"] and datetime.fromisoformat(row["started_at"]) < cutoff
+                if stale or not db.pid_alive(row["owner_pid"]):
+                    conn.execute("DELETE FROM boot_queue WHERE instance = ?", (row["instance"],))
+
+            booting = conn.execute(
+                "SELECT COUNT(*) FROM boot_queue WHERE state = ?", (BootState.BOOTING.value,)
+            ).fetchone()[0]
+            if booting >= settings.BOOT_CONCURRENCY:
+                return False
+
+            head = conn.execute(
+                """
+                SELECT instance FROM boot_queue WHERE state = ?
+                ORDER BY priority DESC, enqueued_at LIMIT 1
+                """,
+                (BootState.WAITING.value,),
+            ).fetchone()
+            if head is None or head["instance"] != instance:
+                return False
+
+            conn.execute(
+                "UPDATE boot_queue SET state = ?, started_at = ? WHERE instance = ?",
+                (BootState.BOOTING.value, datetime.now(UTC).isoformat(), instance),
+            )
+            return True
+
+    @classmethod
+    def _release(cls, instance: str) -> None:
+        with db.connect(_SCHEMA) as conn:
+            conn.execute(
+                "DELETE FROM boot_queue WHERE instance = ? AND owner_pid = ?",
+                (instance, os.getpid()),
+            )
+
+    @classmethod
+    def booting(cls) -> set[str]:
+        """Instances that hold a boot slot right now."""
+        with db.connect(_SCHEMA) as conn:
+            rows = conn.execute(
+                "SELECT instance FROM boot_queue WHERE state = ?", (BootState.BOOTING.value,)
+            ).fetchall()
+        return {r["instance"] for r in rows}
+
+    @classmethod
+    def snapshot(cls) -> list[BootEntry]:
+        """Booting instances first, then the waiting ones in boot order."""
+        with db.connect(_SCHEMA) as conn:
+            rows = conn.execute(
+                """
+                SELECT * FROM boot_queue
+                ORDER BY state = ? DESC, priority DESC, enqueued_at
+                """,
+                (BootState.BOOTING.value,),
+            ).fetchall()
+        return [cls._to_entry(r) for r in rows]
+
+    # ───────────────────────────── booting ─────────────────────────────
+    @classmethod
+    async def boot(
+        cls,
+        instance: str,
+        up: Callable[[], Awaitable[bool]],
+        *,
+        priority: int = 0,
+    ) -> None:
+        """
+        Wait for a boot slot, then run *up*. *up* returns whether a server
+        was actually (re)started; if so the slot stays taken until it is
+        ready, otherwise (container already running) it is freed at once.
+        """
+        if settings.BOOT_CONCURRENCY <= 0:
+            await up()
+            return
+
+        previous = cls._watchers.pop(instance, None)
+        if previous is not None:                    # restarted before it got ready
+            previous.cancel()
+            await asyncio.gather(previous, return_exceptions=True)
+
+        await asyncio.to_thread(cls._enqueue, instance, priority)
+        try:
+            while not await asyncio.to_thread(cls._try_admit, instance):
+                await asyncio.sleep(_POLL_SECONDS)
+            since = time.time()
+            booted = await up()
+        except BaseException:
+            await asyncio.shield(asyncio.to_thread(cls._release, instance))
+            raise
+
+        if not booted:
+            await asyncio.to_thread(cls._release, instance)
+            return
+
+        task = asyncio.create_task(cls._watch(instance, since), name=f"boot-{instance}")
+        cls._watchers[instance] = task
+        task.add_done_callback(
+            lambda t: cls._watchers.pop(instance) if cls._watchers.get(instance) is t else None
+        )
+
+    @classmethod
+    async def _watch(cls, instance: str, since: float) -> None:
+        """Hold *instance*'s slot until it is ready, then free it."""
+        try:
+            ready = await asyncio.wait_for(
+                cls._await_ready(instance, since), settings.BOOT_READY_TIMEOUT
+            )
+            if not ready:
+                logger.warning("%s exited before it finished booting", instance)
+        except TimeoutError:
+            logger.warning("%s not ready after %gs; freeing its boot slot",
+                           instance, settings.BOOT_READY_TIMEOUT)
+        except OSError as e:
+            logger.warning("Could not follow %s's log: %s", instance, e)
+        finally:
+            await asyncio.shield(asyncio.to_thread(cls._release, instance))
+
+    @classmethod
+    async def _await_ready(cls, instance: str, since: float) -> bool:
+        """Follow the container log from *since*; True once it reports "Done"."""
+        # containers are named after their instance (see the compose template)
+        proc = await process.spawn(
+            ["docker", "logs", "--follow", "--since", str(int(since)), instance]
+        )
+        try:
+            async for line in proc.stdout:
+                if _READY.search(line.decode(errors="replace")):
+                    return True
+            return False
+        finally:
+            await process.terminate(proc)
+
+    @classmethod
+    async def shutdown(cls) -> None:
+        """Stop watching boots; their slots are freed for the other workers."""
+        tasks = list(cls._watchers.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
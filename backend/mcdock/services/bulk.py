@@ -0,0 +1,93 @@
+import asyncio
+import time
+from typing import AsyncIterator
+
+from .backup_service import BackupService
+from .docker_service import DockerService
+from .models import BulkItemResult
+from .operations import OperationService
+from .registry import InstanceRegistry
+from ..core.models import BulkAction, OperationKind, OperationState
+
+# lifecycle actions share their name with the DockerService method
+_LIFECYCLE = {
+    BulkAction.START:   OperationKind.START,
+    BulkAction.STOP:    OperationKind.STOP,
+    BulkAction.RESTART: OperationKind.RESTART,
+}
+
+
+class BulkService:
+    """
+    Fleet-wide actions: run one action over many instances with bounded
+    parallelism and yield each instance's result as soon as it finishes.
+
+    Lifecycle actions and backups are submitted as regular operations, so
+    they honour the per-instance queue and the OPERATION_WORKERS cap and
+    keep running if the client goes away.
+    """
+
+    @classmethod
+    def resolve(cls, instances: list[str], tag: str | None) -> list[str]:
+        """Explicit names win; otherwise every instance carrying *tag*."""
+        if instances:
+            return list(dict.fromkeys(instances))
+        records, _ = InstanceRegistry.query(tag=tag)
+        return [r.name for r in records]
+
+    @classmethod
+    async def _one(cls, instance: str, action: BulkAction, command: str | None) -> BulkItemResult:
+        started = time.perf_counter()
+        result = BulkItemResult(instance=instance, action=action, ok=False, elapsed=0)
+        try:
+            DockerService.get_instance_dir(instance)
+
+            if action == BulkAction.COMMAND:
+                result.output = await DockerService.send_command(instance, command or "")
+                result.ok = True
+            else:
+                if action == BulkAction.BACKUP:
+                    bucket = BackupService.triggered_dirname
+                    op = await OperationService.submit(
+                        OperationKind.BACKUP, instance,
+                        BackupService.trigger_backup, instance, bucket,
+                        key=bucket,
+                    )
+                else:
+                    func = getattr(DockerService, action.value)
+                    op = await OperationService.submit(_LIFECYCLE[action], instance, func, instance)
+                result.operation_id = op.id
+                done = await OperationService.wait(op.id)
+                result.ok = done.state == OperationState.SUCCEEDED
+                result.error = done.error
+        except FileNotFoundError:
+            result.error = f"No such instance: {instance}"
+        except Exception as e:
+            result.error = str(e) or type(e).__name__
+        result.elapsed = round(time.perf_counter() - started, 3)
+        return result
+
+    @classmethod
+    async def run(
+        cls,
+        action: BulkAction,
+        instances: list[str],
+        *,
+        parallelism: int,
+        command: str | None = None,
+    ) -> AsyncIterator[BulkItemResult]:
+        """Yield results in completion order, at most *parallelism* in flight."""
+        slots = asyncio.Semaphore(parallelism)
+
+        async def _bounded(name: str) -> BulkItemResult:
+            async with slots:
+                return await cls._one(name, action, command)
+
+        tasks = [asyncio.create_task(_bounded(name)) for name in instances]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # client went away: stop waiting (submitted operations carry on)
+            for task in tasks:
+                task.cancel()
@@ -0,0 +1,134 @@
+import re
+from pathlib import Path
+
+from .boot import BootQueue
+from .models import HostCapacity, MemoryClaim
+from .registry import InstanceRegistry
+from ..core.config import settings
+from ..core.models import InstanceStatus
+
+_UNITS = {"": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+_SIZE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([KMGT]?)B?\s*$", re.IGNORECASE)
+
+# itzg/minecraft-server's heap when MEMORY is unset
+_DEFAULT_HEAP = "1G"
+
+
+class InsufficientMemory(ValueError):
+    """Admitting the instance would overcommit host RAM."""
+
+
+def parse_size(value: str) -> int:
+    """Bytes in a JVM/compose style size such as "4G", "512m" or "1.5G"."""
+    match = _SIZE.match(value or "")
+    if not match:
+        raise ValueError(f"Unrecognised memory size: {value!r}")
+    number, unit = match.groups()
+    return int(float(number) * _UNITS[unit.upper()])
+
+
+def _fmt(size: int) -> str:
+    return f"{size / (1 << 30):.1f}G"
+
+
+class CapacityService:
+    """
+    Host memory admission control.
+
+    Each running (or booting) instance is charged its configured heap plus
+    an estimate of JVM overhead; the sum must stay below MemTotal minus
+    HOST_MEMORY_RESERVE. The model is deliberately static — configured
+    sizes, not current usage — because a JVM grows into its heap over time
+    and the OOM killer strikes when it does, not at start.
+    """
+
+    meminfo_path = Path("/proc/meminfo")
+
+    @classmethod
+    def footprint(cls, memory: str) -> int:
+        try:
+            heap = parse_size(memory)
+        except ValueError:
+            heap = parse_size(_DEFAULT_HEAP)
+        overhead = max(int(heap * settings.JVM_OVERHEAD_RATIO), parse_size(settings.JVM_OVERHEAD_MIN))
+        return heap + overhead
+
+    @classmethod
+    def _meminfo(cls) -> dict[str, int]:
+        """MemTotal/MemAvailable in bytes; empty where /proc is unavailable."""
+        try:
+            text = cls.meminfo_path.read_text()
+        except OSError:
+            return {}
+        info = {}
+        for line in text.splitlines():
+            key, _, rest = line.partition(":")
+            if key in ("MemTotal", "MemAvailable"):
+                info[key] = int(rest.split()[0]) * 1024         # reported in kB
+        return info
+
+    @classmethod
+    def _claims(cls, exclude: str | None = None) -> list[MemoryClaim]:
+        booting = BootQueue.booting()
+        records, _ = InstanceRegistry.query()
+        return [
+            MemoryClaim(
+                instance=r.name,
+                memory=r.memory,
+                footprint=cls.footprint(r.memory),
+                booting=r.name in booting,
+            )
+            for r in records
+            if r.name != exclude and (r.status == InstanceStatus.RUNNING or r.name in booting)
+        ]
+
+    @classmethod
+    def snapshot(cls) -> HostCapacity:
+        info = cls._meminfo()
+        claims = cls._claims()
+        reserve = parse_size(settings.HOST_MEMORY_RESERVE)
+        committed = sum(c.footprint for c in claims)
+        total = info.get("MemTotal")
+        budget = total - reserve if total is not None else None
+        return HostCapacity(
+            total=total,
+            available=info.get("MemAvailable"),
+            reserve=reserve,
+            budget=budget,
+            committed=committed,
+            headroom=budget - committed if budget is not None else None,
+            enforced=settings.MEMORY_ADMISSION and total is not None,
+            instances=claims,
+        )
+
+    @classmethod
+    def ensure_fits(cls, instance: str | None, memory: str, *, alongside_running: bool = True) -> None:
+        """
+        Raise `InsufficientMemory` unless *instance* with heap *memory* fits.
+
+        With *alongside_running* the budget is shared with every other
+        running or booting instance; without it the instance only has to fit
+        the host on its own (used for configuration that is not started yet).
+        """
+        if not settings.MEMORY_ADMISSION:
+            return
+        total = cls._meminfo().get("MemTotal")
+        if total is None:
+            return
+
+        budget = total - parse_size(settings.HOST_MEMORY_RESERVE)
+        needed = cls.footprint(memory)
+        committed = sum(c.footprint for c in cls._claims(exclude=instance)) if alongside_running else 0
+        if committed + needed > budget:
+            raise InsufficientMemory(
+                f"Not enough host memory for '{instance or 'new instance'}': needs {_fmt(needed)} "
+                f"(MEMORY={memory} plus JVM overhead), {_fmt(max(budget - committed, 0))} of "
+                f"{_fmt(budget)} free"
+            )
+
+    @classmethod
+    def ensure_can_start(cls, instance: str) -> None:
+        """`ensure_fits` for a registered instance using its configured MEMORY."""
+        record = InstanceRegistry.get(instance)
+        if record is not None:
+            cls.ensure_fits(instance, record.memory)
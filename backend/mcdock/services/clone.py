@@ -0,0 +1,91 @@
+import asyncio
+import logging
+import shutil
+from pathlib import Path
+
+from .backup_service import BackupService
+from .docker_service import DockerService
+from .locks import InstanceLocks
+from .operations import OperationService
+from .registry import InstanceRegistry
+from ..core import cow
+from ..core.models import OperationKind
+from ..core.timing import timed
+
+logger = logging.getLogger(__name__)
+
+
+class CloneService:
+    """
+    Creates a new instance as a copy of an existing one: same image,
+    memory, env and tags, the next free host ports, and a data/ tree that
+    shares storage with the original for as long as the filesystem lets it
+    (see `core.cow`).
+
+    The clone runs as an operation on the *source* instance, so it never
+    overlaps a restore, import or delete of it, and holds the new
+    instance's queue while data/ is filled, so nothing starts it halfway.
+    A running source keeps running: saves are paused and flushed around
+    the copy as for a backup, and its files are reflinked or copied (never
+    hardlinked, since it would go on writing through them). A hardlink
+    clone is followed by an unshare operation on the clone, which copies
+    what it shares in the background so the source's next start does not
+    have to.
+    """
+
+    @staticmethod
+    @timed()
+    def _populate(src_dir: Path, inst_dir: Path, allow_hardlinks: bool) -> str:
+        src, dst = src_dir / "data", inst_dir / "data"
+        mode = cow.choose_mode(src, dst, allow_hardlinks=allow_hardlinks)
+        if mode == cow.HARDLINK:
+            # marked before the first link, so an interrupted clone still unshares;
+            # only the clone is marked: it pays for the copies, not the source
+            (inst_dir / cow.SHARED).touch()
+        cow.clone_tree(src, dst, mode)
+        return mode
+
+    @classmethod
+    async def _clone(cls, source: str, name: str, tags: list[str] | None) -> None:
+        src = await DockerService.get_compose(source)
+        ports = await DockerService.allocate_ports(src.ports)
+        await DockerService.create_instance(
+            instance_name=name,
+            image=src.image,
+            eula=src.eula,
+            memory=src.memory,
+            env=src.env,
+            ports=ports,
+            tags=src.tags if tags is None else tags,
+            boot_priority=src.boot_priority,
+        )
+        src_dir = DockerService.get_instance_dir(source)
+        inst_dir = DockerService.get_instance_dir(name)
+        try:
+            async with BackupService.saves_paused(source) as running:
+                mode = await asyncio.to_thread(cls._populate, src_dir, inst_dir, not running)
+        except BaseException:
+            await asyncio.to_thread(shutil.rmtree, inst_dir, True)
+            DockerService.forget(name)
+            await asyncio.to_thread(InstanceRegistry.remove, name)
+            raise
+        logger.info(
+            "Cloned %s into %s (%s, ports %s)",
+            source, name, mode, ", ".join(str(p.host_port) for p in ports),
+        )
+        if mode == cow.HARDLINK:
+            # queued behind this clone on its own queue, so nothing starts it first
+            await OperationService.submit(OperationKind.UNSHARE, name, cls.unshare, name)
+
+    @classmethod
+    @timed()
+    async def clone(cls, source: str, name: str, tags: list[str] | None = None) -> None:
+        """Operation body, queued on *source*: create instance *name* from it."""
+        await InstanceLocks.run(name, OperationKind.CLONE, cls._clone, source, name, tags, key=source)
+
+    @staticmethod
+    @timed()
+    async def unshare(name: str) -> None:
+        """Operation body, queued on a hardlink clone: give it private copies of its data."""
+        copied = await asyncio.to_thread(cow.unshare, DockerService.get_instance_dir(name))
+        logger.info("Unshared %s (%d MiB copied)", name, copied // (1024 * 1024))
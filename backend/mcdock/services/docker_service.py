@@ -1,23 +1,78 @@
+import asyncio
+import json
+import re
 import subprocess
 import shutil
+import time
 import yaml
 from collections import OrderedDict
 from pathlib import Path
 from copy import deepcopy
 
+from . import process
+from .boot import BootQueue
+from .capacity import CapacityService
+from .locks import InstanceLocks
 from .models import Instance
+from .registry import InstanceRegistry
+from .sleep import SleepService
+from ..core import cow, metrics
+from ..core.conditional import TagCache, file_tag
 from ..core.config import settings
-from ..core.models import EnvVar, PortBinding, ConnectionType, InstanceStatus
-from ..templates.compose import COMPOSE_TEMPLATE
+from ..core.models import EnvVar, PortBinding, ConnectionType, InstanceStatus, OperationKind
+from ..core.timing import timed
+from ..templates.compose import compose_template
+
+TAGS_LABEL = "mcdock.tags"
+PRIORITY_LABEL = "mcdock.boot-priority"
+
+# `docker stats` output: ANSI clear-screen codes between frames, sizes like "742.6MiB"
+_ANSI = re.compile(r"\x1B\[[0-?]*[ -/]*[@-~]")
+_MEM = re.compile(r"([\d\.]+)([KMG]i?)B", re.I)
+_MIB_PER_UNIT = {"Ki": 1/1024, "Mi": 1, "Gi": 1024}
+# `docker ps` ports, e.g. "0.0.0.0:25565->25565/tcp, :::8000-8001->8000-8001/udp"
+_PUBLISHED = re.compile(r":(\d+)(?:-(\d+))?->[\d-]+/(tcp|udp)")
+
+
+def _read_labels(srv: dict) -> dict[str, str]:
+    """Compose labels may be a mapping or a list of "key=value" strings."""
+    labels = srv.get("labels") or {}
+    if isinstance(labels, list):
+        labels = dict(item.split("=", 1) for item in labels if "=" in item)
+    return dict(labels)
 
 class DockerService:
     """
     Service for managing Docker-compose based Minecraft instances.
+
+    Public operations are coroutines: docker CLI calls go through
+    `process.run` (bounded, with timeouts) and file I/O runs in a worker
+    thread, so callers never block the event loop. The underscore-prefixed
+    sync helpers are for code that already runs off the loop.
     """
     mc_root = Path(settings.MC_ROOT)
     root = Path(settings.MC_ROOT) / "servers"
+    _reads = TagCache(settings.READ_CACHE_SIZE)        # ("compose"|"properties", name) -> parsed
+
+    # ───────────────────────────── read validators ─────────────────────
+    @classmethod
+    def compose_tag(cls, instance_name: str) -> str:
+        """ETag of docker-compose.yml: a stat, no parsing."""
+        return file_tag(cls.root / instance_name / "docker-compose.yml")
 
     @classmethod
+    def properties_tag(cls, instance_name: str) -> str:
+        """ETag of server.properties: a stat, no parsing."""
+        return file_tag(cls.root / instance_name / "data" / "server.properties")
+
+    @classmethod
+    def forget(cls, instance_name: str) -> None:
+        """Drop cached reads of *instance_name* after writing its files."""
+        cls._reads.discard(("compose", instance_name))
+        cls._reads.discard(("properties", instance_name))
+
+    @classmethod
+    @timed()
     def get_instance_dirs(cls) -> list[Path]:
         if not cls.mc_root.exists() or not cls.mc_root.is_dir():
             raise ValueError(f"MC_ROOT path not found: {settings.MC_ROOT}")
@@ -32,6 +87,58 @@ class DockerService:
         return path
     
     @classmethod
+    def _used_ports(cls, exclude_instance: str | None = None) -> set[tuple[int, ConnectionType]]:
+        """(host_port, proto) pairs published by the compose files of all instances."""
+        used: set[tuple[int, ConnectionType]] = set()
+        for inst_dir in cls.get_instance_dirs():
+            if exclude_instance and inst_dir.name == exclude_instance:
+                continue
+
+            instance = cls._load_compose(inst_dir.name)
+
+            for port in instance.ports:
+                used.add((port.host_port, port.type))
+        return used
+
+    @classmethod
+    @timed()
+    async def _published_ports(cls) -> set[tuple[int, ConnectionType]]:
+        """
+        (host_port, proto) pairs published by any running container, ours or
+        not. Asked of the docker daemon, since the panel's own network
+        namespace says nothing about the host's.
+        """
+        result = await process.run(["docker", "ps", "--format", "{{.Ports}}"])
+        used: set[tuple[int, ConnectionType]] = set()
+        for first, last, proto in _PUBLISHED.findall(result.stdout):
+            for port in range(int(first), int(last or first) + 1):
+                used.add((port, ConnectionType(proto)))
+        return used
+
+    @classmethod
+    @timed()
+    async def allocate_ports(cls, ports: list[PortBinding]) -> list[PortBinding]:
+        """
+        *ports* with every host port moved to the next one (upwards,
+        wrapping at 65535) that no instance declares and no running
+        container publishes. Container ports and protocols are kept.
+        """
+        used = await asyncio.to_thread(cls._used_ports)
+        used |= await cls._published_ports()
+        allocated = []
+        for p in ports:
+            for offset in range(1, 65536 - 1024):
+                candidate = 1024 + (p.host_port - 1024 + offset) % (65536 - 1024)
+                if (candidate, p.type) not in used:
+                    break
+            else:
+                raise ValueError(f"No free host port for {p.container_port}/{p.type.value}")
+            used.add((candidate, p.type))
+            allocated.append(p.model_copy(update={"host_port": candidate}))
+        return allocated
+
+    @classmethod
+    @timed()
     def _check_ports(
         cls,
         ports: list[PortBinding],
@@ -47,16 +154,7 @@ class DockerService:
 
         Raises ValueError on the first conflict.
         """
-        # ---------------- collect currently-used host ports ----------------
-        used: set[tuple[int, ConnectionType]] = set()
-        for inst_dir in cls.get_instance_dirs():
-            if exclude_instance and inst_dir.name == exclude_instance:
-                continue
-
-            instance = cls.get_compose(inst_dir.name)
-
-            for port in instance.ports:
-                used.add((port.host_port, port.type))
+        used = cls._used_ports(exclude_instance)
 
         # ---------------- verify incoming list is self-consistent ----------
         seen_in_request: set[tuple[int, ConnectionType]] = set()
@@ -72,14 +170,34 @@ class DockerService:
                 raise ValueError(f"Port {p.host_port}/{p.type} already in use")
     
     @classmethod
-    def create_instance(
+    @timed()
+    async def create_instance(
+        cls,
+        instance_name: str,
+        image: str,
+        eula: bool,
+        memory: str,
+        env: list[EnvVar],
+        ports: list[PortBinding],
+        tags: list[str] | None = None,
+        boot_priority: int = 0,
+    ) -> None:
+        await asyncio.to_thread(
+            cls._create_instance, instance_name, image, eula, memory, env, ports, tags, boot_priority
+        )
+
+    @classmethod
+    @timed()
+    def _create_instance(
         cls, 
         instance_name: str, 
         image: str, 
         eula: bool, 
         memory: str, 
         env: list[EnvVar], 
-        ports: list[PortBinding]
+        ports: list[PortBinding],
+        tags: list[str] | None = None,
+        boot_priority: int = 0,
     ) -> None:
         if not eula:
             raise ValueError("EULA must be accepted.")
@@ -87,6 +205,7 @@ class DockerService:
         inst_dir = cls.root / instance_name
 
         cls._check_ports(ports)
+        CapacityService.ensure_fits(instance_name, memory, alongside_running=False)
 
         # 1) create the folder
         try:
@@ -101,23 +220,40 @@ class DockerService:
             eula=eula,
             memory=memory,
             env=env,
-            ports=ports
+            ports=ports,
+            tags=tags or [],
+            boot_priority=boot_priority,
         )
 
-        compose_txt = COMPOSE_TEMPLATE.render(**instance.model_dump())
+        compose_txt = compose_template().render(**instance.model_dump())
 
         # 2) write the user-supplied compose file
+        compose_path = inst_dir / "docker-compose.yml"
         try:
-            (inst_dir / "docker-compose.yml").write_text(compose_txt)
+            compose_path.write_text(compose_txt)
         except Exception as e:
             raise ValueError(500, f"Failed to write compose file: {e}")
+        cls.forget(instance_name)
+
+        # 3) index it
+        InstanceRegistry.upsert(instance, compose_path=compose_path)
         
     @classmethod
-    def get_compose(cls, instance_name: str) -> Instance:
+    @timed()
+    async def get_compose(cls, instance_name: str) -> Instance:
+        return await asyncio.to_thread(cls._load_compose, instance_name)
+
+    @classmethod
+    @timed()
+    def _load_compose(cls, instance_name: str) -> Instance:
         """
         Parse docker-compose.yml and return an Instance object
-        (name, image, eula, memory, env, ports).
+        (name, image, eula, memory, env, ports, tags).
         """
+        tag = cls.compose_tag(instance_name)
+        if (cached := cls._reads.get(("compose", instance_name), tag)) is not None:
+            return cached.model_copy(deep=True)
+
         compose_path = cls.root / instance_name / "docker-compose.yml"
         if not compose_path.exists():
             raise FileNotFoundError(f"No docker-compose.yml in '{instance_name}'")
@@ -143,6 +279,13 @@ class DockerService:
                 )
             )
 
+        labels = _read_labels(srv)
+        tags = [t for t in str(labels.get(TAGS_LABEL, "")).split(",") if t]
+        try:
+            priority = int(labels.get(PRIORITY_LABEL, 0))
+        except ValueError:
+            priority = 0
+
         # --- rebuild Instance fields ----------------------------------
         instance = Instance(
             name           = instance_name,
@@ -155,17 +298,39 @@ class DockerService:
                 if k not in {"EULA", "MEMORY"}            # exclude locked vars
             ],
             ports          = ports_list,
+            tags           = tags,
+            boot_priority  = priority,
         )
+        cls._reads.put(("compose", instance_name), tag, instance.model_copy(deep=True))
         return instance
         
     @classmethod
-    def update_compose(
+    @timed()
+    async def update_compose(
         cls,
         instance_name: str,
         eula: bool | None = None,
         memory: str | None = None,
         env: list[EnvVar] | None = None,
         ports: list[PortBinding] | None = None,
+        tags: list[str] | None = None,
+        boot_priority: int | None = None,
+    ) -> None:
+        await asyncio.to_thread(
+            cls._update_compose, instance_name, eula, memory, env, ports, tags, boot_priority
+        )
+
+    @classmethod
+    @timed()
+    def _update_compose(
+        cls,
+        instance_name: str,
+        eula: bool | None = None,
+        memory: str | None = None,
+        env: list[EnvVar] | None = None,
+        ports: list[PortBinding] | None = None,
+        tags: list[str] | None = None,
+        boot_priority: int | None = None,
     ) -> None:
         """
         Patch docker-compose.yml with the provided fields.
@@ -189,6 +354,11 @@ class DockerService:
         if eula is not None:
             env_block["EULA"]   = "TRUE" if eula else "FALSE"
         if memory is not None:
+            record = InstanceRegistry.get(instance_name)
+            CapacityService.ensure_fits(
+                instance_name, memory,
+                alongside_running=record is not None and record.status == InstanceStatus.RUNNING,
+            )
             env_block["MEMORY"] = memory
 
         # --- patch env whitelist --------------------------------------
@@ -206,18 +376,47 @@ class DockerService:
                 f"{p.host_port}:{p.container_port}/{p.type.value}" for p in ports
             ]
 
+        # --- patch tags / boot priority (stored as compose labels) -----
+        if tags is not None or boot_priority is not None:
+            labels = _read_labels(srv)
+            if tags:
+                labels[TAGS_LABEL] = ",".join(tags)
+            elif tags is not None:
+                labels.pop(TAGS_LABEL, None)
+            if boot_priority:
+                labels[PRIORITY_LABEL] = str(boot_priority)
+            elif boot_priority is not None:
+                labels.pop(PRIORITY_LABEL, None)
+            if labels:
+                srv["labels"] = labels
+            else:
+                srv.pop("labels", None)
+
         # --- write atomically -----------------------------------------
         tmp = compose_path.with_suffix(".tmp")
         tmp.write_text(
             yaml.safe_dump(data, sort_keys=False, default_flow_style=False)
         )
         tmp.replace(compose_path)
+        cls.forget(instance_name)
+
+        InstanceRegistry.upsert(cls._load_compose(instance_name), compose_path=compose_path)
         
     @classmethod
-    def get_properties(cls, instance_name: str) -> dict[str, str]:
+    @timed()
+    async def get_properties(cls, instance_name: str) -> dict[str, str]:
+        return await asyncio.to_thread(cls._load_properties, instance_name)
+
+    @classmethod
+    @timed()
+    def _load_properties(cls, instance_name: str) -> dict[str, str]:
         """
         Return key/value pairs from server.properties, ignoring blanks/comments.
         """
+        tag = cls.properties_tag(instance_name)
+        if (cached := cls._reads.get(("properties", instance_name), tag)) is not None:
+            return OrderedDict(cached)
+
         inst_dir = cls.root / instance_name
         prop_path = inst_dir / "data" / "server.properties"
 
@@ -235,10 +434,17 @@ class DockerService:
             key, value = line.split("=", 1)
             props[key.strip()] = value.strip()
 
+        cls._reads.put(("properties", instance_name), tag, OrderedDict(props))
         return props
     
     @classmethod
-    def update_properties(cls, instance_name: str, props: dict[str, str]) -> None:
+    @timed()
+    async def update_properties(cls, instance_name: str, props: dict[str, str]) -> None:
+        await asyncio.to_thread(cls._write_properties, instance_name, props)
+
+    @classmethod
+    @timed()
+    def _write_properties(cls, instance_name: str, props: dict[str, str]) -> None:
         """
         Overwrite server.properties with the given mapping.
         Comments are dropped; only key=value lines are kept.
@@ -255,122 +461,198 @@ class DockerService:
             tmp.replace(prop_path)
         except Exception as e:
             raise ValueError(500, f"Failed to write server.properties: {e}")
+        finally:
+            cls.forget(instance_name)
 
     @classmethod
-    def get_status(cls, instance_name: str) -> InstanceStatus:
+    @timed()
+    async def get_status(cls, instance_name: str) -> InstanceStatus:
         """
         Returns 'running' if any container is up, 'stopped' otherwise.
         """
         path = cls.get_instance_dir(instance_name)
         try:
             # List containers for this compose project
-            result = subprocess.run(
-                ["docker", "compose", "ps", "-q"],
-                cwd=path,
-                capture_output=True,
-                text=True,
-                check=True
-            )
+            result = await process.run(["docker", "compose", "ps", "-q"], cwd=path)
             # If any container ID is shown, it's running
             if result.stdout.strip():
-                return InstanceStatus.RUNNING
-            return InstanceStatus.STOPPED
-        except subprocess.CalledProcessError:
-            return InstanceStatus.ERROR
+                status = InstanceStatus.RUNNING
+            else:
+                status = InstanceStatus.STOPPED
+        except (subprocess.CalledProcessError, TimeoutError):
+            status = InstanceStatus.ERROR
+
+        await asyncio.to_thread(InstanceRegistry.set_status, instance_name, status)
+        return status
 
     @classmethod
-    def start(cls, instance_name: str) -> None:
+    @timed()
+    async def running_instances(cls) -> set[str]:
         """
-        Starts the Docker-compose project (detached).
+        Names of all running instance containers, from a single `docker ps`.
+        Containers are named after their instance (see the compose template).
+        """
+        result = await process.run(["docker", "ps", "--format", "{{.Names}}"])
+        return set(result.stdout.split())
+
+    @classmethod
+    @timed()
+    async def unshare(cls, instance_name: str) -> None:
+        """
+        Make sure nothing in *instance_name*'s data/ is written through an
+        inode shared with a hardlink clone (`core.cow`). A clone copies its
+        own files; a source waits for its clones' copies, queued on each
+        clone right after cloning (or runs them, should that queue have
+        been lost with a worker).
         """
         path = cls.get_instance_dir(instance_name)
-        subprocess.run(
-            ["docker", "compose", "up", "-d"],
-            cwd=path,
-            check=True
+        await asyncio.to_thread(cow.unshare, path)
+        for clone in await asyncio.to_thread(cow.clones_of, path):
+            await InstanceLocks.run(clone.name, OperationKind.UNSHARE, asyncio.to_thread, cow.unshare, clone)
+
+    @classmethod
+    @timed()
+    async def start(cls, instance_name: str) -> None:
+        """
+        Starts the Docker-compose project (detached), once the boot queue
+        has a slot for it and the host has memory for it.
+        """
+        path = cls.get_instance_dir(instance_name)
+        await cls.unshare(instance_name)
+
+        async def _up() -> bool:
+            # checked once the slot is ours, so boots admitted together see each other
+            await asyncio.to_thread(CapacityService.ensure_can_start, instance_name)
+            await SleepService.release(instance_name)        # the sleep listener holds the port
+            result = await process.run(
+                ["docker", "compose", "up", "-d"],
+                cwd=path,
+                timeout=settings.DOCKER_UP_TIMEOUT,
+            )
+            # compose reports "Started" only when a container was (re)started
+            return "Started" in result.stdout + result.stderr
+
+        record = await asyncio.to_thread(InstanceRegistry.get, instance_name)
+        await BootQueue.boot(
+            instance_name, _up, priority=record.boot_priority if record else 0
         )
+        await asyncio.to_thread(InstanceRegistry.set_status, instance_name, InstanceStatus.RUNNING)
 
     @classmethod
-    def stop(cls, instance_name: str) -> None:
+    @timed()
+    async def stop(cls, instance_name: str) -> None:
         """
         Stops the Docker-compose project and removes containers.
         """
         path = cls.get_instance_dir(instance_name)
-        subprocess.run(
+        await process.run(
             ["docker", "compose", "down"],
             cwd=path,
-            check=True
+            timeout=settings.DOCKER_DOWN_TIMEOUT,
         )
+        await asyncio.to_thread(InstanceRegistry.set_status, instance_name, InstanceStatus.STOPPED)
 
     @classmethod
-    def restart(cls, instance_name: str) -> None:
+    @timed()
+    async def restart(cls, instance_name: str) -> None:
         """
         Restarts the docker compose project.
         """
-        cls.stop(instance_name)
-        cls.start(instance_name)
+        await cls.stop(instance_name)
+        await cls.start(instance_name)
 
     @classmethod
-    def send_command(cls, instance_name: str, command: str) -> str:
+    @timed()
+    async def send_command(cls, instance_name: str, command: str) -> str:
         """
         Send a command via RCON-cli for the specified instance.
         """
-        path = DockerService.get_instance_dir(instance_name)
+        path = cls.get_instance_dir(instance_name)
 
-        result = subprocess.run(
-            ["docker", "exec", instance_name, "rcon-cli", command],
-            cwd=path,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            check=True,
-        )
+        started = time.perf_counter()
+        try:
+            result = await process.run(
+                ["docker", "exec", instance_name, "rcon-cli", command],
+                cwd=path,
+            )
+        finally:
+            metrics.RCON_DURATION.observe(time.perf_counter() - started, instance=instance_name)
         return result.stdout.strip()
 
     @classmethod
-    def stream_logs(cls, instance_name: str) -> subprocess.Popen:
+    async def stream_logs(cls, instance_name: str) -> asyncio.subprocess.Process:
         path = cls.get_instance_dir(instance_name)
-        return subprocess.Popen(
-            ["docker","compose","logs","-f","--no-color"],
+        return await process.spawn(
+            ["docker", "compose", "logs", "-f", "--no-color"],
             cwd=path,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT
         )
-    
+
+    @staticmethod
+    def parse_stats(line: str) -> tuple[str, float, float] | None:
+        """
+        (container name, CPU %, memory MiB) from one `docker stats` JSON
+        line, or None if the line is not a stats record.
+        """
+        try:
+            item = json.loads(_ANSI.sub("", line).strip())
+            cpu = float(item["CPUPerc"].rstrip("%"))
+            # "742.6MiB / 3.7GiB"  -> 742.6 MiB
+            val, unit = _MEM.match(item["MemUsage"].split("/")[0].strip()).groups()
+            return item.get("Name", ""), cpu, float(val) * _MIB_PER_UNIT[unit]
+        except (ValueError, KeyError, AttributeError, TypeError):
+            return None
+
     @classmethod
-    def stream_stats(cls, instance_name: str) -> subprocess.Popen:
+    @timed()
+    async def stats_snapshot(cls) -> dict[str, tuple[float, float]]:
+        """CPU % and memory MiB of every running container, from one `docker stats`."""
+        result = await process.run(
+            ["docker", "stats", "--no-stream", "--format", "{{json .}}"]
+        )
+        snapshot = {}
+        for line in result.stdout.splitlines():
+            parsed = cls.parse_stats(line)
+            if parsed is not None:
+                name, cpu, mem_mib = parsed
+                snapshot[name] = (cpu, mem_mib)
+        return snapshot
+
+    @classmethod
+    async def stream_stats(cls, instance_name: str) -> asyncio.subprocess.Process:
         """
         Spawn `docker stats` in streaming mode, one JSON object per line.
         """
         path = cls.get_instance_dir(instance_name)
 
         # 1. get container ID
-        result = subprocess.run(
-            ["docker", "compose", "ps", "-q"],
-            cwd=path,
-            capture_output=True,
-            text=True,
-            check=True,
-        )
-        cid = result.stdout.strip().splitlines()[0]
+        result = await process.run(["docker", "compose", "ps", "-q"], cwd=path)
+        ids = result.stdout.strip().splitlines()
+        if not ids:
+            raise ValueError(f"Instance '{instance_name}' is not running")
+        cid = ids[0]
 
         # 2. stream stats, format each line as JSON
-        return subprocess.Popen(
+        return await process.spawn(
             [
                 "docker", "stats", cid,
                 "--no-trunc",
                 "--format", "{{json .}}",   # every line is a JSON dict
             ],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,
         )
 
     @classmethod
-    def delete(cls, instance_name: str) -> None:
+    @timed()
+    async def delete(cls, instance_name: str) -> None:
         """
         Stop containers, prune volumes, and delete the folder.
         """
         path = cls.get_instance_dir(instance_name)
-        subprocess.run(["docker", "compose", "down", "--volumes"], cwd=path, check=True)
-        shutil.rmtree(path)
\ No newline at end of file
+        await SleepService.release(instance_name)
+        await process.run(
+            ["docker", "compose", "down", "--volumes"],
+            cwd=path,
+            timeout=settings.DOCKER_DOWN_TIMEOUT,
+        )
+        await asyncio.to_thread(shutil.rmtree, path)
+        cls.forget(instance_name)
+        await asyncio.to_thread(InstanceRegistry.remove, instance_name)
@@ -0,0 +1,224 @@
+import asyncio
+import logging
+import re
+import subprocess
+import time
+from datetime import datetime, UTC
+from pathlib import Path
+
+from . import process
+from .docker_service import DockerService
+from .locks import leader_loop, release_leader
+from .models import HealthSample
+from .registry import InstanceRegistry
+from ..core import db
+from ..core.config import settings
+from ..core.models import InstanceStatus
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS health_samples (
+    instance     TEXT NOT NULL,
+    at           TEXT NOT NULL,
+    cpu          REAL,
+    mem_mib      REAL,
+    tps          REAL,
+    mspt         REAL,
+    ticks_behind INTEGER,
+    players      INTEGER,
+    players_max  INTEGER
+);
+CREATE INDEX IF NOT EXISTS health_samples_instance_at ON health_samples(instance, at);
+"""
+
+_COLUMNS = ("cpu", "mem_mib", "tps", "mspt", "ticks_behind", "players", "players_max")
+
+# console/RCON output parsing; "§x" colour codes are stripped first
+_COLOR = re.compile("§.")
+_TPS = re.compile(r"TPS from last [^:]*:\s*\*?([\d.]+)")                   # Paper `tps`
+_MSPT = re.compile(r"([\d.]+)/[\d.]+/[\d.]+")                              # Paper `mspt`
+_LIST = re.compile(r"There are (\d+)\s*(?:of a max of|/)\s*(\d+)")
+_BEHIND = re.compile(r"Can't keep up!.*?(\d+) ticks behind")
+
+
+def _utc(at: datetime) -> datetime:
+    """*at* in UTC; naive datetimes already are (as everywhere in the API)."""
+    return at.replace(tzinfo=UTC) if at.tzinfo is None else at.astimezone(UTC)
+
+
+def alerts(sample: HealthSample) -> list[str]:
+    """Thresholds *sample* breaches, as short human-readable strings."""
+    found = []
+    if sample.tps is not None and sample.tps < settings.HEALTH_TPS_MIN:
+        found.append(f"tps {sample.tps:g} < {settings.HEALTH_TPS_MIN:g}")
+    if sample.mspt is not None and sample.mspt > settings.HEALTH_MSPT_MAX:
+        found.append(f"mspt {sample.mspt:g} > {settings.HEALTH_MSPT_MAX:g}")
+    if sample.ticks_behind is not None and sample.ticks_behind > settings.HEALTH_BEHIND_MAX:
+        found.append(f"ticks behind {sample.ticks_behind} > {settings.HEALTH_BEHIND_MAX}")
+    return found
+
+
+class HealthService:
+    """
+    Samples tick health of running instances into a time series.
+
+    Every HEALTH_INTERVAL one worker (holder of MC_ROOT/locks/health.lock)
+    records, per instance: CPU and memory from a single `docker stats`,
+    players from `list`, and tick health — `tps`/`mspt` on Paper-based
+    servers, or the number of ticks vanilla reports skipping ("Can't keep
+    up!") in the console since the previous sample. Samples are kept for
+    HEALTH_RETENTION; crossing a threshold is logged once per episode.
+    """
+
+    lock_path = Path(settings.MC_ROOT) / "locks" / "health.lock"
+
+    _paper: dict[str, bool] = {}               # does the server know `tps`/`mspt`?
+    _alerting: dict[str, set[str]] = {}
+    _last_sample: float | None = None
+
+    # ───────────────────────────── records ─────────────────────────────
+    @staticmethod
+    def _to_sample(row) -> HealthSample:
+        sample = HealthSample(
+            instance=row["instance"],
+            at=datetime.fromisoformat(row["at"]),
+            **{c: row[c] for c in _COLUMNS},
+        )
+        sample.alerts = alerts(sample)
+        return sample
+
+    @classmethod
+    def _store(cls, samples: list[HealthSample]) -> None:
+        cutoff = (datetime.now(UTC) - settings.HEALTH_RETENTION).isoformat()
+        with db.connect(_SCHEMA) as conn:
+            conn.executemany(
+                f"""
+                INSERT INTO health_samples (instance, at, {", ".join(_COLUMNS)})
+                VALUES (?, ?, {", ".join("?" * len(_COLUMNS))})
+                """,
+                [
+                    (s.instance, s.at.isoformat(), *(getattr(s, c) for c in _COLUMNS))
+                    for s in samples
+                ],
+            )
+            conn.execute("DELETE FROM health_samples WHERE at < ?", (cutoff,))
+
+    @classmethod
+    def history(
+        cls,
+        instance: str,
+        *,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        limit: int = 1000,
+    ) -> list[HealthSample]:
+        """Samples of *instance* in [since, until], oldest first (the newest *limit*)."""
+        sql, args = "SELECT * FROM health_samples WHERE instance = ?", [instance]
+        if since is not None:
+            sql, args = sql + " AND at >= ?", args + [_utc(since).isoformat()]
+        if until is not None:
+            sql, args = sql + " AND at <= ?", args + [_utc(until).isoformat()]
+        with db.connect(_SCHEMA) as conn:
+            rows = conn.execute(sql + " ORDER BY at DESC LIMIT ?", args + [limit]).fetchall()
+        return [cls._to_sample(r) for r in reversed(rows)]
+
+    @classmethod
+    def latest(cls) -> list[HealthSample]:
+        """The most recent sample of every instance."""
+        with db.connect(_SCHEMA) as conn:
+            rows = conn.execute(
+                """
+                SELECT * FROM health_samples h
+                WHERE at = (SELECT MAX(at) FROM health_samples WHERE instance = h.instance)
+                ORDER BY instance
+                """
+            ).fetchall()
+        return [cls._to_sample(r) for r in rows]
+
+    # ───────────────────────────── sampling ────────────────────────────
+    @classmethod
+    async def _rcon(cls, instance: str, command: str) -> str | None:
+        try:
+            return _COLOR.sub("", await DockerService.send_command(instance, command))
+        except (subprocess.CalledProcessError, TimeoutError, OSError):
+            return None
+
+    @classmethod
+    async def _ticks_behind(cls, instance: str, since: float) -> int | None:
+        try:
+            result = await process.run(
+                ["docker", "logs", "--since", str(int(since)), instance]
+            )
+        except (subprocess.CalledProcessError, TimeoutError, OSError):
+            return None
+        return sum(int(m) for m in _BEHIND.findall(result.stdout + result.stderr))
+
+    @classmethod
+    async def sample(
+        cls,
+        instance: str,
+        stats: dict[str, tuple[float, float]],
+        since: float | None,
+    ) -> HealthSample:
+        cpu, mem_mib = stats.get(instance, (None, None))
+        sample = HealthSample(instance=instance, at=datetime.now(UTC), cpu=cpu, mem_mib=mem_mib)
+
+        if (out := await cls._rcon(instance, "list")) and (m := _LIST.search(out)):
+            sample.players, sample.players_max = int(m.group(1)), int(m.group(2))
+
+        if cls._paper.get(instance, True):
+            out = await cls._rcon(instance, "tps")
+            if out is not None and (m := _TPS.search(out)):
+                sample.tps = float(m.group(1))
+                if (out := await cls._rcon(instance, "mspt")) and (m := _MSPT.search(out)):
+                    sample.mspt = float(m.group(1))
+                cls._paper[instance] = True
+            elif out is not None:
+                cls._paper[instance] = False            # answered, but not a Paper server
+
+        if not cls._paper.get(instance, True) and since is not None:
+            sample.ticks_behind = await cls._ticks_behind(instance, since)
+
+        sample.alerts = alerts(sample)
+        return sample
+
+    @classmethod
+    def _log_transitions(cls, samples: list[HealthSample]) -> None:
+        for s in samples:
+            kinds = {a.split(" ", 1)[0] for a in s.alerts}
+            before = cls._alerting.get(s.instance, set())
+            if kinds - before:
+                logger.warning("%s is lagging: %s", s.instance, ", ".join(s.alerts))
+            elif before and not kinds:
+                logger.info("%s tick health back to normal", s.instance)
+            cls._alerting[s.instance] = kinds
+
+    @classmethod
+    async def collect(cls) -> list[HealthSample]:
+        """Sample every running instance once and store the results."""
+        records, _ = await asyncio.to_thread(InstanceRegistry.query, status=InstanceStatus.RUNNING)
+        if not records:
+            return []
+        try:
+            stats = await DockerService.stats_snapshot()
+        except (subprocess.CalledProcessError, TimeoutError, OSError) as e:
+            logger.debug("docker stats failed: %s", e)
+            stats = {}
+
+        since, cls._last_sample = cls._last_sample, time.time()
+        samples = list(await asyncio.gather(*(cls.sample(r.name, stats, since) for r in records)))
+        await asyncio.to_thread(cls._store, samples)
+        cls._log_transitions(samples)
+        return samples
+
+    @classmethod
+    async def run(cls) -> None:
+        """Background loop for the app lifespan; samples only while this worker leads."""
+        if settings.HEALTH_INTERVAL <= 0:
+            return
+        await leader_loop(cls.lock_path, settings.HEALTH_INTERVAL, cls.collect, "Health sampling")
+
+    @classmethod
+    def shutdown(cls) -> None:
+        release_leader(cls.lock_path)
@@ -0,0 +1,142 @@
+import asyncio
+import logging
+from pathlib import Path
+
+from .boot import BootQueue
+from .docker_service import DockerService
+from .locks import leader_loop, release_leader
+from .models import InstanceRecord
+from .operations import OperationService
+from .ping import PingService
+from .registry import InstanceRegistry
+from .sleep import SleepService, game_port
+from ..core.config import settings
+from ..core.models import InstanceStatus, OperationKind, OperationState
+
+logger = logging.getLogger(__name__)
+
+# how often the loop re-syncs listeners with the shared sleeping table
+_TICK_SECONDS = 2
+
+
+class IdleService:
+    """
+    Puts idle instances to sleep and wakes them on connect.
+
+    One worker at a time (whoever holds MC_ROOT/locks/idle.lock) pings every
+    running instance each IDLE_POLL_INTERVAL; one that has been empty for
+    IDLE_STOP_AFTER is stopped and a `SleepService` listener takes over its
+    port until someone tries to log in. Instances tagged IDLE_EXEMPT_TAG are
+    never stopped. Idle stops are refused when such a listener could not be
+    reached from the host (`SleepService.reachable`): nothing would ever
+    wake the instance again.
+    """
+
+    lock_path = Path(settings.MC_ROOT) / "locks" / "idle.lock"
+
+    _idle_stop: bool | None = None             # None until the leader has checked
+    _last_active: dict[str, float] = {}
+    _tasks: set[asyncio.Task] = set()
+
+    # ───────────────────────────── loop ────────────────────────────────
+    @classmethod
+    async def run(cls) -> None:
+        """Background loop for the app lifespan; idles until this worker leads."""
+        loop = asyncio.get_running_loop()
+        next_check = loop.time() + settings.IDLE_POLL_INTERVAL
+
+        async def _step() -> None:
+            nonlocal next_check
+            await cls._sync_listeners()
+            if settings.IDLE_STOP_AFTER and cls._idle_stop is None:
+                cls._idle_stop = await cls._check_reachable()
+            if settings.IDLE_STOP_AFTER and cls._idle_stop and loop.time() >= next_check:
+                next_check = loop.time() + settings.IDLE_POLL_INTERVAL
+                await cls._check_idle(loop.time())
+
+        await leader_loop(cls.lock_path, _TICK_SECONDS, _step, "Idle loop iteration")
+
+    @classmethod
+    async def _check_reachable(cls) -> bool:
+        if await SleepService.reachable():
+            return True
+        logger.error(
+            "IDLE_STOP_AFTER is set but idle stop is disabled: the wake-up listener "
+            "would not be reachable on the host's game ports. Run the panel with "
+            "`network_mode: host` (see README)."
+        )
+        return False
+
+    # ───────────────────────────── listeners ───────────────────────────
+    @classmethod
+    async def _sync_listeners(cls) -> None:
+        """Serve every sleeping instance whose container is down; drop the rest."""
+        sleeping = await asyncio.to_thread(SleepService.sleeping)
+        for name in SleepService.serving() - sleeping:
+            await SleepService.close(name)
+
+        for name in sleeping - SleepService.serving():
+            record = await asyncio.to_thread(InstanceRegistry.get, name)
+            if record is None:
+                await asyncio.to_thread(SleepService.unmark, name)
+                continue
+            port = game_port(record)
+            if record.status != InstanceStatus.STOPPED or port is None:
+                continue                            # still shutting down
+            try:
+                await SleepService.serve(name, port, cls._wake)
+            except OSError as e:
+                logger.debug("Cannot listen for %s on %d yet: %s", name, port, e)
+
+    @classmethod
+    async def _wake(cls, instance: str) -> None:
+        await OperationService.submit(OperationKind.START, instance, DockerService.start, instance)
+
+    # ───────────────────────────── idle check ──────────────────────────
+    @classmethod
+    async def _players(cls, record: InstanceRecord) -> int | None:
+        """Players online, or None while the server cannot answer."""
+        status = (await PingService.status_of([record]))[record.name]
+        return status.players_online if status else None
+
+    @classmethod
+    async def _check_idle(cls, now: float) -> None:
+        records, _ = await asyncio.to_thread(InstanceRegistry.query, status=InstanceStatus.RUNNING)
+        sleeping = await asyncio.to_thread(SleepService.sleeping)
+        booting = await asyncio.to_thread(BootQueue.booting)
+        candidates = [
+            r for r in records
+            if settings.IDLE_EXEMPT_TAG not in r.tags
+            and r.name not in sleeping
+            and r.name not in booting
+        ]
+        names = [r.name for r in candidates]
+        counts = await asyncio.gather(*(cls._players(r) for r in candidates))
+
+        cls._last_active = {n: t for n, t in cls._last_active.items() if n in names}
+        idle_after = settings.IDLE_STOP_AFTER.total_seconds()
+        for name, players in zip(names, counts):
+            if players != 0 or name not in cls._last_active:
+                cls._last_active[name] = now        # busy, unreachable, or first seen
+            elif now - cls._last_active[name] >= idle_after:
+                del cls._last_active[name]
+                task = asyncio.create_task(cls._put_to_sleep(name), name=f"sleep-{name}")
+                cls._tasks.add(task)
+                task.add_done_callback(cls._tasks.discard)
+
+    @classmethod
+    async def _put_to_sleep(cls, instance: str) -> None:
+        logger.info("%s has had no players for %s; stopping it", instance, settings.IDLE_STOP_AFTER)
+        await asyncio.to_thread(SleepService.mark, instance)
+        op = await OperationService.submit(OperationKind.STOP, instance, DockerService.stop, instance)
+        done = await OperationService.wait(op.id)
+        if done.state != OperationState.SUCCEEDED:
+            await asyncio.to_thread(SleepService.unmark, instance)
+
+    @classmethod
+    async def shutdown(cls) -> None:
+        for task in list(cls._tasks):
+            task.cancel()
+        await asyncio.gather(*cls._tasks, return_exceptions=True)
+        await SleepService.shutdown()
+        release_leader(cls.lock_path)
@@ -0,0 +1,465 @@
+import asyncio
+import ctypes
+import ctypes.util
+import hashlib
+import logging
+import os
+import re
+import shutil
+import tarfile
+import threading
+import time
+import uuid
+import zipfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, UTC
+from pathlib import Path, PurePosixPath
+from typing import Any, AsyncIterator
+
+from .backup_service import BackupService
+from .docker_service import DockerService
+from .locks import try_flock, unflock
+from .models import ImportUpload
+from ..core.config import settings
+from ..core.models import InstanceStatus
+from ..core.timing import timed
+
+logger = logging.getLogger(__name__)
+
+_ID = re.compile(r"^[0-9a-f]{32}$")
+_CHECKSUM = re.compile(r"^sha256[=:]([0-9a-fA-F]{64})$")
+_WRITE_BATCH = 1024 * 1024              # bytes gathered from the request before one write
+_INLINE_MEMBER = 8 * 1024 * 1024        # larger tar members are copied by the reader itself
+_IGNORED = {"__MACOSX", ".DS_Store"}    # archive-tool litter, never part of a world
+_RENAME_EXCHANGE = 2                    # <linux/fs.h>
+
+
+class OffsetMismatch(ValueError):
+    """A chunk did not start where the upload currently ends."""
+
+    def __init__(self, offset: int):
+        super().__init__(f"Upload continues at byte {offset}")
+        self.offset = offset
+
+
+class UploadBusy(ValueError):
+    """Another request is appending to the same upload."""
+
+
+class ChecksumMismatch(ValueError):
+    """The complete upload does not hash to the announced sha256."""
+
+
+class InsufficientSpace(ValueError):
+    """The upload or its extracted contents would not fit on the disk."""
+
+
+# ───────────────────────────── archive helpers ─────────────────────
+def _member_path(staging: Path, name: str) -> Path | None:
+    """Where archive member *name* goes under *staging*; None for the archive root."""
+    rel = PurePosixPath(name.replace("\\", "/"))
+    if rel.is_absolute() or ".." in rel.parts or (rel.parts and ":" in rel.parts[0]):
+        raise ValueError(f"Unsafe path in archive: {name}")
+    parts = [p for p in rel.parts if p not in ("", ".")]
+    if not parts:
+        return None
+    if parts[0] in _IGNORED or parts[-1] in _IGNORED:
+        return None
+    return staging.joinpath(*parts)
+
+
+def _write_file(target: Path, data: bytes) -> None:
+    with open(target, "wb") as f:
+        f.write(data)
+
+
+def _exchange(a: Path, b: Path) -> None:
+    """Swap two paths in one step (renameat2 RENAME_EXCHANGE), or in two where unsupported."""
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        renameat2 = libc.renameat2
+    except (OSError, AttributeError):
+        renameat2 = None
+    if renameat2 is not None:
+        at_fdcwd = -100
+        if renameat2(at_fdcwd, os.fsencode(a), at_fdcwd, os.fsencode(b), _RENAME_EXCHANGE) == 0:
+            return
+        errno = ctypes.get_errno()
+        if errno not in (22, 38, 95):           # EINVAL/ENOSYS/EOPNOTSUPP: the fs can't
+            raise OSError(errno, os.strerror(errno), str(a))
+    aside = b.with_name(b.name + ".swap")
+    b.rename(aside)
+    a.rename(b)
+    aside.rename(a)
+
+
+class ImportService:
+    """
+    Brings an existing world (or a whole server data/ directory) into an
+    instance from a zip or tar archive.
+
+    The archive arrives as a resumable upload: each request appends its
+    body at an offset, straight to MC_ROOT/imports/<id>/upload, so a broken
+    connection only costs the bytes in flight and a multi-GB archive never
+    sits in memory. The sha256 is computed while writing when the upload
+    arrives in order at one worker, and re-read from disk otherwise.
+
+    The import itself is an operation: the archive is extracted next to the
+    instance (zip members in parallel, tar as a decompress/write pipeline),
+    a safety backup is taken, and the extracted tree is swapped in for
+    data/ — or just for the world, if the archive holds a world only —
+    while the server is stopped.
+    """
+
+    root = Path(settings.MC_ROOT) / "imports"
+    _hashers: dict[str, tuple[int, Any]] = {}       # upload id -> (bytes hashed, running sha256)
+
+    # ───────────────────────────── uploads ─────────────────────────────
+    @classmethod
+    def _dir(cls, upload_id: str) -> Path:
+        if not _ID.match(upload_id):
+            raise ValueError(f"Invalid upload id: {upload_id}")
+        return cls.root / upload_id
+
+    @classmethod
+    def _load(cls, upload_id: str) -> ImportUpload:
+        directory = cls._dir(upload_id)
+        try:
+            upload = ImportUpload.model_validate_json((directory / "meta.json").read_text())
+        except FileNotFoundError:
+            raise FileNotFoundError(f"No such upload: {upload_id}") from None
+        try:
+            upload.offset = (directory / "upload").stat().st_size
+        except FileNotFoundError:
+            upload.offset = 0
+        return upload
+
+    @classmethod
+    def _save(cls, upload: ImportUpload) -> None:
+        meta = cls._dir(upload.id) / "meta.json"
+        tmp = meta.with_name(f".meta.{os.getpid()}.tmp")
+        tmp.write_text(upload.model_dump_json(exclude={"offset", "operation_id"}))
+        tmp.replace(meta)
+
+    @classmethod
+    def purge(cls) -> None:
+        """Drop uploads nobody has written to for IMPORT_UPLOAD_TTL."""
+        cutoff = time.time() - settings.IMPORT_UPLOAD_TTL.total_seconds()
+        try:
+            entries = list(cls.root.iterdir())
+        except FileNotFoundError:
+            return
+        for directory in entries:
+            if not directory.is_dir():
+                continue
+            try:
+                last = max(p.stat().st_mtime for p in directory.iterdir())
+            except (OSError, ValueError):
+                last = 0
+            if last >= cutoff:
+                continue
+            fd = try_flock(directory / "lock")
+            if fd is None:
+                continue                                # being written right now
+            try:
+                shutil.rmtree(directory, ignore_errors=True)
+            finally:
+                unflock(fd)
+            cls._hashers.pop(directory.name, None)
+
+    @classmethod
+    def begin(cls, instance: str, upload_id: str | None, length: int, checksum: str) -> ImportUpload:
+        """
+        The upload *upload_id* of *instance*, or a new one when None.
+        *checksum* is "sha256=<hex>" and, like *length*, must match what the
+        upload was started with.
+        """
+        match = _CHECKSUM.match(checksum.strip())
+        if not match:
+            raise ValueError('Upload-Checksum must be "sha256=<64 hex digits>"')
+        sha256 = match.group(1).lower()
+        if length > settings.IMPORT_MAX_BYTES:
+            raise InsufficientSpace(f"Upload exceeds IMPORT_MAX_BYTES ({settings.IMPORT_MAX_BYTES})")
+
+        if upload_id is not None:
+            upload = cls._load(upload_id)
+            if upload.instance != instance or upload.length != length or upload.sha256 != sha256:
+                raise ValueError(f"Upload {upload_id} was started for other content")
+            return upload
+
+        cls.purge()
+        cls.root.mkdir(parents=True, exist_ok=True)
+        if shutil.disk_usage(cls.root).free < length:
+            raise InsufficientSpace(f"Not enough free space for {length} bytes")
+        upload = ImportUpload(
+            id=uuid.uuid4().hex, instance=instance, length=length, sha256=sha256,
+            created_at=datetime.now(UTC),
+        )
+        cls._dir(upload.id).mkdir()
+        cls._save(upload)
+        return upload
+
+    @classmethod
+    def get(cls, instance: str, upload_id: str) -> ImportUpload:
+        upload = cls._load(upload_id)
+        if upload.instance != instance:
+            raise FileNotFoundError(f"No such upload: {upload_id}")
+        return upload
+
+    @classmethod
+    def abort(cls, instance: str, upload_id: str) -> None:
+        cls.get(instance, upload_id)
+        fd = try_flock(cls._dir(upload_id) / "lock")
+        if fd is None:
+            raise UploadBusy(f"Upload {upload_id} is being written")
+        try:
+            shutil.rmtree(cls._dir(upload_id))
+        finally:
+            unflock(fd)
+        cls._hashers.pop(upload_id, None)
+
+    @staticmethod
+    def _append(f, hasher, data: bytes) -> None:
+        f.write(data)
+        if hasher is not None:
+            hasher.update(data)
+
+    @classmethod
+    async def receive(cls, upload: ImportUpload, offset: int, body: AsyncIterator[bytes]) -> ImportUpload:
+        """
+        Append *body* at *offset* (which must be where the upload ends).
+        Whatever arrived is kept even if the client goes away mid-request.
+        """
+        directory = cls._dir(upload.id)
+        fd = await asyncio.to_thread(try_flock, directory / "lock")
+        if fd is None:
+            raise UploadBusy(f"Upload {upload.id} is being written by another request")
+        try:
+            path = directory / "upload"
+            size = path.stat().st_size if path.exists() else 0
+            if offset != size:
+                raise OffsetMismatch(size)
+
+            # the running hash survives only while the bytes come in order, here
+            hashed = cls._hashers.pop(upload.id, None)
+            if size == 0:
+                hasher = hashlib.sha256()
+            else:
+                hasher = hashed[1] if hashed and hashed[0] == size else None
+
+            with open(path, "ab") as f:
+                pending: list[bytes] = []
+                buffered = 0
+                try:
+                    async for chunk in body:
+                        if size + buffered + len(chunk) > upload.length:
+                            raise ValueError(f"More than Upload-Length ({upload.length}) bytes")
+                        pending.append(chunk)
+                        buffered += len(chunk)
+                        if buffered >= _WRITE_BATCH:
+                            await asyncio.to_thread(cls._append, f, hasher, b"".join(pending))
+                            size += buffered
+                            pending, buffered = [], 0
+                finally:
+                    if pending:
+                        await asyncio.to_thread(cls._append, f, hasher, b"".join(pending))
+                        size += buffered
+                    if hasher is not None:
+                        cls._hashers[upload.id] = (size, hasher)
+            upload.offset = size
+            return upload
+        finally:
+            await asyncio.to_thread(unflock, fd)
+
+    @staticmethod
+    def _sha256(path: Path) -> str:
+        hasher = hashlib.sha256()
+        with open(path, "rb") as f:
+            while block := f.read(4 * 1024 * 1024):
+                hasher.update(block)
+        return hasher.hexdigest()
+
+    @classmethod
+    async def verify(cls, upload: ImportUpload) -> ImportUpload:
+        """Check a complete upload against its sha256; a mismatch discards it."""
+        if upload.verified:
+            return upload
+        hashed = cls._hashers.pop(upload.id, None)
+        if hashed is not None and hashed[0] == upload.length:
+            digest = hashed[1].hexdigest()
+        else:
+            digest = await asyncio.to_thread(cls._sha256, cls._dir(upload.id) / "upload")
+        if digest != upload.sha256:
+            await asyncio.to_thread(shutil.rmtree, cls._dir(upload.id), True)
+            raise ChecksumMismatch(f"Upload has sha256 {digest}, expected {upload.sha256}")
+        upload.verified = True
+        await asyncio.to_thread(cls._save, upload)
+        return upload
+
+    # ───────────────────────────── extraction ──────────────────────────
+    @staticmethod
+    def _check_space(staging: Path, needed: int) -> None:
+        if shutil.disk_usage(staging).free < needed:
+            raise InsufficientSpace(f"Extracting needs {needed} bytes; not enough free space")
+
+    @classmethod
+    @timed()
+    def _extract_zip(cls, archive: Path, staging: Path) -> None:
+        """Members are independent deflate streams: extract them in parallel."""
+        with zipfile.ZipFile(archive) as zf:
+            infos = zf.infolist()
+        files = []
+        for info in infos:
+            target = _member_path(staging, info.filename)
+            if target is None:
+                continue
+            if info.is_dir():
+                target.mkdir(parents=True, exist_ok=True)
+            else:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                files.append((info, target))
+        cls._check_space(staging, sum(info.file_size for info, _ in files))
+
+        # largest first onto the least-loaded shard; one ZipFile handle per thread
+        workers = max(1, settings.IMPORT_WORKERS)
+        shards: list[list] = [[] for _ in range(workers)]
+        loads = [0] * workers
+        for info, target in sorted(files, key=lambda f: -f[0].compress_size):
+            i = loads.index(min(loads))
+            shards[i].append((info, target))
+            loads[i] += info.compress_size
+
+        def _run(shard: list) -> None:
+            with zipfile.ZipFile(archive) as zf:
+                for info, target in shard:
+                    with zf.open(info) as src, open(target, "wb") as dst:
+                        shutil.copyfileobj(src, dst, _WRITE_BATCH)
+
+        with ThreadPoolExecutor(workers, thread_name_prefix="import") as pool:
+            for future in [pool.submit(_run, shard) for shard in shards if shard]:
+                future.result()
+
+    @classmethod
+    @timed()
+    def _extract_tar(cls, archive: Path, staging: Path) -> None:
+        """
+        A compressed tar is one stream, so this thread decompresses while a
+        pool writes the members out; big members are copied straight through.
+        """
+        budget = shutil.disk_usage(staging).free
+        written = 0
+        workers = max(1, settings.IMPORT_WORKERS)
+        slots = threading.BoundedSemaphore(workers * 2)       # bounds the bytes held in memory
+        futures: list[Future] = []
+
+        def _release(_: Future) -> None:
+            slots.release()
+
+        with tarfile.open(archive, "r|*") as tar, \
+                ThreadPoolExecutor(workers, thread_name_prefix="import") as pool:
+            for member in tar:
+                target = _member_path(staging, member.name)
+                if target is None:
+                    continue
+                if member.isdir():
+                    target.mkdir(parents=True, exist_ok=True)
+                    continue
+                if not member.isfile():
+                    logger.debug("Skipping %s in %s: not a regular file", member.name, archive.name)
+                    continue
+                written += member.size
+                if written > budget:
+                    raise InsufficientSpace(f"Extracting needs over {written} bytes; not enough free space")
+                target.parent.mkdir(parents=True, exist_ok=True)
+                src = tar.extractfile(member)
+                if member.size > _INLINE_MEMBER:
+                    with open(target, "wb") as dst:
+                        shutil.copyfileobj(src, dst, _WRITE_BATCH)
+                    continue
+                data = src.read()
+                slots.acquire()
+                future = pool.submit(_write_file, target, data)
+                future.add_done_callback(_release)
+                futures.append(future)
+            for future in futures:
+                future.result()
+
+    @staticmethod
+    def _level_name(instance: str) -> str:
+        try:
+            return DockerService._load_properties(instance).get("level-name") or "world"
+        except ValueError:
+            return "world"
+
+    @classmethod
+    def _stage(cls, instance: str, archive: Path, staging: Path) -> tuple[Path, str]:
+        """
+        Extract *archive* below *staging*; returns the extracted directory and
+        what it replaces in the instance: "data", or "data/<level-name>" for
+        an archive holding just a world.
+        """
+        shutil.rmtree(staging, ignore_errors=True)
+        tree = staging / "archive"
+        tree.mkdir(parents=True)
+        if zipfile.is_zipfile(archive):
+            cls._extract_zip(archive, tree)
+        else:
+            try:
+                cls._extract_tar(archive, tree)
+            except tarfile.ReadError as e:
+                raise ValueError(f"Not a zip or tar archive: {e}") from e
+
+        # strip wrapping folders ("MyServer/data/...", "backup-2024/world/...")
+        while True:
+            entries = [p for p in tree.iterdir() if p.name not in _IGNORED]
+            if len(entries) != 1 or not entries[0].is_dir() or (tree / "level.dat").exists():
+                break
+            tree = entries[0]
+
+        if (tree / "level.dat").is_file():
+            return tree, f"data/{cls._level_name(instance)}"
+        if not any((p / "level.dat").is_file() for p in tree.iterdir() if p.is_dir()):
+            raise ValueError("No Minecraft world (level.dat) in the archive")
+        return tree, "data"
+
+    @staticmethod
+    @timed()
+    def _swap(inst_dir: Path, tree: Path, target: str) -> None:
+        """Put *tree* at inst_dir/*target*; what was there is deleted."""
+        dest = inst_dir / target
+        if dest.exists():
+            _exchange(tree, dest)
+            shutil.rmtree(tree)                         # now the old contents
+        else:
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            tree.rename(dest)
+
+    # ───────────────────────────── import ──────────────────────────────
+    @classmethod
+    @timed()
+    async def import_world(cls, instance: str, upload_id: str) -> None:
+        """Operation body: extract a verified upload and swap it into *instance*."""
+        upload = await asyncio.to_thread(cls.get, instance, upload_id)
+        if not upload.verified or upload.offset != upload.length:
+            raise ValueError(f"Upload {upload_id} is not complete and verified")
+        inst_dir = DockerService.get_instance_dir(instance)
+        staging = inst_dir / f".import-{upload_id}"
+        try:
+            tree, target = await asyncio.to_thread(
+                cls._stage, instance, cls._dir(upload_id) / "upload", staging
+            )
+
+            running = await DockerService.get_status(instance) == InstanceStatus.RUNNING
+            if running:
+                await DockerService.stop(instance)
+            if (inst_dir / "data").is_dir():
+                await BackupService.trigger_backup(instance, bucket=BackupService.restored_dirname)
+
+            await asyncio.to_thread(cls._swap, inst_dir, tree, target)
+            DockerService.forget(instance)
+            logger.info("Imported upload %s into %s/%s", upload_id, instance, target)
+            if running:
+                await DockerService.start(instance)
+        finally:
+            await asyncio.to_thread(shutil.rmtree, staging, True)
+        await asyncio.to_thread(shutil.rmtree, cls._dir(upload_id), True)
@@ -0,0 +1,249 @@
+import asyncio
+import fcntl
+import logging
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+from ..core.config import settings
+from ..core.models import OperationKind
+
+logger = logging.getLogger(__name__)
+
+# Pairs of operations that may overlap on the same instance.
+#
+# A backup only reads data/ and may run alongside a start, stop or restart:
+# the server writes region files chunk by chunk and level.dat/playerdata by
+# rename, so an archive taken while it boots or shuts down is at worst
+# crash-consistent, and `BackupService.saves_paused` copes with the server
+# coming or going. Everything else is mutually exclusive: lifecycle changes
+# must not interleave with each other; restore, import, clone and delete
+# replace or remove data/ (or read it while saves are paused); and two
+# backups would fight over save-off/save-on.
+_COMPATIBLE: frozenset[frozenset[OperationKind]] = frozenset(
+    frozenset((OperationKind.BACKUP, other))
+    for other in (OperationKind.START, OperationKind.STOP, OperationKind.RESTART)
+)
+
+# how often to retry the cross-process file lock while another worker holds it
+_FLOCK_POLL = 0.2
+
+
+def compatible(a: OperationKind, b: OperationKind) -> bool:
+    return frozenset((a, b)) in _COMPATIBLE
+
+
+def try_flock(path: Path) -> int | None:
+    """Take an exclusive flock on *path* without blocking; the fd, or None if held."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return None
+    return fd
+
+
+def unflock(fd: int) -> None:
+    fcntl.flock(fd, fcntl.LOCK_UN)
+    os.close(fd)
+
+
+# lock path -> fd of the leader flocks this worker holds
+_leaders: dict[Path, int] = {}
+
+
+async def leader_loop(
+    lock_path: Path, interval: float, step: Callable[[], Awaitable[Any]], label: str,
+) -> None:
+    """
+    Background loop for the app lifespan: every *interval* seconds, run
+    *step* if this worker leads, i.e. holds the flock on *lock_path*, and
+    try to take it otherwise. Exceptions are logged as "<label> failed"
+    and never end the loop. `release_leader` gives the lock up.
+    """
+    while True:
+        try:
+            if lock_path not in _leaders:
+                fd = await asyncio.to_thread(try_flock, lock_path)
+                if fd is not None:
+                    _leaders[lock_path] = fd
+            if lock_path in _leaders:
+                await step()
+        except Exception:
+            logger.exception("%s failed", label)
+        await asyncio.sleep(interval)
+
+
+def release_leader(lock_path: Path) -> None:
+    fd = _leaders.pop(lock_path, None)
+    if fd is not None:
+        unflock(fd)
+
+
+@dataclass(eq=False)
+class _Entry:
+    instance: str
+    kind: OperationKind
+    key: str | None
+    label: str | None                       # e.g. the operation id
+    granted: asyncio.Event = field(default_factory=asyncio.Event)
+    finished: asyncio.Future = field(
+        default_factory=lambda: asyncio.get_running_loop().create_future()
+    )
+    running: bool = False
+
+
+class InstanceLocks:
+    """
+    Serialises operations per instance.
+
+    Each instance has a FIFO queue; an entry starts once it is compatible
+    with every entry ahead of it, so a conflicting operation waits instead of
+    interleaving (e.g. a cron restart during a restore). A request identical
+    to one that is still *pending* (same kind and key) is coalesced into it:
+    two quick restarts become one down/up cycle.
+
+    While any operation runs on an instance this worker also holds an
+    exclusive `flock` on MC_ROOT/locks/<instance>.lock, so operations started
+    by other gunicorn workers (or their schedulers) wait too.
+    """
+
+    lock_root = Path(settings.MC_ROOT) / "locks"
+
+    _queues: dict[str, list[_Entry]] = {}
+    _fds: dict[str, int] = {}
+    _file_guards: dict[str, asyncio.Lock] = {}
+
+    # ───────────────────────────── queueing ─────────────────────────────
+    @classmethod
+    def claim(
+        cls,
+        instance: str,
+        kind: OperationKind,
+        *,
+        key: str | None = None,
+        label: str | None = None,
+    ) -> tuple[_Entry, bool]:
+        """
+        Queue an operation. Returns the entry and whether it is new; when an
+        identical operation is already waiting, that entry is returned instead.
+        Synchronous on purpose: no other task can slip in between the check
+        and the enqueue.
+        """
+        queue = cls._queues.setdefault(instance, [])
+        for entry in queue:
+            if not entry.running and entry.kind == kind and entry.key == key:
+                return entry, False
+
+        entry = _Entry(instance=instance, kind=kind, key=key, label=label)
+        queue.append(entry)
+        cls._dispatch(instance)
+        return entry, True
+
+    @classmethod
+    def _dispatch(cls, instance: str) -> None:
+        """Grant every entry that is compatible with all entries ahead of it."""
+        queue = cls._queues.get(instance, [])
+        for i, entry in enumerate(queue):
+            if entry.granted.is_set():
+                continue
+            if all(compatible(entry.kind, ahead.kind) for ahead in queue[:i]):
+                entry.granted.set()
+
+    @classmethod
+    def _release(cls, entry: _Entry) -> None:
+        queue = cls._queues.get(entry.instance, [])
+        if entry in queue:
+            queue.remove(entry)
+        if queue:
+            cls._dispatch(entry.instance)
+        else:
+            cls._queues.pop(entry.instance, None)
+
+    @classmethod
+    def discard(cls, entry: _Entry) -> None:
+        """Drop a claimed entry that will never be executed."""
+        if not entry.finished.done():
+            entry.finished.cancel()
+        cls._release(entry)
+
+    # ──────────────────────── cross-process lock ────────────────────────
+    @classmethod
+    def _try_flock(cls, instance: str) -> int | None:
+        return try_flock(cls.lock_root / f"{instance}.lock")
+
+    @classmethod
+    async def _lock_file(cls, instance: str) -> None:
+        guard = cls._file_guards.setdefault(instance, asyncio.Lock())
+        async with guard:
+            if instance in cls._fds:
+                return
+            while (fd := await asyncio.to_thread(cls._try_flock, instance)) is None:
+                await asyncio.sleep(_FLOCK_POLL)
+            cls._fds[instance] = fd
+
+    @classmethod
+    def _unlock_file(cls, instance: str) -> None:
+        if any(e.running for e in cls._queues.get(instance, [])):
+            return
+        fd = cls._fds.pop(instance, None)
+        if fd is not None:
+            unflock(fd)
+        cls._file_guards.pop(instance, None)
+
+    # ───────────────────────────── running ──────────────────────────────
+    @classmethod
+    async def execute(
+        cls,
+        entry: _Entry,
+        func: Callable[..., Awaitable[Any]],
+        *args: Any,
+    ) -> Any:
+        """Wait for *entry*'s turn, run `func(*args)`, publish the outcome."""
+        try:
+            await entry.granted.wait()
+            await cls._lock_file(entry.instance)
+            entry.running = True
+            result = await func(*args)
+        except BaseException as e:
+            if not entry.finished.done():
+                if isinstance(e, asyncio.CancelledError):
+                    entry.finished.cancel()
+                else:
+                    entry.finished.set_exception(e)
+                    entry.finished.exception()  # mark retrieved when nobody coalesced
+            raise
+        else:
+            entry.finished.set_result(result)
+            return result
+        finally:
+            entry.running = False
+            cls._release(entry)
+            cls._unlock_file(entry.instance)
+
+    @classmethod
+    async def run(
+        cls,
+        instance: str,
+        kind: OperationKind,
+        func: Callable[..., Awaitable[Any]],
+        *args: Any,
+        key: str | None = None,
+    ) -> Any:
+        """
+        Run `func(*args)` under the instance's queue, or share the result of
+        an identical operation that is already waiting.
+        """
+        entry, fresh = cls.claim(instance, kind, key=key)
+        if not fresh:
+            return await asyncio.shield(entry.finished)
+        return await cls.execute(entry, func, *args)
+
+    # ──────────────────────────── inspection ────────────────────────────
+    @classmethod
+    def snapshot(cls, instance: str) -> list[_Entry]:
+        """Current queue for *instance*: running entries first, then waiting ones."""
+        return list(cls._queues.get(instance, []))
@@ -0,0 +1,116 @@
+"""
+Just enough of the Minecraft Java protocol for MCDock: framing (VarInt
+length-prefixed packets), the handshake, and the status / ping /
+login-disconnect packets used to ping servers and to stand in for one.
+
+Reference: https://minecraft.wiki/w/Java_Edition_protocol/Server_List_Ping
+"""
+import asyncio
+import json
+import struct
+
+# packet ids in the handshake / status / login states
+HANDSHAKE = 0x00
+STATUS_REQUEST = STATUS_RESPONSE = 0x00
+PING = PONG = 0x01
+LOGIN_DISCONNECT = 0x00
+
+NEXT_STATUS = 1
+NEXT_LOGIN = 2
+NEXT_TRANSFER = 3
+
+# refuse absurd frames from random scanners hitting the port
+MAX_PACKET = 1 << 16
+
+
+def pack_varint(value: int) -> bytes:
+    value &= 0xFFFFFFFF
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def unpack_varint(buf: bytes, offset: int = 0) -> tuple[int, int]:
+    """Decode a VarInt at *offset*; returns (value, new offset)."""
+    result = 0
+    for i in range(5):
+        if offset >= len(buf):
+            raise ValueError("truncated VarInt")
+        byte = buf[offset]
+        offset += 1
+        result |= (byte & 0x7F) << (7 * i)
+        if not byte & 0x80:
+            return (result - (1 << 32) if result & (1 << 31) else result), offset
+    raise ValueError("VarInt too long")
+
+
+def pack_string(text: str) -> bytes:
+    data = text.encode()
+    return pack_varint(len(data)) + data
+
+
+def unpack_string(buf: bytes, offset: int) -> tuple[str, int]:
+    length, offset = unpack_varint(buf, offset)
+    end = offset + length
+    if end > len(buf):
+        raise ValueError("truncated string")
+    return buf[offset:end].decode(errors="replace"), end
+
+
+async def read_varint(reader: asyncio.StreamReader) -> int:
+    result = 0
+    for i in range(5):
+        byte = (await reader.readexactly(1))[0]
+        result |= (byte & 0x7F) << (7 * i)
+        if not byte & 0x80:
+            return result
+    raise ValueError("VarInt too long")
+
+
+async def read_packet(reader: asyncio.StreamReader, limit: int = MAX_PACKET) -> tuple[int, bytes]:
+    """Read one uncompressed packet; returns (packet id, payload)."""
+    length = await read_varint(reader)
+    if not 0 < length <= limit:
+        raise ValueError(f"bad packet length {length}")
+    data = await reader.readexactly(length)
+    packet_id, offset = unpack_varint(data)
+    return packet_id, data[offset:]
+
+
+def packet(packet_id: int, payload: bytes = b"") -> bytes:
+    body = pack_varint(packet_id) + payload
+    return pack_varint(len(body)) + body
+
+
+# ───────────────────────────── handshake ─────────────────────────────
+def handshake(protocol: int, host: str, port: int, next_state: int) -> bytes:
+    return packet(
+        HANDSHAKE,
+        pack_varint(protocol) + pack_string(host) + struct.pack(">H", port) + pack_varint(next_state),
+    )
+
+
+def parse_handshake(payload: bytes) -> tuple[int, str, int, int]:
+    """(protocol, server address, port, next state) from a handshake payload."""
+    protocol, offset = unpack_varint(payload)
+    host, offset = unpack_string(payload, offset)
+    if offset + 2 > len(payload):
+        raise ValueError("truncated handshake")
+    (port,) = struct.unpack_from(">H", payload, offset)
+    next_state, _ = unpack_varint(payload, offset + 2)
+    return protocol, host, port, next_state
+
+
+# ───────────────────────────── responses ─────────────────────────────
+def status_response(status: dict) -> bytes:
+    return packet(STATUS_RESPONSE, pack_string(json.dumps(status)))
+
+
+def disconnect(reason: str) -> bytes:
+    return packet(LOGIN_DISCONNECT, pack_string(json.dumps({"text": reason})))
@@ -1,6 +1,8 @@
+from datetime import datetime
+
 from pydantic import BaseModel
 
-from ..core.models import EnvVar, PortBinding
+from ..core.models import EnvVar, PortBinding, InstanceStatus, OperationKind, OperationState, BulkAction, BootState, FsChange, PregenShape, PregenState
 
 
 class Instance(BaseModel):
@@ -9,4 +11,182 @@ class Instance(BaseModel):
     eula:        bool
     memory:      str
     env:         list[EnvVar]
-    ports:       list[PortBinding]
\ No newline at end of file
+    ports:       list[PortBinding]
+    tags:        list[str] = []
+    boot_priority: int = 0                 # higher boots first (see `BootQueue`)
+
+
+class InstanceRecord(BaseModel):
+    """Row of the instance registry (see `InstanceRegistry`)."""
+    name:        str
+    image:       str
+    memory:      str
+    ports:       list[PortBinding]
+    tags:        list[str]
+    boot_priority: int = 0
+    created_at:  datetime
+    status:      InstanceStatus
+
+
+class ImportUpload(BaseModel):
+    """A resumable world upload (see `ImportService`)."""
+    id:          str
+    instance:    str
+    length:      int                       # total bytes announced by the client
+    offset:      int = 0                   # bytes received; the next request starts here
+    sha256:      str
+    verified:    bool = False              # complete and matching sha256
+    created_at:  datetime
+    operation_id: str | None = None        # the import operation, once submitted
+
+
+class Operation(BaseModel):
+    """A background lifecycle operation (see `OperationService`)."""
+    id:          str
+    kind:        OperationKind
+    instance:    str
+    state:       OperationState
+    error:       str | None = None
+    created_at:  datetime
+    finished_at: datetime | None = None
+
+
+class BulkItemResult(BaseModel):
+    """Outcome of one instance in a bulk request (one NDJSON line)."""
+    instance:     str
+    action:       BulkAction
+    ok:           bool
+    operation_id: str | None = None
+    output:       str | None = None
+    error:        str | None = None
+    elapsed:      float                    # seconds
+
+
+class BootEntry(BaseModel):
+    """An instance waiting for, or holding, a boot slot (see `BootQueue`)."""
+    instance:    str
+    priority:    int
+    state:       BootState
+    enqueued_at: datetime
+    started_at:  datetime | None = None
+
+
+class MemoryClaim(BaseModel):
+    """Memory an instance is charged for while it runs or boots."""
+    instance:    str
+    memory:      str                       # configured MEMORY (heap)
+    footprint:   int                       # bytes: heap + JVM overhead
+    booting:     bool = False
+
+
+class HostCapacity(BaseModel):
+    """Host RAM budget for instances (see `CapacityService`); sizes in bytes."""
+    total:       int | None                # MemTotal, None when unknown
+    available:   int | None                # MemAvailable as seen by the kernel
+    reserve:     int
+    budget:      int | None                # total - reserve
+    committed:   int
+    headroom:    int | None                # budget - committed
+    enforced:    bool
+    instances:   list[MemoryClaim]
+
+
+class ServerStatus(BaseModel):
+    """Server List Ping answer of a running instance (see `PingService`)."""
+    players_online: int
+    players_max:    int
+    version:        str
+    motd:           str
+    latency_ms:     float | None = None    # None if the server skipped the pong
+
+
+class HealthSample(BaseModel):
+    """One tick-health sample of an instance (see `HealthService`)."""
+    instance:     str
+    at:           datetime
+    cpu:          float | None = None      # percent of one core
+    mem_mib:      float | None = None
+    tps:          float | None = None      # Paper `tps` (1m)
+    mspt:         float | None = None      # Paper `mspt` (5s average)
+    ticks_behind: int | None = None        # vanilla "Can't keep up!" since last sample
+    players:      int | None = None
+    players_max:  int | None = None
+    alerts:       list[str] = []           # thresholds breached by this sample
+
+
+class AllocationSite(BaseModel):
+    """Memory allocated from one place, per tracemalloc (see `ProfilingService`)."""
+    site:         str                      # "file.py:123", or a traceback joined by " <- "
+    size:         int                      # bytes currently allocated
+    count:        int                      # live blocks
+    size_diff:    int | None = None        # change since the previous snapshot
+    count_diff:   int | None = None
+
+
+class MemoryReport(BaseModel):
+    """A tracemalloc snapshot of one worker."""
+    worker:       int
+    traced:       int                      # bytes traced right now
+    peak:         int
+    top:          list[AllocationSite]     # largest sites
+    grown:        list[AllocationSite]     # largest growth since the previous snapshot
+
+
+class FsEvent(BaseModel):
+    """A change under MC_ROOT seen by `WatchService`."""
+    kind:         FsChange
+    instance:     str
+    path:         str | None = None        # backup events: "<bucket>/<file>.tar.gz"
+
+
+class InstanceUsage(BaseModel):
+    """Disk used by an instance's data/ (see `UsageService`); sizes in bytes."""
+    instance:     str
+    total:        int
+    dimensions:   dict[str, int]           # "overworld", "the_nether", "the_end", "ns:custom"
+    logs:         int                      # logs/ and crash-reports/
+    plugins:      int                      # plugins/ and mods/
+    other:        int
+    scanned_at:   datetime
+    growth_per_day: float | None = None    # bytes/day over USAGE_TREND_WINDOW
+
+
+class BucketUsage(BaseModel):
+    """Disk used by one backup bucket of an instance; sizes in bytes."""
+    instance:     str
+    bucket:       str
+    total:        int
+    archives:     int
+    scanned_at:   datetime
+    growth_per_day: float | None = None
+
+
+class UsageReport(BaseModel):
+    """Disk usage under MC_ROOT and the filesystem holding it; sizes in bytes."""
+    disk_total:   int
+    disk_free:    int
+    instances:    list[InstanceUsage]
+    backups:      list[BucketUsage]
+    growth_per_day: float | None           # sum over everything with a trend
+    days_until_full: float | None          # at that rate; None when not growing
+
+
+class PregenJob(BaseModel):
+    """A world pre-generation job (see `PregenService`)."""
+    id:           str
+    instance:     str
+    world:        str
+    shape:        PregenShape
+    center_x:     int
+    center_z:     int
+    radius:       int                      # blocks from the centre
+    state:        PregenState
+    reason:       str | None = None        # why it is waiting, throttled or failed
+    progress:     float = 0                # percent, as reported by the plugin
+    chunks:       int = 0                  # chunks processed so far
+    rate:         float | None = None      # chunks per second
+    eta_seconds:  int | None = None
+    created_at:   datetime
+    started_at:   datetime | None = None
+    updated_at:   datetime
+    finished_at:  datetime | None = None
@@ -0,0 +1,286 @@
+import asyncio
+import contextvars
+import logging
+import os
+import uuid
+from datetime import datetime, UTC
+from typing import Any, Awaitable, Callable
+
+from .backup_service import BackupService
+from .docker_service import DockerService
+from .locks import InstanceLocks
+from .models import Operation
+from ..core import db, timing
+from ..core.aio import loop_semaphore
+from ..core.config import settings
+from ..core.models import OperationKind, OperationState
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS operations (
+    id          TEXT PRIMARY KEY,
+    kind        TEXT NOT NULL,
+    instance    TEXT NOT NULL,
+    state       TEXT NOT NULL,
+    error       TEXT,
+    created_at  TEXT NOT NULL,
+    finished_at TEXT,
+    owner_pid   INTEGER NOT NULL,
+    seq         INTEGER NOT NULL          -- bumped on every change, drives the event feed
+);
+CREATE INDEX IF NOT EXISTS operations_seq ON operations(seq);
+"""
+
+_NEXT_SEQ = "(SELECT COALESCE(MAX(seq), 0) + 1 FROM operations)"
+
+_DONE = (OperationState.SUCCEEDED.value, OperationState.FAILED.value)
+
+
+class OperationService:
+    """
+    Runs slow lifecycle operations (compose up/down, delete) in the
+    background so HTTP requests return immediately with an operation id.
+
+    Records live in the shared state DB, so any gunicorn worker can answer
+    `GET /operations/{id}` and stream completion events; finished results
+    are kept for `OPERATION_TTL`. Every operation is queued through
+    `InstanceLocks`, so conflicting ones on the same instance wait and a
+    duplicate of a still-pending one returns the existing operation.
+    """
+
+    _tasks: dict[str, asyncio.Task] = {}
+    _listeners: set[asyncio.Event] = set()
+
+    # ───────────────────────────── records ─────────────────────────────
+    @staticmethod
+    def _to_operation(row) -> Operation:
+        return Operation(
+            id          = row["id"],
+            kind        = OperationKind(row["kind"]),
+            instance    = row["instance"],
+            state       = OperationState(row["state"]),
+            error       = row["error"],
+            created_at  = datetime.fromisoformat(row["created_at"]),
+            finished_at = datetime.fromisoformat(row["finished_at"]) if row["finished_at"] else None,
+        )
+
+    @classmethod
+    def _insert(cls, op: Operation) -> None:
+        with db.connect(_SCHEMA) as conn:
+            conn.execute(
+                f"""
+                INSERT INTO operations (id, kind, instance, state, created_at, owner_pid, seq)
+                VALUES (?, ?, ?, ?, ?, ?, {_NEXT_SEQ})
+                """,
+                (op.id, op.kind.value, op.instance, op.state.value,
+                 op.created_at.isoformat(), os.getpid()),
+            )
+
+    @classmethod
+    def _set_state(cls, op_id: str, state: OperationState, error: str | None = None) -> None:
+        finished = datetime.now(UTC).isoformat() if state.value in _DONE else None
+        with db.connect(_SCHEMA) as conn:
+            conn.execute(
+                f"""
+                UPDATE operations
+                SET state = ?, error = ?, finished_at = ?, seq = {_NEXT_SEQ}
+                WHERE id = ?
+                """,
+                (state.value, error, finished, op_id),
+            )
+
+    @classmethod
+    def get(cls, op_id: str) -> Operation | None:
+        with db.connect(_SCHEMA) as conn:
+            row = conn.execute("SELECT * FROM operations WHERE id = ?", (op_id,)).fetchone()
+        return cls._to_operation(row) if row else None
+
+    @classmethod
+    def recent(cls, instance: str | None = None) -> list[Operation]:
+        sql, args = "SELECT * FROM operations", []
+        if instance:
+            sql, args = sql + " WHERE instance = ?", [instance]
+        with db.connect(_SCHEMA) as conn:
+            rows = conn.execute(sql + " ORDER BY created_at DESC", args).fetchall()
+        return [cls._to_operation(r) for r in rows]
+
+    @classmethod
+    def last_seq(cls) -> int:
+        with db.connect(_SCHEMA) as conn:
+            return conn.execute("SELECT COALESCE(MAX(seq), 0) FROM operations").fetchone()[0]
+
+    @classmethod
+    def changes_since(cls, seq: int) -> tuple[list[Operation], int]:
+        """Operations changed after *seq*, and the new high-water mark."""
+        with db.connect(_SCHEMA) as conn:
+            rows = conn.execute(
+                "SELECT * FROM operations WHERE seq > ? ORDER BY seq", (seq,)
+            ).fetchall()
+        if not rows:
+            return [], seq
+        return [cls._to_operation(r) for r in rows], rows[-1]["seq"]
+
+    @classmethod
+    def purge(cls) -> None:
+        """Drop finished operations older than OPERATION_TTL."""
+        cutoff = (datetime.now(UTC) - settings.OPERATION_TTL).isoformat()
+        with db.connect(_SCHEMA) as conn:
+            conn.execute(
+                "DELETE FROM operations WHERE state IN (?, ?) AND finished_at < ?",
+                (*_DONE, cutoff),
+            )
+
+    @classmethod
+    def recover(cls) -> None:
+        """
+        Fail operations whose owning worker died before finishing them
+        (e.g. a gunicorn worker restart), so clients are not left polling.
+        """
+        with db.connect(_SCHEMA) as conn:
+            rows = conn.execute(
+                "SELECT id, owner_pid FROM operations WHERE state NOT IN (?, ?)", _DONE
+            ).fetchall()
+        for row in rows:
+            if not db.pid_alive(row["owner_pid"]):
+                cls._set_state(row["id"], OperationState.FAILED, "interrupted: worker exited")
+
+    # ───────────────────────────── events ──────────────────────────────
+    @classmethod
+    def subscribe(cls) -> asyncio.Event:
+        """Event set whenever this worker changes an operation."""
+        event = asyncio.Event()
+        cls._listeners.add(event)
+        return event
+
+    @classmethod
+    def unsubscribe(cls, event: asyncio.Event) -> None:
+        cls._listeners.discard(event)
+
+    @classmethod
+    def _notify(cls) -> None:
+        for event in cls._listeners:
+            event.set()
+
+    # ──────────────────────────── execution ────────────────────────────
+    @classmethod
+    async def submit(
+        cls,
+        kind: OperationKind,
+        instance: str,
+        func: Callable[..., Awaitable[Any]],
+        *args: Any,
+        key: str | None = None,
+    ) -> Operation:
+        """
+        Record a pending operation and run `func(*args)` in the background,
+        at most OPERATION_WORKERS at a time per worker.
+
+        *key* narrows coalescing (e.g. the backup bucket): only a pending
+        operation with the same kind and key is reused.
+        """
+        op = Operation(
+            id=uuid.uuid4().hex,
+            kind=kind,
+            instance=instance,
+            state=OperationState.PENDING,
+            created_at=datetime.now(UTC),
+        )
+        entry, fresh = InstanceLocks.claim(instance, kind, key=key, label=op.id)
+        if not fresh and entry.label is not None:
+            existing = await asyncio.to_thread(cls.get, entry.label)
+            if existing is not None:
+                return existing
+
+        try:
+            await asyncio.to_thread(cls.purge)
+            await asyncio.to_thread(cls._insert, op)
+        except BaseException:
+            if fresh:
+                InstanceLocks.discard(entry)
+            raise
+        cls._notify()
+
+        if fresh:
+            work = InstanceLocks.execute(entry, cls._body, op, func, *args)
+        else:                                   # coalesced into an unlabelled waiter
+            work = asyncio.shield(entry.finished)
+
+        # A fresh context: the job outlives the request, so its spans must not
+        # hang off the request's (by then finished) root span.
+        task = asyncio.create_task(
+            cls._run(op, work), name=f"op-{kind.value}-{instance}", context=contextvars.Context(),
+        )
+        cls._tasks[op.id] = task
+        task.add_done_callback(lambda _: cls._tasks.pop(op.id, None))
+        return op
+
+    @classmethod
+    async def _body(cls, op: Operation, func: Callable[..., Awaitable[Any]], *args: Any) -> Any:
+        """Runs once the instance queue granted *op*; waits for an executor slot."""
+        async with loop_semaphore("operations", settings.OPERATION_WORKERS):
+            await asyncio.to_thread(cls._set_state, op.id, OperationState.RUNNING)
+            cls._notify()
+            return await func(*args)
+
+    @classmethod
+    async def _run(cls, op: Operation, work: Awaitable[Any]) -> None:
+        try:
+            with timing.span(f"op.{op.kind.value}", instance=op.instance, id=op.id):
+                await work
+        except asyncio.CancelledError:
+            await asyncio.shield(
+                asyncio.to_thread(cls._set_state, op.id, OperationState.FAILED, "cancelled")
+            )
+            cls._notify()
+            raise
+        except Exception as e:
+            logger.warning("Operation %s (%s %s) failed: %s", op.id, op.kind.value, op.instance, e)
+            await asyncio.to_thread(cls._set_state, op.id, OperationState.FAILED, str(e) or type(e).__name__)
+        else:
+            await asyncio.to_thread(cls._set_state, op.id, OperationState.SUCCEEDED)
+        cls._notify()
+
+    @classmethod
+    async def wait(cls, op_id: str, poll: float = 0.5) -> Operation:
+        """
+        Wait until *op_id* has finished. Operations run by this worker are
+        awaited directly; others are polled from the state DB.
+        """
+        task = cls._tasks.get(op_id)
+        if task is not None:
+            await asyncio.wait({task})
+        while True:
+            op = await asyncio.to_thread(cls.get, op_id)
+            if op is None:
+                raise KeyError(op_id)
+            if op.state.value in _DONE:
+                return op
+            await asyncio.sleep(poll)
+
+    @classmethod
+    async def run_scheduled(cls, kind: OperationKind, instance: str, *args: Any) -> None:
+        """
+        APScheduler entry point for cron restarts/backups: the job becomes a
+        recorded operation in the instance queue, and the job waits for it so
+        `max_instances` keeps its meaning.
+        """
+        if kind == OperationKind.RESTART:
+            op = await cls.submit(kind, instance, DockerService.restart, instance)
+        elif kind == OperationKind.BACKUP:
+            bucket = args[0] if args else BackupService.triggered_dirname
+            op = await cls.submit(
+                kind, instance, BackupService.trigger_backup, instance, bucket, key=bucket
+            )
+        else:
+            raise ValueError(f"{kind.value} cannot be scheduled")
+
+        await cls.wait(op.id)
+
+    @classmethod
+    async def shutdown(cls) -> None:
+        """Cancel this worker's in-flight operations (marks them failed)."""
+        tasks = list(cls._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
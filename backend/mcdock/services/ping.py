@@ -0,0 +1,131 @@
+import asyncio
+import json
+import logging
+import re
+import socket
+import struct
+import time
+
+from . import mcproto
+from .models import InstanceRecord, ServerStatus
+from .sleep import game_port
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# status replies carry a base64 favicon, so allow far more than the listener does
+_STATUS_LIMIT = 1 << 21
+
+# legacy "§" formatting codes inside MOTD strings
+_FORMATTING = re.compile("§.")
+
+
+def _plain(component) -> str:
+    """Flatten a chat component (str, dict with text/extra, or list) to text."""
+    if isinstance(component, str):
+        return _FORMATTING.sub("", component)
+    if isinstance(component, list):
+        return "".join(_plain(c) for c in component)
+    if isinstance(component, dict):
+        return _plain(component.get("text", "")) + _plain(component.get("extra", []))
+    return ""
+
+
+class PingService:
+    """
+    Asyncio Server List Ping client.
+
+    `status_of` pings every given instance's game port at once and caches
+    each answer (or failure) for PING_CACHE_TTL seconds, so listings and
+    pollers can ask freely without hammering servers or spawning
+    `docker exec`. Concurrent callers share one in-flight ping per port.
+    """
+
+    _cache: dict[int, tuple[float, ServerStatus | None]] = {}
+    _inflight: dict[int, asyncio.Task] = {}
+    _host: str | None = None                     # PING_HOST, resolved once
+
+    @classmethod
+    async def host(cls) -> str:
+        """
+        Address of the host's published game ports: PING_HOST resolved once
+        (inside the panel container, the gateway to the docker host), or
+        127.0.0.1 where that name does not resolve.
+        """
+        if cls._host is None:
+            try:
+                infos = await asyncio.get_running_loop().getaddrinfo(
+                    settings.PING_HOST, None, family=socket.AF_INET, type=socket.SOCK_STREAM,
+                )
+                cls._host = infos[0][4][0]
+            except OSError as e:
+                logger.info("PING_HOST %s does not resolve (%s); pinging 127.0.0.1", settings.PING_HOST, e)
+                cls._host = "127.0.0.1"
+        return cls._host
+
+    @classmethod
+    async def ping(cls, host: str, port: int, timeout: float | None = None) -> ServerStatus:
+        """Query one server; raises OSError/TimeoutError/ValueError on failure."""
+        timeout = settings.PING_TIMEOUT if timeout is None else timeout
+        return await asyncio.wait_for(cls._ping(host, port), timeout)
+
+    @classmethod
+    async def _ping(cls, host: str, port: int) -> ServerStatus:
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            writer.write(mcproto.handshake(-1, host, port, mcproto.NEXT_STATUS))
+            writer.write(mcproto.packet(mcproto.STATUS_REQUEST))
+            await writer.drain()
+            packet_id, payload = await mcproto.read_packet(reader, _STATUS_LIMIT)
+            if packet_id != mcproto.STATUS_RESPONSE:
+                raise ValueError(f"unexpected packet 0x{packet_id:02x}")
+            raw, _ = mcproto.unpack_string(payload, 0)
+            status = json.loads(raw)
+
+            sent = time.perf_counter()
+            writer.write(mcproto.packet(mcproto.PING, struct.pack(">q", int(sent * 1000))))
+            await writer.drain()
+            try:
+                await mcproto.read_packet(reader)
+                latency = (time.perf_counter() - sent) * 1000
+            except asyncio.IncompleteReadError:
+                latency = None                         # server hung up after the status
+        finally:
+            writer.close()
+
+        players = status.get("players") or {}
+        return ServerStatus(
+            players_online = int(players.get("online", 0)),
+            players_max    = int(players.get("max", 0)),
+            version        = str((status.get("version") or {}).get("name", "")),
+            motd           = _plain(status.get("description", "")).strip(),
+            latency_ms     = round(latency, 1) if latency is not None else None,
+        )
+
+    @classmethod
+    async def _cached(cls, port: int) -> ServerStatus | None:
+        now = time.monotonic()
+        hit = cls._cache.get(port)
+        if hit and hit[0] > now:
+            return hit[1]
+
+        host = await cls.host()                         # before the lookup: no await in between
+        task = cls._inflight.get(port)
+        if task is None:
+            task = asyncio.create_task(cls.ping(host, port))
+            cls._inflight[port] = task
+            task.add_done_callback(lambda _: cls._inflight.pop(port, None))
+        try:
+            result = await asyncio.shield(task)
+        except Exception:
+            result = None                                # starting up, crashed, or not Minecraft
+        cls._cache[port] = (time.monotonic() + settings.PING_CACHE_TTL, result)
+        return result
+
+    @classmethod
+    async def status_of(cls, records: list[InstanceRecord]) -> dict[str, ServerStatus | None]:
+        """Ping the game port of every record concurrently; None where no answer."""
+        ports = {r.name: game_port(r) for r in records}
+        names = [n for n, p in ports.items() if p is not None]
+        results = await asyncio.gather(*(cls._cached(ports[n]) for n in names))
+        return {**{n: None for n in ports}, **dict(zip(names, results))}
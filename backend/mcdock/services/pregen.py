@@ -0,0 +1,390 @@
+import asyncio
+import logging
+import re
+import subprocess
+import time
+import uuid
+from datetime import datetime, UTC
+from pathlib import Path
+
+from . import process
+from .boot import BootQueue
+from .docker_service import DockerService
+from .health import HealthService
+from .locks import leader_loop, release_leader
+from .models import HealthSample, PregenJob
+from .registry import InstanceRegistry
+from ..core import db
+from ..core.config import settings
+from ..core.models import InstanceStatus, PregenShape, PregenState
+from ..core.timing import timed
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pregen_jobs (
+    id           TEXT PRIMARY KEY,
+    instance     TEXT NOT NULL,
+    world        TEXT NOT NULL,
+    shape        TEXT NOT NULL,
+    center_x     INTEGER NOT NULL,
+    center_z     INTEGER NOT NULL,
+    radius       INTEGER NOT NULL,
+    state        TEXT NOT NULL,
+    reason       TEXT,
+    progress     REAL NOT NULL DEFAULT 0,
+    chunks       INTEGER NOT NULL DEFAULT 0,
+    rate         REAL,
+    eta_seconds  INTEGER,
+    created_at   TEXT NOT NULL,
+    started_at   TEXT,
+    updated_at   TEXT NOT NULL,
+    finished_at  TEXT,
+    scanned_at   REAL,                    -- console read up to here (unix time)
+    progressed_at REAL                    -- last progress line, or last (re)start
+);
+CREATE INDEX IF NOT EXISTS pregen_jobs_instance ON pregen_jobs(instance, created_at);
+"""
+
+_ACTIVE = (
+    PregenState.PENDING, PregenState.RUNNING, PregenState.THROTTLED, PregenState.PAUSED,
+)
+
+# Chunky console lines ("[Chunky] " prefix and "§x" colour codes aside)
+_COLOR = re.compile("§.")
+_PROGRESS = re.compile(
+    r"Task running for (\S+?)\. Processed: (\d+) chunks \(([\d.]+)%\)"
+    r"(?:, ETA: (\d+):(\d\d):(\d\d))?(?:, Rate: ([\d.]+) cps)?"
+)
+_FINISHED = re.compile(r"Task finished for (\S+?)\. Processed: (\d+) chunks \(([\d.]+)%\)")
+_UNKNOWN = re.compile(r"Unknown (?:or incomplete )?command", re.IGNORECASE)
+
+
+class PregenService:
+    """
+    World pre-generation as managed jobs, driven through a Chunky-compatible
+    plugin (`PREGEN_COMMAND`) over RCON.
+
+    Jobs live in the shared state DB; any worker creates, pauses or cancels
+    them. One worker at a time (holder of MC_ROOT/locks/pregen.lock) drives
+    them every PREGEN_INTERVAL: it starts pending jobs, reads progress from
+    the console, pauses the plugin while players are online or TPS is low
+    (THROTTLED) and continues it once they are gone. Nothing is kept in
+    memory, so a job picks up where it was after a panel restart; a running
+    job that makes no progress for PREGEN_STALL_AFTER (e.g. the server was
+    restarted) is sent `continue`, which resumes the plugin's saved task.
+    """
+
+    lock_path = Path(settings.MC_ROOT) / "locks" / "pregen.lock"
+
+
+    # ───────────────────────────── records ─────────────────────────────
+    @staticmethod
+    def _to_job(row) -> PregenJob:
+        return PregenJob(
+            id          = row["id"],
+            instance    = row["instance"],
+            world       = row["world"],
+            shape       = PregenShape(row["shape"]),
+            center_x    = row["center_x"],
+            center_z    = row["center_z"],
+            radius      = row["radius"],
+            state       = PregenState(row["state"]),
+            reason      = row["reason"],
+            progress    = row["progress"],
+            chunks      = row["chunks"],
+            rate        = row["rate"],
+            eta_seconds = row["eta_seconds"],
+            created_at  = datetime.fromisoformat(row["created_at"]),
+            started_at  = datetime.fromisoformat(row["started_at"]) if row["started_at"] else None,
+            updated_at  = datetime.fromisoformat(row["updated_at"]),
+            finished_at = datetime.fromisoformat(row["finished_at"]) if row["finished_at"] else None,
+        )
+
+    @classmethod
+    def _row(cls, job_id: str):
+        with db.connect(_SCHEMA) as conn:
+            return conn.execute("SELECT * FROM pregen_jobs WHERE id = ?", (job_id,)).fetchone()
+
+    @classmethod
+    def _update(cls, job_id: str, expect: PregenState | None = None, **fields) -> bool:
+        """
+        Write *fields* of a job; with *expect*, only while it is still in
+        that state (another worker may have paused or cancelled it meanwhile).
+        """
+        now = datetime.now(UTC)
+        if (state := fields.get("state")) is not None:
+            fields["state"] = state.value
+            if state not in _ACTIVE:
+                fields["finished_at"] = now.isoformat()
+        fields["updated_at"] = now.isoformat()
+        sql = f"UPDATE pregen_jobs SET {', '.join(f'{k} = ?' for k in fields)} WHERE id = ?"
+        args = [*fields.values(), job_id]
+        if expect is not None:
+            sql, args = sql + " AND state = ?", args + [expect.value]
+        with db.connect(_SCHEMA) as conn:
+            return conn.execute(sql, args).rowcount == 1
+
+    @classmethod
+    def get(cls, instance: str, job_id: str) -> PregenJob:
+        row = cls._row(job_id)
+        if row is None or row["instance"] != instance:
+            raise FileNotFoundError(f"No pre-generation job {job_id} for {instance}")
+        return cls._to_job(row)
+
+    @classmethod
+    def jobs(cls, instance: str) -> list[PregenJob]:
+        """Jobs of *instance*, newest first."""
+        with db.connect(_SCHEMA) as conn:
+            rows = conn.execute(
+                "SELECT * FROM pregen_jobs WHERE instance = ? ORDER BY created_at DESC",
+                (instance,),
+            ).fetchall()
+        return [cls._to_job(r) for r in rows]
+
+    @classmethod
+    def active(cls) -> list[PregenJob]:
+        """Jobs not yet completed, cancelled or failed, of every instance."""
+        with db.connect(_SCHEMA) as conn:
+            rows = conn.execute(
+                f"SELECT * FROM pregen_jobs WHERE state IN ({', '.join('?' * len(_ACTIVE))})"
+                " ORDER BY created_at",
+                [s.value for s in _ACTIVE],
+            ).fetchall()
+        return [cls._to_job(r) for r in rows]
+
+    @classmethod
+    def create(
+        cls,
+        instance: str,
+        *,
+        radius: int,
+        shape: PregenShape = PregenShape.SQUARE,
+        center_x: int = 0,
+        center_z: int = 0,
+        world: str = "world",
+    ) -> PregenJob:
+        """Queue a job; it starts on the next pass while the server runs. One per instance."""
+        now = datetime.now(UTC)
+        job = PregenJob(
+            id=uuid.uuid4().hex, instance=instance, world=world, shape=shape,
+            center_x=center_x, center_z=center_z, radius=radius,
+            state=PregenState.PENDING, created_at=now, updated_at=now,
+        )
+        with db.connect(_SCHEMA) as conn:
+            busy = conn.execute(
+                f"SELECT id FROM pregen_jobs WHERE instance = ? AND state IN ({', '.join('?' * len(_ACTIVE))})",
+                [instance, *(s.value for s in _ACTIVE)],
+            ).fetchone()
+            if busy is not None:
+                raise ValueError(f"{instance} already has a pre-generation job ({busy['id']})")
+            conn.execute(
+                """
+                INSERT INTO pregen_jobs
+                    (id, instance, world, shape, center_x, center_z, radius, state,
+                     created_at, updated_at, scanned_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (job.id, instance, world, shape.value, center_x, center_z, radius,
+                 job.state.value, now.isoformat(), now.isoformat(), now.timestamp()),
+            )
+        return job
+
+    # ───────────────────────────── plugin ──────────────────────────────
+    @classmethod
+    async def _chunky(cls, instance: str, *args: str | int) -> str:
+        """Run one plugin command, confirming it if the plugin asks to."""
+        command = " ".join((settings.PREGEN_COMMAND, *map(str, args)))
+        out = _COLOR.sub("", await DockerService.send_command(instance, command))
+        if _UNKNOWN.search(out):
+            raise ValueError(f"`{settings.PREGEN_COMMAND}` is not a command on {instance}; is Chunky installed?")
+        if "confirm" in out.lower():
+            out = _COLOR.sub("", await DockerService.send_command(
+                instance, f"{settings.PREGEN_COMMAND} confirm"
+            ))
+        return out
+
+    @classmethod
+    async def _quietly(cls, instance: str, *args: str) -> None:
+        """`_chunky` for user actions: a stopped server has nothing to pause or cancel."""
+        try:
+            await cls._chunky(instance, *args)
+        except (subprocess.CalledProcessError, TimeoutError, OSError, ValueError) as e:
+            logger.debug("%s %s on %s failed: %s", settings.PREGEN_COMMAND, args, instance, e)
+
+    @classmethod
+    async def _start(cls, job: PregenJob) -> None:
+        await cls._chunky(job.instance, "world", job.world)
+        await cls._chunky(job.instance, "shape", job.shape.value)
+        await cls._chunky(job.instance, "center", job.center_x, job.center_z)
+        await cls._chunky(job.instance, "radius", job.radius)
+        await cls._chunky(job.instance, "start")
+
+    # ───────────────────────────── user actions ────────────────────────
+    @classmethod
+    async def pause(cls, instance: str, job_id: str) -> PregenJob:
+        job = await asyncio.to_thread(cls.get, instance, job_id)
+        if job.state not in (PregenState.PENDING, PregenState.RUNNING, PregenState.THROTTLED):
+            raise ValueError(f"Job {job_id} is {job.state.value}")
+        if not await asyncio.to_thread(
+            cls._update, job_id, job.state, state=PregenState.PAUSED, reason="paused by user"
+        ):
+            raise ValueError(f"Job {job_id} changed meanwhile; try again")
+        if job.state == PregenState.RUNNING:
+            await cls._quietly(instance, "pause")
+        return await asyncio.to_thread(cls.get, instance, job_id)
+
+    @classmethod
+    async def resume(cls, instance: str, job_id: str) -> PregenJob:
+        """Hand a paused job back to the loop, which continues it when the server allows."""
+        job = await asyncio.to_thread(cls.get, instance, job_id)
+        if job.state != PregenState.PAUSED:
+            raise ValueError(f"Job {job_id} is {job.state.value}")
+        state = PregenState.THROTTLED if job.started_at else PregenState.PENDING
+        if not await asyncio.to_thread(
+            cls._update, job_id, PregenState.PAUSED, state=state, reason="resuming"
+        ):
+            raise ValueError(f"Job {job_id} changed meanwhile; try again")
+        return await asyncio.to_thread(cls.get, instance, job_id)
+
+    @classmethod
+    async def cancel(cls, instance: str, job_id: str) -> PregenJob:
+        job = await asyncio.to_thread(cls.get, instance, job_id)
+        if job.state not in _ACTIVE:
+            raise ValueError(f"Job {job_id} is {job.state.value}")
+        if not await asyncio.to_thread(
+            cls._update, job_id, job.state, state=PregenState.CANCELLED, reason="cancelled by user"
+        ):
+            raise ValueError(f"Job {job_id} changed meanwhile; try again")
+        if job.started_at is not None:
+            await cls._quietly(instance, "cancel")
+        return await asyncio.to_thread(cls.get, instance, job_id)
+
+    # ───────────────────────────── driving ─────────────────────────────
+    @classmethod
+    async def _console(cls, instance: str, since: float) -> str | None:
+        try:
+            result = await process.run(["docker", "logs", "--since", str(int(since)), instance])
+        except (subprocess.CalledProcessError, TimeoutError, OSError):
+            return None
+        return _COLOR.sub("", result.stdout + result.stderr)
+
+    @staticmethod
+    def _hold(state: PregenState, sample: HealthSample) -> str | None:
+        """Why the job should not generate right now, or None."""
+        if settings.PREGEN_PAUSE_ON_PLAYERS and sample.players:
+            return f"{sample.players} player(s) online"
+        # hysteresis: once throttled, wait for TPS to recover fully
+        floor = settings.PREGEN_TPS_RESUME if state == PregenState.THROTTLED else settings.PREGEN_TPS_MIN
+        if sample.tps is not None and sample.tps < floor:
+            return f"tps {sample.tps:g} < {floor:g}"
+        return None
+
+    @classmethod
+    async def _drive(cls, job: PregenJob, booting: set[str]) -> None:
+        record = await asyncio.to_thread(InstanceRegistry.get, job.instance)
+        if record is None:
+            await asyncio.to_thread(
+                cls._update, job.id, job.state, state=PregenState.FAILED, reason="instance deleted"
+            )
+            return
+        if record.status != InstanceStatus.RUNNING or job.instance in booting:
+            if job.state != PregenState.PAUSED:
+                await asyncio.to_thread(
+                    cls._update, job.id, job.state, reason="waiting for the server to run"
+                )
+            return
+
+        # progress since the last pass; re-reading the boundary second is harmless
+        row = await asyncio.to_thread(cls._row, job.id)
+        now = time.time()
+        console = await cls._console(job.instance, row["scanned_at"] or now)
+        fields: dict = {}
+        generating = False
+        if console is not None:
+            fields["scanned_at"] = now
+            if (m := _FINISHED.search(console)) and job.state != PregenState.PENDING:
+                await asyncio.to_thread(
+                    cls._update, job.id, job.state, state=PregenState.COMPLETED, reason=None,
+                    progress=100.0, chunks=int(m.group(2)), rate=None, eta_seconds=0,
+                    scanned_at=now,
+                )
+                logger.info("Pre-generation of %s on %s finished", job.world, job.instance)
+                return
+            if (found := _PROGRESS.findall(console)) and job.state != PregenState.PENDING:
+                _, chunks, percent, h, mi, s, rate = found[-1]
+                generating = True
+                fields.update(
+                    chunks=int(chunks), progress=float(percent), progressed_at=now,
+                    eta_seconds=int(h) * 3600 + int(mi) * 60 + int(s) if h else None,
+                    rate=float(rate) if rate else None,
+                )
+
+        if job.state == PregenState.PAUSED:
+            if generating:                  # e.g. continue-on-restart, or a lost race
+                await cls._chunky(job.instance, "pause")
+            await asyncio.to_thread(cls._update, job.id, job.state, **fields)
+            return
+
+        sample = await HealthService.sample(job.instance, {}, None)
+        hold = cls._hold(job.state, sample)
+
+        if job.state == PregenState.PENDING:
+            if hold is None:
+                await cls._start(job)
+                fields.update(
+                    state=PregenState.RUNNING, started_at=datetime.now(UTC).isoformat(),
+                    progressed_at=now,
+                )
+                logger.info(
+                    "Pre-generating %s on %s: %s, radius %d around %d,%d",
+                    job.world, job.instance, job.shape.value, job.radius, job.center_x, job.center_z,
+                )
+        elif job.state == PregenState.RUNNING:
+            if hold is not None:
+                await cls._chunky(job.instance, "pause")
+                fields["state"] = PregenState.THROTTLED
+                logger.info("Pre-generation on %s throttled: %s", job.instance, hold)
+            elif now - (fields.get("progressed_at") or row["progressed_at"] or 0) > settings.PREGEN_STALL_AFTER:
+                await cls._chunky(job.instance, "continue")
+                fields["progressed_at"] = now
+                logger.info("Pre-generation on %s made no progress; sent continue", job.instance)
+        elif job.state == PregenState.THROTTLED:
+            if hold is None:
+                await cls._chunky(job.instance, "continue")
+                fields.update(state=PregenState.RUNNING, progressed_at=now)
+                logger.info("Pre-generation on %s resumed", job.instance)
+            elif generating:
+                await cls._chunky(job.instance, "pause")
+        fields["reason"] = hold
+        await asyncio.to_thread(cls._update, job.id, job.state, **fields)
+
+    @classmethod
+    @timed()
+    async def drive(cls) -> None:
+        """One pass over every active job."""
+        jobs = await asyncio.to_thread(cls.active)
+        if not jobs:
+            return
+        booting = await asyncio.to_thread(BootQueue.booting)
+        for job, result in zip(jobs, await asyncio.gather(
+            *(cls._drive(j, booting) for j in jobs), return_exceptions=True,
+        )):
+            if isinstance(result, ValueError):
+                await asyncio.to_thread(
+                    cls._update, job.id, job.state, state=PregenState.FAILED, reason=str(result)
+                )
+                logger.warning("Pre-generation on %s failed: %s", job.instance, result)
+            elif isinstance(result, Exception):
+                logger.debug("Pre-generation pass on %s failed: %s", job.instance, result)
+
+    @classmethod
+    async def run(cls) -> None:
+        """Background loop for the app lifespan; drives jobs only while this worker leads."""
+        if settings.PREGEN_INTERVAL <= 0:
+            return
+        await leader_loop(cls.lock_path, settings.PREGEN_INTERVAL, cls.drive, "Pre-generation pass")
+
+    @classmethod
+    def shutdown(cls) -> None:
+        release_leader(cls.lock_path)
@@ -0,0 +1,118 @@
+"""
+Asyncio front-end for every external command MCDock runs (docker CLI).
+
+Short-lived commands go through `run`, which bounds how many may run at once
+per worker and always applies a timeout; on timeout or task cancellation the
+child is killed so nothing is left behind. Long-lived streams (`logs -f`,
+`stats`) are started with `spawn` and owned by the caller.
+"""
+import asyncio
+import subprocess
+import time
+from pathlib import Path
+
+from ..core import metrics, timing
+from ..core.aio import loop_semaphore
+from ..core.config import settings
+
+
+def command_label(argv: list[str]) -> str:
+    """Low-cardinality name of a command: "compose up", "exec", "stats", ..."""
+    if not argv or Path(argv[0]).name != "docker":
+        return Path(argv[0]).name if argv else ""
+    words = [a for a in argv[1:] if not a.startswith("-")]
+    return " ".join(words[:2] if words[:1] == ["compose"] else words[:1])
+
+
+async def _reap(proc: asyncio.subprocess.Process) -> None:
+    if proc.returncode is None:
+        try:
+            proc.kill()
+        except ProcessLookupError:
+            pass
+        await proc.wait()
+
+
+async def run(
+    argv: list[str],
+    *,
+    cwd: Path | None = None,
+    timeout: float | None = None,
+    check: bool = True,
+) -> subprocess.CompletedProcess[str]:
+    """
+    Run *argv* to completion and capture its output as text.
+
+    Raises `TimeoutError` after *timeout* seconds (default
+    `settings.DOCKER_TIMEOUT`) and `subprocess.CalledProcessError` on a
+    non-zero exit when *check* is set.
+    """
+    timeout = settings.DOCKER_TIMEOUT if timeout is None else timeout
+
+    async with loop_semaphore("docker", settings.DOCKER_MAX_PROCS):
+        command = command_label(argv)
+        name = f"docker {command}" if Path(argv[0]).name == "docker" else command
+        started, outcome = time.perf_counter(), "error"
+        with timing.span(name, record=False, argv=argv) as sp:
+            try:
+                proc = await asyncio.create_subprocess_exec(
+                    *argv,
+                    cwd=cwd,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                )
+                try:
+                    out, err = await asyncio.wait_for(proc.communicate(), timeout)
+                except TimeoutError:
+                    outcome = "timeout"
+                    await _reap(proc)
+                    raise TimeoutError(f"'{' '.join(argv)}' timed out after {timeout:g}s") from None
+                except asyncio.CancelledError:
+                    outcome = "cancelled"
+                    await _reap(proc)
+                    raise
+                sp.attrs["exit_code"] = proc.returncode
+                outcome = "ok" if proc.returncode == 0 else "error"
+            finally:
+                metrics.DOCKER_DURATION.observe(
+                    time.perf_counter() - started, command=command, outcome=outcome
+                )
+
+    result = subprocess.CompletedProcess(
+        argv,
+        proc.returncode,
+        out.decode(errors="replace"),
+        err.decode(errors="replace"),
+    )
+    if check and result.returncode != 0:
+        raise subprocess.CalledProcessError(
+            result.returncode, argv, result.stdout, result.stderr
+        )
+    return result
+
+
+async def spawn(argv: list[str], *, cwd: Path | None = None) -> asyncio.subprocess.Process:
+    """
+    Start a streaming command with stdout+stderr merged into one pipe.
+    The caller must `terminate` (and await) the returned process.
+    """
+    return await asyncio.create_subprocess_exec(
+        *argv,
+        cwd=cwd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+    )
+
+
+async def terminate(proc: asyncio.subprocess.Process, grace: float = 2) -> None:
+    """Politely stop a spawned process, killing it if it lingers."""
+    if proc.returncode is not None:
+        return
+    try:
+        proc.terminate()
+    except ProcessLookupError:
+        return
+    try:
+        await asyncio.wait_for(proc.wait(), grace)
+    except TimeoutError:
+        await _reap(proc)
@@ -0,0 +1,119 @@
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+
+from .models import AllocationSite, MemoryReport
+
+# allocations of the profiler itself are not interesting
+_OWN_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def _where(filename: str) -> str:
+    """Short, stable location: the path below site-packages or the last two parts."""
+    if "site-packages/" in filename:
+        return filename.rsplit("site-packages/", 1)[1]
+    return "/".join(Path(filename).parts[-2:])
+
+
+def _collapse(thread: str, frame) -> str:
+    """One stack in collapsed (flamegraph.pl / speedscope) form, root first."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({_where(code.co_filename)})")
+        frame = frame.f_back
+    names.append(thread)
+    return ";".join(reversed(names))
+
+
+class ProfilingService:
+    """
+    On-demand profiling of the worker process that answers the request.
+
+    The CPU profiler is a sampling one: for the requested time a helper
+    thread records the stack of every other thread at a fixed interval, so
+    it needs no interpreter hooks and costs nothing outside a profile.
+    Memory profiling is tracemalloc, enabled only between `start_tracing`
+    and `stop_tracing`; each snapshot is diffed against the previous one.
+    """
+
+    _cpu_busy = threading.Lock()
+    _previous: tracemalloc.Snapshot | None = None
+
+    # ───────────────────────────── CPU ─────────────────────────────────
+    @classmethod
+    def sample_cpu(cls, seconds: float, interval: float = 0.005) -> str:
+        """
+        Sample all threads for *seconds* (blocking; run it in a thread).
+        Returns collapsed stacks, one "frame;frame;... count" per line.
+        """
+        if not cls._cpu_busy.acquire(blocking=False):
+            raise ValueError("A CPU profile is already running in this worker")
+        try:
+            me = threading.get_ident()
+            stacks: Counter[str] = Counter()
+            deadline = time.monotonic() + seconds
+            while time.monotonic() < deadline:
+                names = {t.ident: t.name for t in threading.enumerate()}
+                for ident, frame in sys._current_frames().items():
+                    if ident != me:
+                        stacks[_collapse(names.get(ident, f"thread-{ident}"), frame)] += 1
+                time.sleep(interval)
+        finally:
+            cls._cpu_busy.release()
+        return "".join(f"{stack} {n}\n" for stack, n in stacks.most_common())
+
+    # ───────────────────────────── memory ──────────────────────────────
+    @classmethod
+    def tracing(cls) -> bool:
+        return tracemalloc.is_tracing()
+
+    @classmethod
+    def start_tracing(cls, frames: int = 1) -> None:
+        """Start tracemalloc keeping *frames* frames per allocation."""
+        if tracemalloc.is_tracing():
+            raise ValueError("Memory tracing is already running in this worker")
+        cls._previous = None
+        tracemalloc.start(frames)
+
+    @classmethod
+    def stop_tracing(cls) -> None:
+        cls._previous = None
+        tracemalloc.stop()
+
+    @staticmethod
+    def _site(stat) -> str:
+        return " <- ".join(f"{_where(f.filename)}:{f.lineno}" for f in stat.traceback)
+
+    @classmethod
+    def snapshot(cls, limit: int = 25, group_by: str = "lineno") -> MemoryReport:
+        """Top allocation sites now and the ones that grew since the last call."""
+        if not tracemalloc.is_tracing():
+            raise ValueError("Memory tracing is not running; start it first")
+        snap = tracemalloc.take_snapshot().filter_traces(_OWN_FILTERS)
+        traced, peak = tracemalloc.get_traced_memory()
+
+        top = [
+            AllocationSite(site=cls._site(s), size=s.size, count=s.count)
+            for s in snap.statistics(group_by)[:limit]
+        ]
+        grown = []
+        if cls._previous is not None:
+            grown = [
+                AllocationSite(
+                    site=cls._site(s), size=s.size, count=s.count,
+                    size_diff=s.size_diff, count_diff=s.count_diff,
+                )
+                for s in snap.compare_to(cls._previous, group_by)[:limit]
+                if s.size_diff > 0
+            ]
+        cls._previous = snap
+        return MemoryReport(worker=os.getpid(), traced=traced, peak=peak, top=top, grown=grown)
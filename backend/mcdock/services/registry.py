@@ -0,0 +1,235 @@
+import json
+from datetime import datetime, UTC
+from pathlib import Path
+
+from pydantic import TypeAdapter
+
+from .models import Instance, InstanceRecord
+from ..core import db
+from ..core.models import InstanceStatus, PortBinding
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS instances (
+    name          TEXT PRIMARY KEY,
+    image         TEXT NOT NULL,
+    memory        TEXT NOT NULL,
+    ports         TEXT NOT NULL,              -- JSON list[PortBinding]
+    tags          TEXT NOT NULL,              -- JSON list[str]
+    boot_priority INTEGER NOT NULL DEFAULT 0,
+    created_at    TEXT NOT NULL,
+    status        TEXT NOT NULL DEFAULT 'stopped',
+    compose_mtime INTEGER NOT NULL DEFAULT 0  -- ns, skips re-parsing on reconcile
+);
+"""
+
+_PORTS = TypeAdapter(list[PortBinding])
+
+
+class InstanceRegistry:
+    """
+    SQLite index of every instance under MC_ROOT/servers.
+
+    The compose files stay the source of truth: MCDock keeps the index in
+    step on create/update/delete and `reconcile` re-syncs it with the disk
+    at startup, so listings never have to walk or parse the filesystem.
+    """
+
+    @staticmethod
+    def _to_record(row) -> InstanceRecord:
+        return InstanceRecord(
+            name       = row["name"],
+            image      = row["image"],
+            memory     = row["memory"],
+            ports      = _PORTS.validate_json(row["ports"]),
+            tags       = json.loads(row["tags"]),
+            boot_priority = row["boot_priority"],
+            created_at = datetime.fromisoformat(row["created_at"]),
+            status     = InstanceStatus(row["status"]),
+        )
+
+    @classmethod
+    def upsert(
+        cls,
+        instance: Instance,
+        *,
+        compose_path: Path | None = None,
+        created_at: datetime | None = None,
+    ) -> None:
+        """
+        Insert or refresh *instance*; created-at and status of an existing row
+        are preserved.
+        """
+        mtime = compose_path.stat().st_mtime_ns if compose_path else 0
+        created = (created_at or datetime.now(UTC)).isoformat()
+
+        with db.connect(_SCHEMA) as conn:
+            conn.execute(
+                """
+                INSERT INTO instances (name, image, memory, ports, tags, boot_priority, created_at, compose_mtime)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(name) DO UPDATE SET
+                    image         = excluded.image,
+                    memory        = excluded.memory,
+                    ports         = excluded.ports,
+                    tags          = excluded.tags,
+                    boot_priority = excluded.boot_priority,
+                    compose_mtime = excluded.compose_mtime
+                """,
+                (
+                    instance.name,
+                    instance.image,
+                    instance.memory,
+                    _PORTS.dump_json(instance.ports).decode(),
+                    json.dumps(instance.tags),
+                    instance.boot_priority,
+                    created,
+                    mtime,
+                ),
+            )
+
+    @classmethod
+    def remove(cls, name: str) -> None:
+        with db.connect(_SCHEMA) as conn:
+            conn.execute("DELETE FROM instances WHERE name = ?", (name,))
+
+    @classmethod
+    def set_status(cls, name: str, status: InstanceStatus) -> None:
+        with db.connect(_SCHEMA) as conn:
+            conn.execute(
+                "UPDATE instances SET status = ? WHERE name = ?",
+                (status.value, name),
+            )
+
+    @classmethod
+    def get(cls, name: str) -> InstanceRecord | None:
+        with db.connect(_SCHEMA) as conn:
+            row = conn.execute(
+                "SELECT * FROM instances WHERE name = ?", (name,)
+            ).fetchone()
+        return cls._to_record(row) if row else None
+
+    @classmethod
+    def query(
+        cls,
+        *,
+        status: InstanceStatus | None = None,
+        tag: str | None = None,
+        q: str | None = None,
+        limit: int | None = None,
+        cursor: str | None = None,
+    ) -> tuple[list[InstanceRecord], str | None]:
+        """
+        Filtered listing ordered by name.
+
+        *cursor* is the name of the last row of the previous page; the second
+        return value is the cursor for the next page (None on the last one).
+        """
+        where: list[str] = []
+        args: list = []
+
+        if status is not None:
+            where.append("status = ?")
+            args.append(status.value)
+        if tag:
+            where.append("EXISTS (SELECT 1 FROM json_each(instances.tags) WHERE value = ?)")
+            args.append(tag)
+        if q:
+            pattern = "%" + q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            where.append("(name LIKE ? ESCAPE '\\' OR image LIKE ? ESCAPE '\\')")
+            args.extend([pattern, pattern])
+        if cursor:
+            where.append("name > ?")
+            args.append(cursor)
+
+        sql = "SELECT * FROM instances"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY name"
+        if limit is not None:
+            sql += " LIMIT ?"
+            args.append(limit + 1)          # one extra row tells us if there is a next page
+
+        with db.connect(_SCHEMA) as conn:
+            rows = conn.execute(sql, args).fetchall()
+
+        records = [cls._to_record(r) for r in rows]
+        if limit is not None and len(records) > limit:
+            records = records[:limit]
+            return records, records[-1].name
+        return records, None
+
+    @classmethod
+    def refresh(cls, name: str) -> None:
+        """Re-sync one row with its instance directory (dropped when that is gone)."""
+        from .docker_service import DockerService    # avoid import cycle
+
+        inst_dir = DockerService.root / name
+        if not inst_dir.is_dir():
+            cls.remove(name)
+            return
+        compose_path = inst_dir / "docker-compose.yml"
+        try:
+            mtime = compose_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return
+        with db.connect(_SCHEMA) as conn:
+            row = conn.execute(
+                "SELECT compose_mtime FROM instances WHERE name = ?", (name,)
+            ).fetchone()
+        if row is not None and row["compose_mtime"] == mtime:
+            return
+        try:
+            instance = DockerService._load_compose(name)
+        except (ValueError, KeyError, FileNotFoundError):
+            return                                      # malformed compose: leave it as is
+        cls.upsert(
+            instance,
+            compose_path=compose_path,
+            created_at=datetime.fromtimestamp(inst_dir.stat().st_ctime, UTC),
+        )
+
+    @classmethod
+    def reconcile(cls, running: set[str] | None = None) -> None:
+        """
+        Bring the index in line with MC_ROOT/servers.
+
+        Compose files are only re-parsed when their mtime changed. If
+        *running* (names of running containers) is given, every row's status
+        is refreshed from it as well.
+        """
+        from .docker_service import DockerService    # avoid import cycle
+
+        on_disk = {p.name: p for p in DockerService.get_instance_dirs()}
+
+        with db.connect(_SCHEMA) as conn:
+            known = {
+                r["name"]: r["compose_mtime"]
+                for r in conn.execute("SELECT name, compose_mtime FROM instances")
+            }
+            for gone in known.keys() - on_disk.keys():
+                conn.execute("DELETE FROM instances WHERE name = ?", (gone,))
+
+        for name, inst_dir in on_disk.items():
+            compose_path = inst_dir / "docker-compose.yml"
+            if not compose_path.exists():
+                continue
+            if known.get(name) == compose_path.stat().st_mtime_ns:
+                continue
+            try:
+                instance = DockerService._load_compose(name)
+            except (ValueError, KeyError):
+                continue                                # malformed compose: leave it out
+            cls.upsert(
+                instance,
+                compose_path=compose_path,
+                created_at=datetime.fromtimestamp(inst_dir.stat().st_ctime, UTC),
+            )
+
+        if running is not None:
+            with db.connect(_SCHEMA) as conn:
+                for name in on_disk:
+                    status = InstanceStatus.RUNNING if name in running else InstanceStatus.STOPPED
+                    conn.execute(
+                        "UPDATE instances SET status = ? WHERE name = ?",
+                        (status.value, name),
+                    )
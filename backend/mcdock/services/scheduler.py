@@ -1,13 +1,25 @@
 from pathlib import Path
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
 from datetime import UTC
+from typing import TYPE_CHECKING
 
+from .operations import OperationService
 from ..core.config import settings
+from ..core.models import OperationKind
+
+if TYPE_CHECKING:
+    from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
 JOB_DB = Path(settings.MC_ROOT) / "jobs.sqlite"
 
-def build_scheduler() -> AsyncIOScheduler:
+# cron job id prefix -> the operation it schedules
+_CRON_KINDS = {"cron_backup_": OperationKind.BACKUP, "cron_restart_": OperationKind.RESTART}
+
+def build_scheduler() -> "AsyncIOScheduler":
+    # APScheduler + SQLAlchemy are a quarter of the import time of the app;
+    # the lifespan calls this off the event loop, after the worker is up
+    from apscheduler.schedulers.asyncio import AsyncIOScheduler
+    from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+
     scheduler = AsyncIOScheduler(
         timezone=UTC,
         jobstores={
@@ -19,3 +31,21 @@ def build_scheduler() -> AsyncIOScheduler:
         coalesce=True,
     )
     return scheduler
+
+
+def queue_legacy_jobs(scheduler: "AsyncIOScheduler") -> int:
+    """
+    Point cron jobs stored before operations were queued per instance
+    (calling `DockerService.restart` / `BackupService.trigger_backup`
+    directly) at `OperationService.run_scheduled`, so they wait in the
+    instance queue like everything else. Returns how many were changed.
+    """
+    changed = 0
+    for job in scheduler.get_jobs():
+        kind = next((k for prefix, k in _CRON_KINDS.items() if job.id.startswith(prefix)), None)
+        if kind is None or job.func == OperationService.run_scheduled:
+            continue
+        # old args were [instance] or [instance, bucket]
+        scheduler.modify_job(job.id, func=OperationService.run_scheduled, args=[kind, *job.args])
+        changed += 1
+    return changed
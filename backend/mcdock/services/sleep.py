@@ -0,0 +1,213 @@
+import asyncio
+import logging
+import re
+import socket
+import subprocess
+from datetime import datetime, UTC
+from pathlib import Path
+from typing import Awaitable, Callable
+
+from . import mcproto, process
+from .models import InstanceRecord
+from .registry import InstanceRegistry
+from ..core import db
+from ..core.config import settings
+from ..core.models import ConnectionType
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sleeping (
+    instance TEXT PRIMARY KEY,
+    since    TEXT NOT NULL
+);
+"""
+
+# a client that does not finish its handshake within this is dropped
+_HANDSHAKE_TIMEOUT = 5
+# how long `release` waits for another worker to let go of the port
+_RELEASE_TIMEOUT = 10
+# docker bind-mounts /etc/hostname etc. from /var/lib/docker/containers/<id>/
+_CONTAINER_ID = re.compile(r"/containers/([0-9a-f]{64})/")
+
+
+def game_port(record: InstanceRecord) -> int | None:
+    """Host TCP port players connect to (the one mapped to 25565, else the first)."""
+    tcp = [p for p in record.ports if p.type == ConnectionType.TCP]
+    for p in tcp:
+        if p.container_port == 25565:
+            return p.host_port
+    return tcp[0].host_port if tcp else None
+
+
+def _port_free(port: int) -> bool:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            s.bind(("0.0.0.0", port))
+        except OSError:
+            return False
+    return True
+
+
+class SleepService:
+    """
+    Stand-in servers for instances stopped while idle.
+
+    A sleeping instance is recorded in the shared state DB; the worker that
+    runs the idle loop (see `IdleService`) keeps a small asyncio listener on
+    its game port that answers server-list pings with a "sleeping" MOTD and
+    hands real logins to a wake callback. `release` gives the port back
+    before the container is started again, from any worker.
+
+    The listeners bind in the panel's network namespace, so players only
+    reach them when that is the host's: run the panel container with
+    `network_mode: host` (see `reachable`).
+    """
+
+    mountinfo_path = Path("/proc/self/mountinfo")
+    dockerenv_path = Path("/.dockerenv")
+
+    _servers: dict[str, asyncio.Server] = {}
+
+    # ───────────────────────────── host network ────────────────────────
+    @classmethod
+    def own_container(cls) -> str | None:
+        """Id of the docker container this process runs in, if it can tell."""
+        try:
+            m = _CONTAINER_ID.search(cls.mountinfo_path.read_text())
+        except OSError:
+            return None
+        return m.group(1) if m else None
+
+    @classmethod
+    async def reachable(cls) -> bool:
+        """
+        Whether a listener bound here would hold the *host's* game port:
+        always outside a container, inside one only with host networking
+        (a bridge-networked panel publishes nothing but its HTTP port).
+        """
+        container = await asyncio.to_thread(cls.own_container)
+        if container is None:
+            return not await asyncio.to_thread(cls.dockerenv_path.exists)
+        try:
+            result = await process.run(
+                ["docker", "inspect", "--format", "{{.HostConfig.NetworkMode}}", container]
+            )
+        except (subprocess.CalledProcessError, TimeoutError, OSError) as e:
+            logger.warning("Cannot inspect the panel container %s: %s", container[:12], e)
+            return False
+        return result.stdout.strip() == "host"
+
+    # ───────────────────────────── records ─────────────────────────────
+    @classmethod
+    def mark(cls, instance: str) -> None:
+        with db.connect(_SCHEMA) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO sleeping (instance, since) VALUES (?, ?)",
+                (instance, datetime.now(UTC).isoformat()),
+            )
+
+    @classmethod
+    def unmark(cls, instance: str) -> bool:
+        with db.connect(_SCHEMA) as conn:
+            cur = conn.execute("DELETE FROM sleeping WHERE instance = ?", (instance,))
+        return cur.rowcount > 0
+
+    @classmethod
+    def sleeping(cls) -> set[str]:
+        with db.connect(_SCHEMA) as conn:
+            return {r["instance"] for r in conn.execute("SELECT instance FROM sleeping")}
+
+    # ───────────────────────────── listeners ───────────────────────────
+    @classmethod
+    async def serve(
+        cls,
+        instance: str,
+        port: int,
+        on_login: Callable[[str], Awaitable[None]],
+    ) -> None:
+        """Hold *port* for sleeping *instance*. Raises OSError if it is taken."""
+        async def _client(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+            await cls._handle(instance, reader, writer, on_login)
+
+        cls._servers[instance] = await asyncio.start_server(_client, "0.0.0.0", port)
+        logger.info("%s is asleep; listening on %d", instance, port)
+
+    @classmethod
+    async def close(cls, instance: str) -> None:
+        server = cls._servers.pop(instance, None)
+        if server is not None:
+            server.close()
+            await server.wait_closed()
+
+    @classmethod
+    def serving(cls) -> set[str]:
+        return set(cls._servers)
+
+    @classmethod
+    async def _handle(
+        cls,
+        instance: str,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        on_login: Callable[[str], Awaitable[None]],
+    ) -> None:
+        try:
+            packet_id, payload = await asyncio.wait_for(mcproto.read_packet(reader), _HANDSHAKE_TIMEOUT)
+            if packet_id != mcproto.HANDSHAKE:
+                return
+            protocol, _, _, next_state = mcproto.parse_handshake(payload)
+
+            if next_state == mcproto.NEXT_STATUS:
+                await asyncio.wait_for(mcproto.read_packet(reader), _HANDSHAKE_TIMEOUT)
+                writer.write(mcproto.status_response({
+                    "version": {"name": "Sleeping", "protocol": protocol},
+                    "players": {"max": 0, "online": 0},
+                    "description": {"text": settings.SLEEP_MOTD},
+                }))
+                await writer.drain()
+                packet_id, payload = await asyncio.wait_for(mcproto.read_packet(reader), _HANDSHAKE_TIMEOUT)
+                if packet_id == mcproto.PING:
+                    writer.write(mcproto.packet(mcproto.PONG, payload))
+                    await writer.drain()
+
+            elif next_state in (mcproto.NEXT_LOGIN, mcproto.NEXT_TRANSFER):
+                writer.write(mcproto.disconnect(settings.SLEEP_WAKE_MESSAGE))
+                await writer.drain()
+                logger.info("Login attempt on sleeping %s; waking it", instance)
+                await on_login(instance)
+        except (asyncio.IncompleteReadError, TimeoutError, ConnectionError, ValueError):
+            pass                                    # scanners, legacy pings, impatient clients
+        finally:
+            writer.close()
+
+    # ───────────────────────────── waking ──────────────────────────────
+    @classmethod
+    async def release(cls, instance: str) -> None:
+        """
+        Forget that *instance* sleeps and make sure its port is free before
+        the container binds it (the listener may live in another worker).
+        """
+        if not await asyncio.to_thread(cls.unmark, instance):
+            return
+        if instance in cls._servers:
+            await cls.close(instance)
+            return
+
+        record = await asyncio.to_thread(InstanceRegistry.get, instance)
+        port = game_port(record) if record else None
+        if port is None:
+            return
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + _RELEASE_TIMEOUT
+        while not await asyncio.to_thread(_port_free, port):
+            if loop.time() > deadline:
+                logger.warning("Port %d of %s still held after %ds", port, instance, _RELEASE_TIMEOUT)
+                return
+            await asyncio.sleep(0.2)
+
+    @classmethod
+    async def shutdown(cls) -> None:
+        for instance in list(cls._servers):
+            await cls.close(instance)
@@ -0,0 +1,102 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from jose import JWTError
+
+from ..core import db
+from ..core.config import settings
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS revoked_tokens (
+    digest  TEXT PRIMARY KEY,           -- sha256 of the token, never the token itself
+    exp     REAL NOT NULL               -- the token's own expiry; the row is useless after it
+);
+"""
+
+
+def _digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class TokenService:
+    """
+    JWT verification with a verified-token cache and server-side logout.
+
+    A token whose signature and claims checked out is remembered in a
+    bounded LRU until its `exp`, so repeat requests skip `jwt.decode`.
+    Logged-out tokens go into a revocation table in the shared state DB;
+    each worker mirrors it in memory and re-reads it at most every
+    AUTH_REVOCATION_REFRESH seconds, so a logout reaches every worker
+    within that delay and costs nothing per request otherwise.
+    """
+
+    _lock = threading.Lock()
+    _verified: OrderedDict[str, tuple[float, dict]] = OrderedDict()   # token -> (exp, claims)
+    _revoked: dict[str, float] = {}                                    # digest -> exp
+    _revoked_at: float = 0.0                                           # monotonic time of last refresh
+
+    # ───────────────────────────── revocation ──────────────────────────
+    @classmethod
+    def _refresh_revoked(cls) -> None:
+        now = time.monotonic()
+        if now - cls._revoked_at < settings.AUTH_REVOCATION_REFRESH:
+            return
+        with db.connect(_SCHEMA) as conn:
+            rows = conn.execute(
+                "SELECT digest, exp FROM revoked_tokens WHERE exp > ?", (time.time(),)
+            ).fetchall()
+        cls._revoked = {r["digest"]: r["exp"] for r in rows}
+        cls._revoked_at = now
+
+    @classmethod
+    def revoke(cls, token: str) -> None:
+        """Invalidate *token* in every worker. Raises JWTError if it is not valid anyway."""
+        exp = cls.verify(token)["exp"]
+        digest = _digest(token)
+        with db.connect(_SCHEMA) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO revoked_tokens (digest, exp) VALUES (?, ?)", (digest, exp)
+            )
+            conn.execute("DELETE FROM revoked_tokens WHERE exp <= ?", (time.time(),))
+        with cls._lock:
+            cls._verified.pop(token, None)
+            cls._revoked[digest] = exp
+
+    # ───────────────────────────── verification ────────────────────────
+    @classmethod
+    def is_verified(cls, token: str) -> bool:
+        """Cheap check: was *token* verified recently by this worker (no crypto, no I/O)?"""
+        hit = cls._verified.get(token)
+        return hit is not None and hit[0] > time.time()
+
+    @classmethod
+    def verify(cls, token: str) -> dict:
+        """Claims of a valid, unrevoked panel token; raises JWTError otherwise."""
+        cls._refresh_revoked()
+        now = time.time()
+
+        with cls._lock:
+            hit = cls._verified.get(token)
+            if hit is not None and hit[0] > now:
+                cls._verified.move_to_end(token)
+                claims = hit[1]
+            else:
+                claims = None
+                cls._verified.pop(token, None)
+
+        if claims is None:
+            from jose import jwt                # first verification, not import, pays for it
+
+            claims = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.HASH_ALGO])
+            if claims.get("sub") != settings.USER or "exp" not in claims:
+                raise JWTError("Not a panel token")
+            with cls._lock:
+                cls._verified[token] = (float(claims["exp"]), claims)
+                while len(cls._verified) > settings.AUTH_CACHE_SIZE:
+                    cls._verified.popitem(last=False)
+
+        if cls._revoked and _digest(token) in cls._revoked:
+            raise JWTError("Token has been revoked")
+        return claims
@@ -0,0 +1,343 @@
+import asyncio
+import logging
+import os
+import shutil
+import stat
+import time
+from datetime import datetime, UTC
+from pathlib import Path
+
+from .backup_service import BackupService
+from .docker_service import DockerService
+from .locks import leader_loop, release_leader
+from .models import BucketUsage, FsEvent, InstanceUsage, UsageReport
+from .registry import InstanceRegistry
+from .watcher import WatchService
+from ..core import db
+from ..core.config import settings
+from ..core.models import FsChange, InstanceStatus
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS disk_usage (
+    kind    TEXT NOT NULL,              -- 'instance' | 'bucket'
+    name    TEXT NOT NULL,              -- instance, or "instance/bucket"
+    bytes   INTEGER NOT NULL,
+    detail  TEXT NOT NULL,              -- the InstanceUsage / BucketUsage as JSON
+    PRIMARY KEY (kind, name)
+);
+CREATE TABLE IF NOT EXISTS disk_usage_samples (
+    kind    TEXT NOT NULL,
+    name    TEXT NOT NULL,
+    at      REAL NOT NULL,              -- unix time
+    bytes   INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS disk_usage_samples_key_at ON disk_usage_samples(kind, name, at);
+"""
+
+_LOGS = {"logs", "crash-reports"}
+_PLUGINS = {"plugins", "mods"}
+_SAMPLE_EVERY = 3600                    # seconds between trend samples of one key
+_SETTLED = 60                           # an archive untouched this long is complete
+
+
+class _Walker:
+    """du(1) for one scan: allocated bytes, a hard-linked file counted once."""
+
+    def __init__(self):
+        self._seen: set[tuple[int, int]] = set()
+
+    def _count(self, st: os.stat_result) -> int:
+        if st.st_nlink > 1 and not stat.S_ISDIR(st.st_mode):
+            key = (st.st_dev, st.st_ino)
+            if key in self._seen:
+                return 0
+            self._seen.add(key)
+        return st.st_blocks * 512
+
+    def du(self, path: str) -> int:
+        try:
+            st = os.lstat(path)
+        except OSError:
+            return 0
+        total = self._count(st)
+        if not stat.S_ISDIR(st.st_mode):
+            return total
+        stack = [path]
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as it:
+                    for entry in it:
+                        try:
+                            total += self._count(entry.stat(follow_symlinks=False))
+                        except OSError:
+                            continue
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+            except OSError:
+                continue
+        return total
+
+
+def _entries(path: Path) -> list[os.DirEntry]:
+    try:
+        with os.scandir(path) as it:
+            return list(it)
+    except OSError:
+        return []
+
+
+def _slope_per_day(points: list[tuple[float, int]]) -> float | None:
+    """Least-squares growth of (unix time, bytes) points, in bytes/day."""
+    if len(points) < 2 or points[-1][0] - points[0][0] < _SAMPLE_EVERY / 2:
+        return None
+    n = len(points)
+    mean_t = sum(t for t, _ in points) / n
+    mean_b = sum(b for _, b in points) / n
+    var = sum((t - mean_t) ** 2 for t, _ in points)
+    cov = sum((t - mean_t) * (b - mean_b) for t, b in points)
+    return cov / var * 86400
+
+
+class UsageService:
+    """
+    Disk usage of every instance's data/ and every backup bucket.
+
+    One worker (holder of MC_ROOT/locks/usage.lock) keeps the numbers in the
+    shared state DB, without walking all of MC_ROOT each time:
+
+    * running instances are re-measured every USAGE_INTERVAL, plus once
+      after they stop; stopped ones only when the watcher reports them added,
+      or every USAGE_FULL_RESCAN in case something changed behind our back;
+    * backup archives are immutable, so a bucket is re-listed only when its
+      directory mtime moves and each archive is stat'ed once it has settled.
+
+    Totals are sampled hourly for USAGE_RETENTION; `report` turns the samples
+    in USAGE_TREND_WINDOW into growth rates and a days-until-full estimate.
+    """
+
+    lock_path = Path(settings.MC_ROOT) / "locks" / "usage.lock"
+
+    _measured: dict[str, float] = {}                # instance -> monotonic time of last walk
+    _was_running: set[str] = set()
+    _dirty: set[str] = set()
+    _archives: dict[Path, tuple[int, dict[str, tuple[int, bool]]]] = {}   # bucket -> (mtime, name -> (bytes, settled))
+    _sampled: dict[tuple[str, str], float] = {}
+
+    # ───────────────────────────── measuring ───────────────────────────
+    @staticmethod
+    def _level_name(instance: str) -> str:
+        try:
+            return DockerService._load_properties(instance).get("level-name") or "world"
+        except ValueError:
+            return "world"
+
+    @classmethod
+    def measure_instance(cls, instance: str) -> InstanceUsage:
+        """Walk data/ of *instance* once, split by dimension, logs, plugins and the rest."""
+        data = DockerService.root / instance / "data"
+        level = cls._level_name(instance)
+        walker = _Walker()
+        dims: dict[str, int] = {}
+        logs = plugins = other = 0
+
+        def _add(dim: str, size: int) -> None:
+            dims[dim] = dims.get(dim, 0) + size
+
+        for entry in _entries(data):
+            if entry.name == level and entry.is_dir(follow_symlinks=False):
+                for sub in _entries(Path(entry.path)):
+                    if sub.name == "DIM-1":
+                        _add("the_nether", walker.du(sub.path))
+                    elif sub.name == "DIM1":
+                        _add("the_end", walker.du(sub.path))
+                    elif sub.name == "dimensions" and sub.is_dir(follow_symlinks=False):
+                        for ns in _entries(Path(sub.path)):     # dimensions/<namespace>/<name>
+                            for dim in _entries(Path(ns.path)):
+                                _add(f"{ns.name}:{dim.name}", walker.du(dim.path))
+                    else:
+                        _add("overworld", walker.du(sub.path))
+            elif entry.name == f"{level}_nether":               # Bukkit layout
+                _add("the_nether", walker.du(entry.path))
+            elif entry.name == f"{level}_the_end":
+                _add("the_end", walker.du(entry.path))
+            elif entry.name in _LOGS:
+                logs += walker.du(entry.path)
+            elif entry.name in _PLUGINS:
+                plugins += walker.du(entry.path)
+            else:
+                other += walker.du(entry.path)
+
+        return InstanceUsage(
+            instance=instance,
+            total=sum(dims.values()) + logs + plugins + other,
+            dimensions=dims,
+            logs=logs,
+            plugins=plugins,
+            other=other,
+            scanned_at=datetime.now(UTC),
+        )
+
+    @classmethod
+    def measure_backups(cls) -> list[BucketUsage]:
+        """Every bucket under MC_ROOT/backups, re-listing only those that changed."""
+        now = time.time()
+        result = []
+        seen: set[Path] = set()
+        for inst in _entries(BackupService.backups_root):
+            for bucket in _entries(Path(inst.path)):
+                if not bucket.is_dir(follow_symlinks=False):
+                    continue
+                path = Path(bucket.path)
+                seen.add(path)
+                try:
+                    mtime = bucket.stat().st_mtime_ns
+                except OSError:
+                    continue
+                cached_mtime, sizes = cls._archives.get(path, (None, {}))
+                if cached_mtime != mtime or not all(settled for _, settled in sizes.values()):
+                    fresh = {}
+                    for archive in _entries(path):
+                        if not archive.name.endswith(".tar.gz"):
+                            continue
+                        known = sizes.get(archive.name)
+                        if known and known[1]:
+                            fresh[archive.name] = known
+                            continue
+                        try:
+                            st = archive.stat(follow_symlinks=False)
+                        except OSError:
+                            continue
+                        fresh[archive.name] = (st.st_blocks * 512, now - st.st_mtime > _SETTLED)
+                    sizes = fresh
+                    cls._archives[path] = (mtime, sizes)
+                result.append(BucketUsage(
+                    instance=inst.name,
+                    bucket=bucket.name,
+                    total=sum(size for size, _ in sizes.values()),
+                    archives=len(sizes),
+                    scanned_at=datetime.now(UTC),
+                ))
+        for gone in cls._archives.keys() - seen:
+            del cls._archives[gone]
+        return result
+
+    # ───────────────────────────── records ─────────────────────────────
+    @classmethod
+    def _store(
+        cls,
+        instances: list[InstanceUsage],
+        buckets: list[BucketUsage],
+        known: set[str],
+    ) -> None:
+        now = time.time()
+        rows = [("instance", u.instance, u.total, u.model_dump_json()) for u in instances]
+        rows += [("bucket", f"{b.instance}/{b.bucket}", b.total, b.model_dump_json()) for b in buckets]
+        samples = [
+            (kind, name, now, size) for kind, name, size, _ in rows
+            if now - cls._sampled.get((kind, name), 0) >= _SAMPLE_EVERY
+        ]
+        with db.connect(_SCHEMA) as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO disk_usage (kind, name, bytes, detail) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            for (name,) in conn.execute("SELECT name FROM disk_usage WHERE kind = 'instance'").fetchall():
+                if name not in known:
+                    conn.execute("DELETE FROM disk_usage WHERE kind = 'instance' AND name = ?", (name,))
+            present = {f"{b.instance}/{b.bucket}" for b in buckets}
+            for (name,) in conn.execute("SELECT name FROM disk_usage WHERE kind = 'bucket'").fetchall():
+                if name not in present:
+                    conn.execute("DELETE FROM disk_usage WHERE kind = 'bucket' AND name = ?", (name,))
+            conn.executemany(
+                "INSERT INTO disk_usage_samples (kind, name, at, bytes) VALUES (?, ?, ?, ?)", samples
+            )
+            conn.execute(
+                "DELETE FROM disk_usage_samples WHERE at < ?",
+                (now - settings.USAGE_RETENTION.total_seconds(),),
+            )
+        for kind, name, _, _ in samples:
+            cls._sampled[(kind, name)] = now
+
+    @classmethod
+    def report(cls) -> UsageReport:
+        """The latest numbers of every instance and bucket, with growth over the trend window."""
+        since = time.time() - settings.USAGE_TREND_WINDOW.total_seconds()
+        with db.connect(_SCHEMA) as conn:
+            rows = conn.execute("SELECT * FROM disk_usage ORDER BY kind, name").fetchall()
+            points: dict[tuple[str, str], list[tuple[float, int]]] = {}
+            for r in conn.execute(
+                "SELECT kind, name, at, bytes FROM disk_usage_samples WHERE at >= ? ORDER BY at",
+                (since,),
+            ):
+                points.setdefault((r["kind"], r["name"]), []).append((r["at"], r["bytes"]))
+
+        instances, buckets, rates = [], [], []
+        for r in rows:
+            growth = _slope_per_day(points.get((r["kind"], r["name"]), []))
+            if growth is not None:
+                rates.append(growth)
+            if r["kind"] == "instance":
+                instances.append(InstanceUsage.model_validate_json(r["detail"]))
+                instances[-1].growth_per_day = growth
+            else:
+                buckets.append(BucketUsage.model_validate_json(r["detail"]))
+                buckets[-1].growth_per_day = growth
+
+        disk = shutil.disk_usage(settings.MC_ROOT)
+        growth = sum(rates) if rates else None
+        return UsageReport(
+            disk_total=disk.total,
+            disk_free=disk.free,
+            instances=instances,
+            backups=buckets,
+            growth_per_day=growth,
+            days_until_full=disk.free / growth if growth and growth > 0 else None,
+        )
+
+    # ───────────────────────────── loop ────────────────────────────────
+    @classmethod
+    def _on_change(cls, event: FsEvent) -> None:
+        if event.kind in (FsChange.INSTANCE_ADDED, FsChange.INSTANCE_REMOVED):
+            cls._dirty.add(event.instance)
+
+    @classmethod
+    async def collect(cls) -> None:
+        """Re-measure whatever is due and store the results."""
+        records, _ = await asyncio.to_thread(InstanceRegistry.query)
+        running = {r.name for r in records if r.status == InstanceStatus.RUNNING}
+        now = time.monotonic()
+        full = settings.USAGE_FULL_RESCAN.total_seconds()
+
+        measured = []
+        for r in records:
+            last = cls._measured.get(r.name)
+            if (
+                r.name in running
+                or r.name in cls._dirty
+                or r.name in cls._was_running              # stopped since: one final walk
+                or last is None
+                or now - last > full
+            ):
+                measured.append(await asyncio.to_thread(cls.measure_instance, r.name))
+                cls._measured[r.name] = now
+                cls._dirty.discard(r.name)
+        cls._was_running = running
+        for gone in cls._measured.keys() - {r.name for r in records}:
+            del cls._measured[gone]
+
+        buckets = await asyncio.to_thread(cls.measure_backups)
+        await asyncio.to_thread(cls._store, measured, buckets, {r.name for r in records})
+
+    @classmethod
+    async def run(cls) -> None:
+        """Background loop for the app lifespan; measures only while this worker leads."""
+        if settings.USAGE_INTERVAL <= 0:
+            return
+        WatchService.subscribe(cls._on_change)
+        await leader_loop(cls.lock_path, settings.USAGE_INTERVAL, cls.collect, "Disk usage scan")
+
+    @classmethod
+    def shutdown(cls) -> None:
+        release_leader(cls.lock_path)
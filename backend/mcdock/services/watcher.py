@@ -0,0 +1,299 @@
+import asyncio
+import ctypes
+import ctypes.util
+import logging
+import os
+import struct
+from pathlib import Path
+from typing import Callable
+
+from .backup_service import BackupService
+from .docker_service import DockerService
+from .models import FsEvent
+from .registry import InstanceRegistry
+from ..core.config import settings
+from ..core.models import FsChange
+
+logger = logging.getLogger(__name__)
+
+# <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+_IN_NONBLOCK = os.O_NONBLOCK
+_IN_CLOEXEC = os.O_CLOEXEC
+
+_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_ONLYDIR
+_EVENT = struct.Struct("iIII")                  # wd, mask, cookie, len; then the name
+
+
+class _Inotify:
+    """The three inotify syscalls via libc; raises OSError where they are unavailable."""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        try:
+            self._add = libc.inotify_add_watch
+        except AttributeError:
+            raise OSError("libc has no inotify") from None
+        self.fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+    def add(self, path: Path) -> int:
+        wd = self._add(self.fd, os.fsencode(path), _MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {path}")
+        return wd
+
+    def read(self) -> list[tuple[int, int, str]]:
+        """Pending (wd, mask, name) events; [] when there are none."""
+        events = []
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return events
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, size = _EVENT.unpack_from(data, offset)
+                offset += _EVENT.size
+                name = data[offset:offset + size].rstrip(b"\0").decode(errors="surrogateescape")
+                offset += size
+                events.append((wd, mask, name))
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class WatchService:
+    """
+    Tells the rest of MCDock when MC_ROOT changes under it.
+
+    Each worker watches MC_ROOT/servers and MC_ROOT/backups (the roots, every
+    instance directory and its data/, every backup bucket) with inotify. An
+    event only says *which instance* to look at; after WATCH_DEBOUNCE that
+    instance is re-stat'ed and compared with what was seen before, which
+    yields typed `FsEvent`s (instance added/removed, compose or
+    server.properties changed, backup added/removed). Those drop the
+    matching cached reads, keep the instance registry in step and are handed
+    to `subscribe`d callbacks. Without inotify (or after its queue
+    overflowed) the same comparison runs over everything, every
+    WATCH_RESCAN_INTERVAL seconds.
+    """
+
+    _inotify: _Inotify | None = None
+    _wds: dict[int, Path] = {}
+    _instances: dict[str, tuple[str, str]] = {}        # name -> (compose tag, properties tag)
+    _backups: dict[str, frozenset[str]] = {}           # name -> archive paths
+    _subscribers: list[Callable[[FsEvent], None]] = []
+
+    @classmethod
+    def subscribe(cls, callback: Callable[[FsEvent], None]) -> None:
+        """Call *callback* (on the event loop, so it must be quick) for every event."""
+        cls._subscribers.append(callback)
+
+    # ───────────────────────────── scanning ────────────────────────────
+    @classmethod
+    def _watch(cls, path: Path) -> None:
+        if cls._inotify is None:
+            return
+        try:
+            cls._wds[cls._inotify.add(path)] = path
+        except OSError:
+            pass                                        # gone already, or not a directory
+
+    @classmethod
+    def _scan_instance(cls, name: str) -> list[FsEvent]:
+        inst_dir = DockerService.root / name
+        old = cls._instances.get(name)
+        if not inst_dir.is_dir():
+            if old is None:
+                return []
+            del cls._instances[name]
+            return [FsEvent(kind=FsChange.INSTANCE_REMOVED, instance=name)]
+
+        cls._watch(inst_dir)
+        cls._watch(inst_dir / "data")
+        new = (DockerService.compose_tag(name), DockerService.properties_tag(name))
+        cls._instances[name] = new
+        if old is None:
+            return [FsEvent(kind=FsChange.INSTANCE_ADDED, instance=name)]
+        events = []
+        if new[0] != old[0]:
+            events.append(FsEvent(kind=FsChange.COMPOSE_CHANGED, instance=name))
+        if new[1] != old[1]:
+            events.append(FsEvent(kind=FsChange.PROPERTIES_CHANGED, instance=name))
+        return events
+
+    @classmethod
+    def _scan_backups(cls, name: str) -> list[FsEvent]:
+        root = BackupService.backups_root / name
+        old = cls._backups.get(name, frozenset())
+        if root.is_dir():
+            cls._watch(root)
+            for bucket in root.iterdir():
+                if bucket.is_dir():
+                    cls._watch(bucket)
+            new = frozenset(BackupService._list_backups(name))
+            cls._backups[name] = new
+        else:
+            new = frozenset()
+            cls._backups.pop(name, None)
+        return [
+            *(FsEvent(kind=FsChange.BACKUP_ADDED, instance=name, path=p) for p in sorted(new - old)),
+            *(FsEvent(kind=FsChange.BACKUP_REMOVED, instance=name, path=p) for p in sorted(old - new)),
+        ]
+
+    @staticmethod
+    def _children(root: Path) -> set[str]:
+        try:
+            return {p.name for p in root.iterdir() if p.is_dir()}
+        except OSError:
+            return set()
+
+    @classmethod
+    def rescan(cls) -> list[FsEvent]:
+        """Compare everything with the last scan; the events in between."""
+        for root in (DockerService.root, BackupService.backups_root):
+            root.mkdir(parents=True, exist_ok=True)
+            cls._watch(root)
+        events = []
+        for name in sorted(cls._children(DockerService.root) | cls._instances.keys()):
+            events += cls._scan_instance(name)
+        for name in sorted(cls._children(BackupService.backups_root) | cls._backups.keys()):
+            events += cls._scan_backups(name)
+        return events
+
+    @classmethod
+    def _rescan_dirty(cls, servers: set[str], backups: set[str]) -> list[FsEvent]:
+        events = []
+        for name in sorted(servers):
+            events += cls._scan_instance(name)
+        for name in sorted(backups):
+            events += cls._scan_backups(name)
+        return events
+
+    # ───────────────────────────── inotify ─────────────────────────────
+    @classmethod
+    def _drain(cls) -> tuple[set[str], set[str], bool]:
+        """Read pending inotify events: instances to re-scan (servers, backups), overflow."""
+        servers: set[str] = set()
+        backups: set[str] = set()
+        overflow = False
+        for wd, mask, name in cls._inotify.read():
+            if mask & IN_Q_OVERFLOW:
+                overflow = True
+                continue
+            directory = cls._wds.get(wd)
+            if mask & IN_IGNORED:                       # directory deleted: the kernel dropped the watch
+                cls._wds.pop(wd, None)
+            if directory is None or not name:
+                continue
+
+            if directory == DockerService.root:
+                servers.add(name)
+            elif directory == BackupService.backups_root:
+                backups.add(name)
+            elif directory.parent == DockerService.root or directory.parent.parent == DockerService.root:
+                if name in ("docker-compose.yml", "data", "server.properties"):
+                    servers.add(directory.relative_to(DockerService.root).parts[0])
+            elif directory.is_relative_to(BackupService.backups_root):
+                backups.add(directory.relative_to(BackupService.backups_root).parts[0])
+        return servers, backups, overflow
+
+    # ───────────────────────────── dispatch ────────────────────────────
+    @staticmethod
+    def _apply(events: list[FsEvent]) -> None:
+        """Bring every metadata cache in line with *events* (runs in a thread)."""
+        for event in events:
+            if event.kind in (FsChange.BACKUP_ADDED, FsChange.BACKUP_REMOVED):
+                BackupService.forget(event.instance)
+                continue
+            DockerService.forget(event.instance)
+            if event.kind != FsChange.PROPERTIES_CHANGED:
+                InstanceRegistry.refresh(event.instance)
+
+    @classmethod
+    async def _dispatch(cls, events: list[FsEvent]) -> None:
+        if not events:
+            return
+        logger.debug("Filesystem changes: %s", events)
+        await asyncio.to_thread(cls._apply, events)
+        for event in events:
+            for callback in cls._subscribers:
+                try:
+                    callback(event)
+                except Exception:
+                    logger.exception("Watch subscriber failed on %s", event)
+
+    # ───────────────────────────── loop ────────────────────────────────
+    @classmethod
+    async def run(cls) -> None:
+        """Background loop for the app lifespan."""
+        if not settings.WATCH_ENABLED:
+            return
+        try:
+            cls._inotify = _Inotify()
+        except OSError as e:
+            logger.warning(
+                "inotify unavailable (%s); rescanning MC_ROOT every %ss",
+                e, settings.WATCH_RESCAN_INTERVAL,
+            )
+        try:
+            await asyncio.to_thread(cls.rescan)         # baseline: nothing has changed yet
+            if cls._inotify is None:
+                await cls._poll()
+            else:
+                await cls._listen()
+        finally:
+            if cls._inotify is not None:
+                cls._inotify.close()
+                cls._inotify = None
+                cls._wds.clear()
+
+    @classmethod
+    async def _poll(cls) -> None:
+        while True:
+            await asyncio.sleep(settings.WATCH_RESCAN_INTERVAL)
+            try:
+                await cls._dispatch(await asyncio.to_thread(cls.rescan))
+            except Exception:
+                logger.exception("MC_ROOT rescan failed")
+
+    @classmethod
+    async def _listen(cls) -> None:
+        loop = asyncio.get_running_loop()
+        fd = cls._inotify.fd
+        ready = asyncio.Event()
+
+        def _readable() -> None:
+            loop.remove_reader(fd)                      # level-triggered: mute until drained
+            ready.set()
+
+        loop.add_reader(fd, _readable)
+        try:
+            while True:
+                await ready.wait()
+                await asyncio.sleep(settings.WATCH_DEBOUNCE)
+                ready.clear()
+                try:
+                    servers, backups, overflow = cls._drain()
+                finally:
+                    loop.add_reader(fd, _readable)
+                try:
+                    if overflow:
+                        logger.warning("inotify queue overflowed; rescanning MC_ROOT")
+                        events = await asyncio.to_thread(cls.rescan)
+                    else:
+                        events = await asyncio.to_thread(cls._rescan_dirty, servers, backups)
+                    await cls._dispatch(events)
+                except Exception:
+                    logger.exception("Handling MC_ROOT changes failed")
+        finally:
+            loop.remove_reader(fd)
@@ -1,12 +1,24 @@
-from jinja2 import Template
+import functools
+from typing import TYPE_CHECKING
 
-COMPOSE_TEMPLATE: Template = Template(
-    """
+if TYPE_CHECKING:
+    from jinja2 import Template
+
+COMPOSE_SOURCE = """
 services:
   mc-server:
     image: {{ image }}
     container_name: {{ name }}
     restart: unless-stopped
+{%- if tags or boot_priority %}
+    labels:
+{%- if tags %}
+      mcdock.tags: "{{ tags | join(',') }}"
+{%- endif %}
+{%- if boot_priority %}
+      mcdock.boot-priority: "{{ boot_priority }}"
+{%- endif %}
+{%- endif %}
     environment:
       EULA: "{{ 'TRUE' if eula else 'FALSE' }}"
       MEMORY: "{{ memory }}"
@@ -19,6 +31,18 @@ services:
 {%- endfor %}
     volumes:
       - ./data:/data
-""",
-    lstrip_blocks=True,
-)
\ No newline at end of file
+"""
+
+
+@functools.cache
+def compose_template() -> "Template":
+    """The compiled compose template; Jinja2 is imported on first use, not at boot."""
+    from jinja2 import Template
+
+    return Template(COMPOSE_SOURCE, lstrip_blocks=True)
+
+
+def __getattr__(name: str):
+    if name == "COMPOSE_TEMPLATE":
+        return compose_template()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -115,13 +115,13 @@ def test_list_instances(client):
 @pytest.mark.parametrize("action", ["start", "stop", "restart"])
 def test_lifecycle_actions(client, action):
     r = client.post(f"/instances/alpha/{action}")
-    assert r.status_code == 200
+    assert r.status_code == 202
     assert getattr(client._calls, action) == "alpha"
 
 
 def test_delete_instance(client):
     r = client.delete("/instances/alpha")
-    assert r.status_code == 204
+    assert r.status_code == 202
     assert client._calls.delete == "alpha"
 
 
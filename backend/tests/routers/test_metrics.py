@@ -0,0 +1,42 @@
+# tests/routers/test_metrics.py
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from mcdock.core import db, metrics
+from mcdock.core.config import settings
+from mcdock.core.models import InstanceStatus, PortBinding
+from mcdock.routers import metrics as mod
+from mcdock.services.models import Instance
+from mcdock.services.registry import InstanceRegistry
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "STATE_DB", tmp_path / "mcdock.sqlite")
+    monkeypatch.setattr(metrics, "METRICS_DIR", tmp_path / "metrics")
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "scrape-me")
+
+    InstanceRegistry.upsert(Instance(
+        name="alpha", image="itzg/minecraft-server", eula=True, memory="1G", env=[],
+        ports=[PortBinding(host_port=25565, container_port=25565)], tags=[],
+    ))
+    InstanceRegistry.set_status("alpha", InstanceStatus.RUNNING)
+
+    app = FastAPI()
+    app.include_router(mod.router)
+    with TestClient(app) as c:
+        yield c
+
+
+def test_scraper_token_is_accepted(client):
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+
+    r = client.get("/metrics", headers={"Authorization": "Bearer scrape-me"})
+
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'mcdock_instance_status{instance="alpha",status="running"} 1' in r.text
+    assert 'mcdock_instance_sleeping{instance="alpha"} 0' in r.text
+    assert "# TYPE mcdock_docker_call_duration_seconds histogram" in r.text
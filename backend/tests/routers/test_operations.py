@@ -0,0 +1,60 @@
+# tests/routers/test_operations.py
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from mcdock.core import db
+from mcdock.routers import instances
+from mcdock.routers import operations as mod
+from mcdock.routers.security import require_user, require_ws_user
+from mcdock.services.locks import InstanceLocks
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "STATE_DB", tmp_path / "mcdock.sqlite")
+    monkeypatch.setattr(InstanceLocks, "lock_root", tmp_path / "locks")
+
+    app = FastAPI()
+    app.include_router(instances.router)
+    app.include_router(mod.router)
+    app.include_router(mod.ws_router)
+    app.dependency_overrides[require_user] = lambda: None
+    app.dependency_overrides[require_ws_user] = lambda: None
+
+    async def _slow_start(name):
+        await asyncio.sleep(0.05)
+
+    monkeypatch.setattr(instances.DockerService, "get_instance_dir", lambda name: tmp_path)
+    monkeypatch.setattr(instances.DockerService, "start", _slow_start)
+
+    with TestClient(app) as c:
+        yield c
+
+
+def test_start_returns_202_and_operation_is_queryable(client):
+    r = client.post("/instances/alpha/start")
+    assert r.status_code == 202
+    op_id = r.json()["operation_id"]
+
+    r2 = client.get(f"/operations/{op_id}")
+    assert r2.status_code == 200
+    assert r2.json()["kind"] == "start"
+    assert r2.json()["instance"] == "alpha"
+
+
+def test_unknown_operation_404(client):
+    assert client.get("/operations/nope").status_code == 404
+
+
+def test_websocket_streams_completion(client):
+    with client.websocket_connect("/operations/ws?instance=alpha") as ws:
+        op_id = client.post("/instances/alpha/start").json()["operation_id"]
+        states = []
+        while "succeeded" not in states:
+            event = ws.receive_json()
+            assert event["id"] == op_id
+            states.append(event["state"])
+    assert states[0] == "pending"
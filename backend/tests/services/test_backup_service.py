@@ -1,4 +1,5 @@
 # tests/test_backup_service.py
+import asyncio
 import tarfile
 import time
 from datetime import datetime
@@ -80,7 +81,7 @@ def test_list_backups_sorted_and_limited(tmp_path, monkeypatch):
     (backup_dir / "mc-backup-2025-01-02-00-00.tar.gz").touch()
     (backup_dir / "readme.txt").touch()
 
-    assert BackupService.list_backups("world") == ["mc-backup-2025-01-02-00-00.tar.gz"]
+    assert asyncio.run(BackupService.list_backups("world")) == ["mc-backup-2025-01-02-00-00.tar.gz"]
 
 
 def test_trigger_backup_creates_archive_and_prunes(tmp_path, monkeypatch, rcon_spy):
@@ -100,7 +101,7 @@ def test_trigger_backup_creates_archive_and_prunes(tmp_path, monkeypatch, rcon_s
     # dummy world file
     (data_dir / "level.dat").write_text("dummy")
 
-    BackupService.trigger_backup("alpha")
+    asyncio.run(BackupService.trigger_backup("alpha"))
 
     backups = sorted(p.name for p in backup_dir.glob("*.tar.gz"))
     # exactly BACKUP_RETENTION files should remain
@@ -134,7 +135,7 @@ def test_restore_backup_replaces_data_and_restarts(tmp_path, docker_spy):
     with tarfile.open(archive_path, "w:gz") as tar:
         tar.add(tmp_src / "data", arcname="data")
 
-    BackupService.restore_backup("beta", backup_name)
+    asyncio.run(BackupService.restore_backup("beta", backup_name))
 
     # old data moved aside
     old_dirs = list(inst_dir.glob("data_OLD_*"))
@@ -145,3 +146,33 @@ def test_restore_backup_replaces_data_and_restarts(tmp_path, docker_spy):
 
     # Docker was stopped then started for this instance
     assert docker_spy == [("stop", "beta"), ("start", "beta")]
+
+
+def test_saves_paused_tolerates_a_server_stopped_meanwhile(monkeypatch):
+    """A stop may overlap a backup (see locks._COMPATIBLE); save-on then has nobody to reach."""
+    import subprocess
+    from mcdock.core.models import InstanceStatus
+
+    sent = []
+
+    async def _running(name):
+        return InstanceStatus.RUNNING
+
+    async def _send(name, command):
+        if command == "save-on":
+            raise subprocess.CalledProcessError(1, ["rcon-cli", command])
+        sent.append(command)
+
+    async def _no_sleep(_):
+        pass
+
+    monkeypatch.setattr(DockerService, "get_status", _running)
+    monkeypatch.setattr(DockerService, "send_command", _send)
+    monkeypatch.setattr(backup_service.asyncio, "sleep", _no_sleep)
+
+    async def _main():
+        async with BackupService.saves_paused("alpha") as running:
+            return running
+
+    assert asyncio.run(_main()) is True
+    assert sent == ["save-off", "save-all"]
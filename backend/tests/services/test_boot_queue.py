@@ -0,0 +1,89 @@
+# tests/services/test_boot_queue.py
+import asyncio
+
+import pytest
+
+from mcdock.core import db
+from mcdock.core.config import settings
+from mcdock.core.models import BootState
+from mcdock.services import boot
+from mcdock.services.boot import BootQueue
+
+
+@pytest.fixture(autouse=True)
+def _isolate(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "STATE_DB", tmp_path / "mcdock.sqlite")
+    monkeypatch.setattr(settings, "BOOT_CONCURRENCY", 1)
+    monkeypatch.setattr(boot, "_POLL_SECONDS", 0.01)
+
+
+def test_ready_line_matches_server_log():
+    line = '[12:00:01] [Server thread/INFO]: Done (8.532s)! For help, type "help"'
+    assert boot._READY.search(line)
+    assert not boot._READY.search("[12:00:00] [Server thread/INFO]: Preparing spawn area: 0%")
+
+
+def test_slot_is_held_until_ready_and_priority_sets_order(monkeypatch):
+    order: list[str] = []
+    ready: dict[str, asyncio.Event] = {}
+
+    async def _await_ready(cls, instance, since):
+        await ready[instance].wait()
+        return True
+
+    monkeypatch.setattr(BootQueue, "_await_ready", classmethod(_await_ready))
+
+    def _up(name):
+        async def _inner():
+            order.append(name)
+            return True
+        return _inner
+
+    async def _main():
+        for name in ("first", "low", "high"):
+            ready[name] = asyncio.Event()
+
+        await BootQueue.boot("first", _up("first"))
+        low = asyncio.create_task(BootQueue.boot("low", _up("low"), priority=0))
+        await asyncio.sleep(0.05)
+        high = asyncio.create_task(BootQueue.boot("high", _up("high"), priority=5))
+        await asyncio.sleep(0.05)
+
+        # compose returned but "first" has not logged Done yet: nobody else boots
+        assert order == ["first"]
+        states = {e.instance: e.state for e in BootQueue.snapshot()}
+        assert states == {"first": BootState.BOOTING, "low": BootState.WAITING, "high": BootState.WAITING}
+
+        ready["first"].set()
+        await high
+        assert order == ["first", "high"]
+
+        ready["high"].set()
+        await low
+        ready["low"].set()
+        await BootQueue.shutdown()
+
+    asyncio.run(_main())
+    assert order == ["first", "high", "low"]
+    assert BootQueue.snapshot() == []
+
+
+def test_already_running_container_frees_slot_at_once():
+    async def _noop():
+        return False                                # compose reported "Running"
+
+    async def _main():
+        await BootQueue.boot("alpha", _noop)
+        await asyncio.wait_for(BootQueue.boot("beta", _noop), 1)
+
+    asyncio.run(_main())
+    assert BootQueue.snapshot() == []
+
+
+def test_failed_up_releases_slot():
+    async def _boom():
+        raise TimeoutError("compose up timed out")
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(BootQueue.boot("alpha", _boom))
+    assert BootQueue.snapshot() == []
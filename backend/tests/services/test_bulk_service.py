@@ -0,0 +1,85 @@
+# tests/services/test_bulk_service.py
+import asyncio
+
+import pytest
+
+from mcdock.core import db
+from mcdock.core.models import BulkAction, OperationKind
+from mcdock.services.bulk import BulkService
+from mcdock.services.docker_service import DockerService
+from mcdock.services.locks import InstanceLocks
+
+
+@pytest.fixture(autouse=True)
+def _isolate(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "STATE_DB", tmp_path / "mcdock.sqlite")
+    monkeypatch.setattr(InstanceLocks, "lock_root", tmp_path / "locks")
+    monkeypatch.setattr(DockerService, "root", tmp_path / "servers")
+    for name in ("alpha", "beta", "gamma", "delta"):
+        (tmp_path / "servers" / name).mkdir(parents=True)
+
+
+async def _collect(action, names, **kw):
+    return [r async for r in BulkService.run(action, names, **kw)]
+
+
+def test_parallelism_is_bounded_and_results_stream_per_instance(monkeypatch):
+    active = peak = 0
+
+    async def _start(name):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.05)
+        active -= 1
+        if name == "beta":
+            raise RuntimeError("port in use")
+
+    monkeypatch.setattr(DockerService, "start", _start)
+
+    results = asyncio.run(
+        _collect(BulkAction.START, ["alpha", "beta", "gamma", "delta"], parallelism=2)
+    )
+
+    assert peak == 2
+    by_name = {r.instance: r for r in results}
+    assert set(by_name) == {"alpha", "beta", "gamma", "delta"}
+    assert by_name["beta"].ok is False and by_name["beta"].error == "port in use"
+    assert all(by_name[n].ok for n in ("alpha", "gamma", "delta"))
+    assert all(r.operation_id for r in results)
+
+
+def test_results_arrive_in_completion_order(monkeypatch):
+    async def _send(name, command):
+        await asyncio.sleep(0.1 if name == "alpha" else 0)
+        return f"{name}: {command}"
+
+    monkeypatch.setattr(DockerService, "send_command", _send)
+
+    results = asyncio.run(
+        _collect(BulkAction.COMMAND, ["alpha", "beta"], parallelism=2, command="say hi")
+    )
+
+    assert [r.instance for r in results] == ["beta", "alpha"]
+    assert results[1].output == "alpha: say hi"
+
+
+def test_unknown_instance_is_reported_not_raised():
+    results = asyncio.run(_collect(BulkAction.STOP, ["nope"], parallelism=1))
+    assert results[0].ok is False
+    assert "No such instance" in results[0].error
+
+
+def test_resolve_by_tag(monkeypatch):
+    from mcdock.services.registry import InstanceRegistry
+
+    class _Rec:
+        def __init__(self, name):
+            self.name = name
+
+    monkeypatch.setattr(
+        InstanceRegistry, "query",
+        classmethod(lambda cls, **kw: ([_Rec("alpha"), _Rec("gamma")], None)),
+    )
+    assert BulkService.resolve([], "survival") == ["alpha", "gamma"]
+    assert BulkService.resolve(["beta", "beta", "alpha"], None) == ["beta", "alpha"]
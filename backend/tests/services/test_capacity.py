@@ -0,0 +1,90 @@
+# tests/services/test_capacity.py
+import pytest
+
+from mcdock.core import db
+from mcdock.core.config import settings
+from mcdock.core.models import InstanceStatus, PortBinding
+from mcdock.services.capacity import CapacityService, InsufficientMemory, parse_size
+from mcdock.services.models import Instance
+from mcdock.services.registry import InstanceRegistry
+
+GiB = 1 << 30
+
+
+@pytest.fixture(autouse=True)
+def _host(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "STATE_DB", tmp_path / "mcdock.sqlite")
+    meminfo = tmp_path / "meminfo"
+    meminfo.write_text(
+        "MemTotal:       16777216 kB\n"         # 16G
+        "MemFree:         1048576 kB\n"
+        "MemAvailable:    8388608 kB\n"
+    )
+    monkeypatch.setattr(CapacityService, "meminfo_path", meminfo)
+    monkeypatch.setattr(settings, "HOST_MEMORY_RESERVE", "2G")
+    monkeypatch.setattr(settings, "JVM_OVERHEAD_RATIO", 0.25)
+    monkeypatch.setattr(settings, "JVM_OVERHEAD_MIN", "256M")
+
+
+def _register(name: str, memory: str, status: InstanceStatus) -> None:
+    InstanceRegistry.upsert(Instance(
+        name=name, image="itzg/minecraft-server", eula=True, memory=memory, env=[],
+        ports=[PortBinding(host_port=25565, container_port=25565)],
+    ))
+    InstanceRegistry.set_status(name, status)
+
+
+def test_parse_size_accepts_jvm_styles():
+    assert parse_size("4G") == 4 * GiB
+    assert parse_size("512m") == 512 << 20
+    assert parse_size("1.5G") == int(1.5 * GiB)
+    with pytest.raises(ValueError):
+        parse_size("lots")
+
+
+def test_footprint_adds_overhead_with_a_floor():
+    assert CapacityService.footprint("8G") == 10 * GiB
+    assert CapacityService.footprint("512M") == (512 + 256) << 20
+
+
+def test_snapshot_counts_only_running_instances():
+    _register("alpha", "4G", InstanceStatus.RUNNING)
+    _register("beta", "8G", InstanceStatus.STOPPED)
+
+    cap = CapacityService.snapshot()
+
+    assert cap.total == 16 * GiB and cap.available == 8 * GiB
+    assert cap.budget == 14 * GiB
+    assert cap.committed == 5 * GiB
+    assert cap.headroom == 9 * GiB
+    assert [c.instance for c in cap.instances] == ["alpha"]
+
+
+def test_start_rejected_when_it_would_overcommit():
+    _register("alpha", "8G", InstanceStatus.RUNNING)        # 10G committed
+    _register("beta", "4G", InstanceStatus.STOPPED)         # needs 5G, 4G left
+
+    with pytest.raises(InsufficientMemory, match="beta"):
+        CapacityService.ensure_can_start("beta")
+
+    # restarting a running instance does not count it twice
+    CapacityService.ensure_can_start("alpha")
+
+
+def test_configuration_only_has_to_fit_the_host_alone():
+    _register("alpha", "8G", InstanceStatus.RUNNING)
+
+    CapacityService.ensure_fits("new", "8G", alongside_running=False)
+    with pytest.raises(InsufficientMemory):
+        CapacityService.ensure_fits("new", "12G", alongside_running=False)
+
+
+def test_admission_off_or_unknown_host_never_rejects(monkeypatch, tmp_path):
+    _register("alpha", "64G", InstanceStatus.STOPPED)
+
+    monkeypatch.setattr(settings, "MEMORY_ADMISSION", False)
+    CapacityService.ensure_can_start("alpha")
+
+    monkeypatch.setattr(settings, "MEMORY_ADMISSION", True)
+    monkeypatch.setattr(CapacityService, "meminfo_path", tmp_path / "missing")
+    CapacityService.ensure_can_start("alpha")
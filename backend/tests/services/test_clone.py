@@ -0,0 +1,206 @@
+# tests/services/test_clone.py
+import asyncio
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from mcdock.core import cow, db
+from mcdock.core.conditional import TagCache
+from mcdock.core.models import ConnectionType, InstanceStatus, OperationKind, OperationState, PortBinding
+from mcdock.services.capacity import CapacityService
+from mcdock.services.clone import CloneService
+from mcdock.services import process
+from mcdock.services.docker_service import DockerService
+from mcdock.services.locks import InstanceLocks
+from mcdock.services.operations import OperationService
+from mcdock.services.registry import InstanceRegistry
+
+
+async def _no_containers(argv, **kwargs):
+    return SimpleNamespace(stdout="")
+
+
+@pytest.fixture(autouse=True)
+def tree(tmp_path, monkeypatch):
+    monkeypatch.setattr(DockerService, "mc_root", tmp_path)
+    monkeypatch.setattr(DockerService, "root", tmp_path / "servers")
+    monkeypatch.setattr(DockerService, "_reads", TagCache(16))
+    monkeypatch.setattr(db, "STATE_DB", tmp_path / "mcdock.sqlite")
+    monkeypatch.setattr(InstanceLocks, "lock_root", tmp_path / "locks")
+    monkeypatch.setattr(CapacityService, "meminfo_path", tmp_path / "meminfo")
+    monkeypatch.setattr(process, "run", _no_containers)
+    return tmp_path
+
+
+def _world(data):
+    (data / "world" / "region").mkdir(parents=True)
+    (data / "world" / "level.dat").write_bytes(b"level")
+    (data / "world" / "region" / "r.0.0.mca").write_bytes(os.urandom(4096))
+    (data / "server.properties").write_text("motd=prod\n")
+    os.symlink("world", data / "world-link")
+
+
+def _source(name="prod", port=25565):
+    asyncio.run(DockerService.create_instance(
+        instance_name=name, image="itzg/minecraft-server", eula=True, memory="1G", env=[],
+        ports=[PortBinding(host_port=port, container_port=25565, type=ConnectionType.TCP)],
+        tags=["prod"],
+    ))
+    data = DockerService.root / name / "data"
+    _world(data)
+    return data
+
+
+def test_hardlink_clone_shares_until_unshared(tree):
+    src = tree / "src"
+    src.mkdir()
+    _world(src)
+    dst = tree / "dst"
+    mode = cow.choose_mode(src, dst, allow_hardlinks=True)
+    if mode == cow.REFLINK:
+        pytest.skip("filesystem reflinks; hardlinks are not used here")
+    assert mode == cow.HARDLINK
+
+    cow.clone_tree(src, dst, mode)
+    region = "world/region/r.0.0.mca"
+    assert os.stat(src / region).st_ino == os.stat(dst / region).st_ino
+    assert os.readlink(dst / "world-link") == "world"
+
+    inst = tree / "inst"
+    inst.mkdir()
+    os.rename(dst, inst / "data")
+    assert cow.unshare(inst) == 0                       # no marker: nothing to do
+    (inst / cow.SHARED).touch()
+    assert cow.unshare(inst) > 4096
+    assert os.stat(src / region).st_ino != os.stat(inst / "data" / region).st_ino
+    assert os.stat(src / region).st_nlink == 1
+    assert (inst / "data" / region).read_bytes() == (src / region).read_bytes()
+    assert not (inst / cow.SHARED).exists()
+
+
+def test_source_waits_for_its_clones_copy_and_keeps_its_inodes(tree):
+    root = tree / "servers"
+    _world(root / "prod" / "data")
+    dst = root / "test" / "data"
+    if cow.choose_mode(root / "prod" / "data", dst) != cow.HARDLINK:
+        pytest.skip("filesystem reflinks; hardlinks are not used here")
+    (root / "test" / cow.SHARED).touch()
+    cow.clone_tree(root / "prod" / "data", dst, cow.HARDLINK)
+    region = "world/region/r.0.0.mca"
+    before = os.stat(root / "prod" / "data" / region).st_ino
+
+    assert cow.unshare(root / "prod") == 0              # unmarked: never copies itself
+    assert cow.clones_of(root / "prod") == [root / "test"]
+    asyncio.run(DockerService.unshare("prod"))          # the unshare queued after cloning was lost
+    assert os.stat(root / "prod" / "data" / region).st_ino == before
+    assert os.stat(dst / region).st_ino != before
+    assert (dst / region).read_bytes() == (root / "prod" / "data" / region).read_bytes()
+    assert cow.clones_of(root / "prod") == []
+
+
+def test_copy_mode_never_shares(tree):
+    src = tree / "src"
+    src.mkdir()
+    _world(src)
+    dst = tree / "dst"
+    cow.clone_tree(src, dst, cow.COPY)
+    region = "world/region/r.0.0.mca"
+    assert os.stat(src / region).st_ino != os.stat(dst / region).st_ino
+    assert (dst / region).read_bytes() == (src / region).read_bytes()
+
+
+def test_next_free_ports_skip_instances_and_published_ports(tree, monkeypatch):
+    async def _ps(argv, **kwargs):
+        assert argv == ["docker", "ps", "--format", "{{.Ports}}"]
+        return SimpleNamespace(stdout=(
+            "0.0.0.0:25567->25565/tcp, :::25567->25565/tcp\n"
+            "\n"
+            "0.0.0.0:25566-25567->19132-19133/udp\n"
+        ))
+
+    monkeypatch.setattr(process, "run", _ps)
+    _source("prod", 25565)
+    _source("other", 25566)
+    ports = asyncio.run(DockerService.allocate_ports([
+        PortBinding(host_port=25565, container_port=25565, type=ConnectionType.TCP),
+        PortBinding(host_port=25565, container_port=25565, type=ConnectionType.UDP),
+    ]))
+    assert [p.host_port for p in ports] == [25568, 25568]     # 25567 is published by a container
+    assert [p.container_port for p in ports] == [25565, 25565]
+
+
+def test_clone_of_a_stopped_instance(tree, monkeypatch):
+    async def _stopped(name):
+        return InstanceStatus.STOPPED
+
+    monkeypatch.setattr(DockerService, "get_status", _stopped)
+    monkeypatch.setattr(cow, "_supports_reflink", lambda src, dst: False)
+    src_data = _source()
+
+    async def _main():
+        await CloneService.clone("prod", "test", None)
+        region = "world/region/r.0.0.mca"
+        assert os.stat(DockerService.root / "test" / "data" / region).st_ino == before
+        [unshare] = OperationService._tasks.values()
+        await unshare
+
+    region = "world/region/r.0.0.mca"
+    before = os.stat(src_data / region).st_ino
+    asyncio.run(_main())
+
+    clone = DockerService._load_compose("test")
+    assert clone.tags == ["prod"] and clone.memory == "1G"
+    assert clone.ports[0].host_port == 25566 and clone.ports[0].container_port == 25565
+    assert InstanceRegistry.get("test") is not None
+
+    data = DockerService.root / "test" / "data"       # copied in the background, by the clone
+    assert os.stat(src_data / region).st_ino == before
+    assert os.stat(data / region).st_ino != before
+    assert not (DockerService.root / "test" / cow.SHARED).exists()
+    [op] = OperationService.recent("test")
+    assert op.kind == OperationKind.UNSHARE and op.state == OperationState.SUCCEEDED
+
+
+def test_running_source_is_paused_and_never_hardlinked(tree, monkeypatch):
+    sent = []
+
+    async def _running(name):
+        return InstanceStatus.RUNNING
+
+    async def _send(name, command):
+        sent.append(command)
+
+    async def _no_sleep(_):
+        pass
+
+    monkeypatch.setattr(DockerService, "get_status", _running)
+    monkeypatch.setattr(DockerService, "send_command", _send)
+    monkeypatch.setattr(cow, "_supports_reflink", lambda src, dst: False)
+    monkeypatch.setattr("mcdock.services.backup_service.asyncio.sleep", _no_sleep)
+    src_data = _source()
+
+    asyncio.run(CloneService.clone("prod", "test", ["staging"]))
+
+    assert sent == ["save-off", "save-all", "save-on"]
+    assert DockerService._load_compose("test").tags == ["staging"]
+    region = "world/region/r.0.0.mca"
+    assert os.stat(DockerService.root / "test" / "data" / region).st_ino != os.stat(src_data / region).st_ino
+    assert not (DockerService.root / "test" / cow.SHARED).exists()
+
+
+def test_failed_clone_leaves_no_instance_behind(tree, monkeypatch):
+    async def _stopped(name):
+        return InstanceStatus.STOPPED
+
+    def _broken(src, dst, mode):
+        raise OSError("disk on fire")
+
+    monkeypatch.setattr(DockerService, "get_status", _stopped)
+    monkeypatch.setattr(cow, "clone_tree", _broken)
+    _source()
+
+    with pytest.raises(OSError):
+        asyncio.run(CloneService.clone("prod", "test", None))
+    assert not (DockerService.root / "test").exists()
+    assert InstanceRegistry.get("test") is None
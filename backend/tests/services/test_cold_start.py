@@ -0,0 +1,49 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND = Path(__file__).resolve().parents[2]
+
+# what importing the app must not pull in (see benchmarks/imports.py)
+LAZY = ("apscheduler", "sqlalchemy", "jinja2", "jose.jwt", "uvicorn")
+
+_PROBE = """
+import json, sys, threading
+import mcdock.main
+print(json.dumps({"modules": sorted(sys.modules), "threads": threading.active_count()}))
+"""
+
+
+def _probe(code: str, mc_root: Path) -> dict:
+    env = {**os.environ, "MC_ROOT": str(mc_root)}
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=BACKEND, env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(out.splitlines()[-1])
+
+
+@pytest.fixture(scope="module")
+def probe(tmp_path_factory):
+    return _probe(_PROBE, tmp_path_factory.mktemp("mc"))
+
+
+@pytest.mark.parametrize("module", LAZY)
+def test_heavy_dependencies_are_not_imported_at_boot(probe, module):
+    assert module not in probe["modules"]
+
+
+def test_only_the_log_listener_thread_is_started(probe):
+    assert probe["threads"] == 2                  # main + the logging QueueListener
+
+
+def test_submodules_do_not_build_the_app(tmp_path):
+    probe = _probe(
+        "import json, sys, mcdock.core.config; print(json.dumps({'modules': sorted(sys.modules)}))",
+        tmp_path,
+    )
+    assert "mcdock.main" not in probe["modules"]
+    assert not (tmp_path / "mcdock-logs").exists()
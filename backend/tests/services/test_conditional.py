@@ -0,0 +1,103 @@
+# tests/services/test_conditional.py
+import os
+from collections import OrderedDict
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from mcdock.core.conditional import TagCache, file_tag, tree_tag
+from mcdock.routers import backups, instances
+from mcdock.routers.security import require_user
+from mcdock.services.backup_service import BackupService
+from mcdock.services.docker_service import DockerService
+
+COMPOSE = """\
+services:
+  mc-server:
+    image: itzg/minecraft-server
+    environment: {EULA: "TRUE", MEMORY: 2G}
+    ports: ["25565:25565/tcp"]
+"""
+
+
+@pytest.fixture
+def tree(tmp_path, monkeypatch):
+    monkeypatch.setattr(DockerService, "root", tmp_path / "servers")
+    monkeypatch.setattr(DockerService, "_reads", TagCache(16))
+    monkeypatch.setattr(BackupService, "backups_root", tmp_path / "backups")
+    monkeypatch.setattr(BackupService, "_listings", TagCache(16))
+    (tmp_path / "servers" / "alpha" / "data").mkdir(parents=True)
+    (tmp_path / "servers" / "alpha" / "docker-compose.yml").write_text(COMPOSE)
+    (tmp_path / "servers" / "alpha" / "data" / "server.properties").write_text("motd=hi\n")
+    (tmp_path / "backups" / "alpha" / "triggered").mkdir(parents=True)
+    (tmp_path / "backups" / "alpha" / "triggered" / "2025-01-01-00-00.tar.gz").write_bytes(b"x")
+    return tmp_path
+
+
+@pytest.fixture
+def client(tree):
+    app = FastAPI()
+    app.include_router(instances.router)
+    app.include_router(backups.router)
+    app.dependency_overrides[require_user] = lambda: None
+    return TestClient(app)
+
+
+def test_tags_follow_file_changes(tmp_path):
+    f = tmp_path / "f"
+    missing = file_tag(f)
+    f.write_text("a")
+    first = file_tag(f)
+    assert first != missing and file_tag(f) == first
+
+    tmp = tmp_path / "f.tmp"
+    tmp.write_text("b")
+    st = f.stat()
+    os.utime(tmp, ns=(st.st_atime_ns, st.st_mtime_ns))      # same mtime and size ...
+    tmp.replace(f)
+    assert file_tag(f) != first                              # ... but a new inode
+
+    (tmp_path / "bucket").mkdir()
+    listing = tree_tag(tmp_path)
+    (tmp_path / "bucket" / "new.tar.gz").write_bytes(b"")
+    assert tree_tag(tmp_path) != listing
+
+
+def test_tag_cache():
+    cache = TagCache(2)
+    cache.put("a", "1", "A")
+    assert cache.get("a", "1") == "A"
+    assert cache.get("a", "2") is None                       # stale tag is a miss
+    cache.put("b", "1", "B")
+    cache.put("c", "1", "C")
+    assert cache.get("a", "1") is None                       # evicted
+    cache.discard("b")
+    assert cache.get("b", "1") is None
+
+
+def test_properties_parsed_once_until_written(tree, monkeypatch):
+    assert DockerService._load_properties("alpha") == OrderedDict(motd="hi")
+    with monkeypatch.context() as m:
+        m.setattr(Path, "read_text", lambda *a, **kw: pytest.fail("re-parsed"))
+        assert DockerService._load_properties("alpha") == {"motd": "hi"}
+
+    DockerService._write_properties("alpha", {"motd": "bye"})
+    assert DockerService._load_properties("alpha") == {"motd": "bye"}
+
+
+def test_conditional_get(client, tree):
+    for url in ("/instances/alpha/compose", "/instances/alpha/properties", "/backups/alpha"):
+        first = client.get(url)
+        assert first.status_code == 200, url
+        etag = first.headers["etag"]
+        again = client.get(url, headers={"If-None-Match": etag})
+        assert again.status_code == 304, url
+        assert again.headers["etag"] == etag
+
+    etag = client.get("/backups/alpha").headers["etag"]
+    (tree / "backups" / "alpha" / "triggered" / "2025-01-02-00-00.tar.gz").write_bytes(b"x")
+    r = client.get("/backups/alpha", headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.json() == ["triggered/2025-01-02-00-00.tar.gz", "triggered/2025-01-01-00-00.tar.gz"]
@@ -1,4 +1,5 @@
 # test_docker_service.py
+import asyncio
 import subprocess
 from pathlib import Path
 from types import SimpleNamespace
@@ -8,9 +9,11 @@ import yaml
 
 # ---- project imports (edit as needed) -----------------------
 from mcdock.services import docker_service  # module that defines DockerService
+from mcdock.services.capacity import CapacityService
 from mcdock.services.docker_service import DockerService
 from mcdock.core.models import ConnectionType, EnvVar, PortBinding
 from mcdock.core.config import settings
+from mcdock.core import db
 # -------------------------------------------------------------
 
 # -------------------------------------------------------------------
@@ -24,6 +27,9 @@ def _isolate_fs(tmp_path, monkeypatch):
     monkeypatch.setattr(settings, "MC_ROOT", tmp_path)
     # let the class pick up the new path
     monkeypatch.setattr(DockerService, "root", Path(settings.MC_ROOT))
+    monkeypatch.setattr(db, "STATE_DB", tmp_path / "mcdock.sqlite")
+    # no /proc/meminfo: memory admission does not depend on the test host
+    monkeypatch.setattr(CapacityService, "meminfo_path", tmp_path / "meminfo")
 
 
 @pytest.fixture(autouse=True)
@@ -53,7 +59,7 @@ def _patch_template(monkeypatch):
             }
             return yaml.safe_dump({"version": "3", "services": {"mc-server": service}}, sort_keys=False)
 
-    monkeypatch.setattr(docker_service, "COMPOSE_TEMPLATE", DummyTemplate())
+    monkeypatch.setattr(docker_service, "compose_template", lambda: DummyTemplate())
 
 
 
@@ -98,14 +104,14 @@ def test_check_ports_rejects_collision_with_other_instance(tmp_path):
 
 def test_create_instance_writes_compose(tmp_path):
     ports = [PortBinding(host_port=25570, container_port=25565, type=ConnectionType.TCP)]
-    DockerService.create_instance(
+    asyncio.run(DockerService.create_instance(
         instance_name="alpha",
         image="itzg/minecraft-server:latest",
         eula=True,
         memory="4G",
         env=[EnvVar(key="DIFFICULTY", value="hard")],
         ports=ports,
-    )
+    ))
     compose_file = tmp_path / "alpha" / "docker-compose.yml"
     assert compose_file.exists()
     data = yaml.safe_load(compose_file.read_text())
@@ -113,30 +119,36 @@ def test_create_instance_writes_compose(tmp_path):
 
 
 def test_get_status_running(monkeypatch):
-    # fake subprocess so `stdout` looks like docker returned a container ID
-    monkeypatch.setattr(
-        docker_service,
-        "subprocess",
-        SimpleNamespace(
-            run=lambda *a, **kw: _fake_completed(stdout="deadbeef\n"),
-            CalledProcessError=subprocess.CalledProcessError,
-        ),
-    )
+    # fake the runner so `stdout` looks like docker returned a container ID
+    async def _fake_run(*a, **kw):
+        return _fake_completed(stdout="deadbeef\n")
+
+    monkeypatch.setattr(docker_service.process, "run", _fake_run)
 
     # Create dummy instance dir so _get_instance_dir does not barf
     (Path(settings.MC_ROOT) / "alpha").mkdir()
 
-    status = DockerService.get_status("alpha")
+    status = asyncio.run(DockerService.get_status("alpha"))
     assert status == "running"
 
 
+def test_get_status_timeout_is_error(monkeypatch):
+    async def _hang(*a, **kw):
+        raise TimeoutError("docker compose ps timed out")
+
+    monkeypatch.setattr(docker_service.process, "run", _hang)
+    (Path(settings.MC_ROOT) / "alpha").mkdir()
+
+    assert asyncio.run(DockerService.get_status("alpha")) == "error"
+
+
 def test_update_properties_overwrites_file(tmp_path):
     inst = tmp_path / "beta" / "data"
     inst.mkdir(parents=True)
     prop_path = inst / "server.properties"
     prop_path.write_text("foo=bar\n")
 
-    DockerService.update_properties("beta", {"max-players": "20", "pvp": "true"})
+    asyncio.run(DockerService.update_properties("beta", {"max-players": "20", "pvp": "true"}))
     content = prop_path.read_text().splitlines()
     assert "max-players=20" in content and "pvp=true" in content and "foo=bar" not in content
 
@@ -149,16 +161,23 @@ def test_start_and_stop_call_docker(monkeypatch, tmp_path):
 
     calls = []
 
-    def _fake_run(cmd, cwd=None, **kw):
-        calls.append((cmd, cwd))
+    async def _fake_run(cmd, cwd=None, **kw):
+        calls.append((cmd, cwd, kw.get("timeout")))
         return _fake_completed()
 
-    mp = SimpleNamespace(run=_fake_run)
-    monkeypatch.setattr(docker_service, "subprocess", mp)
+    monkeypatch.setattr(docker_service.process, "run", _fake_run)
 
-    DockerService.start("gamma")
-    DockerService.stop("gamma")
+    asyncio.run(DockerService.start("gamma"))
+    asyncio.run(DockerService.stop("gamma"))
 
     assert calls[0][0][:3] == ["docker", "compose", "up"]
     assert calls[1][0][:3] == ["docker", "compose", "down"]
     assert all(call[1] == Path(settings.MC_ROOT) / "gamma" for call in calls)
+    assert calls[0][2] == settings.DOCKER_UP_TIMEOUT
+    assert calls[1][2] == settings.DOCKER_DOWN_TIMEOUT
+
+
+def test_parse_stats_line():
+    line = '\x1b[2J\x1b[H{"Name":"alpha","CPUPerc":"112.5%","MemUsage":"1.5GiB / 7.7GiB"}'
+    assert DockerService.parse_stats(line) == ("alpha", 112.5, 1536.0)
+    assert DockerService.parse_stats("not json") is None
@@ -0,0 +1,108 @@
+# tests/services/test_health_service.py
+import asyncio
+import subprocess
+import time
+from datetime import datetime, timedelta, UTC
+
+import pytest
+
+from mcdock.core import db
+from mcdock.services import health
+from mcdock.services.docker_service import DockerService
+from mcdock.services.health import HealthService
+from mcdock.services.models import HealthSample
+
+PAPER = {
+    "list": "There are 3 of a max of 20 players online: a, b, c",
+    "tps": "§6TPS from last 1m, 5m, 15m: §e17.2, §a19.9, §a*20.0",
+    "mspt": "§6Server tick times §e(§7avg§e/§7min§e/§7max§e)§6 from last 5s,§7 10s,§6 1m§e:\n"
+            "§6◴ §a61.3§7/§a0.8§7/§a90.1§e, §a40.0§7/§a0.7§7/§a88.0§e, §a30.2§7/§a0.6§7/§a91.4",
+}
+VANILLA = {
+    "list": "There are 0 of a max of 10 players online: ",
+    "tps": "Unknown or incomplete command, see below for error",
+}
+
+
+@pytest.fixture(autouse=True)
+def _isolate(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "STATE_DB", tmp_path / "mcdock.sqlite")
+    monkeypatch.setattr(HealthService, "_paper", {})
+
+
+def _fake_rcon(monkeypatch, answers):
+    async def _send(name, command):
+        return answers[name][command]
+
+    monkeypatch.setattr(DockerService, "send_command", _send)
+
+
+def test_paper_sample_reads_tps_mspt_and_players(monkeypatch):
+    _fake_rcon(monkeypatch, {"paper": PAPER})
+    stats = {"paper": (150.0, 2048.0)}
+
+    s = asyncio.run(HealthService.sample("paper", stats, since=None))
+
+    assert (s.cpu, s.mem_mib) == (150.0, 2048.0)
+    assert (s.players, s.players_max) == (3, 20)
+    assert s.tps == 17.2 and s.mspt == 61.3
+    assert s.ticks_behind is None
+    assert s.alerts == ["tps 17.2 < 18", "mspt 61.3 > 50"]
+
+
+def test_vanilla_sample_counts_ticks_behind_from_console(monkeypatch):
+    _fake_rcon(monkeypatch, {"vanilla": VANILLA})
+    argv_seen = []
+
+    async def _run(argv, **kw):
+        argv_seen.append(argv)
+        log = (
+            "[12:00:01] [Server thread/WARN]: Can't keep up! Is the server overloaded? "
+            "Running 2500ms or 50 ticks behind\n"
+            "[12:00:09] [Server thread/WARN]: Can't keep up! Is the server overloaded? "
+            "Running 4000ms or 80 ticks behind\n"
+        )
+        return subprocess.CompletedProcess(argv, 0, "", log)
+
+    monkeypatch.setattr(health.process, "run", _run)
+
+    s = asyncio.run(HealthService.sample("vanilla", {}, since=1700000000))
+
+    assert s.tps is None and s.mspt is None
+    assert s.ticks_behind == 130
+    assert s.players == 0
+    assert argv_seen == [["docker", "logs", "--since", "1700000000", "vanilla"]]
+    assert s.alerts == ["ticks behind 130 > 100"]
+    assert HealthService._paper == {"vanilla": False}
+
+
+def test_history_and_latest():
+    now = datetime.now(UTC)
+    samples = [
+        HealthSample(instance="alpha", at=now - timedelta(minutes=m), tps=20.0 - m)
+        for m in (2, 1, 0)
+    ] + [HealthSample(instance="beta", at=now, players=4)]
+    HealthService._store(samples)
+
+    hist = HealthService.history("alpha", since=now - timedelta(minutes=1, seconds=30))
+    assert [s.tps for s in hist] == [19.0, 20.0]
+    assert HealthService.history("alpha", limit=1)[0].tps == 20.0
+
+    latest = {s.instance: s for s in HealthService.latest()}
+    assert latest["alpha"].tps == 20.0 and latest["beta"].players == 4
+
+
+def test_naive_bounds_are_utc(monkeypatch):
+    monkeypatch.setenv("TZ", "America/New_York")        # a panel not running in UTC
+    time.tzset()
+    try:
+        now = datetime.now(UTC)
+        HealthService._store([
+            HealthSample(instance="alpha", at=now - timedelta(minutes=m), tps=20.0 - m) for m in (2, 0)
+        ])
+        naive = (now - timedelta(minutes=1)).replace(tzinfo=None)
+        assert [s.tps for s in HealthService.history("alpha", since=naive)] == [20.0]
+        assert [s.tps for s in HealthService.history("alpha", until=naive)] == [18.0]
+    finally:
+        monkeypatch.delenv("TZ")
+        time.tzset()
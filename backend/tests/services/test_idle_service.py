@@ -0,0 +1,101 @@
+# tests/services/test_idle_service.py
+import asyncio
+from datetime import timedelta
+
+import pytest
+
+from mcdock.core import db
+from mcdock.core.config import settings
+from mcdock.core.models import InstanceStatus, PortBinding
+from mcdock.services import locks
+from mcdock.services.idle import IdleService
+from mcdock.services.models import Instance
+from mcdock.services.registry import InstanceRegistry
+from mcdock.services.sleep import SleepService
+
+
+@pytest.fixture(autouse=True)
+def _isolate(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "STATE_DB", tmp_path / "mcdock.sqlite")
+    monkeypatch.setattr(IdleService, "_last_active", {})
+    monkeypatch.setattr(settings, "IDLE_STOP_AFTER", timedelta(minutes=10))
+
+    for i, (name, tags) in enumerate([("empty", []), ("busy", []), ("pinned", ["always-on"])]):
+        InstanceRegistry.upsert(Instance(
+            name=name, image="itzg/minecraft-server", eula=True, memory="1G", env=[],
+            ports=[PortBinding(host_port=25565 + i, container_port=25565)], tags=tags,
+        ))
+        InstanceRegistry.set_status(name, InstanceStatus.RUNNING)
+
+
+def test_only_instances_empty_for_the_whole_window_are_stopped(monkeypatch):
+    slept: list[str] = []
+
+    async def _players(cls, record):
+        return {"empty": 0, "busy": 3, "pinned": 0}[record.name]
+
+    async def _put_to_sleep(cls, name):
+        slept.append(name)
+
+    monkeypatch.setattr(IdleService, "_players", classmethod(_players))
+    monkeypatch.setattr(IdleService, "_put_to_sleep", classmethod(_put_to_sleep))
+
+    async def _main():
+        await IdleService._check_idle(0)            # first sighting starts the clock
+        await IdleService._check_idle(300)
+        await asyncio.sleep(0)
+        assert slept == []
+        await IdleService._check_idle(600)
+        await asyncio.sleep(0)
+
+    asyncio.run(_main())
+    assert slept == ["empty"]
+
+
+def test_unreachable_server_counts_as_active(monkeypatch):
+    slept: list[str] = []
+    answers = iter([0, None, 0])
+
+    async def _players(cls, record):
+        return next(answers) if record.name == "empty" else 1
+
+    async def _put_to_sleep(cls, name):
+        slept.append(name)
+
+    monkeypatch.setattr(IdleService, "_players", classmethod(_players))
+    monkeypatch.setattr(IdleService, "_put_to_sleep", classmethod(_put_to_sleep))
+
+    async def _main():
+        await IdleService._check_idle(0)
+        await IdleService._check_idle(600)          # RCON failed: clock restarts
+        await IdleService._check_idle(900)
+        await asyncio.sleep(0)
+
+    asyncio.run(_main())
+    assert slept == []
+
+
+def test_idle_stop_is_refused_without_a_reachable_listener(tmp_path, monkeypatch):
+    checked = []
+
+    async def _unreachable():
+        return False
+
+    async def _nothing():
+        pass
+
+    async def _check_idle(now):
+        checked.append(now)
+
+    monkeypatch.setattr(SleepService, "reachable", _unreachable)
+    monkeypatch.setattr(IdleService, "lock_path", tmp_path / "idle.lock")
+    monkeypatch.setattr(IdleService, "_idle_stop", None)
+    monkeypatch.setattr(IdleService, "_sync_listeners", _nothing)
+    monkeypatch.setattr(IdleService, "_check_idle", _check_idle)
+    monkeypatch.setattr(settings, "IDLE_POLL_INTERVAL", 0)
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(asyncio.wait_for(IdleService.run(), 0.2))
+    locks.release_leader(IdleService.lock_path)
+    assert IdleService._idle_stop is False
+    assert checked == []
@@ -0,0 +1,211 @@
+# tests/services/test_imports.py
+import asyncio
+import hashlib
+import io
+import os
+import tarfile
+import zipfile
+
+import pytest
+
+from mcdock.core.conditional import TagCache
+from mcdock.core.config import settings
+from mcdock.core.models import InstanceStatus
+from mcdock.services import imports
+from mcdock.services.backup_service import BackupService
+from mcdock.services.docker_service import DockerService
+from mcdock.services.imports import (
+    ImportService, OffsetMismatch, ChecksumMismatch, UploadBusy,
+)
+
+
+@pytest.fixture(autouse=True)
+def tree(tmp_path, monkeypatch):
+    monkeypatch.setattr(ImportService, "root", tmp_path / "imports")
+    monkeypatch.setattr(ImportService, "_hashers", {})
+    monkeypatch.setattr(DockerService, "root", tmp_path / "servers")
+    monkeypatch.setattr(DockerService, "_reads", TagCache(16))
+    monkeypatch.setattr(settings, "IMPORT_WORKERS", 3)
+    (tmp_path / "servers" / "alpha" / "data").mkdir(parents=True)
+    return tmp_path
+
+
+def _checksum(data: bytes) -> str:
+    return "sha256=" + hashlib.sha256(data).hexdigest()
+
+
+async def _body(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+def _upload(data: bytes, *parts: bytes):
+    async def _go():
+        upload = ImportService.begin("alpha", None, len(data), _checksum(data))
+        for part in parts or (data,):
+            upload = ImportService.begin("alpha", upload.id, len(data), _checksum(data))
+            upload = await ImportService.receive(upload, upload.offset, _body(part))
+        return await ImportService.verify(upload)
+    return asyncio.run(_go())
+
+
+def _world(files: dict[str, bytes], fmt: str) -> bytes:
+    buf = io.BytesIO()
+    if fmt == "zip":
+        with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+            for name, content in files.items():
+                zf.writestr(name, content)
+    else:
+        with tarfile.open(fileobj=buf, mode=f"w:{fmt}") as tar:
+            for name, content in files.items():
+                info = tarfile.TarInfo(name)
+                info.size = len(content)
+                tar.addfile(info, io.BytesIO(content))
+    return buf.getvalue()
+
+
+def test_chunks_resume_at_the_current_offset():
+    data = os.urandom(300_000)
+
+    async def _go():
+        upload = ImportService.begin("alpha", None, len(data), _checksum(data))
+        upload = await ImportService.receive(upload, 0, _body(data[:100_000], data[100_000:120_000]))
+        assert upload.offset == 120_000
+
+        with pytest.raises(OffsetMismatch) as e:
+            await ImportService.receive(upload, 50_000, _body(b"x"))
+        assert e.value.offset == 120_000
+
+        ImportService._hashers.clear()              # e.g. the rest went to another worker
+        resumed = ImportService.get("alpha", upload.id)
+        resumed = await ImportService.receive(resumed, resumed.offset, _body(data[120_000:]))
+        return await ImportService.verify(resumed)
+
+    upload = asyncio.run(_go())
+    assert upload.verified
+    assert (ImportService.root / upload.id / "upload").read_bytes() == data
+
+
+def test_checksum_mismatch_discards_the_upload():
+    data = os.urandom(1000)
+
+    async def _go():
+        upload = ImportService.begin("alpha", None, len(data), _checksum(b"something else"))
+        upload = await ImportService.receive(upload, 0, _body(data))
+        with pytest.raises(ChecksumMismatch):
+            await ImportService.verify(upload)
+        return upload
+
+    upload = asyncio.run(_go())
+    assert not (ImportService.root / upload.id).exists()
+
+
+def test_bytes_beyond_the_announced_length_are_refused_but_the_rest_kept():
+    data = os.urandom(1000)
+
+    async def _go():
+        upload = ImportService.begin("alpha", None, len(data), _checksum(data))
+        with pytest.raises(ValueError):
+            await ImportService.receive(upload, 0, _body(data, b"extra"))
+        return ImportService.get("alpha", upload.id)
+
+    assert asyncio.run(_go()).offset == len(data)
+
+
+def test_an_upload_written_elsewhere_is_busy():
+    data = os.urandom(10)
+    upload = ImportService.begin("alpha", None, len(data), _checksum(data))
+    fd = imports.try_flock(ImportService.root / upload.id / "lock")
+    try:
+        with pytest.raises(UploadBusy):
+            asyncio.run(ImportService.receive(upload, 0, _body(data)))
+    finally:
+        imports.unflock(fd)
+
+
+@pytest.mark.parametrize("fmt", ["zip", "gz", "xz"])
+def test_stage_unwraps_a_server_directory(tree, monkeypatch, fmt):
+    monkeypatch.setattr(imports, "_INLINE_MEMBER", 4096)
+    big = os.urandom(imports._INLINE_MEMBER + 1)            # copied inline from a tar
+    archive = _world({
+        "MyServer/data/server.properties": b"level-name=world\n",
+        "MyServer/data/world/level.dat": b"level",
+        "MyServer/data/world/region/r.0.0.mca": big,
+        **{f"MyServer/data/world/region/r.{i}.1.mca": os.urandom(2048) for i in range(20)},
+    }, fmt)
+    path = tree / "archive"
+    path.write_bytes(archive)
+
+    root, target = ImportService._stage("alpha", path, tree / "staging")
+    assert target == "data"
+    assert (root / "server.properties").is_file()
+    assert (root / "world" / "region" / "r.0.0.mca").read_bytes() == big
+    assert len(list((root / "world" / "region").iterdir())) == 21
+
+
+def test_stage_recognises_a_bare_world(tree):
+    (tree / "servers" / "alpha" / "data" / "server.properties").write_text("level-name=realm\n")
+    path = tree / "archive"
+    path.write_bytes(_world({"level.dat": b"x", "region/r.0.0.mca": b"y", "__MACOSX/._level.dat": b""}, "zip"))
+
+    root, target = ImportService._stage("alpha", path, tree / "staging")
+    assert target == "data/realm"
+    assert sorted(p.name for p in root.iterdir()) == ["level.dat", "region"]
+
+
+@pytest.mark.parametrize("name", ["../evil", "/etc/evil"])
+def test_stage_refuses_paths_outside_the_staging_dir(tree, name):
+    path = tree / "archive"
+    path.write_bytes(_world({"world/level.dat": b"x", name: b"boom"}, "gz"))
+    with pytest.raises(ValueError):
+        ImportService._stage("alpha", path, tree / "staging")
+
+
+def test_stage_requires_a_world(tree):
+    path = tree / "archive"
+    path.write_bytes(_world({"notes.txt": b"hi", "other/readme": b"x"}, "zip"))
+    with pytest.raises(ValueError):
+        ImportService._stage("alpha", path, tree / "staging")
+
+
+def test_import_swaps_the_data_dir_of_a_stopped_server(tree, monkeypatch):
+    data_dir = tree / "servers" / "alpha" / "data"
+    (data_dir / "world").mkdir()
+    (data_dir / "world" / "level.dat").write_bytes(b"old")
+
+    calls = []
+
+    async def _status(name):
+        return InstanceStatus.RUNNING
+
+    async def _record(name, *a, **kw):
+        calls.append(name)
+
+    async def _backup(name, bucket):
+        calls.append(f"backup:{bucket}")
+        assert (data_dir / "world" / "level.dat").read_bytes() == b"old"
+
+    monkeypatch.setattr(DockerService, "get_status", _status)
+    monkeypatch.setattr(DockerService, "stop", lambda name: _record("stop"))
+    monkeypatch.setattr(DockerService, "start", lambda name: _record("start"))
+    monkeypatch.setattr(BackupService, "trigger_backup", _backup)
+
+    archive = _world({"data/world/level.dat": b"new", "data/world/region/r.0.0.mca": b"r"}, "gz")
+    upload = _upload(archive, archive[:100], archive[100:])
+    asyncio.run(ImportService.import_world("alpha", upload.id))
+
+    assert calls == ["stop", f"backup:{BackupService.restored_dirname}", "start"]
+    assert (data_dir / "world" / "level.dat").read_bytes() == b"new"
+    assert not (ImportService.root / upload.id).exists()
+    assert [p.name for p in (tree / "servers" / "alpha").iterdir()] == ["data"]
+
+
+def test_exchange_swaps_two_directories(tree):
+    a, b = tree / "a", tree / "b"
+    a.mkdir()
+    b.mkdir()
+    (a / "from-a").touch()
+    (b / "from-b").touch()
+    imports._exchange(a, b)
+    assert [p.name for p in a.iterdir()] == ["from-b"]
+    assert [p.name for p in b.iterdir()] == ["from-a"]
@@ -0,0 +1,193 @@
+# tests/services/test_locks.py
+import asyncio
+import fcntl
+import os
+
+import pytest
+
+from mcdock.core.models import OperationKind
+from mcdock.services import locks
+from mcdock.services.locks import InstanceLocks
+
+
+@pytest.fixture(autouse=True)
+def _isolate(tmp_path, monkeypatch):
+    monkeypatch.setattr(InstanceLocks, "lock_root", tmp_path / "locks")
+    monkeypatch.setattr(InstanceLocks, "_queues", {})
+    monkeypatch.setattr(InstanceLocks, "_fds", {})
+    monkeypatch.setattr(InstanceLocks, "_file_guards", {})
+
+
+def _recorder(log: list, name: str, delay: float = 0.02):
+    async def _work():
+        log.append(f"{name}:start")
+        await asyncio.sleep(delay)
+        log.append(f"{name}:end")
+        return name
+    return _work
+
+
+def test_conflicting_operations_are_serialised():
+    log = []
+
+    async def _main():
+        await asyncio.gather(
+            InstanceLocks.run("alpha", OperationKind.RESTORE, _recorder(log, "restore")),
+            InstanceLocks.run("alpha", OperationKind.RESTART, _recorder(log, "restart")),
+        )
+
+    asyncio.run(_main())
+    assert log == ["restore:start", "restore:end", "restart:start", "restart:end"]
+
+
+def test_other_instances_are_not_blocked():
+    log = []
+
+    async def _main():
+        await asyncio.gather(
+            InstanceLocks.run("alpha", OperationKind.STOP, _recorder(log, "a")),
+            InstanceLocks.run("beta", OperationKind.STOP, _recorder(log, "b")),
+        )
+
+    asyncio.run(_main())
+    assert log[:2] == ["a:start", "b:start"]
+
+
+def test_pending_duplicates_are_coalesced():
+    log = []
+
+    async def _main():
+        running = asyncio.create_task(
+            InstanceLocks.run("alpha", OperationKind.BACKUP, _recorder(log, "backup"), key="5m")
+        )
+        await asyncio.sleep(0)                  # backup is now running
+        results = await asyncio.gather(
+            running,
+            InstanceLocks.run("alpha", OperationKind.RESTART, _recorder(log, "restart-1")),
+            InstanceLocks.run("alpha", OperationKind.RESTART, _recorder(log, "restart-2")),
+        )
+        return results
+
+    results = asyncio.run(_main())
+    assert results == ["backup", "restart-1", "restart-1"]
+    assert log.count("restart-1:start") == 1 and "restart-2:start" not in log
+
+
+def test_running_operation_is_not_coalesced():
+    log = []
+
+    async def _main():
+        first = asyncio.create_task(
+            InstanceLocks.run("alpha", OperationKind.RESTART, _recorder(log, "r1"))
+        )
+        await asyncio.sleep(0.005)              # r1 is running, so r2 must queue
+        await asyncio.gather(
+            first, InstanceLocks.run("alpha", OperationKind.RESTART, _recorder(log, "r2"))
+        )
+
+    asyncio.run(_main())
+    assert log == ["r1:start", "r1:end", "r2:start", "r2:end"]
+
+
+def test_backup_overlaps_a_stop():
+    log = []
+
+    async def _main():
+        await asyncio.gather(
+            InstanceLocks.run("alpha", OperationKind.BACKUP, _recorder(log, "backup")),
+            InstanceLocks.run("alpha", OperationKind.STOP, _recorder(log, "stop")),
+        )
+
+    asyncio.run(_main())
+    assert log[:2] == ["backup:start", "stop:start"]
+
+
+@pytest.mark.parametrize("kind", [OperationKind.RESTORE, OperationKind.DELETE, OperationKind.BACKUP])
+def test_exclusive_operations_wait_for_a_backup(kind):
+    assert not locks.compatible(OperationKind.BACKUP, kind)
+    assert not locks.compatible(OperationKind.START, OperationKind.STOP)
+    log = []
+
+    async def _main():
+        await asyncio.gather(
+            InstanceLocks.run("alpha", OperationKind.BACKUP, _recorder(log, "backup"), key="5m"),
+            InstanceLocks.run("alpha", kind, _recorder(log, "other")),
+        )
+
+    asyncio.run(_main())
+    assert log == ["backup:start", "backup:end", "other:start", "other:end"]
+
+
+def test_snapshot_reports_queue_depth():
+    async def _main():
+        t1 = asyncio.create_task(
+            InstanceLocks.run("alpha", OperationKind.BACKUP, _recorder(log, "b"), key="triggered")
+        )
+        t2 = asyncio.create_task(
+            InstanceLocks.run("alpha", OperationKind.RESTORE, _recorder(log, "r"), key="5m/x.tar.gz")
+        )
+        await asyncio.sleep(0.005)
+        snap = [(e.kind, e.running) for e in InstanceLocks.snapshot("alpha")]
+        await asyncio.gather(t1, t2)
+        return snap
+
+    log = []
+    snap = asyncio.run(_main())
+    assert snap == [(OperationKind.BACKUP, True), (OperationKind.RESTORE, False)]
+    assert InstanceLocks.snapshot("alpha") == []
+
+
+def test_waits_for_file_lock_held_elsewhere(tmp_path):
+    lock_dir = tmp_path / "locks"
+    lock_dir.mkdir()
+    other = os.open(lock_dir / "alpha.lock", os.O_RDWR | os.O_CREAT)
+    fcntl.flock(other, fcntl.LOCK_EX)           # "another worker" holds the instance
+
+    log = []
+
+    async def _main():
+        task = asyncio.create_task(
+            InstanceLocks.run("alpha", OperationKind.START, _recorder(log, "start"))
+        )
+        await asyncio.sleep(0.3)
+        blocked = list(log)
+        fcntl.flock(other, fcntl.LOCK_UN)
+        await task
+        return blocked
+
+    try:
+        assert asyncio.run(_main()) == []
+        assert log == ["start:start", "start:end"]
+    finally:
+        os.close(other)
+
+
+def test_leader_loop_steps_only_while_leading(tmp_path):
+    path = tmp_path / "job.lock"
+    other = os.open(path, os.O_RDWR | os.O_CREAT)
+    fcntl.flock(other, fcntl.LOCK_EX)           # "another worker" leads
+    steps = []
+
+    async def _step():
+        steps.append(len(steps))
+        if len(steps) == 1:
+            raise RuntimeError("one bad pass")  # logged, the loop goes on
+
+    async def _main():
+        task = asyncio.create_task(locks.leader_loop(path, 0.01, _step, "Test step"))
+        await asyncio.sleep(0.1)
+        assert steps == []
+        fcntl.flock(other, fcntl.LOCK_UN)
+        while len(steps) < 3:
+            await asyncio.sleep(0.01)
+        task.cancel()
+
+    try:
+        asyncio.run(_main())
+        with pytest.raises(BlockingIOError):
+            fcntl.flock(other, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        locks.release_leader(path)
+        fcntl.flock(other, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        locks.release_leader(path)              # no longer held: a no-op
+    finally:
+        os.close(other)
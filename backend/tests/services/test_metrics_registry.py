@@ -0,0 +1,78 @@
+# tests/services/test_metrics_registry.py
+import json
+import os
+
+import pytest
+
+from mcdock.core import metrics
+from mcdock.services.process import command_label
+
+
+@pytest.fixture(autouse=True)
+def _isolate(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_DIR", tmp_path / "metrics")
+    monkeypatch.setattr(metrics, "REGISTRY", {})
+
+
+def test_histogram_renders_cumulative_buckets():
+    h = metrics.Histogram("t_seconds", "Test.", ("op",), buckets=(0.1, 1))
+    for v in (0.05, 0.5, 0.5, 3):
+        h.observe(v, op="a")
+
+    text = metrics.render(metrics.snapshot())
+
+    assert '# TYPE t_seconds histogram' in text
+    assert 't_seconds_bucket{op="a",le="0.1"} 1' in text
+    assert 't_seconds_bucket{op="a",le="1"} 3' in text
+    assert 't_seconds_bucket{op="a",le="+Inf"} 4' in text
+    assert 't_seconds_sum{op="a"} 4.05' in text
+    assert 't_seconds_count{op="a"} 4' in text
+
+
+def test_collect_merges_live_workers_and_keeps_dead_ones_counts(monkeypatch):
+    c = metrics.Counter("t_total", "Test.", ("outcome",))
+    c.inc(outcome="ok")
+    metrics.METRICS_DIR.mkdir()
+    other = {
+        "t_total": {
+            "kind": "counter", "help": "Test.", "labels": ["outcome"], "buckets": [],
+            "values": [[["ok"], 2], [["failed"], 1]],
+        },
+        "t_gauge": {
+            "kind": "gauge", "help": "Test.", "labels": [], "buckets": [],
+            "values": [[[], 5]],
+        },
+    }
+    (metrics.METRICS_DIR / "111.json").write_text(json.dumps(other))
+    (metrics.METRICS_DIR / "222.json").write_text(json.dumps(other))
+    monkeypatch.setattr(metrics.db, "pid_alive", lambda pid: pid in (111, os.getpid()))
+
+    for _ in range(2):                              # a second scrape must not count 222 again
+        merged = metrics.collect()
+        assert dict((tuple(k), v) for k, v in merged["t_total"]["values"]) == {
+            ("ok",): 5, ("failed",): 2,
+        }
+        assert merged["t_gauge"]["values"] == [[[], 5]]     # the dead worker's gauge is gone
+    assert not (metrics.METRICS_DIR / "222.json").exists()
+    assert (metrics.METRICS_DIR / "departed.json").exists()
+
+
+def test_exiting_worker_retires_its_own_snapshot():
+    h = metrics.Histogram("t_seconds", "Test.", buckets=(1,))
+    h.observe(0.5)
+    metrics.flush()
+    metrics.retire(metrics.METRICS_DIR / f"{os.getpid()}.json")
+    h.values.clear()                                # e.g. its replacement starts from zero
+
+    assert metrics.collect()["t_seconds"]["values"] == [[[], [1.0, 0.0, 0.5]]]
+
+
+def test_label_values_are_escaped():
+    metrics.Gauge("t_gauge", "Test.", ("name",)).set(1, name='a"b\\c\nd')
+    assert 't_gauge{name="a\\"b\\\\c\\nd"} 1' in metrics.render(metrics.snapshot())
+
+
+def test_command_labels_are_low_cardinality():
+    assert command_label(["docker", "compose", "up", "-d"]) == "compose up"
+    assert command_label(["docker", "exec", "alpha", "rcon-cli", "list"]) == "exec"
+    assert command_label(["docker", "stats", "--no-stream", "--format", "{{json .}}"]) == "stats"
@@ -0,0 +1,146 @@
+# tests/services/test_operation_service.py
+import asyncio
+import os
+from datetime import datetime, timedelta, UTC
+
+import pytest
+
+from mcdock.core import db, timing
+from mcdock.core.config import settings
+from mcdock.core.models import OperationKind, OperationState
+from mcdock.services.models import Operation
+from mcdock.services.locks import InstanceLocks
+from mcdock.services.operations import OperationService
+
+
+@pytest.fixture(autouse=True)
+def _isolate_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "STATE_DB", tmp_path / "mcdock.sqlite")
+    monkeypatch.setattr(InstanceLocks, "lock_root", tmp_path / "locks")
+
+
+async def _wait_done(op_id: str) -> Operation:
+    for _ in range(200):
+        op = OperationService.get(op_id)
+        if op.state in (OperationState.SUCCEEDED, OperationState.FAILED):
+            return op
+        await asyncio.sleep(0.01)
+    raise AssertionError("operation did not finish")
+
+
+def test_submit_runs_in_background_and_records_success():
+    calls = []
+
+    async def _work(name):
+        await asyncio.sleep(0.05)
+        calls.append(name)
+
+    async def _main():
+        op = await OperationService.submit(OperationKind.START, "alpha", _work, "alpha")
+        assert op.state == OperationState.PENDING
+        assert calls == []                          # returned before the work ran
+        return await _wait_done(op.id)
+
+    done = asyncio.run(_main())
+    assert done.state == OperationState.SUCCEEDED
+    assert done.finished_at is not None
+    assert calls == ["alpha"]
+
+
+def test_failure_is_recorded_with_error():
+    async def _boom(name):
+        raise TimeoutError("'docker compose down' timed out after 180s")
+
+    async def _main():
+        op = await OperationService.submit(OperationKind.STOP, "alpha", _boom, "alpha")
+        return await _wait_done(op.id)
+
+    done = asyncio.run(_main())
+    assert done.state == OperationState.FAILED
+    assert "timed out" in done.error
+
+
+def test_changes_feed_and_concurrency_bound(monkeypatch):
+    monkeypatch.setattr(settings, "OPERATION_WORKERS", 1)
+    running = []
+    peak = []
+
+    async def _work(name):
+        running.append(name)
+        peak.append(len(running))
+        await asyncio.sleep(0.02)
+        running.remove(name)
+
+    async def _main():
+        seq = OperationService.last_seq()
+        ops = [await OperationService.submit(OperationKind.RESTART, n, _work, n) for n in "abc"]
+        assert len({op.id for op in ops}) == 3      # different instances: nothing coalesced
+        for op in ops:
+            await _wait_done(op.id)
+        return OperationService.changes_since(seq)
+
+    changed, _ = asyncio.run(_main())
+    assert max(peak) == 1
+    # one row per operation, in its latest state
+    assert [op.state for op in changed] == [OperationState.SUCCEEDED] * 3
+
+
+def test_purge_and_recover(monkeypatch):
+    old = Operation(
+        id="old", kind=OperationKind.START, instance="a",
+        state=OperationState.PENDING, created_at=datetime.now(UTC),
+    )
+    OperationService._insert(old)
+    OperationService._set_state("old", OperationState.SUCCEEDED)
+
+    orphan = old.model_copy(update={"id": "orphan"})
+    OperationService._insert(orphan)
+    monkeypatch.setattr(db, "pid_alive", lambda pid: pid != os.getpid())
+
+    OperationService.recover()
+    assert OperationService.get("orphan").state == OperationState.FAILED
+
+    monkeypatch.setattr(settings, "OPERATION_TTL", timedelta(seconds=-1))
+    OperationService.purge()
+    assert OperationService.get("old") is None
+
+
+def test_duplicate_pending_operation_returns_same_id():
+    calls = []
+
+    async def _work(name):
+        calls.append(name)
+        await asyncio.sleep(0.02)
+
+    async def _main():
+        first = await OperationService.submit(OperationKind.STOP, "alpha", _work, "alpha")
+        await asyncio.sleep(0.005)             # stop is running
+        second = await OperationService.submit(OperationKind.RESTART, "alpha", _work, "alpha")
+        third = await OperationService.submit(OperationKind.RESTART, "alpha", _work, "alpha")
+        assert OperationService.get(second.id).state == OperationState.PENDING
+        await _wait_done(first.id)
+        await _wait_done(second.id)
+        return second, third
+
+    second, third = asyncio.run(_main())
+    assert second.id == third.id
+    assert calls == ["alpha", "alpha"]
+
+
+def test_job_is_recorded_as_its_own_root_span(monkeypatch):
+    monkeypatch.setattr(timing, "_recent", type(timing._recent)(maxlen=10))
+
+    @timing.timed("work")
+    async def _work(name):
+        await asyncio.sleep(0.01)
+
+    async def _main():
+        with timing.span("POST /api/instances/alpha/start", record=False):
+            op = await OperationService.submit(OperationKind.START, "alpha", _work, "alpha")
+        return await _wait_done(op.id)
+
+    asyncio.run(_main())
+    roots = {s.name: s for s in timing._recent}
+    assert set(roots) == {"POST /api/instances/alpha/start", "op.start"}
+    assert roots["POST /api/instances/alpha/start"].children == []
+    assert [c.name for c in roots["op.start"].children] == ["work"]
@@ -0,0 +1,108 @@
+# tests/services/test_ping_service.py
+import asyncio
+import socket
+from datetime import datetime, UTC
+
+import pytest
+
+from mcdock.core import db
+from mcdock.core.config import settings
+from mcdock.core.models import InstanceStatus, PortBinding
+from mcdock.services import ping
+from mcdock.services.models import InstanceRecord
+from mcdock.services.ping import PingService
+from mcdock.services.sleep import SleepService
+
+
+@pytest.fixture(autouse=True)
+def _isolate(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "STATE_DB", tmp_path / "mcdock.sqlite")
+    monkeypatch.setattr(PingService, "_cache", {})
+    monkeypatch.setattr(PingService, "_host", None)
+    monkeypatch.setattr(settings, "PING_HOST", "127.0.0.1")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _record(name: str, port: int) -> InstanceRecord:
+    return InstanceRecord(
+        name=name, image="itzg/minecraft-server", memory="1G",
+        ports=[PortBinding(host_port=port, container_port=25565)],
+        tags=[], created_at=datetime.now(UTC), status=InstanceStatus.RUNNING,
+    )
+
+
+def test_motd_components_are_flattened():
+    assert ping._plain("§aHello §lworld") == "Hello world"
+    assert ping._plain({"text": "A", "extra": [{"text": "B"}, "§cC"]}) == "ABC"
+
+
+def test_pings_all_instances_concurrently_and_caches(monkeypatch):
+    up, down = _free_port(), _free_port()
+    calls: list[int] = []
+    real_ping = PingService.ping.__func__
+
+    async def _counting(cls, host, port, timeout=None):
+        calls.append(port)
+        return await real_ping(cls, host, port, timeout)
+
+    monkeypatch.setattr(PingService, "ping", classmethod(_counting))
+
+    async def _main():
+        # the sleep listener speaks the status protocol, so it doubles as a server
+        await SleepService.serve("alpha", up, lambda name: asyncio.sleep(0))
+        try:
+            records = [_record("alpha", up), _record("beta", down)]
+            first = await PingService.status_of(records)
+            second = await PingService.status_of(records)
+        finally:
+            await SleepService.shutdown()
+        return first, second
+
+    first, second = asyncio.run(_main())
+
+    alpha = first["alpha"]
+    assert alpha.motd == settings.SLEEP_MOTD
+    assert alpha.version == "Sleeping"
+    assert alpha.players_online == 0
+    assert alpha.latency_ms is not None
+    assert first["beta"] is None                    # nothing listening
+    assert second == first
+    assert sorted(calls) == sorted([up, down])      # second round came from the cache
+
+
+def test_default_host_resolves_like_the_compose_extra_hosts_entry(monkeypatch):
+    """
+    The shipped compose file maps host.docker.internal to the docker host
+    (`extra_hosts: host-gateway`); pings go there, not to the panel's loopback.
+    """
+    port = _free_port()
+    real = socket.getaddrinfo
+
+    def _hosts_file(host, *args, **kwargs):
+        # what /etc/hosts in the panel container resolves; here the "host" is us
+        return real("127.0.0.1" if host == "host.docker.internal" else host, *args, **kwargs)
+
+    monkeypatch.setattr(settings, "PING_HOST", type(settings)().PING_HOST)
+    monkeypatch.setattr(socket, "getaddrinfo", _hosts_file)
+
+    async def _main():
+        await SleepService.serve("alpha", port, lambda name: asyncio.sleep(0))
+        try:
+            return await PingService.host(), await PingService.status_of([_record("alpha", port)])
+        finally:
+            await SleepService.shutdown()
+
+    host, status = asyncio.run(_main())
+    assert settings.PING_HOST == "host.docker.internal"
+    assert host == "127.0.0.1"
+    assert status["alpha"] is not None and status["alpha"].motd == settings.SLEEP_MOTD
+
+
+def test_unresolvable_host_falls_back_to_loopback(monkeypatch):
+    monkeypatch.setattr(settings, "PING_HOST", "no-such-host.invalid")
+    assert asyncio.run(PingService.host()) == "127.0.0.1"
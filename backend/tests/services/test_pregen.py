@@ -0,0 +1,152 @@
+# tests/services/test_pregen.py
+import asyncio
+from datetime import datetime, UTC
+from types import SimpleNamespace
+
+import pytest
+
+from mcdock.core import db
+from mcdock.core.models import InstanceStatus, PregenShape, PregenState
+from mcdock.services.boot import BootQueue
+from mcdock.services.docker_service import DockerService
+from mcdock.services.health import HealthService
+from mcdock.services.models import HealthSample
+from mcdock.services.pregen import PregenService
+from mcdock.services.registry import InstanceRegistry
+
+RUNNING = ("[12:00:01 INFO]: [Chunky] Task running for world. Processed: {n} chunks ({p}%), "
+           "ETA: 0:01:40, Rate: 120.5 cps, Current: 3, -7\n")
+FINISHED = "[12:09:00 INFO]: [Chunky] Task finished for world. Processed: 40401 chunks (100.00%), Total time: 0:09:00\n"
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    """A running instance `alpha` with a scriptable console, player count and TPS."""
+    state = SimpleNamespace(sent=[], console="", players=0, tps=20.0, status=InstanceStatus.RUNNING, reply="")
+    monkeypatch.setattr(db, "STATE_DB", tmp_path / "mcdock.sqlite")
+
+    async def _send(name, command):
+        state.sent.append(command)
+        return state.reply
+
+    async def _console(name, since):
+        out, state.console = state.console, ""
+        return out
+
+    async def _sample(name, stats, since):
+        return HealthSample(instance=name, at=datetime.now(UTC), players=state.players, tps=state.tps)
+
+    monkeypatch.setattr(DockerService, "send_command", _send)
+    monkeypatch.setattr(PregenService, "_console", _console)
+    monkeypatch.setattr(HealthService, "sample", _sample)
+    monkeypatch.setattr(InstanceRegistry, "get", lambda name: SimpleNamespace(status=state.status))
+    monkeypatch.setattr(BootQueue, "booting", lambda: set())
+    return state
+
+
+def _job(job_id):
+    return PregenService.get("alpha", job_id)
+
+
+def test_one_active_job_per_instance(server):
+    PregenService.create("alpha", radius=1000)
+    with pytest.raises(ValueError):
+        PregenService.create("alpha", radius=2000)
+    PregenService.create("beta", radius=1000)
+
+
+def test_job_starts_reports_progress_throttles_and_finishes(server):
+    job = PregenService.create("alpha", radius=1600, shape=PregenShape.CIRCLE, center_x=100, center_z=-50)
+
+    asyncio.run(PregenService.drive())
+    assert server.sent == [
+        "chunky world world", "chunky shape circle", "chunky center 100 -50",
+        "chunky radius 1600", "chunky start",
+    ]
+    assert _job(job.id).state == PregenState.RUNNING
+
+    server.console = RUNNING.format(n=100, p="0.25") + RUNNING.format(n=4040, p="10.00")
+    asyncio.run(PregenService.drive())
+    current = _job(job.id)
+    assert (current.chunks, current.progress, current.rate, current.eta_seconds) == (4040, 10.0, 120.5, 100)
+
+    server.sent.clear()
+    server.players = 2
+    asyncio.run(PregenService.drive())
+    current = _job(job.id)
+    assert server.sent == ["chunky pause"]
+    assert current.state == PregenState.THROTTLED and current.reason == "2 player(s) online"
+
+    server.players, server.tps = 0, 17.0                # above TPS_MIN, below TPS_RESUME
+    asyncio.run(PregenService.drive())
+    assert _job(job.id).state == PregenState.THROTTLED
+    assert _job(job.id).reason.startswith("tps 17")
+
+    server.tps = 19.5
+    asyncio.run(PregenService.drive())
+    assert server.sent[-1] == "chunky continue"
+    assert _job(job.id).state == PregenState.RUNNING
+
+    server.console = FINISHED
+    asyncio.run(PregenService.drive())
+    current = _job(job.id)
+    assert current.state == PregenState.COMPLETED and current.progress == 100
+    assert current.finished_at is not None
+    assert PregenService.active() == []
+
+
+def test_low_tps_holds_back_a_pending_job(server):
+    job = PregenService.create("alpha", radius=500)
+    server.tps = 12.0
+    asyncio.run(PregenService.drive())
+    assert server.sent == []
+    assert _job(job.id).state == PregenState.PENDING and _job(job.id).reason == "tps 12 < 15"
+
+
+def test_stalled_job_is_continued_after_a_restart(server):
+    job = PregenService.create("alpha", radius=500)
+    asyncio.run(PregenService.drive())
+
+    server.status = InstanceStatus.STOPPED
+    asyncio.run(PregenService.drive())
+    assert _job(job.id).reason == "waiting for the server to run"
+
+    PregenService._update(job.id, progressed_at=0)        # the panel was down for a while
+    server.status, server.sent = InstanceStatus.RUNNING, []
+    asyncio.run(PregenService.drive())
+    assert server.sent == ["chunky continue"]
+    assert _job(job.id).state == PregenState.RUNNING
+
+
+def test_missing_plugin_fails_the_job(server):
+    job = PregenService.create("alpha", radius=500)
+    server.reply = "Unknown or incomplete command, see below for error"
+    asyncio.run(PregenService.drive())
+    current = _job(job.id)
+    assert current.state == PregenState.FAILED and "Chunky" in current.reason
+
+
+def test_pause_resume_and_cancel(server):
+    job = PregenService.create("alpha", radius=500)
+    asyncio.run(PregenService.drive())
+    server.sent.clear()
+
+    assert asyncio.run(PregenService.pause("alpha", job.id)).state == PregenState.PAUSED
+    assert server.sent == ["chunky pause"]
+
+    server.console = RUNNING.format(n=10, p="1.00")          # still generating: pause again
+    asyncio.run(PregenService.drive())
+    assert server.sent == ["chunky pause", "chunky pause"]
+    assert _job(job.id).state == PregenState.PAUSED
+
+    with pytest.raises(ValueError):
+        asyncio.run(PregenService.pause("alpha", job.id))
+    assert asyncio.run(PregenService.resume("alpha", job.id)).state == PregenState.THROTTLED
+    asyncio.run(PregenService.drive())
+    assert server.sent[-1] == "chunky continue"
+
+    server.reply = "Use /chunky confirm to cancel all tasks."
+    assert asyncio.run(PregenService.cancel("alpha", job.id)).state == PregenState.CANCELLED
+    assert server.sent[-2:] == ["chunky cancel", "chunky confirm"]
+    with pytest.raises(FileNotFoundError):
+        PregenService.get("beta", job.id)
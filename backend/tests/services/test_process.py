@@ -0,0 +1,44 @@
+# tests/services/test_process.py
+import asyncio
+import subprocess
+import sys
+import time
+
+import pytest
+
+from mcdock.core.config import settings
+from mcdock.services import process
+
+
+def test_run_captures_output():
+    result = asyncio.run(process.run([sys.executable, "-c", "print('hello')"]))
+    assert result.returncode == 0
+    assert result.stdout.strip() == "hello"
+
+
+def test_run_raises_on_non_zero_exit():
+    with pytest.raises(subprocess.CalledProcessError) as exc:
+        asyncio.run(process.run([sys.executable, "-c", "import sys; sys.exit(3)"]))
+    assert exc.value.returncode == 3
+
+
+def test_run_times_out_and_kills_child():
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        asyncio.run(
+            process.run([sys.executable, "-c", "import time; time.sleep(30)"], timeout=0.5)
+        )
+    assert time.monotonic() - start < 5
+
+
+def test_run_is_bounded(monkeypatch):
+    monkeypatch.setattr(settings, "DOCKER_MAX_PROCS", 2)
+    argv = [sys.executable, "-c", "import time; time.sleep(0.4)"]
+
+    async def _many():
+        start = time.monotonic()
+        await asyncio.gather(*(process.run(argv) for _ in range(4)))
+        return time.monotonic() - start
+
+    # 4 jobs, 2 at a time → at least two "rounds"
+    assert asyncio.run(_many()) >= 0.8
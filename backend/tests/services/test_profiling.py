@@ -0,0 +1,57 @@
+# tests/services/test_profiling.py
+import threading
+import time
+
+import pytest
+
+from mcdock.services.profiling import ProfilingService
+
+
+def _spin(stop: threading.Event):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_cpu_profile_returns_collapsed_stacks_of_busy_threads():
+    stop = threading.Event()
+    worker = threading.Thread(target=_spin, args=(stop,), name="spinner")
+    worker.start()
+    try:
+        out = ProfilingService.sample_cpu(0.2, interval=0.005)
+    finally:
+        stop.set()
+        worker.join()
+
+    lines = out.splitlines()
+    spinner = [l for l in lines if l.startswith("spinner;")]
+    assert spinner and all(l.rsplit(" ", 1)[1].isdigit() for l in lines)
+    assert "_spin (services/test_profiling.py)" in spinner[0]
+
+
+def test_only_one_cpu_profile_at_a_time():
+    t = threading.Thread(target=ProfilingService.sample_cpu, args=(0.3,))
+    t.start()
+    time.sleep(0.05)
+    try:
+        with pytest.raises(ValueError):
+            ProfilingService.sample_cpu(0.01)
+    finally:
+        t.join()
+
+
+def test_memory_snapshots_diff_against_the_previous_one():
+    with pytest.raises(ValueError):
+        ProfilingService.snapshot()
+
+    ProfilingService.start_tracing()
+    try:
+        ProfilingService.snapshot()
+        hoard = [bytearray(1024) for _ in range(2000)]     # ~2 MiB from one line
+        report = ProfilingService.snapshot(limit=5)
+    finally:
+        ProfilingService.stop_tracing()
+
+    assert report.traced >= 2_000_000
+    assert "test_profiling.py" in report.grown[0].site
+    assert report.grown[0].size_diff >= 2_000_000
+    del hoard
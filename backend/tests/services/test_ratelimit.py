@@ -0,0 +1,74 @@
+# tests/services/test_ratelimit.py
+import pytest
+from fastapi import APIRouter, Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from mcdock.core import ratelimit
+from mcdock.core.ratelimit import SharedBuckets, parse_limit
+from mcdock.routers import security
+
+
+def test_parse_limit():
+    assert parse_limit("30/minute") == (30.0, 0.5)
+    assert parse_limit("100/5 minutes") == (100.0, 100 / 300)
+    assert parse_limit(" 2 / second ") == (2.0, 2.0)
+    with pytest.raises(ValueError):
+        parse_limit("lots")
+
+
+def test_bucket_drains_and_refills(tmp_path, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(ratelimit.time, "monotonic", lambda: clock[0])
+    buckets = SharedBuckets(tmp_path / "rl.shm", 64)
+
+    assert [buckets.take("k", 3, 1.0) for _ in range(3)] == [0, 0, 0]
+    assert buckets.take("k", 3, 1.0) == pytest.approx(1.0)
+    assert buckets.take("other", 3, 1.0) == 0                # separate bucket
+
+    clock[0] += 0.5
+    assert buckets.take("k", 3, 1.0) == pytest.approx(0.5)   # half a token back
+    clock[0] += 10
+    assert [buckets.take("k", 3, 1.0) for _ in range(4)][-1] > 0   # capped at capacity
+
+
+def test_buckets_are_shared_between_processes(tmp_path):
+    # two tables on one file = two workers
+    a = SharedBuckets(tmp_path / "rl.shm", 64)
+    b = SharedBuckets(tmp_path / "rl.shm", 64)
+    assert a.take("k", 2, 0.001) == 0
+    assert b.take("k", 2, 0.001) == 0
+    assert a.take("k", 2, 0.001) > 0
+
+
+def test_full_table_evicts_stalest(tmp_path, monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr(ratelimit.time, "monotonic", lambda: clock[0])
+    buckets = SharedBuckets(tmp_path / "rl.shm", 4)
+    for i in range(8):                                        # twice the table size
+        clock[0] += 1
+        assert buckets.take(f"k{i}", 1, 0.001) == 0
+    assert buckets.take("k7", 1, 0.001) > 0                  # recent bucket survived
+
+
+def test_dependency_limits_per_route(tmp_path, monkeypatch):
+    monkeypatch.setattr(ratelimit, "BUCKETS", SharedBuckets(tmp_path / "rl.shm", 64))
+    monkeypatch.setattr(security, "_DEFAULT_LIMIT", (2.0, 0.001))
+    monkeypatch.setattr(security, "_LIMITED", security._route_rules({
+        "GET /api/health": None,
+        "GET /api/items/{name}": "1/hour",
+    }))
+
+    api = APIRouter(prefix="/api", dependencies=[Depends(security.rate_limit)])
+    api.get("/health")(lambda: "ok")
+    api.get("/items/{name}")(lambda name: name)
+    api.get("/other")(lambda: "ok")
+    app = FastAPI()
+    app.include_router(api)
+    client = TestClient(app)
+
+    assert all(client.get("/api/health").status_code == 200 for _ in range(5))
+    assert client.get("/api/items/a").status_code == 200
+    r = client.get("/api/items/b")                            # same route template
+    assert r.status_code == 429
+    assert int(r.headers["Retry-After"]) > 0
+    assert [client.get("/api/other").status_code for _ in range(3)] == [200, 200, 429]
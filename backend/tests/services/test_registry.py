@@ -0,0 +1,121 @@
+# tests/services/test_registry.py
+import asyncio
+from pathlib import Path
+
+import pytest
+import yaml
+
+from mcdock.core import db
+from mcdock.core.config import settings
+from mcdock.core.models import ConnectionType, InstanceStatus, PortBinding
+from mcdock.services.capacity import CapacityService
+from mcdock.services.docker_service import DockerService
+from mcdock.services.models import Instance
+from mcdock.services.registry import InstanceRegistry
+
+
+@pytest.fixture(autouse=True)
+def _isolate_fs(tmp_path, monkeypatch):
+    """Fresh MC_ROOT + state DB per test."""
+    monkeypatch.setattr(settings, "MC_ROOT", tmp_path)
+    monkeypatch.setattr(DockerService, "mc_root", tmp_path)
+    monkeypatch.setattr(DockerService, "root", tmp_path / "servers")
+    monkeypatch.setattr(db, "STATE_DB", tmp_path / "mcdock.sqlite")
+    # no /proc/meminfo: memory admission does not depend on the test host
+    monkeypatch.setattr(CapacityService, "meminfo_path", tmp_path / "meminfo")
+
+
+def _instance(name: str, port: int = 25565, tags: list[str] | None = None) -> Instance:
+    return Instance(
+        name=name,
+        image="itzg/minecraft-server:latest",
+        eula=True,
+        memory="4G",
+        env=[],
+        ports=[PortBinding(host_port=port, container_port=25565, type=ConnectionType.TCP)],
+        tags=tags or [],
+    )
+
+
+def _write_compose(root: Path, name: str, port: int, tags: str | None = None) -> None:
+    srv = {"image": "itzg/minecraft-server:java21", "ports": [f"{port}:25565/tcp"],
+           "environment": {"EULA": "TRUE", "MEMORY": "2G"}}
+    if tags:
+        srv["labels"] = {"mcdock.tags": tags}
+    inst = root / "servers" / name
+    inst.mkdir(parents=True)
+    (inst / "docker-compose.yml").write_text(yaml.safe_dump({"services": {"mc-server": srv}}))
+
+
+def test_upsert_and_filters():
+    InstanceRegistry.upsert(_instance("alpha", tags=["prod", "eu"]))
+    InstanceRegistry.upsert(_instance("beta", 25566, tags=["test"]))
+    InstanceRegistry.upsert(_instance("gamma", 25567, tags=["prod"]))
+    InstanceRegistry.set_status("gamma", InstanceStatus.RUNNING)
+
+    names = lambda recs: [r.name for r in recs]
+
+    assert names(InstanceRegistry.query()[0]) == ["alpha", "beta", "gamma"]
+    assert names(InstanceRegistry.query(tag="prod")[0]) == ["alpha", "gamma"]
+    assert names(InstanceRegistry.query(status=InstanceStatus.RUNNING)[0]) == ["gamma"]
+    assert names(InstanceRegistry.query(q="et")[0]) == ["beta"]
+    assert names(InstanceRegistry.query(q="%")[0]) == []
+
+
+def test_pagination_with_cursor():
+    for i, name in enumerate(["a", "b", "c", "d", "e"]):
+        InstanceRegistry.upsert(_instance(name, 25565 + i))
+
+    page1, cursor = InstanceRegistry.query(limit=2)
+    page2, cursor2 = InstanceRegistry.query(limit=2, cursor=cursor)
+    page3, cursor3 = InstanceRegistry.query(limit=2, cursor=cursor2)
+
+    assert [r.name for r in page1 + page2 + page3] == ["a", "b", "c", "d", "e"]
+    assert cursor3 is None
+
+
+def test_upsert_keeps_created_at_and_status():
+    InstanceRegistry.upsert(_instance("alpha"))
+    InstanceRegistry.set_status("alpha", InstanceStatus.RUNNING)
+    before = InstanceRegistry.get("alpha")
+
+    InstanceRegistry.upsert(_instance("alpha", 30000))
+    after = InstanceRegistry.get("alpha")
+
+    assert after.created_at == before.created_at
+    assert after.status == InstanceStatus.RUNNING
+    assert after.ports[0].host_port == 30000
+
+
+def test_reconcile_syncs_with_disk(tmp_path):
+    InstanceRegistry.upsert(_instance("ghost"))
+    _write_compose(tmp_path, "alpha", 25565, tags="prod,eu")
+    _write_compose(tmp_path, "beta", 25566)
+
+    InstanceRegistry.reconcile(running={"alpha"})
+
+    recs = {r.name: r for r in InstanceRegistry.query()[0]}
+    assert set(recs) == {"alpha", "beta"}
+    assert recs["alpha"].tags == ["prod", "eu"]
+    assert recs["alpha"].memory == "2G"
+    assert recs["alpha"].status == InstanceStatus.RUNNING
+    assert recs["beta"].status == InstanceStatus.STOPPED
+
+
+def test_docker_service_keeps_registry_in_step(tmp_path, monkeypatch):
+    monkeypatch.setattr(DockerService, "_check_ports", classmethod(lambda cls, ports, **kw: None))
+    asyncio.run(DockerService.create_instance(
+        instance_name="alpha",
+        image="itzg/minecraft-server:latest",
+        eula=True,
+        memory="4G",
+        env=[],
+        ports=[PortBinding(host_port=25570, container_port=25565, type=ConnectionType.TCP)],
+        tags=["prod"],
+    ))
+    assert InstanceRegistry.get("alpha").tags == ["prod"]
+
+    asyncio.run(DockerService.update_compose("alpha", memory="6G", tags=["test"]))
+    rec = InstanceRegistry.get("alpha")
+    assert (rec.memory, rec.tags) == ("6G", ["test"])
+    assert asyncio.run(DockerService.get_compose("alpha")).tags == ["test"]
@@ -0,0 +1,39 @@
+# tests/services/test_scheduler.py
+import asyncio
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+from apscheduler.triggers.cron import CronTrigger
+
+from mcdock.core.models import OperationKind
+from mcdock.services.backup_service import BackupService
+from mcdock.services.docker_service import DockerService
+from mcdock.services.operations import OperationService
+from mcdock.services.scheduler import queue_legacy_jobs
+
+
+def test_legacy_cron_jobs_are_moved_onto_the_operation_queue(tmp_path):
+    async def _main():
+        store = SQLAlchemyJobStore(url=f"sqlite:///{tmp_path / 'jobs.sqlite'}")
+        sched = AsyncIOScheduler(jobstores={"default": store})
+        sched.start(paused=True)
+        trigger = CronTrigger.from_crontab("0 4 * * *")
+        # as stored by earlier versions of routers/schedules.py
+        sched.add_job(BackupService.trigger_backup, trigger=trigger, args=["my_world", "1d"],
+                      id="cron_backup_my_world_1d")
+        sched.add_job(DockerService.restart, trigger=trigger, args=["my_world"], id="cron_restart_my_world")
+        sched.add_job(OperationService.run_scheduled, trigger=trigger,
+                      args=[OperationKind.RESTART, "beta"], id="cron_restart_beta")
+        try:
+            assert queue_legacy_jobs(sched) == 2
+            assert queue_legacy_jobs(sched) == 0
+            return {j.id: (j.func, list(j.args)) for j in sched.get_jobs()}
+        finally:
+            sched.shutdown(wait=False)
+
+    jobs = asyncio.run(_main())
+    assert jobs == {
+        "cron_backup_my_world_1d": (OperationService.run_scheduled, [OperationKind.BACKUP, "my_world", "1d"]),
+        "cron_restart_my_world": (OperationService.run_scheduled, [OperationKind.RESTART, "my_world"]),
+        "cron_restart_beta": (OperationService.run_scheduled, [OperationKind.RESTART, "beta"]),
+    }
@@ -0,0 +1,123 @@
+# tests/services/test_sleep_service.py
+import asyncio
+import json
+import socket
+import subprocess
+
+import pytest
+
+from mcdock.core import db
+from mcdock.core.config import settings
+from mcdock.services import mcproto, process
+from mcdock.services.sleep import SleepService
+
+
+@pytest.fixture(autouse=True)
+def _isolate(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "STATE_DB", tmp_path / "mcdock.sqlite")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_varint_roundtrip():
+    for value in (0, 1, 127, 128, 255, 25565, 2**31 - 1, -1):
+        assert mcproto.unpack_varint(mcproto.pack_varint(value)) == (value, len(mcproto.pack_varint(value)))
+    assert mcproto.pack_varint(300) == b"\xac\x02"
+
+
+def test_listener_answers_ping_and_wakes_on_login():
+    port = _free_port()
+    woken: list[str] = []
+
+    async def _on_login(name):
+        woken.append(name)
+
+    async def _ping() -> tuple[dict, bytes]:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(mcproto.handshake(767, "localhost", port, mcproto.NEXT_STATUS))
+        writer.write(mcproto.packet(mcproto.STATUS_REQUEST))
+        _, payload = await mcproto.read_packet(reader)
+        status, _ = mcproto.unpack_string(payload, 0)
+        writer.write(mcproto.packet(mcproto.PING, b"12345678"))
+        _, pong = await mcproto.read_packet(reader)
+        writer.close()
+        return json.loads(status), pong
+
+    async def _login() -> str:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(mcproto.handshake(767, "localhost", port, mcproto.NEXT_LOGIN))
+        packet_id, payload = await mcproto.read_packet(reader)
+        writer.close()
+        assert packet_id == mcproto.LOGIN_DISCONNECT
+        return json.loads(mcproto.unpack_string(payload, 0)[0])["text"]
+
+    async def _main():
+        SleepService.mark("alpha")
+        await SleepService.serve("alpha", port, _on_login)
+        try:
+            status, pong = await _ping()
+            assert woken == []
+            reason = await _login()
+            await asyncio.sleep(0.05)
+        finally:
+            await SleepService.shutdown()
+        return status, pong, reason
+
+    status, pong, reason = asyncio.run(_main())
+
+    assert status["description"]["text"] == settings.SLEEP_MOTD
+    assert status["version"]["protocol"] == 767
+    assert status["players"]["online"] == 0
+    assert pong == b"12345678"
+    assert reason == settings.SLEEP_WAKE_MESSAGE
+    assert woken == ["alpha"]
+
+
+def test_release_closes_local_listener_and_frees_port():
+    port = _free_port()
+
+    async def _main():
+        SleepService.mark("alpha")
+        await SleepService.serve("alpha", port, lambda name: asyncio.sleep(0))
+        await SleepService.release("alpha")
+
+    asyncio.run(_main())
+
+    assert SleepService.sleeping() == set()
+    assert SleepService.serving() == set()
+    with socket.socket() as s:
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        s.bind(("0.0.0.0", port))                  # would raise if still held
+
+
+@pytest.mark.parametrize("mode, expected", [("host", True), ("bridge", False), ("mcdock_default", False)])
+def test_listener_is_reachable_only_with_host_networking(tmp_path, monkeypatch, mode, expected):
+    cid = "ab" * 32
+    mountinfo = tmp_path / "mountinfo"
+    mountinfo.write_text(
+        f"612 590 8:1 /var/lib/docker/containers/{cid}/hostname /etc/hostname rw,relatime - ext4 /dev/sda1 rw\n"
+    )
+    monkeypatch.setattr(SleepService, "mountinfo_path", mountinfo)
+    argvs = []
+
+    async def _run(argv, **kw):
+        argvs.append(argv)
+        return subprocess.CompletedProcess(argv, 0, stdout=f"{mode}\n", stderr="")
+
+    monkeypatch.setattr(process, "run", _run)
+    assert asyncio.run(SleepService.reachable()) is expected
+    assert argvs[0][-1] == cid
+
+
+def test_listener_is_reachable_outside_a_container(tmp_path, monkeypatch):
+    (tmp_path / "mountinfo").write_text("22 1 8:1 / / rw,relatime - ext4 /dev/sda1 rw\n")
+    monkeypatch.setattr(SleepService, "mountinfo_path", tmp_path / "mountinfo")
+    monkeypatch.setattr(SleepService, "dockerenv_path", tmp_path / ".dockerenv")
+    assert asyncio.run(SleepService.reachable()) is True
+
+    (tmp_path / ".dockerenv").touch()                # a container we cannot identify
+    assert asyncio.run(SleepService.reachable()) is False
@@ -0,0 +1,86 @@
+# tests/services/test_static.py
+import gzip
+import os
+
+import brotli
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from mcdock.core import static
+from mcdock.core.static import SPAStaticFiles, precompress
+
+JS = b"console.log('mcdock');\n" * 200
+
+
+@pytest.fixture
+def bundle(tmp_path):
+    (tmp_path / "assets").mkdir()
+    (tmp_path / "assets" / "index-BdC3x9Kf.js").write_bytes(JS)
+    (tmp_path / "index.html").write_bytes(b"<!doctype html><div id=root></div>" + b" " * 2000)
+    (tmp_path / "favicon.svg").write_bytes(b"<svg/>")                   # too small to compress
+    return tmp_path
+
+
+@pytest.fixture
+def client(bundle):
+    app = FastAPI()
+    app.mount("/", SPAStaticFiles(directory=bundle), name="static")
+    return TestClient(app)
+
+
+def test_precompress_is_idempotent(bundle):
+    assert precompress(bundle) == 4
+    js = bundle / "assets" / "index-BdC3x9Kf.js"
+    assert gzip.decompress(js.with_name(js.name + ".gz").read_bytes()) == JS
+    assert brotli.decompress(js.with_name(js.name + ".br").read_bytes()) == JS
+    assert not (bundle / "favicon.svg.gz").exists()
+    assert precompress(bundle) == 0
+
+    os.utime(js, ns=(1, 1))                                            # rebuilt bundle
+    assert precompress(bundle) == 2
+
+
+def test_negotiates_precompressed_variant(bundle, client):
+    precompress(bundle)
+    r = client.get("/assets/index-BdC3x9Kf.js", headers={"Accept-Encoding": "gzip"})
+    assert r.status_code == 200
+    assert r.headers["content-encoding"] == "gzip"
+    assert r.headers["content-type"].startswith("text/javascript")
+    assert r.headers["cache-control"] == static.IMMUTABLE
+    assert r.content == JS                                             # decoded by the client
+
+    r = client.get("/assets/index-BdC3x9Kf.js", headers={"Accept-Encoding": "gzip;q=0, identity"})
+    assert "content-encoding" not in r.headers
+
+
+def test_prefers_brotli(bundle, client):
+    precompress(bundle)
+    r = client.get("/assets/index-BdC3x9Kf.js", headers={"Accept-Encoding": "gzip, deflate, br"})
+    assert r.headers["content-encoding"] == "br"
+    assert r.content == JS
+    assert r.headers["etag"].endswith('-br"')
+
+    r = client.get("/assets/index-BdC3x9Kf.js", headers={"Accept-Encoding": "br;q=0, gzip"})
+    assert r.headers["content-encoding"] == "gzip"
+
+
+def test_etag_304(client):
+    r = client.get("/index.html")
+    assert r.headers["cache-control"] == static.REVALIDATE
+    again = client.get("/index.html", headers={"If-None-Match": r.headers["etag"]})
+    assert again.status_code == 304
+    assert again.content == b""
+
+
+def test_small_files_are_cached_until_changed(bundle, client):
+    assert client.get("/favicon.svg").content == b"<svg/>"
+    (bundle / "favicon.svg").write_bytes(b"<svg></svg>")
+    assert client.get("/favicon.svg").content == b"<svg></svg>"
+
+
+def test_spa_fallback_and_api_404(client):
+    r = client.get("/instances/alpha")
+    assert r.status_code == 200 and r.text.startswith("<!doctype html>")
+    assert client.get("/assets/missing-12345678.js").status_code == 404
+    assert client.get("/api/nope").status_code == 404
@@ -0,0 +1,59 @@
+# tests/services/test_timing.py
+import asyncio
+import sys
+
+import pytest
+
+from mcdock.core import timing
+from mcdock.services import process
+
+
+@pytest.fixture(autouse=True)
+def _isolate(monkeypatch):
+    monkeypatch.setattr(timing, "_recent", type(timing._recent)(maxlen=10))
+    monkeypatch.setattr(timing.OPERATION_DURATION, "values", {})
+
+
+@timing.timed()
+def _parse():
+    return "parsed"
+
+
+@timing.timed("load")
+async def _load():
+    await asyncio.to_thread(_parse)                       # context follows the thread
+    await process.run([sys.executable, "-c", "raise SystemExit(3)"], check=False)
+
+
+def test_spans_nest_across_threads_and_subprocesses():
+    async def _request():
+        with timing.span("GET /things", record=False):
+            await _load()
+
+    asyncio.run(_request())
+
+    [tree] = timing.slowest(5)
+    assert tree["name"] == "GET /things"
+    [load] = tree["children"]
+    assert load["name"] == "load"
+    parse, sub = load["children"]
+    assert parse["name"] == "_parse"
+    assert sub["attrs"]["exit_code"] == 3
+    assert sub["attrs"]["argv"][0] == sys.executable
+
+    recorded = {k[0] for k in timing.OPERATION_DURATION.values}
+    assert recorded == {"load", "_parse"}                 # the root opted out
+
+
+def test_failed_span_is_marked():
+    with pytest.raises(KeyError):
+        with timing.span("boom"):
+            raise KeyError("x")
+    assert timing.slowest(1)[0]["attrs"] == {"error": "KeyError"}
+
+
+def test_quantile_interpolates_within_buckets():
+    buckets = [0.1, 1.0]
+    values = [0, 10, 0, 5.5]                              # ten observations in (0.1, 1]
+    assert timing.quantile(0.5, buckets, values) == pytest.approx(0.55)
+    assert timing.quantile(0.99, buckets, [0, 0, 4, 40.0]) == 1.0   # beyond the last bucket
@@ -0,0 +1,96 @@
+# tests/services/test_tokens.py
+import asyncio
+import time
+from collections import OrderedDict
+
+import bcrypt
+import pytest
+from jose import JWTError, jwt
+
+from mcdock.core import db
+from mcdock.core.config import settings
+from mcdock.routers import security
+from mcdock.routers.models import LoginBody
+from mcdock.services.tokens import TokenService
+
+
+@pytest.fixture(autouse=True)
+def _isolate(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "STATE_DB", tmp_path / "mcdock.sqlite")
+    monkeypatch.setattr(TokenService, "_verified", OrderedDict())
+    monkeypatch.setattr(TokenService, "_revoked", {})
+    monkeypatch.setattr(TokenService, "_revoked_at", 0.0)
+
+
+def _counting_decode(monkeypatch) -> list[str]:
+    calls = []
+    real = jwt.decode
+
+    def _decode(token, *a, **kw):
+        calls.append(token)
+        return real(token, *a, **kw)
+
+    monkeypatch.setattr(jwt, "decode", _decode)
+    return calls
+
+
+def test_verified_tokens_are_cached_until_exp(monkeypatch):
+    calls = _counting_decode(monkeypatch)
+    token = security._create_token()
+
+    TokenService.verify(token)
+    TokenService.verify(token)
+    assert len(calls) == 1
+
+    exp, claims = TokenService._verified[token]
+    assert exp == claims["exp"]
+    TokenService._verified[token] = (time.time() - 1, claims)      # entry outlived its exp
+    TokenService.verify(token)
+    assert len(calls) == 2                                         # checked again, not served
+
+
+def test_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(settings, "AUTH_CACHE_SIZE", 2)
+    issued = [security._create_token() for _ in range(3)]
+    for t in issued:
+        TokenService.verify(t)
+    assert list(TokenService._verified) == issued[1:]
+
+
+def test_foreign_tokens_are_rejected():
+    with pytest.raises(JWTError):
+        TokenService.verify("not-a-jwt")
+
+
+def test_logout_reaches_other_workers(monkeypatch):
+    token, other = security._create_token(), security._create_token()
+    assert token != other
+
+    TokenService.verify(token)
+    TokenService.revoke(token)
+    with pytest.raises(JWTError):
+        TokenService.verify(token)
+    TokenService.verify(other)
+
+    # another worker: nothing in memory, only the shared table
+    monkeypatch.setattr(TokenService, "_verified", OrderedDict())
+    monkeypatch.setattr(TokenService, "_revoked", {})
+    monkeypatch.setattr(TokenService, "_revoked_at", 0.0)
+    with pytest.raises(JWTError):
+        TokenService.verify(token)
+
+
+def test_wrong_user_still_pays_for_bcrypt(monkeypatch):
+    checked = []
+    real = bcrypt.checkpw
+
+    def _checkpw(pw, hashed):
+        checked.append(hashed)
+        return real(pw, hashed)
+
+    monkeypatch.setattr(security.bcrypt, "checkpw", _checkpw)
+    monkeypatch.setattr(security, "_dummy_hash", lambda: bcrypt.hashpw(b"x", bcrypt.gensalt(4)))
+
+    with pytest.raises(security.HTTPException):
+        asyncio.run(security.login_body(LoginBody(username="intruder", password="pw")))
+    assert len(checked) == 1
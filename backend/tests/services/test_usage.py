@@ -0,0 +1,116 @@
+# tests/services/test_usage.py
+import asyncio
+import os
+import time
+
+import pytest
+
+from mcdock.core import db
+from mcdock.core.conditional import TagCache
+from mcdock.core.models import InstanceStatus
+from mcdock.services import usage
+from mcdock.services.backup_service import BackupService
+from mcdock.services.docker_service import DockerService
+from mcdock.services.models import Instance
+from mcdock.services.registry import InstanceRegistry
+from mcdock.services.usage import UsageService
+
+KIB = 1024
+
+
+@pytest.fixture(autouse=True)
+def tree(tmp_path, monkeypatch):
+    monkeypatch.setattr(DockerService, "root", tmp_path / "servers")
+    monkeypatch.setattr(DockerService, "_reads", TagCache(16))
+    monkeypatch.setattr(BackupService, "backups_root", tmp_path / "backups")
+    monkeypatch.setattr(db, "STATE_DB", tmp_path / "mcdock.sqlite")
+    for attr, value in (("_measured", {}), ("_was_running", set()), ("_dirty", set()),
+                        ("_archives", {}), ("_sampled", {})):
+        monkeypatch.setattr(UsageService, attr, value)
+    return tmp_path
+
+
+def _file(path, size):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(os.urandom(size))                  # incompressible, fully allocated
+
+
+def _instance(root, name):
+    data = root / "servers" / name / "data"
+    data.mkdir(parents=True)
+    InstanceRegistry.upsert(Instance(name=name, image="img", eula=True, memory="1G", env=[], ports=[]))
+    return data
+
+
+def test_breakdown_by_dimension_logs_and_plugins(tree):
+    data = _instance(tree, "alpha")
+    (data / "server.properties").write_text("level-name=realm\n")
+    _file(data / "realm" / "region" / "r.0.0.mca", 64 * KIB)
+    _file(data / "realm" / "DIM-1" / "region" / "r.0.0.mca", 32 * KIB)
+    _file(data / "realm_the_end" / "DIM1" / "region" / "r.0.0.mca", 16 * KIB)
+    _file(data / "realm" / "dimensions" / "mymod" / "moon" / "region" / "r.0.0.mca", 8 * KIB)
+    _file(data / "logs" / "latest.log", 12 * KIB)
+    _file(data / "plugins" / "x.jar", 20 * KIB)
+    os.link(data / "plugins" / "x.jar", data / "plugins" / "same.jar")   # counted once
+
+    u = UsageService.measure_instance("alpha")
+    assert u.dimensions["overworld"] >= 64 * KIB
+    assert 32 * KIB <= u.dimensions["the_nether"] < 64 * KIB
+    assert 16 * KIB <= u.dimensions["the_end"] < 32 * KIB
+    assert u.dimensions["mymod:moon"] >= 8 * KIB
+    assert 12 * KIB <= u.logs < 20 * KIB
+    assert 20 * KIB <= u.plugins < 40 * KIB
+    assert u.total == sum(u.dimensions.values()) + u.logs + u.plugins + u.other
+
+
+def test_buckets_relisted_only_when_changed(tree, monkeypatch):
+    bucket = tree / "backups" / "alpha" / "5m"
+    _file(bucket / "5m-a.tar.gz", 16 * KIB)
+    old = time.time() - 3600
+    os.utime(bucket / "5m-a.tar.gz", (old, old))        # settled
+
+    [b] = UsageService.measure_backups()
+    assert (b.instance, b.bucket, b.archives) == ("alpha", "5m", 1)
+
+    listed = []
+    real = usage._entries
+    monkeypatch.setattr(usage, "_entries", lambda p: listed.append(p) or real(p))
+    UsageService.measure_backups()
+    assert bucket not in listed                          # unchanged bucket: not re-listed
+
+    _file(bucket / "5m-b.tar.gz", 16 * KIB)
+    [b] = UsageService.measure_backups()
+    assert b.archives == 2 and bucket in listed
+
+
+def test_collect_and_report(tree, monkeypatch):
+    data = _instance(tree, "alpha")
+    _instance(tree, "beta")
+    InstanceRegistry.set_status("alpha", InstanceStatus.RUNNING)
+    _file(data / "world" / "level.dat", 8 * KIB)
+
+    asyncio.run(UsageService.collect())
+    report = UsageService.report()
+    assert [u.instance for u in report.instances] == ["alpha", "beta"]
+    assert report.instances[0].growth_per_day is None        # one sample is no trend
+
+    walked = []
+    monkeypatch.setattr(UsageService, "measure_instance",
+                        classmethod(lambda cls, name: walked.append(name) or usage.InstanceUsage(
+                            instance=name, total=0, dimensions={}, logs=0, plugins=0, other=0,
+                            scanned_at=usage.datetime.now(usage.UTC))))
+    asyncio.run(UsageService.collect())
+    assert walked == ["alpha"]                                # stopped beta is not walked again
+
+    # two samples a day apart, 1 MiB growth
+    with db.connect(usage._SCHEMA) as conn:
+        conn.execute("DELETE FROM disk_usage_samples")
+        now = time.time()
+        conn.executemany(
+            "INSERT INTO disk_usage_samples VALUES ('instance', 'alpha', ?, ?)",
+            [(now - 86400, 0), (now, 1024 * KIB)],
+        )
+    report = UsageService.report()
+    assert report.instances[0].growth_per_day == pytest.approx(1024 * KIB)
+    assert report.growth_per_day == pytest.approx(1024 * KIB)
+    assert report.days_until_full == pytest.approx(report.disk_free / (1024 * KIB))
@@ -0,0 +1,112 @@
+# tests/services/test_watcher.py
+import asyncio
+import shutil
+
+import pytest
+
+from mcdock.core import db
+from mcdock.core.conditional import TagCache
+from mcdock.core.config import settings
+from mcdock.core.models import FsChange
+from mcdock.services import watcher
+from mcdock.services.backup_service import BackupService
+from mcdock.services.docker_service import DockerService
+from mcdock.services.registry import InstanceRegistry
+from mcdock.services.watcher import WatchService
+
+COMPOSE = """\
+services:
+  mc-server:
+    image: itzg/minecraft-server
+    environment: {EULA: "TRUE", MEMORY: %s}
+"""
+
+
+@pytest.fixture(autouse=True)
+def tree(tmp_path, monkeypatch):
+    monkeypatch.setattr(DockerService, "root", tmp_path / "servers")
+    monkeypatch.setattr(DockerService, "_reads", TagCache(16))
+    monkeypatch.setattr(BackupService, "backups_root", tmp_path / "backups")
+    monkeypatch.setattr(BackupService, "_listings", TagCache(16))
+    monkeypatch.setattr(db, "STATE_DB", tmp_path / "mcdock.sqlite")
+    monkeypatch.setattr(WatchService, "_wds", {})
+    monkeypatch.setattr(WatchService, "_instances", {})
+    monkeypatch.setattr(WatchService, "_backups", {})
+    monkeypatch.setattr(WatchService, "_subscribers", [])
+    monkeypatch.setattr(settings, "WATCH_DEBOUNCE", 0.05)
+    return tmp_path
+
+
+def _add_instance(root, name, memory="2G"):
+    (root / "servers" / name / "data").mkdir(parents=True)
+    (root / "servers" / name / "docker-compose.yml").write_text(COMPOSE % memory)
+
+
+def _kinds(events):
+    return [(e.kind, e.instance, e.path) for e in events]
+
+
+def test_rescan_reports_typed_changes(tree):
+    _add_instance(tree, "alpha")
+    assert _kinds(WatchService.rescan()) == [(FsChange.INSTANCE_ADDED, "alpha", None)]
+    assert WatchService.rescan() == []
+
+    (tree / "servers" / "alpha" / "data" / "server.properties").write_text("motd=hi\n")
+    (tree / "servers" / "alpha" / "docker-compose.yml").write_text(COMPOSE % "4G")
+    bucket = tree / "backups" / "alpha" / "triggered"
+    bucket.mkdir(parents=True)
+    (bucket / "a.tar.gz").write_bytes(b"x")
+    assert _kinds(WatchService.rescan()) == [
+        (FsChange.COMPOSE_CHANGED, "alpha", None),
+        (FsChange.PROPERTIES_CHANGED, "alpha", None),
+        (FsChange.BACKUP_ADDED, "alpha", "triggered/a.tar.gz"),
+    ]
+
+    (bucket / "a.tar.gz").unlink()
+    shutil.rmtree(tree / "servers" / "alpha")
+    assert _kinds(WatchService.rescan()) == [
+        (FsChange.INSTANCE_REMOVED, "alpha", None),
+        (FsChange.BACKUP_REMOVED, "alpha", "triggered/a.tar.gz"),
+    ]
+
+
+def test_events_refresh_registry():
+    _add_instance(DockerService.root.parent, "alpha")
+    events = WatchService.rescan()
+    WatchService._apply(events)
+    assert InstanceRegistry.get("alpha").memory == "2G"
+
+    (DockerService.root / "alpha" / "docker-compose.yml").write_text(COMPOSE % "6G")
+    WatchService._apply(WatchService.rescan())
+    assert InstanceRegistry.get("alpha").memory == "6G"
+
+
+def test_inotify_loop(tree):
+    try:
+        watcher._Inotify().close()
+    except OSError:
+        pytest.skip("no inotify here")
+    _add_instance(tree, "alpha")
+    seen = []
+    WatchService.subscribe(seen.append)
+
+    async def _main():
+        task = asyncio.create_task(WatchService.run())
+        await asyncio.sleep(0.2)                                  # baseline scan
+        _add_instance(tree, "beta")
+        (tree / "servers" / "alpha" / "data" / "server.properties").write_text("motd=hi\n")
+        bucket = tree / "backups" / "alpha" / "5m"
+        bucket.mkdir(parents=True)
+        await asyncio.sleep(0.3)                                  # bucket is watched now
+        (bucket / "5m-1.tar.gz").write_bytes(b"x")
+        await asyncio.sleep(0.3)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(_main())
+    assert set(_kinds(seen)) == {
+        (FsChange.INSTANCE_ADDED, "beta", None),
+        (FsChange.PROPERTIES_CHANGED, "alpha", None),
+        (FsChange.BACKUP_ADDED, "alpha", "5m/5m-1.tar.gz"),
+    }
+    assert InstanceRegistry.get("beta") is not None
@@ -13,5 +13,5 @@ export function getBearerToken(username: string, password: string) {
 }
 
 export function logout() {
-    return apiFetch<ResponseMessage>("/auth/logout", { auth: false, method: 'POST' });
+    return apiFetch<ResponseMessage>("/auth/logout", { method: 'POST' });
 }
\ No newline at end of file
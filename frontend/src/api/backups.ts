@@ -1,5 +1,5 @@
 import { apiFetch } from "../lib/api";
-import type { ResponseMessage } from "./types";
+import type { OperationAccepted } from "./types";
 
 function asPosix(p: string) {
   // turn `triggered\2025-07-03-00-05.tar.gz` → `triggered/2025-07-03-00-05.tar.gz`
@@ -14,12 +14,12 @@ export const listBackups = (name: string) =>
     apiFetch<string[]>(`/backups/${encodeURIComponent(name)}`);
 
 export const triggerBackup = (name: string) =>
-    apiFetch<ResponseMessage>(`/backups/${encodeURIComponent(name)}/trigger`, {
+    apiFetch<OperationAccepted>(`/backups/${encodeURIComponent(name)}/trigger`, {
         method: "PUT",
     });
 
 export const restoreBackup = (instance: string, filePath: string) =>
-    apiFetch<ResponseMessage>(
+    apiFetch<OperationAccepted>(
         `/backups/${encodeURIComponent(instance)}/${encodeURIComponent(asPosix(filePath))}/restore`,
         { method: "POST" },
     );
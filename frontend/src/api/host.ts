@@ -0,0 +1,5 @@
+import { apiFetch } from "../lib/api";
+import type { HostCapacity } from "./types";
+
+export const getHostCapacity = () =>
+    apiFetch<HostCapacity>("/host/capacity");
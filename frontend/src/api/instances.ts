@@ -5,6 +5,14 @@ import type {
     ResponseMessage,
     InstanceUpdate,
     InstanceCompose,
+    OperationAccepted,
+    InstanceQueue,
+    BulkRequest,
+    BulkItemResult,
+    BootEntry,
+    HealthSample,
+    PregenCreate,
+    PregenJob,
 } from "./types";
 
 /* -------------------------------------------------------------------------- */
@@ -15,17 +23,45 @@ export const listInstances = () =>
     apiFetch<InstanceInfo[]>("/instances/");
 
 export const startInstance = (name: string) =>
-    apiFetch<ResponseMessage>(`/instances/${name}/start`, {
+    apiFetch<OperationAccepted>(`/instances/${name}/start`, {
         method: "POST",
     });
 
 export const stopInstance = (name: string) =>
-    apiFetch<ResponseMessage>(`/instances/${name}/stop`, {
+    apiFetch<OperationAccepted>(`/instances/${name}/stop`, {
         method: "POST",
     });
 
 export const restartInstance = (name: string) =>
-    apiFetch<ResponseMessage>(`/instances/${name}/restart`, {
+    apiFetch<OperationAccepted>(`/instances/${name}/restart`, {
+        method: "POST",
+    });
+
+export const getInstanceQueue = (name: string) =>
+    apiFetch<InstanceQueue>(`/instances/${name}/queue`);
+
+export const getBootQueue = () =>
+    apiFetch<BootEntry[]>("/instances/boot-queue");
+
+export const getLatestHealth = () =>
+    apiFetch<HealthSample[]>("/instances/health");
+
+export const getHealthHistory = (name: string, since?: string) =>
+    apiFetch<HealthSample[]>(
+        `/instances/${name}/health` + (since ? `?since=${encodeURIComponent(since)}` : ""),
+    );
+
+export const listPregenJobs = (name: string) =>
+    apiFetch<PregenJob[]>(`/instances/${name}/pregen`);
+
+export const createPregenJob = (name: string, body: PregenCreate) =>
+    apiFetch<PregenJob>(`/instances/${name}/pregen`, {
+        method: "POST",
+        json: body,
+    });
+
+export const pregenAction = (name: string, id: string, action: "pause" | "resume" | "cancel") =>
+    apiFetch<PregenJob>(`/instances/${name}/pregen/${id}/${action}`, {
         method: "POST",
     });
 
@@ -35,6 +71,34 @@ export const sendCommand = (name: string, command: string) =>
         json: { command },
     });
 
+/** Runs one action over many instances; `onItem` fires as each one finishes. */
+export async function bulkAction(
+    body: BulkRequest,
+    onItem: (item: BulkItemResult) => void,
+): Promise<void> {
+    const token = (window as any).currentJwt;
+    const res = await fetch(`${import.meta.env.VITE_API_BASE}/instances/bulk`, {
+        method: "POST",
+        headers: {
+            "Content-Type": "application/json",
+            ...(token ? { Authorization: `Bearer ${token}` } : {}),
+        },
+        body: JSON.stringify(body),
+    });
+    if (!res.ok || !res.body) throw new Error(`bulk ${body.action} failed: ${res.status}`);
+
+    const reader = res.body.pipeThrough(new TextDecoderStream()).getReader();
+    let buf = "";
+    for (;;) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buf += value;
+        const lines = buf.split("\n");
+        buf = lines.pop() ?? "";
+        for (const line of lines) if (line) onItem(JSON.parse(line));
+    }
+}
+
 /* -------------------------------------------------------------------------- */
 /*  Compose & properties                                                      */
 /* -------------------------------------------------------------------------- */
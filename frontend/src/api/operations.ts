@@ -0,0 +1,19 @@
+import { apiFetch } from "../lib/api";
+import { buildWsUrl } from "../lib/ws";
+import type { Operation } from "./types";
+
+export const getOperation = (id: string) =>
+    apiFetch<Operation>(`/operations/${id}`);
+
+export const listOperations = (instance?: string) =>
+    apiFetch<Operation[]>(
+        instance ? `/operations/?instance=${encodeURIComponent(instance)}` : "/operations/",
+    );
+
+/** Stream of Operation objects, one JSON message per state change */
+export function openOperations(instance?: string): WebSocket {
+    const path = instance
+        ? `/operations/ws?instance=${encodeURIComponent(instance)}`
+        : "/operations/ws";
+    return new WebSocket(buildWsUrl(path));
+}
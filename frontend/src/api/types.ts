@@ -7,6 +7,20 @@ export type InstanceStatus = 'running' | 'stopped' | 'error';
 export interface InstanceInfo {
     name: string;
     status: InstanceStatus;
+    image?: string | null;
+    memory?: string | null;
+    ports: PortBinding[];
+    tags: string[];
+    boot_priority: number;
+    created_at?: string | null;
+    /** stopped while idle; the next login starts it again */
+    sleeping: boolean;
+    /** live Server List Ping data; null unless running and answering */
+    players_online?: number | null;
+    players_max?: number | null;
+    version?: string | null;
+    motd?: string | null;
+    latency_ms?: number | null;
 }
 
 export interface EnvVar {
@@ -28,6 +42,9 @@ export interface InstanceCompose {
     memory: string;             // e.g. "4G"
     env: EnvVar[];
     ports: PortBinding[];
+    tags?: string[];
+    /** higher boots first when several instances start at once */
+    boot_priority?: number;
 }
 
 /** Body for PUT /instances/{name}/compose */
@@ -36,12 +53,75 @@ export interface InstanceUpdate {
     memory: string;
     env: EnvVar[];
     ports: PortBinding[];
+    /** omitted → tags stay unchanged */
+    tags?: string[];
+    /** omitted → priority stays unchanged */
+    boot_priority?: number;
+}
+
+export interface BootEntry {
+    instance: string;
+    priority: number;
+    state: "waiting" | "booting";
+    enqueued_at: string;
+    started_at: string | null;
 }
 
 export interface ResponseMessage {
     message: string;
 }
 
+/** 202 reply for start/stop/restart/delete; poll or watch the operation */
+export interface OperationAccepted extends ResponseMessage {
+    operation_id: string;
+}
+
+export type BulkAction = "start" | "stop" | "restart" | "backup" | "command";
+
+export interface BulkRequest {
+    action: BulkAction;
+    instances?: string[];
+    tag?: string;
+    command?: string;
+    parallelism?: number;
+}
+
+export interface BulkItemResult {
+    instance: string;
+    action: BulkAction;
+    ok: boolean;
+    operation_id: string | null;
+    output: string | null;
+    error: string | null;
+    elapsed: number;
+}
+
+export interface QueuedOperation {
+    kind: string;
+    key: string | null;
+    operation_id: string | null;
+    running: boolean;
+}
+
+/** GET /instances/{name}/queue – e.g. "waiting for backup" */
+export interface InstanceQueue {
+    depth: number;
+    running: QueuedOperation[];
+    waiting: QueuedOperation[];
+}
+
+export type OperationState = 'pending' | 'running' | 'succeeded' | 'failed';
+
+export interface Operation {
+    id: string;
+    kind: string;
+    instance: string;
+    state: OperationState;
+    error: string | null;
+    created_at: string;
+    finished_at: string | null;
+}
+
 export interface CronSchedule {
   /** crontab string, e.g. "0 3 * * *"  */
   cron: string;
@@ -58,4 +138,70 @@ export interface ScheduledJob {
 export interface TokenResponse {
     token: string;
     user: string;
-}
\ No newline at end of file
+}
+export interface MemoryClaim {
+    instance: string;
+    memory: string;
+    footprint: number;          // bytes: heap + JVM overhead
+    booting: boolean;
+}
+
+/** GET /host/capacity — sizes in bytes; null when the host total is unknown */
+export interface HostCapacity {
+    total: number | null;
+    available: number | null;
+    reserve: number;
+    budget: number | null;
+    committed: number;
+    headroom: number | null;
+    enforced: boolean;
+    instances: MemoryClaim[];
+}
+
+/** One tick-health sample; fields are null when the server could not report them */
+export interface HealthSample {
+    instance: string;
+    at: string;
+    cpu: number | null;
+    mem_mib: number | null;
+    tps: number | null;
+    mspt: number | null;
+    ticks_behind: number | null;
+    players: number | null;
+    players_max: number | null;
+    alerts: string[];
+}
+
+export type PregenShape = "square" | "circle" | "diamond" | "pentagon" | "hexagon" | "star" | "triangle";
+export type PregenState =
+    "pending" | "running" | "throttled" | "paused" | "completed" | "cancelled" | "failed";
+
+/** Body of POST /instances/{name}/pregen */
+export interface PregenCreate {
+    radius: number;             // blocks from the centre
+    shape?: PregenShape;
+    center_x?: number;
+    center_z?: number;
+    world?: string;
+}
+
+/** A world pre-generation job; `reason` says why it waits, is throttled or failed */
+export interface PregenJob {
+    id: string;
+    instance: string;
+    world: string;
+    shape: PregenShape;
+    center_x: number;
+    center_z: number;
+    radius: number;
+    state: PregenState;
+    reason: string | null;
+    progress: number;           // percent
+    chunks: number;
+    rate: number | null;        // chunks per second
+    eta_seconds: number | null;
+    created_at: string;
+    started_at: string | null;
+    updated_at: string;
+    finished_at: string | null;
+}
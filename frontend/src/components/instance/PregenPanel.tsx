@@ -0,0 +1,133 @@
+import { useState } from "react";
+import {
+    usePregenJobs,
+    useCreatePregenJob,
+    usePregenAction,
+} from "../../hooks/usePregen";
+import type { PregenShape } from "../../api/types";
+
+interface Props {
+    instanceName: string;
+}
+
+const SHAPES: PregenShape[] = ["square", "circle", "diamond", "pentagon", "hexagon", "star", "triangle"];
+
+function fmtEta(seconds: number | null) {
+    if (seconds === null) return "—";
+    const h = Math.floor(seconds / 3600);
+    const m = Math.floor((seconds % 3600) / 60);
+    return h ? `${h}h ${m}m` : `${m}m ${seconds % 60}s`;
+}
+
+export default function PregenPanel({ instanceName }: Props) {
+    const { data: jobs } = usePregenJobs(instanceName);
+    const createMut = useCreatePregenJob(instanceName);
+    const actionMut = usePregenAction(instanceName);
+
+    const [radius, setRadius] = useState(2000);
+    const [shape, setShape]   = useState<PregenShape>("square");
+    const [world, setWorld]   = useState("world");
+
+    const current = jobs?.find(j => ["pending", "running", "throttled", "paused"].includes(j.state));
+    const last    = current ?? jobs?.[0];
+
+    return (
+        <div className="space-y-3 text-sm text-gray-300">
+        <p className="uppercase text-xs tracking-wider text-gray-400">World pre-generation</p>
+
+        {last && (
+            <div className="space-y-1">
+            <p className="text-white">
+                {last.world} · {last.shape} · radius {last.radius} around {last.center_x}, {last.center_z}
+                {" — "}<span className="capitalize">{last.state}</span>
+                {last.reason && <span className="text-gray-400"> ({last.reason})</span>}
+            </p>
+            <div className="w-full h-2 bg-gray-700 rounded">
+                <div
+                className="h-2 bg-green-500 rounded"
+                style={{ width: `${Math.min(last.progress, 100)}%` }}
+                />
+            </div>
+            <p>
+                {last.progress.toFixed(2)}% · {last.chunks} chunks
+                {" · "}{last.rate === null ? "—" : `${last.rate.toFixed(1)} chunks/s`}
+                {" · ETA "}{fmtEta(last.eta_seconds)}
+            </p>
+            </div>
+        )}
+
+        {current ? (
+            <div className="flex gap-2">
+            {current.state === "paused" ? (
+                <button
+                onClick={() => actionMut.mutate({ id: current.id, action: "resume" })}
+                disabled={actionMut.isPending}
+                className="px-3 py-1 bg-green-600 rounded hover:bg-green-700 disabled:opacity-50"
+                >
+                Resume
+                </button>
+            ) : (
+                <button
+                onClick={() => actionMut.mutate({ id: current.id, action: "pause" })}
+                disabled={actionMut.isPending}
+                className="px-3 py-1 bg-yellow-600 rounded hover:bg-yellow-700 disabled:opacity-50"
+                >
+                Pause
+                </button>
+            )}
+            <button
+                onClick={() => actionMut.mutate({ id: current.id, action: "cancel" })}
+                disabled={actionMut.isPending}
+                className="px-3 py-1 bg-red-600 rounded hover:bg-red-700 disabled:opacity-50"
+            >
+                Cancel
+            </button>
+            </div>
+        ) : (
+            <form
+            className="flex flex-wrap items-end gap-2"
+            onSubmit={e => {
+                e.preventDefault();
+                createMut.mutate({ radius, shape, world });
+            }}
+            >
+            <label className="flex flex-col">
+                World
+                <input
+                value={world}
+                onChange={e => setWorld(e.target.value)}
+                className="px-2 py-1 rounded bg-gray-800 text-white"
+                />
+            </label>
+            <label className="flex flex-col">
+                Radius (blocks)
+                <input
+                type="number"
+                min={16}
+                value={radius}
+                onChange={e => setRadius(Number(e.target.value))}
+                className="w-28 px-2 py-1 rounded bg-gray-800 text-white"
+                />
+            </label>
+            <label className="flex flex-col">
+                Shape
+                <select
+                value={shape}
+                onChange={e => setShape(e.target.value as PregenShape)}
+                className="px-2 py-1 rounded bg-gray-800 text-white"
+                >
+                {SHAPES.map(s => <option key={s} value={s}>{s}</option>)}
+                </select>
+            </label>
+            <button
+                type="submit"
+                disabled={createMut.isPending}
+                className="px-3 py-1 bg-blue-600 rounded hover:bg-blue-700 disabled:opacity-50"
+            >
+                {createMut.isPending ? "Queuing…" : "Pre-generate"}
+            </button>
+            </form>
+        )}
+        </div>
+    );
+}
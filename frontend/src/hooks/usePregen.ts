@@ -0,0 +1,52 @@
+import {
+    useQuery,
+    useMutation,
+    useQueryClient,
+} from "@tanstack/react-query";
+
+import {
+    listPregenJobs,
+    createPregenJob,
+    pregenAction,
+} from "../api/instances";
+import type { PregenCreate, PregenJob } from "../api/types";
+
+const ACTIVE = ["pending", "running", "throttled", "paused"];
+
+/* ---------- helpers ------------------------------------------------ */
+function invalidatePregen(
+    qc: ReturnType<typeof useQueryClient>,
+    instance: string,
+) {
+    qc.invalidateQueries({ queryKey: ["pregen", instance] });
+}
+
+/* ---------- list (polled while a job is active) ------------------- */
+export function usePregenJobs(instance: string) {
+    return useQuery<PregenJob[]>({
+        queryKey: ["pregen", instance],
+        queryFn: () => listPregenJobs(instance),
+        refetchInterval: (query) =>
+            query.state.data?.some(j => ACTIVE.includes(j.state)) ? 5_000 : false,
+    });
+}
+
+/* ---------- create ------------------------------------------------- */
+export function useCreatePregenJob(instance: string) {
+    const qc = useQueryClient();
+    return useMutation<PregenJob, unknown, PregenCreate>({
+        mutationKey: ["createPregen", instance],
+        mutationFn: (body) => createPregenJob(instance, body),
+        onSuccess: () => invalidatePregen(qc, instance),
+    });
+}
+
+/* ---------- pause / resume / cancel -------------------------------- */
+export function usePregenAction(instance: string) {
+    const qc = useQueryClient();
+    return useMutation<PregenJob, unknown, { id: string; action: "pause" | "resume" | "cancel" }>({
+        mutationKey: ["pregenAction", instance],
+        mutationFn: ({ id, action }) => pregenAction(instance, id, action),
+        onSuccess: () => invalidatePregen(qc, instance),
+    });
+}
@@ -7,6 +7,7 @@ import {
 } from "../../hooks/useInstances";
 import LogsPanel  from "../../components/instance/LogPanel";
 import StatsPanel from "../../components/instance/StatsPanel";
+import PregenPanel from "../../components/instance/PregenPanel";
 
 export default function Instance() {
     const { name } = useParams<{ name: string }>();
@@ -83,6 +84,7 @@ export default function Instance() {
         {/* panels */}
         <LogsPanel  instanceName={instance.name} isRunning={isRunning} />
         <StatsPanel instanceName={instance.name} isRunning={isRunning} />
+        <PregenPanel instanceName={instance.name} />
         </div>
     );
 }